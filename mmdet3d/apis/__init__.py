@@ -3,12 +3,14 @@ from .inference import (convert_SyncBN, inference_detector,
                         inference_mono_3d_detector,
                         inference_multi_modality_detector, inference_segmentor,
                         init_model, show_result_meshlab)
-from .test import single_gpu_test
+from .test import (AsyncResultFormatter, ColumnarResults, SpooledResults,
+                   multi_gpu_test, single_gpu_test)
 from .train import init_random_seed, train_model
 
 __all__ = [
-    'inference_detector', 'init_model', 'single_gpu_test',
+    'inference_detector', 'init_model', 'single_gpu_test', 'multi_gpu_test',
     'inference_mono_3d_detector', 'show_result_meshlab', 'convert_SyncBN',
     'train_model', 'inference_multi_modality_detector', 'inference_segmentor',
-    'init_random_seed'
+    'init_random_seed', 'AsyncResultFormatter', 'ColumnarResults',
+    'SpooledResults'
 ]
@@ -1,19 +1,521 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import pickle
+import shutil
+import tempfile
+from collections import deque
+from collections.abc import Sequence
+from multiprocessing import get_context
 from os import path as osp
 
 import mmcv
+import numpy as np
 import torch
+import torch.distributed as dist
 from mmcv.image import tensor2imgs
+from mmcv.runner import get_dist_info
+from torch.utils.data import DataLoader
 
+from mmdet3d.core.bbox import BaseInstance3DBoxes
 from mmdet3d.models import (Base3DDetector, Base3DSegmentor,
                             SingleStageMono3DDetector)
+from mmdet.apis.test import collect_results_cpu, collect_results_gpu
+
+
+# dataset of the workers formatting results
+_format_dataset = None
+
+
+def _init_format_worker(dataset):
+    """Store the dataset in a worker process formatting results."""
+    global _format_dataset
+    _format_dataset = dataset
+
+
+def _format_batch(indices, results):
+    """Format the results of a batch in a worker process."""
+    return [
+        _format_dataset.format_result(idx, result)
+        for idx, result in zip(indices, results)
+    ]
+
+
+class AsyncResultFormatter(object):
+    """Format testing results in background processes during inference.
+
+    The results of each batch are sent to a process pool which converts them
+    with ``dataset.format_result``, and the formatted results are appended to
+    a temporary file in the order of submission. Neither the raw results nor
+    the formatted results of the whole split are kept in memory, and
+    :meth:`finish` returns a :obj:`SpooledResults` which reads them back from
+    the file one by one.
+
+    The workers are started with the ``spawn`` method, as forking a process
+    which has initialized CUDA or the distributed backend is not safe.
+
+    Args:
+        dataset (:obj:`Dataset`): Dataset implementing
+            ``format_result(idx, result)``.
+        nproc (int, optional): Number of worker processes. Default: 4.
+        max_pending (int, optional): Maximum number of batches being
+            formatted, submitting more batches waits for the oldest one.
+            Default: 16.
+        tmpdir (str, optional): Directory of the temporary file.
+            Default: None.
+    """
+
+    def __init__(self, dataset, nproc=4, max_pending=16, tmpdir=None):
+        assert hasattr(dataset, 'format_result'), \
+            f'{type(dataset).__name__} cannot format results sample by sample'
+        self.max_pending = max_pending
+        self._pool = get_context('spawn').Pool(
+            nproc, initializer=_init_format_worker, initargs=(dataset, ))
+        self._pending = deque()
+        self._file = tempfile.TemporaryFile(dir=tmpdir)
+        self._offsets = []
+
+    def submit(self, indices, results):
+        """Format the results of a batch asynchronously.
+
+        Args:
+            indices (list[int]): Dataset indices of the batch.
+            results (list[dict]): Results of the batch.
+        """
+        assert len(indices) == len(results)
+        self._pending.append(
+            self._pool.apply_async(_format_batch, (indices, results)))
+        while len(self._pending) > self.max_pending:
+            self._write(self._pending.popleft().get())
+
+    def _write(self, formatted):
+        """Append formatted results to the temporary file."""
+        for result in formatted:
+            self._offsets.append(self._file.tell())
+            pickle.dump(result, self._file, pickle.HIGHEST_PROTOCOL)
+
+    def finish(self):
+        """Wait for all the batches to be formatted.
+
+        Returns:
+            :obj:`SpooledResults`: The formatted results in the order of
+                submission, read from the temporary file when accessed.
+        """
+        while self._pending:
+            self._write(self._pending.popleft().get())
+        self._pool.close()
+        self._pool.join()
+        self._file.flush()
+        return SpooledResults(self._file, self._offsets)
+
+
+class SpooledResults(Sequence):
+    """Lazy sequence over results pickled one after another in a file.
+
+    A result is unpickled only when it is accessed, so iterating over the
+    results of a whole split keeps a single one of them in memory.
+
+    Args:
+        file (file object): Binary file holding the pickled results.
+        offsets (list[int] | np.ndarray): Position of each result in the
+            file.
+    """
+
+    def __init__(self, file, offsets):
+        self.file = file
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('results index out of range')
+        self.file.seek(int(self.offsets[idx]))
+        return pickle.load(self.file)
+
+    def dump(self, prefix):
+        """Save the pickled results and their offsets.
+
+        Args:
+            prefix (str): Prefix of the saved files.
+        """
+        self.file.seek(0)
+        with open(f'{prefix}_results.pkl', 'wb') as f:
+            shutil.copyfileobj(self.file, f)
+        np.save(f'{prefix}_offsets.npy', np.asarray(self.offsets, np.int64))
+
+    @classmethod
+    def load(cls, prefix):
+        """Open the results saved by :meth:`dump`.
+
+        Args:
+            prefix (str): Prefix of the saved files.
+
+        Returns:
+            :obj:`SpooledResults`: The loaded results.
+        """
+        return cls(
+            open(f'{prefix}_results.pkl', 'rb'),
+            np.load(f'{prefix}_offsets.npy'))
+
+
+class ColumnarResults(object):
+    """Testing results stored as flat columns with per-sample offsets.
+
+    Every leaf of the result dicts (3D boxes, tensors or arrays whose first
+    dimension is the number of predictions) is concatenated over the samples
+    into one array, so that the results of a whole split are a handful of
+    arrays instead of millions of small Python objects. Nested result dicts
+    like ``dict(pts_bbox=dict(boxes_3d=..., ...))`` are supported.
+    """
+
+    def __init__(self):
+        self.keys = None
+        self.meta = dict()
+        self.columns = dict()
+        self.offsets = dict()
+        self._chunks = None
+        self._lengths = None
+
+    @staticmethod
+    def _flatten(result, prefix=''):
+        """Yield the flattened key and the value of the leaves of a result."""
+        for key, value in result.items():
+            if isinstance(value, dict):
+                yield from ColumnarResults._flatten(value, f'{prefix}{key}/')
+            else:
+                yield prefix + key, value
+
+    @staticmethod
+    def is_packable(result):
+        """Whether a result can be stored in columns.
+
+        Args:
+            result (dict): Testing result of a sample.
+
+        Returns:
+            bool: Whether all the leaves of the result are 3D boxes, tensors
+                or arrays with at least one dimension.
+        """
+        if not isinstance(result, dict):
+            return False
+        for _, value in ColumnarResults._flatten(result):
+            if isinstance(value, BaseInstance3DBoxes):
+                continue
+            if not isinstance(value, (torch.Tensor, np.ndarray)) or \
+                    value.ndim == 0:
+                return False
+        return True
+
+    def can_append(self, result):
+        """Whether a result can be appended to the stored results.
+
+        Args:
+            result (dict): Testing result of a sample.
+
+        Returns:
+            bool: Whether the result can be stored in columns with the same
+                keys as the stored results.
+        """
+        if not self.is_packable(result):
+            return False
+        return self.keys is None or \
+            [key for key, _ in self._flatten(result)] == self.keys
+
+    def __len__(self):
+        if self._lengths is not None:
+            return len(next(iter(self._lengths.values()), []))
+        return len(next(iter(self.offsets.values()), [0])) - 1
+
+    def append(self, result):
+        """Append the result of a sample.
+
+        Args:
+            result (dict): Testing result of a sample.
+        """
+        leaves = list(self._flatten(result))
+        if self.keys is None:
+            self.keys = [key for key, _ in leaves]
+            self._chunks = {key: [] for key in self.keys}
+            self._lengths = {key: [] for key in self.keys}
+        assert [key for key, _ in leaves] == self.keys, \
+            'all the results should have the same keys'
+        for key, value in leaves:
+            if isinstance(value, BaseInstance3DBoxes):
+                self.meta[key] = (type(value), value.box_dim, value.with_yaw)
+                value = value.tensor
+            if isinstance(value, torch.Tensor):
+                self.meta.setdefault(key, torch.Tensor)
+                value = value.detach().cpu().numpy()
+            else:
+                self.meta.setdefault(key, np.ndarray)
+            self._chunks[key].append(value)
+            self._lengths[key].append(len(value))
+
+    def _pack(self):
+        """Concatenate the appended results into columns."""
+        if self._chunks is None:
+            return
+        for key in self.keys:
+            self.columns[key] = np.concatenate(self._chunks[key])
+            self.offsets[key] = np.concatenate(
+                [[0], np.cumsum(self._lengths[key])]).astype(np.int64)
+        self._chunks = self._lengths = None
+
+    def __getitem__(self, idx):
+        """Rebuild the result of a sample from the columns.
+
+        Args:
+            idx (int): Index of the sample.
+
+        Returns:
+            dict: Testing result of the sample.
+        """
+        self._pack()
+        result = dict()
+        for key in self.keys:
+            offsets = self.offsets[key]
+            value = np.array(self.columns[key][offsets[idx]:offsets[idx + 1]])
+            meta = self.meta[key]
+            if meta is not np.ndarray:
+                value = torch.from_numpy(value)
+            if isinstance(meta, tuple):
+                box_type, box_dim, with_yaw = meta
+                value = box_type(value, box_dim=box_dim, with_yaw=with_yaw)
+            *parents, name = key.split('/')
+            node = result
+            for parent in parents:
+                node = node.setdefault(parent, dict())
+            node[name] = value
+        return result
+
+    def dump(self, prefix):
+        """Save the columns as ``.npy`` files.
+
+        Args:
+            prefix (str): Prefix of the saved files.
+        """
+        self._pack()
+        mmcv.dump(
+            dict(keys=self.keys, meta=self.meta, num_samples=len(self)),
+            f'{prefix}_meta.pkl')
+        for i, key in enumerate(self.keys or []):
+            np.save(f'{prefix}_{i}.npy', self.columns[key])
+            np.save(f'{prefix}_{i}_offsets.npy', self.offsets[key])
+
+    @classmethod
+    def load(cls, prefix, mmap=True):
+        """Load the columns saved by :meth:`dump`.
+
+        Args:
+            prefix (str): Prefix of the saved files.
+            mmap (bool, optional): Whether to memory-map the columns instead
+                of reading them. Default: True.
+
+        Returns:
+            :obj:`ColumnarResults`: The loaded results.
+        """
+        info = mmcv.load(f'{prefix}_meta.pkl')
+        results = cls()
+        results.keys = info['keys']
+        results.meta = info['meta']
+        mmap_mode = 'r' if mmap else None
+        for i, key in enumerate(results.keys or []):
+            results.columns[key] = np.load(
+                f'{prefix}_{i}.npy', mmap_mode=mmap_mode)
+            results.offsets[key] = np.load(f'{prefix}_{i}_offsets.npy')
+        return results
+
+
+class InterleavedColumnarResults(Sequence):
+    """Lazy sequence over the columnar results collected from all ranks.
+
+    The distributed sampler assigns the samples to the ranks in turn, so the
+    ``i``-th sample is the ``i // world_size``-th result of rank
+    ``i % world_size``. A sample is rebuilt from the columns only when it is
+    accessed, so the results of the whole split are never held as per-sample
+    objects.
+
+    Args:
+        parts (list[:obj:`ColumnarResults` | :obj:`SpooledResults`]):
+            Results of each rank.
+        size (int): Size of the dataset. The padded samples of the
+            dataloader beyond it are dropped.
+    """
+
+    def __init__(self, parts, size):
+        self.parts = parts
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self.size))]
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError('results index out of range')
+        world_size = len(self.parts)
+        return self.parts[idx % world_size][idx // world_size]
+
+
+def collect_results_columnar(result_part, size, tmpdir=None):
+    """Collect columnar results from all ranks.
+
+    Each rank saves its columns as ``.npy`` files and rank 0 memory-maps
+    them, so no rank pickles per-sample objects. The results are returned as
+    a :obj:`InterleavedColumnarResults` which rebuilds a sample only when it
+    is accessed, in the same order as
+    :func:`mmdet.apis.test.collect_results_cpu`. The formatted results of
+    :obj:`SpooledResults` are collected the same way, rank 0 reading them
+    from the spool file of each rank.
+
+    Args:
+        result_part (:obj:`ColumnarResults` | :obj:`SpooledResults`):
+            Results of this rank.
+        size (int): Size of the dataset.
+        tmpdir (str, optional): Path of directory to save the temporary
+            results. Default: None.
+
+    Returns:
+        :obj:`InterleavedColumnarResults` | None: The ordered results on
+            rank 0, None on the other ranks.
+    """
+    rank, world_size = get_dist_info()
+    # create a tmp dir if it is not specified
+    if tmpdir is None:
+        MAX_LEN = 512
+        # 32 is whitespace
+        dir_tensor = torch.full((MAX_LEN, ),
+                                32,
+                                dtype=torch.uint8,
+                                device='cuda')
+        if rank == 0:
+            mmcv.mkdir_or_exist('.dist_test')
+            tmpdir = tempfile.mkdtemp(dir='.dist_test')
+            tmpdir = torch.tensor(
+                bytearray(tmpdir.encode()), dtype=torch.uint8, device='cuda')
+            dir_tensor[:len(tmpdir)] = tmpdir
+        dist.broadcast(dir_tensor, 0)
+        tmpdir = dir_tensor.cpu().numpy().tobytes().decode().rstrip()
+    else:
+        mmcv.mkdir_or_exist(tmpdir)
+    result_part.dump(osp.join(tmpdir, f'part_{rank}'))
+    dist.barrier()
+    if rank != 0:
+        return None
+    parts = [
+        type(result_part).load(osp.join(tmpdir, f'part_{i}'))
+        for i in range(world_size)
+    ]
+    # the memory-mapped and opened files stay readable after being unlinked
+    shutil.rmtree(tmpdir)
+    return InterleavedColumnarResults(parts, size)
+
+
+def _append_results(results, batch_results, columnar):
+    """Append the results of a batch, in columns as long as possible.
+
+    Args:
+        results (list[dict] | :obj:`ColumnarResults`): Results so far.
+        batch_results (list[dict]): Results of the batch.
+        columnar (bool): Whether to store the results in columns.
+
+    Returns:
+        list[dict] | :obj:`ColumnarResults`: The results including the batch.
+            They are turned into a list once a result cannot be stored in
+            columns.
+    """
+    if columnar and isinstance(results, list) and not results:
+        results = ColumnarResults()
+    if isinstance(results, ColumnarResults):
+        for i, result in enumerate(batch_results):
+            if not results.can_append(result):
+                results = [results[j] for j in range(len(results))]
+                results.extend(batch_results[i:])
+                return results
+            results.append(result)
+        return results
+    results.extend(batch_results)
+    return results
+
+
+def _agree_on_columnar(results):
+    """Turn the columnar results into a list unless all ranks kept columns.
+
+    Args:
+        results (list[dict] | :obj:`ColumnarResults`): Results of this rank.
+
+    Returns:
+        list[dict] | :obj:`ColumnarResults`: Results of this rank, in columns
+            only if the results of all the ranks are.
+    """
+    is_columnar = torch.tensor(
+        int(isinstance(results, ColumnarResults)), device='cuda')
+    dist.all_reduce(is_columnar, op=dist.ReduceOp.MIN)
+    if not is_columnar.item() and isinstance(results, ColumnarResults):
+        results = [results[i] for i in range(len(results))]
+    return results
+
+
+def _indexed_batches(data_loader):
+    """Yield the dataset indices and the data of each batch.
+
+    The batch sampler is iterated only once and its batches are loaded by a
+    copy of the data loader, so the indices are those of the loaded data even
+    if the sampler gives a different order on every pass.
+
+    Args:
+        data_loader (:obj:`DataLoader`): Pytorch data loader.
+
+    Yields:
+        tuple[list[int], dict]: Dataset indices and data of a batch.
+    """
+    batches = list(data_loader.batch_sampler)
+    loader_cfg = dict(
+        num_workers=data_loader.num_workers,
+        collate_fn=data_loader.collate_fn,
+        pin_memory=data_loader.pin_memory,
+        worker_init_fn=data_loader.worker_init_fn,
+        timeout=data_loader.timeout)
+    if data_loader.num_workers > 0:
+        loader_cfg.update(
+            prefetch_factor=data_loader.prefetch_factor,
+            persistent_workers=data_loader.persistent_workers)
+    loader = DataLoader(
+        data_loader.dataset, batch_sampler=batches, **loader_cfg)
+    yield from zip(batches, loader)
+
+
+def _results_to_seg_hists(dataset, results, indices):
+    """Replace the predicted semantic masks with their confusion matrices.
+
+    Args:
+        dataset (:obj:`Custom3DSegDataset`): Segmentation dataset.
+        results (list[dict]): Results of a batch.
+        indices (list[int]): Dataset indices of the batch.
+
+    Returns:
+        list[dict]: Confusion matrix of each result under key ``seg_hist``.
+    """
+    return [
+        dict(seg_hist=hist)
+        for hist in dataset.seg_hists(results, indices=indices)
+    ]
 
 
 def single_gpu_test(model,
                     data_loader,
                     show=False,
                     out_dir=None,
-                    show_score_thr=0.3):
+                    show_score_thr=0.3,
+                    stream_seg_eval=False,
+                    formatter=None):
     """Test model with single gpu.
 
     This method tests model with single gpu and gives the 'show' option.
@@ -27,15 +529,29 @@ def single_gpu_test(model,
             Default: True.
         out_dir (str, optional): The path to save visualization results.
             Default: None.
+        show_score_thr (float, optional): Score threshold of the visualized
+            boxes. Default: 0.3.
+        stream_seg_eval (bool, optional): Whether to turn the predicted
+            semantic masks into confusion matrices as soon as a batch is
+            finished, so that the predicted masks are not kept until
+            evaluation. Only for segmentation datasets. Default: False.
+        formatter (:obj:`AsyncResultFormatter`, optional): If given, the
+            results of each batch are formatted by it in the background
+            instead of being kept. Default: None.
 
     Returns:
-        list[dict]: The prediction results.
+        list[dict] | :obj:`SpooledResults`: The prediction results, or the
+            formatted results if ``formatter`` is given.
     """
     model.eval()
     results = []
     dataset = data_loader.dataset
     prog_bar = mmcv.ProgressBar(len(dataset))
-    for i, data in enumerate(data_loader):
+    if stream_seg_eval or formatter is not None:
+        batches = _indexed_batches(data_loader)
+    else:
+        batches = ((None, data) for data in data_loader)
+    for i, (indices, data) in enumerate(batches):
         with torch.no_grad():
             result = model(return_loss=False, rescale=True, **data)
 
@@ -82,9 +598,97 @@ def single_gpu_test(model,
                         show=show,
                         out_file=out_file,
                         score_thr=show_score_thr)
-        results.extend(result)
+        if stream_seg_eval:
+            result = _results_to_seg_hists(dataset, result, indices)
+        if formatter is not None:
+            formatter.submit(indices, result)
+        else:
+            results.extend(result)
 
         batch_size = len(result)
         for _ in range(batch_size):
             prog_bar.update()
+    if formatter is not None:
+        results = formatter.finish()
+    return results
+
+
+def multi_gpu_test(model,
+                   data_loader,
+                   tmpdir=None,
+                   gpu_collect=False,
+                   stream_seg_eval=False,
+                   formatter=None,
+                   columnar=False):
+    """Test model with multiple gpus.
+
+    Same as :func:`mmdet.apis.multi_gpu_test`, except that the predicted
+    semantic masks can be turned into confusion matrices on each rank before
+    the results are collected, and that the results are kept and collected
+    as :obj:`ColumnarResults` under cpu mode when possible.
+
+    Args:
+        model (nn.Module): Model to be tested.
+        data_loader (nn.Dataloader): Pytorch data loader.
+        tmpdir (str, optional): Path of directory to save the temporary
+            results from different gpus under cpu mode. Default: None.
+        gpu_collect (bool, optional): Option to use either gpu or cpu to
+            collect results. Default: False.
+        stream_seg_eval (bool, optional): Whether to turn the predicted
+            semantic masks into confusion matrices as soon as a batch is
+            finished. Only for segmentation datasets. Default: False.
+        formatter (:obj:`AsyncResultFormatter`, optional): If given, the
+            results of each batch are formatted by it in the background
+            and the formatted results are collected lazily under cpu mode.
+            Default: None.
+        columnar (bool, optional): Whether to store the results in columns
+            and collect them through memory-mapped files under cpu mode.
+            If a result of any rank cannot be stored in columns, all the
+            results are collected as usual. Default: False.
+
+    Returns:
+        list[dict] | :obj:`InterleavedColumnarResults`: The prediction
+            results, or the formatted results if ``formatter`` is given.
+    """
+    model.eval()
+    results = []
+    dataset = data_loader.dataset
+    columnar = columnar and not gpu_collect
+    rank, world_size = get_dist_info()
+    if rank == 0:
+        prog_bar = mmcv.ProgressBar(len(dataset))
+    if stream_seg_eval or formatter is not None:
+        batches = _indexed_batches(data_loader)
+    else:
+        batches = ((None, data) for data in data_loader)
+    for i, (indices, data) in enumerate(batches):
+        with torch.no_grad():
+            result = model(return_loss=False, rescale=True, **data)
+        if stream_seg_eval:
+            result = _results_to_seg_hists(dataset, result, indices)
+        if formatter is not None:
+            formatter.submit(indices, result)
+        else:
+            results = _append_results(results, result, columnar)
+
+        if rank == 0:
+            batch_size = len(result)
+            for _ in range(batch_size * world_size):
+                prog_bar.update()
+    if formatter is not None:
+        results = formatter.finish()
+    elif columnar:
+        # all the ranks should collect the results in the same way
+        results = _agree_on_columnar(results)
+
+    # collect results from all ranks
+    if gpu_collect:
+        if isinstance(results, SpooledResults):
+            # the open spool file cannot be pickled
+            results = list(results)
+        results = collect_results_gpu(results, len(dataset))
+    elif isinstance(results, (ColumnarResults, SpooledResults)):
+        results = collect_results_columnar(results, len(dataset), tmpdir)
+    else:
+        results = collect_results_cpu(results, len(dataset), tmpdir)
     return results
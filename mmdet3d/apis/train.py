@@ -11,6 +11,7 @@ from mmcv.runner import (HOOKS, DistSamplerSeedHook, EpochBasedRunner,
 from mmcv.utils import build_from_cfg
 from torch import distributed as dist
 
+from mmdet3d.core import SetDatasetEpochHook
 from mmdet3d.datasets import build_dataset
 from mmdet3d.utils import find_latest_checkpoint
 from mmdet.core import DistEvalHook as MMDET_DistEvalHook
@@ -281,6 +282,9 @@ def train_detector(model,
     if distributed:
         if isinstance(runner, EpochBasedRunner):
             runner.register_hook(DistSamplerSeedHook())
+    if isinstance(runner, EpochBasedRunner):
+        # resample datasets such as CBGSDataset at the start of every epoch
+        runner.register_hook(SetDatasetEpochHook())
 
     # register eval hooks
     if validate:
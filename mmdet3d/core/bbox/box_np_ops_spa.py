@@ -166,7 +166,7 @@ def center_to_corner_box2d(centers, dims, angles=None, origin=0.5):
     return corners
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def depth_to_points(depth, trunc_pixel):
     """Convert depth map to points.
 
@@ -282,7 +282,7 @@ def box_center_to_corner_3d(centers, dims, angles):
     return corner_box
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def box2d_to_corner_jit(boxes):
     """Convert box2d to corner.
 
@@ -313,7 +313,7 @@ def box2d_to_corner_jit(boxes):
     return box_corners
 
 
-@numba.njit
+@numba.njit(cache=True)
 def corner_to_standup_nd_jit(boxes_corner):
     """Convert boxes_corner to aligned (min-max) boxes.
 
@@ -334,7 +334,7 @@ def corner_to_standup_nd_jit(boxes_corner):
     return result
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def corner_to_surfaces_3d_jit(corners):
     """Convert 3d box corners from corner function above to surfaces that
     normal vectors all direct to internal.
@@ -561,7 +561,7 @@ def rbbox2d_to_near_bbox(rbboxes):
     return bboxes
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def iou_jit(boxes, query_boxes, mode='iou', eps=0.0):
     """Calculate box iou. Note that jit version runs ~10x faster than the
     box_overlaps function in mmdet3d.core.evaluation.
@@ -662,6 +662,55 @@ def remove_outside_points(points, rect, Trv2c, P2, image_shape):
     points = points[indices.reshape([-1])]
     return points
 
+
+def points_in_frusta_mask(points,
+                          rect,
+                          Trv2c,
+                          P_list,
+                          image_shapes,
+                          near_clip=0.001,
+                          far_clip=100):
+    """Check whether points fall inside the union of several camera frusta.
+
+    All points are projected into all cameras with a single batched matmul,
+    instead of building a frustum and running a points-in-convex-polygon
+    test per camera as :func:`remove_outside_points` does.
+
+    Args:
+        points (np.ndarray, shape=[N, 3+dims]): Total points.
+        rect (np.ndarray, shape=[4, 4]): Matrix to project points in
+            specific camera coordinate (e.g. CAM2) to CAM0.
+        Trv2c (np.ndarray, shape=[4, 4]): Matrix to project points in
+            lidar coordinate to camera coordinate.
+        P_list (list[np.ndarray]): Projection matrices of the cameras,
+            each of shape [4, 4] or [3, 4].
+        image_shapes (list[list[int]]): Shape (h, w) of each camera image.
+        near_clip (float, optional): Nearest depth of the frusta.
+            Defaults to 0.001.
+        far_clip (float, optional): Farthest depth of the frusta.
+            Defaults to 100.
+
+    Returns:
+        np.ndarray, shape=[N]: Whether each point is seen by any camera.
+    """
+    num_cams = len(P_list)
+    lidar2img = np.zeros((num_cams, 3, 4), dtype=np.float64)
+    for i, P in enumerate(P_list):
+        lidar2img[i] = (P[:3] @ rect @ Trv2c)[:3]
+    image_shapes = np.asarray(image_shapes, dtype=np.float64).reshape(-1, 2)
+    # [num_cams, 3, 3] @ [3, N] + [num_cams, 3, 1] -> [num_cams, 3, N]
+    pts_img = lidar2img[:, :, :3] @ points[:, :3].T.astype(np.float64)
+    pts_img += lidar2img[:, :, 3:]
+    depth = pts_img[:, 2]
+    valid = (depth > near_clip) & (depth < far_clip)
+    depth = np.where(valid, depth, 1.0)
+    u = pts_img[:, 0] / depth
+    v = pts_img[:, 1] / depth
+    valid &= (u >= 0) & (u < image_shapes[:, 1:2])
+    valid &= (v >= 0) & (v < image_shapes[:, 0:1])
+    return valid.any(axis=0)
+
+
 def remove_outside_points_0220(points, rect, Trv2c, P, Tr, image_shape):
     """Remove points which are outside of image.
 
@@ -748,7 +797,7 @@ def surface_equ_3d(polygon_surfaces):
     return normal_vec, -d
 
 
-@numba.njit
+@numba.njit(cache=True)
 def _points_in_convex_polygon_3d_jit(points, polygon_surfaces, normal_vec, d,
                                      num_surfaces):
     """
@@ -815,7 +864,7 @@ def points_in_convex_polygon_3d_jit(points,
                                             normal_vec, d, num_surfaces)
 
 
-@numba.njit
+@numba.njit(cache=True)
 def points_in_convex_polygon_jit(points, polygon, clockwise=False):
     """Check points is in 2d convex polygons. True when point in polygon.
 
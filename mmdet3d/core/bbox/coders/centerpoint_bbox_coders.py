@@ -1,5 +1,8 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import math
+
 import torch
+from torch.nn import functional as F
 
 from mmdet.core.bbox import BaseBBoxCoder
 from mmdet.core.bbox.builder import BBOX_CODERS
@@ -19,6 +22,16 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
         score_threshold (float, optional): Threshold to filter boxes
             based on score. Default: None.
         code_size (int, optional): Code size of bboxes. Default: 9
+        sparse_decode (bool, optional): Whether to only decode the peaks of
+            the heatmap whose scores are above ``score_threshold``, instead
+            of the top ``max_num`` cells of the dense heatmap. The heatmap
+            given to :meth:`decode` should be the logits, as only the peaks
+            go through the sigmoid. Default: False.
+        peak_kernel (int, optional): Size of the window in which a peak has
+            the max score, only used by sparse decoding. Default: 3.
+        mask_empty_cells (bool, optional): Whether to only decode the cells
+            containing points in sparse decoding. The points need to be
+            given to :meth:`decode`. Default: False.
     """
 
     def __init__(self,
@@ -28,7 +41,10 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
                  post_center_range=None,
                  max_num=100,
                  score_threshold=None,
-                 code_size=9):
+                 code_size=9,
+                 sparse_decode=False,
+                 peak_kernel=3,
+                 mask_empty_cells=False):
 
         self.pc_range = pc_range
         self.out_size_factor = out_size_factor
@@ -37,6 +53,10 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
         self.max_num = max_num
         self.score_threshold = score_threshold
         self.code_size = code_size
+        assert peak_kernel % 2 == 1
+        self.sparse_decode = sparse_decode
+        self.peak_kernel = peak_kernel
+        self.mask_empty_cells = mask_empty_cells
 
     def _gather_feat(self, feats, inds, feat_masks=None):
         """Given feats and indexes, returns the gathered feats.
@@ -111,6 +131,173 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
         feat = self._gather_feat(feat, ind)
         return feat
 
+    def get_occupancy(self, points, height, width):
+        """Get the cells of the heatmap containing points.
+
+        Args:
+            points (list[torch.Tensor]): Points of each sample.
+            height (int): Height of the heatmap.
+            width (int): Width of the heatmap.
+
+        Returns:
+            torch.Tensor: Whether each cell contains points, with the shape
+                of [B, H, W].
+        """
+        occupancy = points[0].new_zeros((len(points), height * width),
+                                        dtype=torch.bool)
+        cell_x = self.out_size_factor * self.voxel_size[0]
+        cell_y = self.out_size_factor * self.voxel_size[1]
+        for i, pts in enumerate(points):
+            xs = torch.floor((pts[:, 0] - self.pc_range[0]) / cell_x).long()
+            ys = torch.floor((pts[:, 1] - self.pc_range[1]) / cell_y).long()
+            valid = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+            occupancy[i, ys[valid] * width + xs[valid]] = True
+        return occupancy.view(len(points), height, width)
+
+    def _find_peaks(self, heat, occupancy=None):
+        """Find the peaks of the heatmap above the score threshold.
+
+        The cells above the threshold are compared with their neighbors,
+        which is the same as comparing them with the max-pooled heatmap.
+        The whole heatmap is only max-pooled when so many cells are above
+        the threshold that it is cheaper.
+
+        Args:
+            heat (torch.Tensor): Logits of heatmap with the shape of
+                [B, N, H, W].
+            occupancy (torch.Tensor, optional): Cells to decode with the
+                shape of [B, H, W]. Default: None.
+
+        Returns:
+            tuple[torch.Tensor]: Batch indexes, classes, y coords, x coords
+                and logits of the peaks.
+        """
+        batch, _, height, width = heat.size()
+        # the sigmoid is monotonic, so the logits are thresholded
+        if self.score_threshold:
+            threshold = math.log(self.score_threshold /
+                                 (1 - self.score_threshold))
+            mask = heat > threshold
+        else:
+            mask = torch.ones_like(heat, dtype=torch.bool)
+        if occupancy is not None:
+            mask &= occupancy.view(batch, 1, height, width)
+        batch_inds, clses, ys, xs = torch.nonzero(mask, as_tuple=True)
+        logits = heat[batch_inds, clses, ys, xs]
+
+        radius = self.peak_kernel // 2
+        if logits.numel() * (self.peak_kernel**2 - 1) > heat.numel():
+            heat_max = F.max_pool2d(
+                heat, self.peak_kernel, stride=1, padding=radius)
+            is_peak = logits == heat_max[batch_inds, clses, ys, xs]
+        else:
+            is_peak = torch.ones_like(logits, dtype=torch.bool)
+            for dy in range(-radius, radius + 1):
+                for dx in range(-radius, radius + 1):
+                    if dy == 0 and dx == 0:
+                        continue
+                    neighbor_ys = (ys + dy).clamp(0, height - 1)
+                    neighbor_xs = (xs + dx).clamp(0, width - 1)
+                    # neighbors out of the heatmap are clamped to cells
+                    # inside the window, which keeps the max unchanged
+                    neighbors = heat[batch_inds, clses, neighbor_ys,
+                                     neighbor_xs]
+                    is_peak &= logits >= neighbors
+        return (batch_inds[is_peak], clses[is_peak], ys[is_peak], xs[is_peak],
+                logits[is_peak])
+
+    def _decode_boxes(self, xs, ys, rot_sine, rot_cosine, hei, dim, vel):
+        """Decode the boxes of the gathered predictions.
+
+        Args:
+            xs (torch.Tensor): X coords in the heatmap, shape [..., 1].
+            ys (torch.Tensor): Y coords in the heatmap, shape [..., 1].
+            rot_sine (torch.Tensor): Sine of rotation, shape [..., 1].
+            rot_cosine (torch.Tensor): Cosine of rotation, shape [..., 1].
+            hei (torch.Tensor): Height of the boxes, shape [..., 1].
+            dim (torch.Tensor): Dim of the boxes, shape [..., 3].
+            vel (torch.Tensor): Velocity, shape [..., 2], or None.
+
+        Returns:
+            torch.Tensor: Decoded boxes.
+        """
+        rot = torch.atan2(rot_sine, rot_cosine)
+        xs = xs * self.out_size_factor * self.voxel_size[0] + self.pc_range[0]
+        ys = ys * self.out_size_factor * self.voxel_size[1] + self.pc_range[1]
+        if vel is None:  # KITTI FORMAT
+            return torch.cat([xs, ys, hei, dim, rot], dim=-1)
+        # exist velocity, nuscene format
+        return torch.cat([xs, ys, hei, dim, rot, vel], dim=-1)
+
+    def _decode_sparse(self,
+                       heat,
+                       rot_sine,
+                       rot_cosine,
+                       hei,
+                       dim,
+                       vel,
+                       reg=None,
+                       points=None):
+        """Decode bboxes at the peaks of the heatmap.
+
+        Args:
+            heat (torch.Tensor): Logits of heatmap with the shape of
+                [B, N, H, W].
+            rot_sine, rot_cosine, hei, dim, vel, reg (torch.Tensor): Same
+                as :meth:`decode`.
+            points (list[torch.Tensor], optional): Points of each sample to
+                find the empty cells. Default: None.
+
+        Returns:
+            list[dict]: Decoded boxes.
+        """
+        batch, _, height, width = heat.size()
+        occupancy = None
+        if self.mask_empty_cells and points is not None:
+            occupancy = self.get_occupancy(points, height, width)
+        batch_inds, clses, ys, xs, logits = self._find_peaks(heat, occupancy)
+        if self.post_center_range is not None:
+            post_center_range = torch.as_tensor(
+                self.post_center_range, device=heat.device)
+
+        predictions_dicts = []
+        for i in range(batch):
+            inds = torch.nonzero(batch_inds == i, as_tuple=True)[0]
+            # keep the peaks in descending order of score as the top-k
+            _, topk = logits[inds].topk(min(self.max_num, inds.numel()))
+            inds = inds[topk]
+            sample_ys, sample_xs = ys[inds], xs[inds]
+
+            def gather(feat):
+                return feat[i][:, sample_ys, sample_xs].t()
+
+            if reg is not None:
+                sample_reg = gather(reg)
+                box_xs = sample_xs.float().view(-1, 1) + sample_reg[:, 0:1]
+                box_ys = sample_ys.float().view(-1, 1) + sample_reg[:, 1:2]
+            else:
+                box_xs = sample_xs.float().view(-1, 1) + 0.5
+                box_ys = sample_ys.float().view(-1, 1) + 0.5
+            sample_vel = None if vel is None else gather(vel)
+            boxes3d = self._decode_boxes(box_xs, box_ys, gather(rot_sine),
+                                         gather(rot_cosine), gather(hei),
+                                         gather(dim), sample_vel)
+            scores = logits[inds].sigmoid()
+            labels = clses[inds].float()
+
+            if self.post_center_range is not None:
+                mask = (boxes3d[:, :3] >= post_center_range[:3]).all(1)
+                mask &= (boxes3d[:, :3] <= post_center_range[3:]).all(1)
+                boxes3d = boxes3d[mask]
+                scores = scores[mask]
+                labels = labels[mask]
+            predictions_dicts.append({
+                'bboxes': boxes3d,
+                'scores': scores,
+                'labels': labels
+            })
+        return predictions_dicts
+
     def encode(self):
         pass
 
@@ -122,11 +309,14 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
                dim,
                vel,
                reg=None,
-               task_id=-1):
+               task_id=-1,
+               points=None):
         """Decode bboxes.
 
         Args:
             heat (torch.Tensor): Heatmap with the shape of [B, N, W, H].
+                It is the logits rather than the scores when
+                ``sparse_decode`` is True.
             rot_sine (torch.Tensor): Sine of rotation with the shape of
                 [B, 1, W, H].
             rot_cosine (torch.Tensor): Cosine of rotation with the shape of
@@ -139,10 +329,16 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
             reg (torch.Tensor, optional): Regression value of the boxes in
                 2D with the shape of [B, 2, W, H]. Default: None.
             task_id (int, optional): Index of task. Default: -1.
+            points (list[torch.Tensor], optional): Points of each sample,
+                used to skip the empty cells when ``mask_empty_cells`` is
+                True. Default: None.
 
         Returns:
             list[dict]: Decoded boxes.
         """
+        if self.sparse_decode:
+            return self._decode_sparse(heat, rot_sine, rot_cosine, hei, dim,
+                                       vel, reg, points)
         batch, cat, _, _ = heat.size()
 
         scores, inds, clses, ys, xs = self._topk(heat, K=self.max_num)
@@ -162,7 +358,6 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
 
         rot_cosine = self._transpose_and_gather_feat(rot_cosine, inds)
         rot_cosine = rot_cosine.view(batch, self.max_num, 1)
-        rot = torch.atan2(rot_sine, rot_cosine)
 
         # height in the bev
         hei = self._transpose_and_gather_feat(hei, inds)
@@ -176,19 +371,13 @@ class CenterPointBBoxCoder(BaseBBoxCoder):
         clses = clses.view(batch, self.max_num).float()
         scores = scores.view(batch, self.max_num)
 
-        xs = xs.view(
-            batch, self.max_num,
-            1) * self.out_size_factor * self.voxel_size[0] + self.pc_range[0]
-        ys = ys.view(
-            batch, self.max_num,
-            1) * self.out_size_factor * self.voxel_size[1] + self.pc_range[1]
-
-        if vel is None:  # KITTI FORMAT
-            final_box_preds = torch.cat([xs, ys, hei, dim, rot], dim=2)
-        else:  # exist velocity, nuscene format
+        xs = xs.view(batch, self.max_num, 1)
+        ys = ys.view(batch, self.max_num, 1)
+        if vel is not None:
             vel = self._transpose_and_gather_feat(vel, inds)
             vel = vel.view(batch, self.max_num, 2)
-            final_box_preds = torch.cat([xs, ys, hei, dim, rot, vel], dim=2)
+        final_box_preds = self._decode_boxes(xs, ys, rot_sine, rot_cosine, hei,
+                                             dim, vel)
 
         final_scores = scores
         final_preds = clses
@@ -3,9 +3,9 @@ from .indoor_eval import indoor_eval
 from .instance_seg_eval import instance_seg_eval
 from .kitti_utils import kitti_eval, kitti_eval_coco_style
 from .lyft_eval import lyft_eval
-from .seg_eval import seg_eval
+from .seg_eval import seg_eval, seg_eval_hist, seg_hist
 
 __all__ = [
     'kitti_eval_coco_style', 'kitti_eval', 'indoor_eval', 'lyft_eval',
-    'seg_eval', 'instance_seg_eval'
+    'seg_eval', 'seg_eval_hist', 'seg_hist', 'instance_seg_eval'
 ]
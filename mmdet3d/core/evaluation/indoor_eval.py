@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from concurrent import futures
+
 import numpy as np
-import torch
 from mmcv.utils import print_log
 from terminaltables import AsciiTable
 
@@ -53,6 +54,71 @@ def average_precision(recalls, precisions, mode='area'):
     return ap
 
 
+def assign_det_cls(scores, ious_max, gt_inds, num_gts, iou_thr):
+    """Compute precision/recall of the packed detections of a single class.
+
+    Detections are visited by decreasing score and a detection is a true
+    positive if its best matching ground truth has an IoU above the threshold
+    and has not been matched by a detection with a higher score. As the best
+    matching ground truth of a detection does not depend on the previous
+    matches, the greedy assignment reduces to keeping the first detection of
+    each matched ground truth.
+
+    Args:
+        scores (np.ndarray): Scores of the detections in shape (N, ).
+        ious_max (np.ndarray): IoU between each detection and its best
+            matching ground truth in the same scene, -inf if the scene has
+            no ground truth, in shape (N, ).
+        gt_inds (np.ndarray): Index of the best matching ground truth of
+            each detection, unique across scenes, in shape (N, ).
+        num_gts (int): Number of ground truths.
+        iou_thr (list[float]): A list of iou thresholds.
+
+    Return:
+        list[tuple]: Recalls, precisions and average precision for each
+            iou threshold.
+    """
+    # sort by confidence
+    sorted_ind = np.argsort(-scores)
+    ious_max = ious_max[sorted_ind]
+    gt_inds = gt_inds[sorted_ind]
+
+    ret = []
+    for thresh in iou_thr:
+        tp = np.zeros(len(sorted_ind))
+        matched = np.flatnonzero(ious_max > thresh)
+        _, first_matched = np.unique(gt_inds[matched], return_index=True)
+        tp[matched[first_matched]] = 1.
+        # compute precision recall
+        fp = np.cumsum(1. - tp)
+        tp = np.cumsum(tp)
+        recall = tp / float(num_gts)
+        # avoid divide by zero in case the first detection matches a difficult
+        # ground truth
+        precision = tp / np.maximum(tp + fp, np.finfo(np.float64).eps)
+        ap = average_precision(recall, precision)
+        ret.append((recall, precision, ap))
+
+    return ret
+
+
+def _match_boxes(ious, num_gts_before):
+    """Find the best matching ground truth of each detection.
+
+    Args:
+        ious (np.ndarray): IoUs between the detections and the ground truths
+            of a scene in shape (N, M).
+        num_gts_before (int): Number of ground truths in the previous scenes.
+
+    Returns:
+        tuple[np.ndarray]: IoU and global index of the best matching ground
+            truth of each detection.
+    """
+    if ious.shape[1] == 0:
+        return np.full(ious.shape[0], -np.inf), np.full(ious.shape[0], -1)
+    return ious.max(axis=1), ious.argmax(axis=1) + num_gts_before
+
+
 def eval_det_cls(pred, gt, iou_thr=None):
     """Generic functions to compute precision/recall for object detection for a
     single class.
@@ -67,101 +133,87 @@ def eval_det_cls(pred, gt, iou_thr=None):
         tuple (np.ndarray, np.ndarray, float): Recalls, precisions and
             average precision.
     """
-
-    # {img_id: {'bbox': box structure, 'det': matched list}}
-    class_recs = {}
+    # the boxes of each scene are packed and compared in one call
+    gt_boxes = {}
+    gt_offsets = {}
     npos = 0
     for img_id in gt.keys():
-        cur_gt_num = len(gt[img_id])
-        if cur_gt_num != 0:
-            gt_cur = torch.zeros([cur_gt_num, 7], dtype=torch.float32)
-            for i in range(cur_gt_num):
-                gt_cur[i] = gt[img_id][i].tensor
-            bbox = gt[img_id][0].new_box(gt_cur)
+        if len(gt[img_id]) != 0:
+            gt_boxes[img_id] = gt[img_id][0].cat(gt[img_id])
         else:
-            bbox = gt[img_id]
-        det = [[False] * len(bbox) for i in iou_thr]
-        npos += len(bbox)
-        class_recs[img_id] = {'bbox': bbox, 'det': det}
-
-    # construct dets
-    image_ids = []
-    confidence = []
-    ious = []
+            gt_boxes[img_id] = gt[img_id]
+        gt_offsets[img_id] = npos
+        npos += len(gt_boxes[img_id])
+
+    scores = []
+    ious_max = []
+    gt_inds = []
     for img_id in pred.keys():
-        cur_num = len(pred[img_id])
-        if cur_num == 0:
+        if len(pred[img_id]) == 0:
             continue
-        pred_cur = torch.zeros((cur_num, 7), dtype=torch.float32)
-        box_idx = 0
-        for box, score in pred[img_id]:
-            image_ids.append(img_id)
-            confidence.append(score)
-            pred_cur[box_idx] = box.tensor
-            box_idx += 1
-        pred_cur = box.new_box(pred_cur)
-        gt_cur = class_recs[img_id]['bbox']
+        boxes, cur_scores = zip(*pred[img_id])
+        boxes = boxes[0].cat(boxes)
+        gt_cur = gt_boxes[img_id]
         if len(gt_cur) > 0:
             # calculate iou in each image
-            iou_cur = pred_cur.overlaps(pred_cur, gt_cur)
-            for i in range(cur_num):
-                ious.append(iou_cur[i])
+            ious = boxes.overlaps(boxes, gt_cur).numpy()
         else:
-            for i in range(cur_num):
-                ious.append(np.zeros(1))
+            ious = np.zeros((len(boxes), 0))
+        cur_ious_max, cur_gt_inds = _match_boxes(ious, gt_offsets[img_id])
+        scores.append(np.array(cur_scores))
+        ious_max.append(cur_ious_max)
+        gt_inds.append(cur_gt_inds)
+
+    if len(scores) == 0:
+        scores, ious_max, gt_inds = np.zeros(0), np.zeros(0), np.zeros(0)
+    else:
+        scores = np.concatenate(scores)
+        ious_max = np.concatenate(ious_max)
+        gt_inds = np.concatenate(gt_inds)
+    return assign_det_cls(scores, ious_max, gt_inds, npos, iou_thr)
 
-    confidence = np.array(confidence)
 
-    # sort by confidence
-    sorted_ind = np.argsort(-confidence)
-    image_ids = [image_ids[x] for x in sorted_ind]
-    ious = [ious[x] for x in sorted_ind]
-
-    # go down dets and mark TPs and FPs
-    nd = len(image_ids)
-    tp_thr = [np.zeros(nd) for i in iou_thr]
-    fp_thr = [np.zeros(nd) for i in iou_thr]
-    for d in range(nd):
-        R = class_recs[image_ids[d]]
-        iou_max = -np.inf
-        BBGT = R['bbox']
-        cur_iou = ious[d]
-
-        if len(BBGT) > 0:
-            # compute overlaps
-            for j in range(len(BBGT)):
-                # iou = get_iou_main(get_iou_func, (bb, BBGT[j,...]))
-                iou = cur_iou[j]
-                if iou > iou_max:
-                    iou_max = iou
-                    jmax = j
-
-        for iou_idx, thresh in enumerate(iou_thr):
-            if iou_max > thresh:
-                if not R['det'][iou_idx][jmax]:
-                    tp_thr[iou_idx][d] = 1.
-                    R['det'][iou_idx][jmax] = 1
-                else:
-                    fp_thr[iou_idx][d] = 1.
-            else:
-                fp_thr[iou_idx][d] = 1.
+def _eval_classes(eval_func, class_args, nproc=1):
+    """Evaluate the classes, in a process pool if `nproc` > 1.
 
-    ret = []
-    for iou_idx, thresh in enumerate(iou_thr):
-        # compute precision recall
-        fp = np.cumsum(fp_thr[iou_idx])
-        tp = np.cumsum(tp_thr[iou_idx])
-        recall = tp / float(npos)
-        # avoid divide by zero in case the first detection matches a difficult
-        # ground truth
-        precision = tp / np.maximum(tp + fp, np.finfo(np.float64).eps)
-        ap = average_precision(recall, precision)
-        ret.append((recall, precision, ap))
+    Args:
+        eval_func (callable): Function evaluating a single class.
+        class_args (dict): Arguments of `eval_func` of each class.
+        nproc (int): Number of processes. Default: 1.
 
-    return ret
+    Return:
+        dict: Results of each class.
+    """
+    if nproc > 1 and len(class_args) > 1:
+        with futures.ProcessPoolExecutor(nproc) as executor:
+            results = executor.map(eval_func, *zip(*class_args.values()))
+            return dict(zip(class_args.keys(), results))
+    return {
+        classname: eval_func(*args)
+        for classname, args in class_args.items()
+    }
+
+
+def _collect_map_recall(ret_values, labels, ovthresh):
+    """Collect the per-class results into recall, precision and AP dicts."""
+    recall = [{} for i in ovthresh]
+    precision = [{} for i in ovthresh]
+    ap = [{} for i in ovthresh]
+
+    for label in labels:
+        for iou_idx, thresh in enumerate(ovthresh):
+            if label in ret_values:
+                recall[iou_idx][label], precision[iou_idx][label], ap[iou_idx][
+                    label] = ret_values[label][iou_idx]
+            else:
+                recall[iou_idx][label] = np.zeros(1)
+                precision[iou_idx][label] = np.zeros(1)
+                ap[iou_idx][label] = np.zeros(1)
+
+    return recall, precision, ap
 
 
-def eval_map_recall(pred, gt, ovthresh=None):
+def eval_map_recall(pred, gt, ovthresh=None, nproc=1):
     """Evaluate mAP and recall.
 
     Generic functions to compute precision/recall for object detection
@@ -173,31 +225,18 @@ def eval_map_recall(pred, gt, ovthresh=None):
         gt (dict): Information of ground truths, which maps class_id and
             ground truths.
         ovthresh (list[float], optional): iou threshold. Default: None.
+        nproc (int, optional): Number of processes evaluating the classes.
+            Default: 1.
 
     Return:
         tuple[dict]: dict results of recall, AP, and precision for all classes.
     """
-
-    ret_values = {}
-    for classname in gt.keys():
-        if classname in pred:
-            ret_values[classname] = eval_det_cls(pred[classname],
-                                                 gt[classname], ovthresh)
-    recall = [{} for i in ovthresh]
-    precision = [{} for i in ovthresh]
-    ap = [{} for i in ovthresh]
-
-    for label in gt.keys():
-        for iou_idx, thresh in enumerate(ovthresh):
-            if label in pred:
-                recall[iou_idx][label], precision[iou_idx][label], ap[iou_idx][
-                    label] = ret_values[label][iou_idx]
-            else:
-                recall[iou_idx][label] = np.zeros(1)
-                precision[iou_idx][label] = np.zeros(1)
-                ap[iou_idx][label] = np.zeros(1)
-
-    return recall, precision, ap
+    class_args = {
+        classname: (pred[classname], gt[classname], ovthresh)
+        for classname in gt.keys() if classname in pred
+    }
+    ret_values = _eval_classes(eval_det_cls, class_args, nproc)
+    return _collect_map_recall(ret_values, gt.keys(), ovthresh)
 
 
 def indoor_eval(gt_annos,
@@ -206,7 +245,8 @@ def indoor_eval(gt_annos,
                 label2cat,
                 logger=None,
                 box_type_3d=None,
-                box_mode_3d=None):
+                box_mode_3d=None,
+                nproc=1):
     """Indoor Evaluation.
 
     Evaluate the result of the detection.
@@ -224,29 +264,22 @@ def indoor_eval(gt_annos,
         label2cat (dict): Map from label to category.
         logger (logging.Logger | str, optional): The way to print the mAP
             summary. See `mmdet.utils.print_log()` for details. Default: None.
+        nproc (int, optional): Number of processes evaluating the classes.
+            Default: 1.
 
     Return:
         dict[str, float]: Dict of results.
     """
     assert len(dt_annos) == len(gt_annos)
-    pred = {}  # map {class_id: pred}
-    gt = {}  # map {class_id: gt}
+    labels = {}  # ordered set of the evaluated classes
+    num_gts = {}  # map {class_id: number of gt boxes}
+    dets = {}  # map {class_id: (scores, ious_max, gt_inds) of each scene}
     for img_id in range(len(dt_annos)):
         # parse detected annotations
         det_anno = dt_annos[img_id]
-        for i in range(len(det_anno['labels_3d'])):
-            label = det_anno['labels_3d'].numpy()[i]
-            bbox = det_anno['boxes_3d'].convert_to(box_mode_3d)[i]
-            score = det_anno['scores_3d'].numpy()[i]
-            if label not in pred:
-                pred[int(label)] = {}
-            if img_id not in pred[label]:
-                pred[int(label)][img_id] = []
-            if label not in gt:
-                gt[int(label)] = {}
-            if img_id not in gt[label]:
-                gt[int(label)][img_id] = []
-            pred[int(label)][img_id].append((bbox, score))
+        pred_labels = det_anno['labels_3d'].numpy()
+        pred_scores = det_anno['scores_3d'].numpy()
+        pred_boxes = det_anno['boxes_3d'].convert_to(box_mode_3d)
 
         # parse gt annotations
         gt_anno = gt_annos[img_id]
@@ -255,21 +288,36 @@ def indoor_eval(gt_annos,
                 gt_anno['gt_boxes_upright_depth'],
                 box_dim=gt_anno['gt_boxes_upright_depth'].shape[-1],
                 origin=(0.5, 0.5, 0.5)).convert_to(box_mode_3d)
-            labels_3d = gt_anno['class']
+            gt_labels = gt_anno['class']
         else:
             gt_boxes = box_type_3d(np.array([], dtype=np.float32))
-            labels_3d = np.array([], dtype=np.int64)
-
-        for i in range(len(labels_3d)):
-            label = labels_3d[i]
-            bbox = gt_boxes[i]
-            if label not in gt:
-                gt[label] = {}
-            if img_id not in gt[label]:
-                gt[label][img_id] = []
-            gt[label][img_id].append(bbox)
-
-    rec, prec, ap = eval_map_recall(pred, gt, metric)
+            gt_labels = np.array([], dtype=np.int64)
+
+        # calculate the ious of all classes of the scene in one call
+        if len(pred_labels) > 0 and len(gt_labels) > 0:
+            ious = pred_boxes.overlaps(pred_boxes, gt_boxes).numpy()
+        else:
+            ious = np.zeros((len(pred_labels), len(gt_labels)))
+
+        for label in dict.fromkeys(pred_labels.tolist()):
+            pred_mask = pred_labels == label
+            gt_mask = gt_labels == label
+            ious_max, gt_inds = _match_boxes(ious[pred_mask][:, gt_mask],
+                                             num_gts.get(label, 0))
+            dets.setdefault(label, []).append(
+                (pred_scores[pred_mask], ious_max, gt_inds))
+            labels[label] = None
+        for label in gt_labels.tolist():
+            num_gts[label] = num_gts.get(label, 0) + 1
+            labels[label] = None
+
+    class_args = {}
+    for label, cls_dets in dets.items():
+        scores, ious_max, gt_inds = map(np.concatenate, zip(*cls_dets))
+        class_args[label] = (scores, ious_max, gt_inds, num_gts.get(label, 0),
+                             metric)
+    ret_values = _eval_classes(assign_det_cls, class_args, nproc)
+    rec, prec, ap = _collect_map_recall(ret_values, labels.keys(), metric)
     ret_dict = dict()
     header = ['classes']
     table_columns = [[label2cat[label]
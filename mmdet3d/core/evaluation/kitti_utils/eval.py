@@ -6,7 +6,7 @@ import numba
 import numpy as np
 
 
-@numba.jit
+@numba.jit(cache=True)
 def get_thresholds(scores: np.ndarray, num_gt, num_sample_pts=41):
     scores.sort()
     scores = scores[::-1]
@@ -82,7 +82,7 @@ def clean_data(gt_anno, dt_anno, current_class, difficulty):
     return num_valid_gt, ignored_gt, ignored_dt, dc_bboxes
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def image_box_overlap(boxes, query_boxes, criterion=-1):
     N = boxes.shape[0]
     K = query_boxes.shape[0]
@@ -120,7 +120,7 @@ def bev_box_overlap(boxes, qboxes, criterion=-1):
     return riou
 
 
-@numba.jit(nopython=True, parallel=True)
+@numba.jit(nopython=True, parallel=True, cache=True)
 def d3_box_overlap_kernel(boxes, qboxes, rinc, criterion=-1):
     # ONLY support overlap in CAMERA, not lidar.
     # TODO: change to use prange for parallel mode, should check the difference
@@ -160,7 +160,7 @@ def d3_box_overlap(boxes, qboxes, criterion=-1):
     return rinc
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def compute_statistics_jit(overlaps,
                            gt_datas,
                            dt_datas,
@@ -290,7 +290,7 @@ def get_split_parts(num, num_part):
         return [same_part] * num_part + [remain_num]
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def fused_compute_statistics(overlaps,
                              pr,
                              gt_nums,
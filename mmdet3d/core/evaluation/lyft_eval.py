@@ -1,16 +1,22 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from concurrent import futures
 from os import path as osp
 
 import mmcv
 import numpy as np
-from lyft_dataset_sdk.eval.detection.mAP_evaluation import (Box3D, get_ap,
+from lyft_dataset_sdk.eval.detection.mAP_evaluation import (get_ap,
                                                             get_class_names,
-                                                            get_ious,
-                                                            group_by_key,
-                                                            wrap_in_box)
+                                                            group_by_key)
 from mmcv.utils import print_log
 from terminaltables import AsciiTable
 
+try:
+    # vectorized geometry operations are available since shapely 2.0
+    from shapely import area, intersection, polygons
+except ImportError:
+    from shapely.geometry import Polygon
+    area = intersection = polygons = None
+
 
 def load_lyft_gts(lyft, data_root, eval_split, logger=None):
     """Loads ground truth boxes from database.
@@ -88,7 +94,13 @@ def load_lyft_predictions(res_path):
     return all_preds
 
 
-def lyft_eval(lyft, data_root, res_path, eval_set, output_dir, logger=None):
+def lyft_eval(lyft,
+              data_root,
+              res_path,
+              eval_set,
+              output_dir,
+              logger=None,
+              nproc=4):
     """Evaluation API for Lyft dataset.
 
     Args:
@@ -99,6 +111,8 @@ def lyft_eval(lyft, data_root, res_path, eval_set, output_dir, logger=None):
         output_dir (str): Output directory for output json files.
         logger (logging.Logger | str, optional): Logger used for printing
                 related information during evaluation. Default: None.
+        nproc (int, optional): Number of processes evaluating the classes.
+            Default: 4.
 
     Returns:
         dict[str, float]: The evaluation results.
@@ -112,8 +126,8 @@ def lyft_eval(lyft, data_root, res_path, eval_set, output_dir, logger=None):
 
     iou_thresholds = [0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95]
     metrics = {}
-    average_precisions = \
-        get_classwise_aps(gts, predictions, class_names, iou_thresholds)
+    average_precisions = get_classwise_aps(
+        gts, predictions, class_names, iou_thresholds, nproc=nproc)
     APs_data = [['IOU', 0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95]]
 
     mAPs = np.mean(average_precisions, axis=0)
@@ -140,7 +154,7 @@ def lyft_eval(lyft, data_root, res_path, eval_set, output_dir, logger=None):
     return metrics
 
 
-def get_classwise_aps(gt, predictions, class_names, iou_thresholds):
+def get_classwise_aps(gt, predictions, class_names, iou_thresholds, nproc=1):
     """Returns an array with an average precision per class.
 
     Note: Ground truth and predictions should have the following format.
@@ -176,6 +190,8 @@ def get_classwise_aps(gt, predictions, class_names, iou_thresholds):
         class_names (list[str]): list of the class names.
         iou_thresholds (list[float]): IOU thresholds used to calculate
             TP / FN
+        nproc (int, optional): Number of processes evaluating the classes.
+            Default: 1.
 
     Returns:
         np.ndarray: an array with an average precision per class.
@@ -187,20 +203,162 @@ def get_classwise_aps(gt, predictions, class_names, iou_thresholds):
 
     average_precisions = np.zeros((len(class_names), len(iou_thresholds)))
 
-    for class_id, class_name in enumerate(class_names):
-        if class_name in pred_by_class_name:
-            recalls, precisions, average_precision = get_single_class_aps(
-                gt_by_class_name[class_name], pred_by_class_name[class_name],
-                iou_thresholds)
-            average_precisions[class_id, :] = average_precision
+    class_ids = [
+        class_id for class_id, class_name in enumerate(class_names)
+        if class_name in pred_by_class_name
+    ]
+    class_args = [(gt_by_class_name[class_names[class_id]],
+                   pred_by_class_name[class_names[class_id]], iou_thresholds)
+                  for class_id in class_ids]
+    if nproc > 1 and len(class_args) > 1:
+        with futures.ProcessPoolExecutor(nproc) as executor:
+            ret_values = list(
+                executor.map(get_single_class_aps, *zip(*class_args)))
+    else:
+        ret_values = [get_single_class_aps(*args) for args in class_args]
+    for class_id, (_, _, average_precision) in zip(class_ids, ret_values):
+        average_precisions[class_id, :] = average_precision
 
     return average_precisions
 
 
+def pack_lyft_boxes(boxes):
+    """Pack Lyft-format boxes into arrays.
+
+    Args:
+        boxes (list[dict]): list of dictionaries in the format described in
+            :func:`get_classwise_aps`.
+
+    Returns:
+        dict[str, np.ndarray]: Packed boxes with the following keys.
+
+            - sample_token (np.ndarray): Sample token of each box.
+            - translation (np.ndarray): Box centers in shape (N, 3).
+            - size (np.ndarray): Box sizes (width, length, height) in
+              shape (N, 3).
+            - rotation (np.ndarray): Box rotation quaternions in shape (N, 4).
+            - score (np.ndarray): Box scores, -1 for ground truths, in
+              shape (N, ).
+    """
+    packed = dict(
+        sample_token=np.array([box['sample_token'] for box in boxes]),
+        translation=np.array([box['translation'] for box in boxes],
+                             dtype=np.float64).reshape(-1, 3),
+        size=np.array([box['size'] for box in boxes],
+                      dtype=np.float64).reshape(-1, 3),
+        rotation=np.array([box['rotation'] for box in boxes],
+                          dtype=np.float64).reshape(-1, 4),
+        score=np.array([box.get('score', -1) for box in boxes],
+                       dtype=np.float64))
+    assert np.all(packed['size'] > 0)
+    return packed
+
+
+def get_bev_corners(boxes):
+    """Compute the ground corners of packed boxes like `Box3D` in the SDK.
+
+    Args:
+        boxes (dict[str, np.ndarray]): Boxes packed by
+            :func:`pack_lyft_boxes`.
+
+    Returns:
+        np.ndarray: Ground corners in shape (N, 4, 2).
+    """
+    # normalize the quaternions and take the first row of their rotation
+    # matrices in the same way as pyquaternion
+    q = boxes['rotation']
+    sum_of_squares = np.sum(q * q, axis=1, keepdims=True)
+    q = np.where(
+        np.abs(1.0 - sum_of_squares) < 1e-14, q, q / np.sqrt(sum_of_squares))
+    w, x, y, z = q.T
+    cos_angle = x * x + w * w - z * z - y * y
+    sin_angle = x * y - w * z - z * w + y * x
+
+    center_x, center_y = boxes['translation'][:, :2].T
+    width, length = boxes['size'][:, :2].T
+    length_cos = length / 2 * cos_angle
+    length_sin = length / 2 * sin_angle
+    width_cos = width / 2 * cos_angle
+    width_sin = width / 2 * sin_angle
+    corners_x = np.stack([
+        center_x + length_cos + width_sin, center_x + length_cos - width_sin,
+        center_x - length_cos - width_sin, center_x - length_cos + width_sin
+    ],
+                         axis=1)
+    corners_y = np.stack([
+        center_y + length_sin - width_cos, center_y + length_sin + width_cos,
+        center_y - length_sin + width_cos, center_y - length_sin - width_cos
+    ],
+                         axis=1)
+    return np.stack([corners_x, corners_y], axis=2)
+
+
+def get_paired_ious(boxes1, corners1, inds1, boxes2, corners2, inds2):
+    """Compute the 3D IoUs between pairs of packed boxes.
+
+    Only pairs whose bounding circles and heights overlap go through the
+    polygon intersection.
+
+    Args:
+        boxes1 (dict[str, np.ndarray]): First boxes packed by
+            :func:`pack_lyft_boxes`.
+        corners1 (np.ndarray): Ground corners of the first boxes.
+        inds1 (np.ndarray): Indices of the first boxes of the pairs.
+        boxes2 (dict[str, np.ndarray]): Second boxes packed by
+            :func:`pack_lyft_boxes`.
+        corners2 (np.ndarray): Ground corners of the second boxes.
+        inds2 (np.ndarray): Indices of the second boxes of the pairs.
+
+    Returns:
+        np.ndarray: IoU of each pair.
+    """
+    center1 = boxes1['translation'][inds1]
+    center2 = boxes2['translation'][inds2]
+    size1 = boxes1['size'][inds1]
+    size2 = boxes2['size'][inds2]
+
+    min_z = np.maximum(center1[:, 2] - size1[:, 2] / 2,
+                       center2[:, 2] - size2[:, 2] / 2)
+    max_z = np.minimum(center1[:, 2] + size1[:, 2] / 2,
+                       center2[:, 2] + size2[:, 2] / 2)
+    height_intersection = np.maximum(max_z - min_z, 0)
+
+    radius1 = np.linalg.norm(size1[:, :2], axis=1) / 2
+    radius2 = np.linalg.norm(size2[:, :2], axis=1) / 2
+    center_dist = np.linalg.norm(center1[:, :2] - center2[:, :2], axis=1)
+    overlap = np.flatnonzero((height_intersection > 0)
+                             & (center_dist <= radius1 + radius2))
+
+    area_intersection = np.zeros(len(inds1))
+    if len(overlap) > 0:
+        ground1 = corners1[inds1[overlap]]
+        ground2 = corners2[inds2[overlap]]
+        if polygons is not None:
+            area_intersection[overlap] = area(
+                intersection(polygons(ground1), polygons(ground2)))
+        else:
+            area_intersection[overlap] = [
+                Polygon(g1).intersection(Polygon(g2)).area
+                for g1, g2 in zip(ground1, ground2)
+            ]
+
+    intersection_volume = height_intersection * area_intersection
+    union = np.prod(size1, axis=1) + np.prod(size2, axis=1) - \
+        intersection_volume
+    return np.clip(intersection_volume / union, 0, 1)
+
+
 def get_single_class_aps(gt, predictions, iou_thresholds):
     """Compute recall and precision for all iou thresholds. Adapted from
     LyftDatasetDevkit.
 
+    The boxes are packed into arrays and the IoUs between the predictions
+    and the ground truths of the same sample are computed in one batch. As
+    the best matching ground truth of a prediction does not depend on the
+    previous matches, a prediction is a true positive if it is the first
+    prediction, by decreasing score, whose best match is a given ground
+    truth with an IoU above the threshold.
+
     Args:
         gt (list[dict]): list of dictionaries in the format described above.
         predictions (list[dict]): list of dictionaries in the format
@@ -213,55 +371,59 @@ def get_single_class_aps(gt, predictions, iou_thresholds):
             for each class.
     """
     num_gts = len(gt)
-    image_gts = group_by_key(gt, 'sample_token')
-    image_gts = wrap_in_box(image_gts)
-
-    sample_gt_checked = {
-        sample_token: np.zeros((len(boxes), len(iou_thresholds)))
-        for sample_token, boxes in image_gts.items()
-    }
-
-    predictions = sorted(predictions, key=lambda x: x['score'], reverse=True)
-
-    # go down dets and mark TPs and FPs
-    num_predictions = len(predictions)
+    gt_boxes = pack_lyft_boxes(gt)
+    pred_boxes = pack_lyft_boxes(predictions)
+
+    # map the sample tokens to the indices of the samples with ground truths
+    sample_inds = {}
+    gt_samples = np.array([
+        sample_inds.setdefault(token, len(sample_inds))
+        for token in gt_boxes['sample_token']
+    ],
+                          dtype=np.int64)
+    pred_samples = np.array(
+        [sample_inds.get(token, -1) for token in pred_boxes['sample_token']],
+        dtype=np.int64)
+
+    # go down dets by decreasing score
+    order = np.argsort(-pred_boxes['score'], kind='stable')
+    pred_samples = pred_samples[order]
+
+    # pair each prediction with all the ground truths of its sample
+    gt_order = np.argsort(gt_samples, kind='stable')
+    num_sample_gts = np.bincount(gt_samples, minlength=len(sample_inds))
+    sample_starts = np.cumsum(num_sample_gts) - num_sample_gts
+    has_gt = np.flatnonzero(pred_samples >= 0)
+    num_pairs = num_sample_gts[pred_samples[has_gt]]
+    pair_preds = np.repeat(has_gt, num_pairs)
+    pair_starts = np.cumsum(num_pairs) - num_pairs
+    pair_ranks = np.arange(len(pair_preds)) - np.repeat(pair_starts, num_pairs)
+    pair_gts = gt_order[sample_starts[pred_samples[pair_preds]] + pair_ranks]
+
+    ious = get_paired_ious(pred_boxes, get_bev_corners(pred_boxes),
+                           order[pair_preds], gt_boxes,
+                           get_bev_corners(gt_boxes), pair_gts)
+
+    # best matching ground truth of each prediction, the first one in case
+    # of ties
+    max_overlaps = np.full(len(order), -np.inf)
+    jmax = np.full(len(order), -1)
+    if len(ious) > 0:
+        best = np.lexsort((pair_ranks, -ious, pair_preds))
+        first = np.ones(len(best), dtype=bool)
+        first[1:] = pair_preds[best[1:]] != pair_preds[best[:-1]]
+        best = best[first]
+        max_overlaps[pair_preds[best]] = ious[best]
+        jmax[pair_preds[best]] = pair_gts[best]
+
+    # mark TPs and FPs
+    num_predictions = len(order)
     tps = np.zeros((num_predictions, len(iou_thresholds)))
-    fps = np.zeros((num_predictions, len(iou_thresholds)))
-
-    for prediction_index, prediction in enumerate(predictions):
-        predicted_box = Box3D(**prediction)
-
-        sample_token = prediction['sample_token']
-
-        max_overlap = -np.inf
-        jmax = -1
-
-        if sample_token in image_gts:
-            gt_boxes = image_gts[sample_token]
-            # gt_boxes per sample
-            gt_checked = sample_gt_checked[sample_token]
-            # gt flags per sample
-        else:
-            gt_boxes = []
-            gt_checked = None
-
-        if len(gt_boxes) > 0:
-            overlaps = get_ious(gt_boxes, predicted_box)
-
-            max_overlap = np.max(overlaps)
-
-            jmax = np.argmax(overlaps)
-
-        for i, iou_threshold in enumerate(iou_thresholds):
-            if max_overlap > iou_threshold:
-                if gt_checked[jmax, i] == 0:
-                    tps[prediction_index, i] = 1.0
-                    gt_checked[jmax, i] = 1
-                else:
-                    fps[prediction_index, i] = 1.0
-            else:
-                fps[prediction_index, i] = 1.0
-
+    for i, iou_threshold in enumerate(iou_thresholds):
+        matched = np.flatnonzero(max_overlaps > iou_threshold)
+        _, first_matched = np.unique(jmax[matched], return_index=True)
+        tps[matched[first_matched], i] = 1.0
+    fps = 1.0 - tps
     # compute precision recall
     fps = np.cumsum(fps, axis=0)
     tps = np.cumsum(tps, axis=0)
@@ -67,14 +67,39 @@ def get_acc_cls(hist):
     return np.nanmean(np.diag(hist) / hist.sum(axis=1))
 
 
+def seg_hist(gt_labels, seg_preds, num_classes, ignore_index):
+    """Compute the confusion matrix of a single sample.
+
+    Args:
+        gt_labels (torch.Tensor | np.ndarray): Ground truth labels of points
+            with shape of (num_points, ).
+        seg_preds (torch.Tensor | np.ndarray): Prediction labels of points
+            with shape of (num_points, ).
+        num_classes (int): Number of classes.
+        ignore_index (int): Index that will be ignored in evaluation.
+
+    Returns:
+        np.ndarray: Confusion matrix in shape (num_classes, num_classes).
+    """
+    gt_seg = np.asarray(gt_labels).astype(np.int64)
+    pred_seg = np.asarray(seg_preds).astype(np.int64)
+
+    # filter out ignored points
+    gt_seg[gt_seg == ignore_index] = -1
+
+    return fast_hist(pred_seg, gt_seg, num_classes)
+
+
 def seg_eval(gt_labels, seg_preds, label2cat, ignore_index, logger=None):
     """Semantic Segmentation  Evaluation.
 
-    Evaluate the result of the Semantic Segmentation.
+    Evaluate the result of the Semantic Segmentation. The confusion matrix is
+    accumulated sample by sample, so ``gt_labels`` and ``seg_preds`` can be
+    generators that load the masks lazily.
 
     Args:
-        gt_labels (list[torch.Tensor]): Ground truth labels.
-        seg_preds  (list[torch.Tensor]): Predictions.
+        gt_labels (Iterable[torch.Tensor]): Ground truth labels.
+        seg_preds  (Iterable[torch.Tensor]): Predictions.
         label2cat (dict): Map from label to category name.
         ignore_index (int): Index that will be ignored in evaluation.
         logger (logging.Logger | str, optional): The way to print the mAP
@@ -83,25 +108,34 @@ def seg_eval(gt_labels, seg_preds, label2cat, ignore_index, logger=None):
     Returns:
         dict[str, float]: Dict of results.
     """
-    assert len(seg_preds) == len(gt_labels)
+    if hasattr(gt_labels, '__len__') and hasattr(seg_preds, '__len__'):
+        assert len(seg_preds) == len(gt_labels)
     num_classes = len(label2cat)
 
-    hist_list = []
-    for i in range(len(gt_labels)):
-        gt_seg = gt_labels[i].clone().numpy().astype(np.int)
-        pred_seg = seg_preds[i].clone().numpy().astype(np.int)
+    hist = np.zeros((num_classes, num_classes), dtype=np.int64)
+    for gt_seg, pred_seg in zip(gt_labels, seg_preds):
+        hist += seg_hist(gt_seg, pred_seg, num_classes, ignore_index)
 
-        # filter out ignored points
-        pred_seg[gt_seg == ignore_index] = -1
-        gt_seg[gt_seg == ignore_index] = -1
+    return seg_eval_hist(hist, label2cat, logger=logger)
 
-        # calculate one instance result
-        hist_list.append(fast_hist(pred_seg, gt_seg, num_classes))
 
-    iou = per_class_iou(sum(hist_list))
+def seg_eval_hist(hist, label2cat, logger=None):
+    """Semantic Segmentation Evaluation from an accumulated confusion matrix.
+
+    Args:
+        hist (np.ndarray): Overall confusion matrix
+            (num_classes, num_classes).
+        label2cat (dict): Map from label to category name.
+        logger (logging.Logger | str, optional): The way to print the mAP
+            summary. See `mmdet.utils.print_log()` for details. Default: None.
+
+    Returns:
+        dict[str, float]: Dict of results.
+    """
+    iou = per_class_iou(hist)
     miou = np.nanmean(iou)
-    acc = get_acc(sum(hist_list))
-    acc_cls = get_acc_cls(sum(hist_list))
+    acc = get_acc(hist)
+    acc_cls = get_acc_cls(hist)
 
     header = ['classes']
     for i in range(len(label2cat)):
@@ -0,0 +1,5 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from .numba_warmup import NumbaWarmupHook, warmup_numba_kernels
+from .set_dataset_epoch import SetDatasetEpochHook
+
+__all__ = ['SetDatasetEpochHook', 'NumbaWarmupHook', 'warmup_numba_kernels']
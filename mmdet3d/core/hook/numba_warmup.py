@@ -0,0 +1,67 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import numpy as np
+from mmcv.runner import HOOKS, Hook
+
+
+def warmup_numba_kernels(dtypes=('float32', 'float64')):
+    """Compile the numba kernels used by the data pipelines.
+
+    The kernels are jitted with ``cache=True``, so they are loaded from the
+    on-disk cache (``__pycache__`` or ``NUMBA_CACHE_DIR``) when it is
+    available and compiled otherwise. Running this in the main process
+    before the dataloader workers are forked means that the workers inherit
+    the compiled kernels instead of compiling them again.
+
+    Args:
+        dtypes (tuple[str], optional): Float types of the points and boxes
+            to compile the kernels for. Default: ('float32', 'float64').
+    """
+    from mmdet3d.core.bbox import box_np_ops
+    from mmdet3d.core.post_processing import circle_nms
+    from mmdet3d.core.voxel.voxel_generator import points_to_voxel
+    from mmdet3d.datasets.pipelines import data_augment_utils
+
+    # the data augmentations draw from the global random state
+    random_state = np.random.get_state()
+    for dtype in dtypes:
+        boxes = np.array([[1., 1., -1., 4., 2., 1.5, 0.3],
+                          [5., 5., -1., 4., 2., 1.5, -0.3]],
+                         dtype=dtype)
+        points = np.random.uniform(0, 8, (64, 4)).astype(dtype)
+        box_np_ops.points_in_rbbox(points, boxes)
+        centers, dims, yaws = boxes[:, :2], boxes[:, 3:5], boxes[:, 6]
+        boxes_bv = box_np_ops.center_to_corner_box2d(centers, dims, yaws)
+        data_augment_utils.box_collision_test(boxes_bv, boxes_bv)
+        data_augment_utils.noise_per_object_v3_(
+            boxes.copy(), points.copy(), num_try=2)
+        for reverse_index in (True, False):
+            points_to_voxel(
+                points,
+                voxel_size=np.array([0.5, 0.5, 4.], dtype=dtype),
+                coors_range=np.array([0, 0, -3, 8, 8, 1], dtype=dtype),
+                max_points=5,
+                reverse_index=reverse_index,
+                max_voxels=100)
+        circle_nms(np.array([[0, 0, 0.9], [0.1, 0, 0.5]], dtype=dtype), 0.5)
+    np.random.set_state(random_state)
+
+
+@HOOKS.register_module()
+class NumbaWarmupHook(Hook):
+    """Compile the numba kernels of the data pipelines before training.
+
+    Without it, every dataloader worker compiles the kernels it uses on its
+    first batches, which may take tens of seconds for the augmentations.
+    The hook is enabled with ``custom_hooks = [dict(type='NumbaWarmupHook')]``.
+
+    Args:
+        dtypes (tuple[str], optional): Float types of the points and boxes
+            to compile the kernels for. Default: ('float32', 'float64').
+    """
+
+    def __init__(self, dtypes=('float32', 'float64')):
+        self.dtypes = dtypes
+
+    def before_run(self, runner):
+        runner.logger.info('Compiling numba kernels of the data pipelines')
+        warmup_numba_kernels(self.dtypes)
@@ -0,0 +1,28 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from mmcv.runner import HOOKS, Hook
+
+
+@HOOKS.register_module()
+class SetDatasetEpochHook(Hook):
+    """Pass the epoch index to the training dataset before each epoch.
+
+    Datasets which resample their content every epoch (e.g.
+    :class:`CBGSDataset`) expose a ``set_epoch`` method. Wrapper datasets
+    are searched through their ``dataset`` / ``datasets`` attributes.
+
+    Note:
+        The dataset is updated in the main process, so the data loader must
+        not use persistent workers.
+    """
+
+    def before_train_epoch(self, runner):
+        self._set_epoch(runner.data_loader.dataset, runner.epoch)
+
+    def _set_epoch(self, dataset, epoch):
+        if hasattr(dataset, 'set_epoch'):
+            dataset.set_epoch(epoch)
+        elif hasattr(dataset, 'datasets'):
+            for d in dataset.datasets:
+                self._set_epoch(d, epoch)
+        elif hasattr(dataset, 'dataset'):
+            self._set_epoch(dataset.dataset, epoch)
@@ -2,13 +2,14 @@
 from mmdet.core.post_processing import (merge_aug_bboxes, merge_aug_masks,
                                         merge_aug_proposals, merge_aug_scores,
                                         multiclass_nms)
-from .box3d_nms import (aligned_3d_nms, box3d_multiclass_nms, circle_nms,
-                        nms_bev, nms_normal_bev)
+from .box3d_nms import (aligned_3d_nms, batched_nms_bev, box3d_multiclass_nms,
+                        circle_nms, nms_bev, nms_normal_bev)
 from .merge_augs import merge_aug_bboxes_3d
+from .nms_cpu import nms_rotated_cpu
 
 __all__ = [
     'multiclass_nms', 'merge_aug_proposals', 'merge_aug_bboxes',
     'merge_aug_scores', 'merge_aug_masks', 'box3d_multiclass_nms',
     'aligned_3d_nms', 'merge_aug_bboxes_3d', 'circle_nms', 'nms_bev',
-    'nms_normal_bev'
+    'nms_normal_bev', 'batched_nms_bev', 'nms_rotated_cpu'
 ]
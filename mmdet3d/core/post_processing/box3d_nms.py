@@ -4,6 +4,8 @@ import numpy as np
 import torch
 from mmcv.ops import nms, nms_rotated
 
+from .nms_cpu import nms_rotated_cpu
+
 
 def box3d_multiclass_nms(mlvl_bboxes,
                          mlvl_bboxes_for_nms,
@@ -44,55 +46,25 @@ def box3d_multiclass_nms(mlvl_bboxes,
     # do multi class nms
     # the fg class id range: [0, num_classes-1]
     num_classes = mlvl_scores.shape[1] - 1
-    bboxes = []
-    scores = []
-    labels = []
-    dir_scores = []
-    attr_scores = []
-    bboxes2d = []
-    for i in range(0, num_classes):
-        # get bboxes and scores of this class
-        cls_inds = mlvl_scores[:, i] > score_thr
-        if not cls_inds.any():
-            continue
-
-        _scores = mlvl_scores[cls_inds, i]
-        _bboxes_for_nms = mlvl_bboxes_for_nms[cls_inds, :]
-
-        if cfg.use_rotate_nms:
-            nms_func = nms_bev
-        else:
-            nms_func = nms_normal_bev
-
-        selected = nms_func(_bboxes_for_nms, _scores, cfg.nms_thr)
-        _mlvl_bboxes = mlvl_bboxes[cls_inds, :]
-        bboxes.append(_mlvl_bboxes[selected])
-        scores.append(_scores[selected])
-        cls_label = mlvl_bboxes.new_full((len(selected), ),
-                                         i,
-                                         dtype=torch.long)
-        labels.append(cls_label)
-
-        if mlvl_dir_scores is not None:
-            _mlvl_dir_scores = mlvl_dir_scores[cls_inds]
-            dir_scores.append(_mlvl_dir_scores[selected])
-        if mlvl_attr_scores is not None:
-            _mlvl_attr_scores = mlvl_attr_scores[cls_inds]
-            attr_scores.append(_mlvl_attr_scores[selected])
-        if mlvl_bboxes2d is not None:
-            _mlvl_bboxes2d = mlvl_bboxes2d[cls_inds]
-            bboxes2d.append(_mlvl_bboxes2d[selected])
-
-    if bboxes:
-        bboxes = torch.cat(bboxes, dim=0)
-        scores = torch.cat(scores, dim=0)
-        labels = torch.cat(labels, dim=0)
+    # indices of the boxes and classes with high scores, sorted by classes
+    cls_inds, box_inds = (mlvl_scores[:, :num_classes] >
+                          score_thr).t().nonzero(as_tuple=True)
+    selected = batched_nms_bev(mlvl_bboxes_for_nms[box_inds],
+                               mlvl_scores[box_inds, cls_inds], cls_inds,
+                               cfg.nms_thr, cfg.use_rotate_nms)
+    box_inds = box_inds[selected]
+    cls_inds = cls_inds[selected]
+
+    if len(selected) > 0:
+        bboxes = mlvl_bboxes[box_inds]
+        scores = mlvl_scores[box_inds, cls_inds]
+        labels = cls_inds
         if mlvl_dir_scores is not None:
-            dir_scores = torch.cat(dir_scores, dim=0)
+            dir_scores = mlvl_dir_scores[box_inds]
         if mlvl_attr_scores is not None:
-            attr_scores = torch.cat(attr_scores, dim=0)
+            attr_scores = mlvl_attr_scores[box_inds]
         if mlvl_bboxes2d is not None:
-            bboxes2d = torch.cat(bboxes2d, dim=0)
+            bboxes2d = mlvl_bboxes2d[box_inds]
         if bboxes.shape[0] > max_num:
             _, inds = scores.sort(descending=True)
             inds = inds[:max_num]
@@ -178,7 +150,7 @@ def aligned_3d_nms(boxes, scores, classes, thresh):
     return indices
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def circle_nms(dets, thresh, post_max_size=83):
     """Circular NMS.
 
@@ -225,6 +197,21 @@ def circle_nms(dets, thresh, post_max_size=83):
     return keep
 
 
+def _xyxyr2xywhr(boxes):
+    """Convert BEV boxes from [x1, y1, x2, y2, ry] to [x, y, w, h, ry].
+
+    Args:
+        boxes (torch.Tensor): Input boxes with the shape of [N, 5].
+
+    Returns:
+        torch.Tensor: Converted boxes with the shape of [N, 5].
+    """
+    return torch.stack(
+        ((boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+         boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1], boxes[:, 4]),
+        dim=-1)
+
+
 # This function duplicates functionality of mmcv.ops.iou_3d.nms_bev
 # from mmcv<=1.5, but using cuda ops from mmcv.ops.nms.nms_rotated.
 # Nms api will be unified in mmdetection3d one day.
@@ -232,7 +219,8 @@ def nms_bev(boxes, scores, thresh, pre_max_size=None, post_max_size=None):
     """NMS function GPU implementation (for BEV boxes). The overlap of two
     boxes for IoU calculation is defined as the exact overlapping area of the
     two boxes. In this function, one can also set ``pre_max_size`` and
-    ``post_max_size``.
+    ``post_max_size``. The boxes on CPU are suppressed by
+    :func:`nms_rotated_cpu`, which keeps the same boxes.
 
     Args:
         boxes (torch.Tensor): Input boxes with the shape of [N, 5]
@@ -256,12 +244,12 @@ def nms_bev(boxes, scores, thresh, pre_max_size=None, post_max_size=None):
 
     # xyxyr -> back to xywhr
     # note: better skip this step before nms_bev call in the future
-    boxes = torch.stack(
-        ((boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
-         boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1], boxes[:, 4]),
-        dim=-1)
+    boxes = _xyxyr2xywhr(boxes)
 
-    keep = nms_rotated(boxes, scores, thresh)[1]
+    if boxes.is_cuda:
+        keep = nms_rotated(boxes, scores, thresh)[1]
+    else:
+        keep = nms_rotated_cpu(boxes, scores, thresh)
     keep = order[keep]
     if post_max_size is not None:
         keep = keep[:post_max_size]
@@ -286,3 +274,51 @@ def nms_normal_bev(boxes, scores, thresh):
     """
     assert boxes.shape[1] == 5, 'Input boxes shape should be [N, 5]'
     return nms(boxes[:, :-1], scores, thresh)[1]
+
+
+def batched_nms_bev(boxes, scores, labels, thresh, use_rotate_nms=True):
+    """Multi-class NMS for BEV boxes.
+
+    The boxes of each class are suppressed separately, and the results are
+    the same as concatenating the results of :func:`nms_bev` or
+    :func:`nms_normal_bev` of each class in the ascending order of labels.
+    The rotated NMS of the boxes on CPU is done for all the classes at once
+    by :func:`nms_rotated_cpu`.
+
+    Args:
+        boxes (torch.Tensor): Input boxes with the shape of [N, 5]
+            ([x1, y1, x2, y2, ry]).
+        scores (torch.Tensor): Scores of boxes with the shape of [N].
+        labels (torch.Tensor): Labels of boxes with the shape of [N].
+        thresh (float): Overlap threshold of NMS.
+        use_rotate_nms (bool, optional): Whether to use the rotated NMS
+            :func:`nms_bev` instead of :func:`nms_normal_bev`.
+            Default: True.
+
+    Returns:
+        torch.Tensor: Indexes after NMS, sorted by labels.
+    """
+    class_inds = [
+        torch.nonzero(labels == label, as_tuple=False).view(-1)
+        for label in torch.unique(labels)
+    ]
+    if not use_rotate_nms or boxes.is_cuda:
+        nms_func = nms_bev if use_rotate_nms else nms_normal_bev
+        keep = [
+            inds[nms_func(boxes[inds], scores[inds], thresh)]
+            for inds in class_inds
+        ]
+        return torch.cat(keep) if keep else labels.new_zeros(
+            (0, ), dtype=torch.long)
+
+    # the boxes of each class are processed in the order of nms_bev
+    orders = []
+    for inds in class_inds:
+        class_scores = scores[inds]
+        order = class_scores.sort(0, descending=True)[1]
+        order = order[class_scores[order].sort(0, descending=True)[1]]
+        orders.append(inds[order])
+    order = torch.cat(orders) if orders else labels.new_zeros(
+        (0, ), dtype=torch.long)
+    return nms_rotated_cpu(
+        _xyxyr2xywhr(boxes), scores, thresh, labels=labels, order=order)
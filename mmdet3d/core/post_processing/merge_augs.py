@@ -1,7 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import torch
 
-from mmdet3d.core.post_processing import nms_bev, nms_normal_bev
+from mmdet3d.core.post_processing import batched_nms_bev
 from ..bbox import bbox3d2result, bbox3d_mapping_back, xywhr2xyxyr
 
 
@@ -49,37 +49,15 @@ def merge_aug_bboxes_3d(aug_results, img_metas, test_cfg):
     aug_scores = torch.cat(recovered_scores, dim=0)
     aug_labels = torch.cat(recovered_labels, dim=0)
 
-    # TODO: use a more elegent way to deal with nms
-    if test_cfg.use_rotate_nms:
-        nms_func = nms_bev
-    else:
-        nms_func = nms_normal_bev
-
-    merged_bboxes = []
-    merged_scores = []
-    merged_labels = []
-
     # Apply multi-class nms when merge bboxes
     if len(aug_labels) == 0:
         return bbox3d2result(aug_bboxes, aug_scores, aug_labels)
 
-    for class_id in range(torch.max(aug_labels).item() + 1):
-        class_inds = (aug_labels == class_id)
-        bboxes_i = aug_bboxes[class_inds]
-        bboxes_nms_i = aug_bboxes_for_nms[class_inds, :]
-        scores_i = aug_scores[class_inds]
-        labels_i = aug_labels[class_inds]
-        if len(bboxes_nms_i) == 0:
-            continue
-        selected = nms_func(bboxes_nms_i, scores_i, test_cfg.nms_thr)
-
-        merged_bboxes.append(bboxes_i[selected, :])
-        merged_scores.append(scores_i[selected])
-        merged_labels.append(labels_i[selected])
-
-    merged_bboxes = merged_bboxes[0].cat(merged_bboxes)
-    merged_scores = torch.cat(merged_scores, dim=0)
-    merged_labels = torch.cat(merged_labels, dim=0)
+    selected = batched_nms_bev(aug_bboxes_for_nms, aug_scores, aug_labels,
+                               test_cfg.nms_thr, test_cfg.use_rotate_nms)
+    merged_bboxes = aug_bboxes[selected]
+    merged_scores = aug_scores[selected]
+    merged_labels = aug_labels[selected]
 
     _, order = merged_scores.sort(0, descending=True)
     num = min(test_cfg.max_num, len(aug_bboxes))
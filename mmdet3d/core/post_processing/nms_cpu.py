@@ -0,0 +1,372 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import numba
+import numpy as np
+import torch
+from mmcv.ops import box_iou_rotated, nms_rotated
+
+
+@numba.jit(nopython=True, cache=True)
+def _set_suppression_bits(rows, cols, num_boxes):
+    """Pack the suppressing pairs into a bitmask.
+
+    Args:
+        rows (np.ndarray): Sorted indices of the suppressing boxes.
+        cols (np.ndarray): Sorted indices of the suppressed boxes.
+        num_boxes (int): Number of boxes.
+
+    Returns:
+        np.ndarray: Bitmask with shape (num_boxes, ceil(num_boxes / 64)),
+            where bit ``j % 64`` of word ``j // 64`` in row ``i`` is set if
+            box ``i`` suppresses box ``j``.
+    """
+    num_words = (num_boxes + 63) // 64
+    mask = np.zeros((num_boxes, num_words), dtype=np.uint64)
+    for k in range(rows.shape[0]):
+        j = cols[k]
+        mask[rows[k], j >> 6] |= np.uint64(1) << np.uint64(j & 63)
+    return mask
+
+
+@numba.jit(nopython=True, cache=True)
+def _greedy_suppress(mask):
+    """Greedily keep the boxes which are not suppressed by a kept box.
+
+    Args:
+        mask (np.ndarray): Bitmask returned by :func:`_set_suppression_bits`.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept boxes.
+    """
+    num_boxes = mask.shape[0]
+    removed = np.zeros(mask.shape[1], dtype=np.uint64)
+    keep = np.empty(num_boxes, dtype=np.int64)
+    num_keep = 0
+    for i in range(num_boxes):
+        if (removed[i >> 6] >> np.uint64(i & 63)) & np.uint64(1):
+            continue
+        keep[num_keep] = i
+        num_keep += 1
+        removed |= mask[i]
+    return keep[:num_keep]
+
+
+def _greedy_nms(rows, cols, num_boxes):
+    """Run the greedy NMS over the suppressing pairs of sorted boxes.
+
+    Args:
+        rows (torch.Tensor): Sorted indices of the suppressing boxes.
+        cols (torch.Tensor): Sorted indices of the suppressed boxes, which
+            are larger than ``rows``.
+        num_boxes (int): Number of boxes.
+
+    Returns:
+        torch.Tensor: Sorted indices of the kept boxes.
+    """
+    mask = _set_suppression_bits(rows.numpy(), cols.numpy(), num_boxes)
+    return torch.from_numpy(_greedy_suppress(mask))
+
+
+def _rotated_corners(boxes):
+    """Get the corners of rotated boxes in the order of the mmcv kernels.
+
+    Args:
+        boxes (torch.Tensor): Rotated boxes with shape (N, 5)
+            ([x, y, w, h, r]).
+
+    Returns:
+        torch.Tensor: Corners with shape (N, 4, 2).
+    """
+    x, y, w, h, angle = boxes.unbind(-1)
+    cos, sin = torch.cos(angle) * 0.5, torch.sin(angle) * 0.5
+    dx0, dy0 = sin * h - cos * w, -cos * h - sin * w
+    dx1, dy1 = -sin * h - cos * w, cos * h - sin * w
+    return torch.stack((torch.stack((x + dx0, y + dy0), -1),
+                        torch.stack((x + dx1, y + dy1), -1),
+                        torch.stack((x - dx0, y - dy0), -1),
+                        torch.stack((x - dx1, y - dy1), -1)), -2)
+
+
+def _points_in_rotated_boxes(points, boxes):
+    """Check whether the points are in the rotated boxes.
+
+    Args:
+        points (torch.Tensor): Points with shape (P, K, 2).
+        boxes (torch.Tensor): Rotated boxes with shape (P, 5).
+
+    Returns:
+        torch.Tensor: Whether each point is in its box, with shape (P, K).
+    """
+    offsets = points - boxes[:, None, :2]
+    cos, sin = torch.cos(boxes[:, 4:5]), torch.sin(boxes[:, 4:5])
+    local_x = offsets[..., 0] * cos + offsets[..., 1] * sin
+    local_y = offsets[..., 1] * cos - offsets[..., 0] * sin
+    return (local_x.abs() <= boxes[:, 2:3] * 0.5) & (
+        local_y.abs() <= boxes[:, 3:4] * 0.5)
+
+
+def rotated_iou_pairs(boxes1, boxes2):
+    """Compute the IoU of pairs of rotated BEV boxes.
+
+    The intersection of each pair is the convex polygon of the corners of
+    one box inside the other box and the intersections of their edges,
+    whose area is computed with the shoelace formula after sorting the
+    vertices by their angles around their centroid. All the pairs are
+    computed in a vectorized way.
+
+    Args:
+        boxes1 (torch.Tensor): Rotated boxes with shape (P, 5)
+            ([x, y, w, h, r]).
+        boxes2 (torch.Tensor): Rotated boxes with shape (P, 5).
+
+    Returns:
+        torch.Tensor: IoU of each pair with shape (P, ).
+    """
+    boxes1 = boxes1.double()
+    boxes2 = boxes2.double()
+    # shift the centers of each pair to the origin for higher precision
+    center = (boxes1[:, :2] + boxes2[:, :2]) * 0.5
+    boxes1 = torch.cat((boxes1[:, :2] - center, boxes1[:, 2:]), dim=1)
+    boxes2 = torch.cat((boxes2[:, :2] - center, boxes2[:, 2:]), dim=1)
+    corners1 = _rotated_corners(boxes1)
+    corners2 = _rotated_corners(boxes2)
+
+    # intersections of the 4 x 4 pairs of edges, (P, 16, 2)
+    starts1 = corners1[:, :, None].expand(-1, 4, 4, 2)
+    starts2 = corners2[:, None].expand(-1, 4, 4, 2)
+    edges1 = (corners1.roll(-1, 1) - corners1)[:, :, None]
+    edges2 = (corners2.roll(-1, 1) - corners2)[:, None]
+    offsets = starts2 - starts1
+    denom = edges1[..., 0] * edges2[..., 1] - edges1[..., 1] * edges2[..., 0]
+    valid_denom = denom.abs() > 1e-14
+    denom = torch.where(valid_denom, denom, torch.ones_like(denom))
+    t1 = (offsets[..., 0] * edges2[..., 1] -
+          offsets[..., 1] * edges2[..., 0]) / denom
+    t2 = (offsets[..., 0] * edges1[..., 1] -
+          offsets[..., 1] * edges1[..., 0]) / denom
+    cross_valid = valid_denom & (t1 >= 0) & (t1 <= 1) & (t2 >= 0) & (t2 <= 1)
+    cross_points = starts1 + t1[..., None] * edges1
+
+    # (P, 24, 2) candidate vertices of the intersection
+    vertices = torch.cat((corners1, corners2, cross_points.flatten(1, 2)), 1)
+    valid = torch.cat((_points_in_rotated_boxes(corners1, boxes2),
+                       _points_in_rotated_boxes(corners2, boxes1),
+                       cross_valid.flatten(1, 2)), 1)
+    num_valid = valid.sum(1)
+    centroid = (vertices * valid[..., None]).sum(1) / num_valid.clamp(
+        min=1)[:, None]
+    rel = vertices - centroid[:, None]
+    angles = torch.atan2(rel[..., 1], rel[..., 0])
+    # the invalid vertices are sorted to the end and replaced by the first
+    # vertex, which adds empty edges to the closed polygon
+    angles = torch.where(valid, angles, angles.new_tensor(10.))
+    angles, order = angles.sort(1)
+    rel = rel.gather(1, order[..., None].expand(-1, -1, 2))
+    rel = torch.where((angles < 10)[..., None], rel, rel[:, :1])
+    rel_next = rel.roll(-1, 1)
+    inter = (rel[..., 0] * rel_next[..., 1] -
+             rel[..., 1] * rel_next[..., 0]).sum(1).abs() * 0.5
+    inter = torch.where(num_valid > 2, inter, inter.new_zeros(()))
+
+    area1 = boxes1[:, 2] * boxes1[:, 3]
+    area2 = boxes2[:, 2] * boxes2[:, 3]
+    union = (area1 + area2 - inter).clamp(min=1e-14)
+    return inter / union
+
+
+def _collinear_edges(boxes1, boxes2, tol=1e-3):
+    """Check whether pairs of rotated boxes have nearly collinear edges.
+
+    The rounding errors of the mmcv kernel are not bounded for these pairs,
+    e.g. two boxes with the same corners in a different order.
+
+    Args:
+        boxes1 (torch.Tensor): Rotated boxes with shape (P, 5)
+            ([x, y, w, h, r]).
+        boxes2 (torch.Tensor): Rotated boxes with shape (P, 5).
+        tol (float, optional): Tolerance of the angles and of the distances
+            relative to the sizes of the boxes. Default: 1e-3.
+
+    Returns:
+        torch.Tensor: Whether each pair has nearly collinear edges.
+    """
+    center = (boxes1[:, :2] + boxes2[:, :2]) * 0.5
+    corners1 = _rotated_corners(
+        torch.cat((boxes1[:, :2] - center, boxes1[:, 2:]), dim=1))
+    corners2 = _rotated_corners(
+        torch.cat((boxes2[:, :2] - center, boxes2[:, 2:]), dim=1))
+    edges1 = corners1.roll(-1, 1) - corners1
+    edges2 = corners2.roll(-1, 1) - corners2
+    edges1 = edges1 / edges1.norm(dim=-1, keepdim=True).clamp(min=1e-12)
+    edges2 = edges2 / edges2.norm(dim=-1, keepdim=True).clamp(min=1e-12)
+    # (P, 4, 4) sines of the angles between the edges and distances from
+    # the corners of boxes2 to the lines of the edges of boxes1
+    sines = edges1[:, :, None, 0] * edges2[:, None, :, 1] - \
+        edges1[:, :, None, 1] * edges2[:, None, :, 0]
+    offsets = corners2[:, None] - corners1[:, :, None]
+    dists = edges1[:, :, None, 0] * offsets[..., 1] - \
+        edges1[:, :, None, 1] * offsets[..., 0]
+    sizes = torch.cat((boxes1[:, 2:4], boxes2[:, 2:4]), 1).amax(1)
+    max_dists = tol * sizes[:, None, None]
+    collinear = (sines.abs() < tol) & (dists.abs() < max_dists)
+    return collinear.flatten(1).any(1)
+
+
+def _overlapped_pairs(bounds, rows, cols, labels=None):
+    """Get the pairs of boxes whose axis-aligned bounding boxes overlap.
+
+    Args:
+        bounds (torch.Tensor): Axis-aligned bounding boxes with shape (N, 4)
+            ([x1, y1, x2, y2]).
+        rows (torch.Tensor): Indices of the first boxes of the pairs.
+        cols (torch.Tensor): Indices of the second boxes of the pairs.
+        labels (torch.Tensor, optional): Labels of the boxes, where only
+            the boxes with the same label are paired. Default: None.
+
+    Returns:
+        torch.Tensor: Whether the bounding boxes of ``rows`` overlap the
+            ones of ``cols``, with shape (len(rows), len(cols)).
+    """
+    bounds1, bounds2 = bounds[rows, None], bounds[None, cols]
+    overlap = (bounds1[..., 0] <= bounds2[..., 2]) & (
+        bounds2[..., 0] <= bounds1[..., 2])
+    overlap &= (bounds1[..., 1] <= bounds2[..., 3]) & (
+        bounds2[..., 1] <= bounds1[..., 3])
+    if labels is not None:
+        overlap &= labels[rows, None] == labels[None, cols]
+    return overlap
+
+
+def _suppress_pairs(dets, boxes, rows, cols, iou_threshold, margin):
+    """Check whether the first boxes of the pairs suppress the second ones.
+
+    Args:
+        dets (torch.Tensor): Rotated boxes with shape (N, 5).
+        boxes (torch.Tensor): ``dets`` in double precision.
+        rows (torch.Tensor): Indices of the first boxes of the pairs.
+        cols (torch.Tensor): Indices of the second boxes of the pairs.
+        iou_threshold (float): IoU threshold of NMS.
+        margin (float): Minimal margin of the IoU around the threshold to
+            compute again with the mmcv kernel.
+
+    Returns:
+        torch.Tensor: Whether the IoU of each pair reaches the threshold.
+    """
+    boxes1, boxes2 = boxes[rows], boxes[cols]
+    ious = rotated_iou_pairs(boxes1, boxes2)
+    suppress = ious >= iou_threshold
+    # the rounding error of the mmcv kernel grows with the coordinates
+    # relative to the sizes of the boxes
+    coors = torch.cat((boxes1[:, :2], boxes2[:, :2]), 1).abs().amax(1)
+    sizes = torch.cat((boxes1[:, 2:4], boxes2[:, 2:4]), 1).amin(1)
+    margin = margin + 32 * torch.finfo(dets.dtype).eps * coors / sizes.clamp(
+        min=1e-6)
+    uncertain = ((ious - iou_threshold).abs() <= margin) | _collinear_edges(
+        boxes1, boxes2)
+    uncertain = uncertain.nonzero(as_tuple=True)[0]
+    if len(uncertain) == 0:
+        return suppress
+    pairs1, pairs2 = dets[rows[uncertain]], dets[cols[uncertain]]
+    if dets.dtype == torch.float32:
+        exact_ious = box_iou_rotated(pairs1, pairs2, aligned=True)
+        suppress[uncertain] = exact_ious >= iou_threshold
+    else:
+        # box_iou_rotated only supports float
+        pair_scores = dets.new_tensor([1., 0.])
+        for k, (box1, box2) in enumerate(zip(pairs1, pairs2)):
+            pair_keep = nms_rotated(
+                torch.stack((box1, box2)), pair_scores, iou_threshold)[1]
+            suppress[uncertain[k]] = len(pair_keep) == 1
+    return suppress
+
+
+def nms_rotated_cpu(dets,
+                    scores,
+                    iou_threshold,
+                    labels=None,
+                    order=None,
+                    block_size=512,
+                    margin=1e-4):
+    """Rotated NMS on CPU with the same keep set as ``mmcv.ops.nms_rotated``.
+
+    The boxes are processed in blocks, whose sizes double from 32 boxes up
+    to ``block_size`` boxes. The boxes of a block are first suppressed by
+    the boxes kept in the previous blocks, and the remaining boxes are then
+    suppressed by each other with a bitmask of their suppressing pairs.
+    The IoU is only computed for the pairs of boxes whose axis-aligned
+    bounding boxes overlap. It is vectorized in double precision, and the
+    pairs whose IoU is close to the threshold or whose edges are nearly
+    collinear are computed again with the mmcv kernel, so that the boxes
+    are suppressed exactly as in ``mmcv.ops.nms_rotated``.
+
+    Args:
+        dets (torch.Tensor): Rotated boxes with shape (N, 5)
+            ([x, y, w, h, r]).
+        scores (torch.Tensor): Scores of boxes with shape (N, ).
+        iou_threshold (float): IoU threshold of NMS.
+        labels (torch.Tensor, optional): Labels of boxes with shape (N, ).
+            If given, only the boxes with the same label suppress each
+            other. Default: None.
+        order (torch.Tensor, optional): Order in which the boxes are
+            processed. If not given, the boxes are processed in the
+            descending order of their scores. Default: None.
+        block_size (int, optional): Max number of boxes in each block.
+            Default: 512.
+        margin (float, optional): Minimal margin of the IoU around the
+            threshold to compute again with the mmcv kernel. Default: 1e-4.
+
+    Returns:
+        torch.Tensor: Indices of the kept boxes in the processing order.
+    """
+    if order is None:
+        _, order = scores.sort(0, descending=True)
+    num_boxes = len(order)
+    if num_boxes == 0:
+        return order.new_zeros((0, ), dtype=torch.long)
+    if iou_threshold <= 0:
+        # any pair of boxes has an IoU of at least 0
+        if labels is None:
+            return order[:1]
+        _, first = np.unique(labels[order].numpy(), return_index=True)
+        return order[np.sort(first)]
+
+    dets = dets[order]
+    boxes = dets.double()
+    cos, sin = torch.cos(boxes[:, 4]).abs(), torch.sin(boxes[:, 4]).abs()
+    extents = torch.stack(
+        (boxes[:, 2] * cos + boxes[:, 3] * sin,
+         boxes[:, 2] * sin + boxes[:, 3] * cos), -1) * 0.5
+    # the margin keeps the touching boxes in the pairs, and the bounds are
+    # rounded outwards to float to check the overlaps faster
+    extents = extents * (1 + 1e-6) + 1e-6
+    lower = (boxes[:, :2] - extents).float()
+    upper = (boxes[:, :2] + extents).float()
+    lower = torch.nextafter(lower, lower.new_tensor(-np.inf))
+    upper = torch.nextafter(upper, upper.new_tensor(np.inf))
+    bounds = torch.cat((lower, upper), 1)
+    if labels is not None:
+        labels = labels[order]
+
+    keep = order.new_zeros((0, ), dtype=torch.long)
+    start, size = 0, min(32, block_size)
+    while start < num_boxes:
+        alive = torch.arange(start, min(start + size, num_boxes))
+        # the first blocks are small since the top boxes usually suppress
+        # most of the others in crowded scenes
+        start, size = start + size, min(size * 2, block_size)
+        # suppressed by the boxes kept in the previous blocks
+        if len(keep) > 0:
+            rows, cols = _overlapped_pairs(bounds, keep, alive,
+                                           labels).nonzero(as_tuple=True)
+            suppress = _suppress_pairs(dets, boxes, keep[rows], alive[cols],
+                                       iou_threshold, margin)
+            suppressed = torch.zeros_like(alive, dtype=torch.bool)
+            suppressed[cols[suppress]] = True
+            alive = alive[~suppressed]
+        # suppressed by the other boxes in the block
+        rows, cols = _overlapped_pairs(bounds, alive, alive,
+                                       labels).triu_(1).nonzero(as_tuple=True)
+        suppress = _suppress_pairs(dets, boxes, alive[rows], alive[cols],
+                                   iou_threshold, margin)
+        block_keep = _greedy_nms(rows[suppress], cols[suppress], len(alive))
+        keep = torch.cat((keep, alive[block_keep]))
+    return order[keep]
@@ -76,129 +76,122 @@ def array_converter(to_torch=True,
 
     def array_converter_wrapper(func):
         """Outer wrapper for the function."""
+        if len(apply_to) == 0:
+            return func
+
+        # bind the signature once, rather than on every call
+        func_name = func.__name__
+
+        arg_spec = getfullargspec(func)
+
+        arg_names = arg_spec.args
+        arg_num = len(arg_names)
+        default_arg_values = arg_spec.defaults
+        if default_arg_values is None:
+            default_arg_values = []
+        no_default_arg_num = len(arg_names) - len(default_arg_values)
+        default_args = dict(
+            zip(arg_names[no_default_arg_num:], default_arg_values))
+        if arg_spec.kwonlydefaults is not None:
+            default_args.update(arg_spec.kwonlydefaults)
+
+        all_arg_names = arg_names + arg_spec.kwonlyargs
+
+        # template argument data type is used for all array-like arguments
+        if template_arg_name_ is None:
+            template_arg_name = apply_to[0]
+        else:
+            template_arg_name = template_arg_name_
+
+        # the errors are raised when the function is called
+        error_msg = None
+        if template_arg_name not in all_arg_names:
+            error_msg = (f'{template_arg_name} is not among the '
+                         f'argument list of function {func_name}')
+        else:
+            # inspect apply_to
+            for arg_to_apply in apply_to:
+                if arg_to_apply not in all_arg_names:
+                    error_msg = (f'{arg_to_apply} is not '
+                                 f'an argument of {func_name}')
+                    break
+
+        # names and positions of the arguments to convert, keyword-only
+        # arguments are never given by position
+        arg_inds = {arg_name: i for i, arg_name in enumerate(arg_names)}
+        apply_to_args = [(arg_name, arg_inds.get(arg_name, arg_num))
+                         for arg_name in all_arg_names if arg_name in apply_to]
+        template_ind = arg_inds.get(template_arg_name, arg_num)
+
+        target_type = torch.Tensor if to_torch else np.ndarray
+        converter = ArrayConverter()
+
+        def convert(arg_value):
+            # arrays of the target type are passed as they are
+            if isinstance(arg_value, target_type):
+                return arg_value
+            return converter.convert(
+                input_array=arg_value, target_type=target_type)
 
         @functools.wraps(func)
         def new_func(*args, **kwargs):
             """Inner wrapper for the arguments."""
-            if len(apply_to) == 0:
-                return func(*args, **kwargs)
-
-            func_name = func.__name__
-
-            arg_spec = getfullargspec(func)
-
-            arg_names = arg_spec.args
-            arg_num = len(arg_names)
-            default_arg_values = arg_spec.defaults
-            if default_arg_values is None:
-                default_arg_values = []
-            no_default_arg_num = len(arg_names) - len(default_arg_values)
-
-            kwonly_arg_names = arg_spec.kwonlyargs
-            kwonly_default_arg_values = arg_spec.kwonlydefaults
-            if kwonly_default_arg_values is None:
-                kwonly_default_arg_values = {}
-
-            all_arg_names = arg_names + kwonly_arg_names
-
-            # in case there are args in the form of *args
-            if len(args) > arg_num:
-                named_args = args[:arg_num]
-                nameless_args = args[arg_num:]
+            if error_msg is not None:
+                raise ValueError(error_msg)
+
+            num_args = min(len(args), arg_num)
+            new_args = list(args)
+            new_kwargs = dict(kwargs)
+
+            # non-keyword arguments, keyword arguments and arguments using
+            # default value
+            for arg_name, i in apply_to_args:
+                if i < num_args:
+                    new_args[i] = convert(args[i])
+                elif arg_name in kwargs:
+                    new_kwargs[arg_name] = convert(kwargs[arg_name])
+                elif arg_name in default_args:
+                    new_kwargs[arg_name] = convert(default_args[arg_name])
+
+            if template_ind < num_args:
+                template_arg_value = args[template_ind]
             else:
-                named_args = args
-                nameless_args = []
-
-            # template argument data type is used for all array-like arguments
-            if template_arg_name_ is None:
-                template_arg_name = apply_to[0]
-            else:
-                template_arg_name = template_arg_name_
-
-            if template_arg_name not in all_arg_names:
-                raise ValueError(f'{template_arg_name} is not among the '
-                                 f'argument list of function {func_name}')
-
-            # inspect apply_to
-            for arg_to_apply in apply_to:
-                if arg_to_apply not in all_arg_names:
-                    raise ValueError(f'{arg_to_apply} is not '
-                                     f'an argument of {func_name}')
-
-            new_args = []
-            new_kwargs = {}
-
-            converter = ArrayConverter()
-            target_type = torch.Tensor if to_torch else np.ndarray
-
-            # non-keyword arguments
-            for i, arg_value in enumerate(named_args):
-                if arg_names[i] in apply_to:
-                    new_args.append(
-                        converter.convert(
-                            input_array=arg_value, target_type=target_type))
-                else:
-                    new_args.append(arg_value)
-
-                if arg_names[i] == template_arg_name:
-                    template_arg_value = arg_value
-
-            kwonly_default_arg_values.update(kwargs)
-            kwargs = kwonly_default_arg_values
-
-            # keyword arguments and non-keyword arguments using default value
-            for i in range(len(named_args), len(all_arg_names)):
-                arg_name = all_arg_names[i]
-                if arg_name in kwargs:
-                    if arg_name in apply_to:
-                        new_kwargs[arg_name] = converter.convert(
-                            input_array=kwargs[arg_name],
-                            target_type=target_type)
-                    else:
-                        new_kwargs[arg_name] = kwargs[arg_name]
-                else:
-                    default_value = default_arg_values[i - no_default_arg_num]
-                    if arg_name in apply_to:
-                        new_kwargs[arg_name] = converter.convert(
-                            input_array=default_value, target_type=target_type)
-                    else:
-                        new_kwargs[arg_name] = default_value
-                if arg_name == template_arg_name:
-                    template_arg_value = kwargs[arg_name]
-
-            # add nameless args provided by *args (if exists)
-            new_args += nameless_args
+                template_arg_value = kwargs.get(
+                    template_arg_name, default_args.get(template_arg_name))
 
             return_values = func(*new_args, **new_kwargs)
-            converter.set_template(template_arg_value)
-
-            def recursive_recover(input_data):
-                if isinstance(input_data, (tuple, list)):
-                    new_data = []
-                    for item in input_data:
-                        new_data.append(recursive_recover(item))
-                    return tuple(new_data) if isinstance(input_data,
-                                                         tuple) else new_data
-                elif isinstance(input_data, dict):
-                    new_data = {}
-                    for k, v in input_data.items():
-                        new_data[k] = recursive_recover(v)
-                    return new_data
-                elif isinstance(input_data, (torch.Tensor, np.ndarray)):
-                    return converter.recover(input_data)
-                else:
-                    return input_data
-
-            if recover:
-                return recursive_recover(return_values)
-            else:
+
+            if not recover:
                 return return_values
+            # nothing to recover if the outputs already have the type of
+            # the template
+            if isinstance(template_arg_value, target_type) and \
+                    isinstance(return_values, target_type):
+                return return_values
+            template_converter = ArrayConverter(template_arg_value)
+            return _recursive_recover(return_values, template_converter)
 
         return new_func
 
     return array_converter_wrapper
 
 
+def _recursive_recover(input_data, converter):
+    """Recover the arrays in the outputs to the type of the template."""
+    if isinstance(input_data, (tuple, list)):
+        new_data = [_recursive_recover(item, converter) for item in input_data]
+        return tuple(new_data) if isinstance(input_data, tuple) else new_data
+    elif isinstance(input_data, dict):
+        return {
+            k: _recursive_recover(v, converter)
+            for k, v in input_data.items()
+        }
+    elif isinstance(input_data, (torch.Tensor, np.ndarray)):
+        return converter.recover(input_data)
+    else:
+        return input_data
+
+
 class ArrayConverter:
 
     SUPPORTED_NON_ARRAY_TYPES = (int, float, np.int8, np.int16, np.int32,
@@ -3,7 +3,6 @@ from os import path as osp
 
 import mmcv
 import numpy as np
-import trimesh
 
 from .image_vis import (draw_camera_bbox3d_on_img, draw_depth_bbox3d_on_img,
                         draw_lidar_bbox3d_on_img)
@@ -41,6 +40,8 @@ def _write_oriented_bbox(scene_bbox, out_filename):
             heading angle of positive Y is 90 degrees.
         out_filename(str): Filename.
     """
+    # trimesh is slow to import and only needed to dump the boxes
+    import trimesh
 
     def heading2rotmat(heading_angle):
         rotmat = np.zeros((3, 3))
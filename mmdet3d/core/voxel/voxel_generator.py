@@ -6,19 +6,28 @@ import numpy as np
 class VoxelGenerator(object):
     """Voxel generator in numpy implementation.
 
+    The generator keeps a workspace (the voxel map and the voxel buffers)
+    across calls, which is only reset on the cells touched by the previous
+    call. Grids larger than `max_dense_cells` use a hash map of `max_voxels`
+    entries instead of a dense voxel map. As a consequence, a generator
+    should not be shared between threads.
+
     Args:
         voxel_size (list[float]): Size of a single voxel
         point_cloud_range (list[float]): Range of points
         max_num_points (int): Maximum number of points in a single voxel
         max_voxels (int, optional): Maximum number of voxels.
             Defaults to 20000.
+        max_dense_cells (int, optional): Maximum number of cells of the grid
+            to use a dense voxel map. Defaults to 2 ** 24.
     """
 
     def __init__(self,
                  voxel_size,
                  point_cloud_range,
                  max_num_points,
-                 max_voxels=20000):
+                 max_voxels=20000,
+                 max_dense_cells=2**24):
 
         point_cloud_range = np.array(point_cloud_range, dtype=np.float32)
         # [0, -40, -3, 70.4, 40, 1]
@@ -32,12 +41,106 @@ class VoxelGenerator(object):
         self._max_num_points = max_num_points
         self._max_voxels = max_voxels
         self._grid_size = grid_size
+        self._use_hash = int(np.prod(grid_size)) > max_dense_cells
+        self._workspace = None
 
     def generate(self, points):
-        """Generate voxels given points."""
-        return points_to_voxel(points, self._voxel_size,
-                               self._point_cloud_range, self._max_num_points,
-                               True, self._max_voxels)
+        """Generate voxels given points.
+
+        The result is the same as :func:`points_to_voxel` with reversed
+        coordinates, but the voxel map and buffers are reused and the points
+        are processed in two passes: voxel indices are assigned first, then
+        the voxels are filled in parallel.
+        """
+        workspace = self._get_workspace(points)
+        voxelmap_shape = self._grid_size[::-1].copy()
+        keys = np.empty(points.shape[0], dtype=np.int64)
+        _points_to_voxel_keys_kernel(points, self._voxel_size,
+                                     self._point_cloud_range, voxelmap_shape,
+                                     True, keys)
+        point_voxel_inds = np.empty(points.shape[0], dtype=np.int32)
+        point_slots = np.empty(points.shape[0], dtype=np.int32)
+        voxel_keys = workspace['voxel_keys']
+        num_points_per_voxel = workspace['num_points_per_voxel']
+        if self._use_hash:
+            voxel_num = _assign_voxels_hash_kernel(
+                keys, workspace['table_keys'], workspace['table_values'],
+                workspace['voxel_slots'], point_voxel_inds, point_slots,
+                num_points_per_voxel, voxel_keys, self._max_num_points,
+                self._max_voxels)
+        else:
+            voxel_num = _assign_voxels_dense_kernel(
+                keys, workspace['coor_to_voxelidx'], point_voxel_inds,
+                point_slots, num_points_per_voxel, voxel_keys,
+                self._max_num_points, self._max_voxels)
+        voxels = workspace['voxels']
+        _fill_voxels_kernel(points, point_voxel_inds, point_slots, voxels)
+
+        voxel_keys = voxel_keys[:voxel_num]
+        coors = np.stack(
+            np.unravel_index(voxel_keys, voxelmap_shape),
+            axis=1).astype(np.int32)
+        result = (voxels[:voxel_num].copy(), coors,
+                  num_points_per_voxel[:voxel_num].copy())
+
+        # only reset the part of the workspace used by this call
+        voxels[:voxel_num] = 0
+        num_points_per_voxel[:voxel_num] = 0
+        if self._use_hash:
+            workspace['table_keys'][workspace['voxel_slots'][:voxel_num]] = -1
+        else:
+            workspace['coor_to_voxelidx'][voxel_keys] = -1
+        return result
+
+    def _get_workspace(self, points):
+        """Get the workspace matching the points, create it if needed."""
+        workspace = self._workspace
+        if workspace is not None and \
+                workspace['voxels'].dtype == points.dtype and \
+                workspace['voxels'].shape[-1] == points.shape[-1]:
+            return workspace
+        workspace = dict(
+            voxels=np.zeros(
+                shape=(self._max_voxels, self._max_num_points,
+                       points.shape[-1]),
+                dtype=points.dtype),
+            num_points_per_voxel=np.zeros(
+                shape=(self._max_voxels, ), dtype=np.int32),
+            voxel_keys=np.zeros(shape=(self._max_voxels, ), dtype=np.int64))
+        if self._use_hash:
+            table_size = 1 << int(2 * self._max_voxels - 1).bit_length()
+            workspace['table_keys'] = -np.ones(
+                shape=(table_size, ), dtype=np.int64)
+            workspace['table_values'] = np.zeros(
+                shape=(table_size, ), dtype=np.int32)
+            workspace['voxel_slots'] = np.zeros(
+                shape=(self._max_voxels, ), dtype=np.int64)
+        elif self._workspace is not None:
+            workspace['coor_to_voxelidx'] = \
+                self._workspace['coor_to_voxelidx']
+        else:
+            workspace['coor_to_voxelidx'] = -np.ones(
+                shape=(int(np.prod(self._grid_size)), ), dtype=np.int32)
+        self._workspace = workspace
+        return workspace
+
+    def generate_batch(self, points, batch_inds, batch_size):
+        """Generate voxels given the concatenated points of a batch.
+
+        Args:
+            points (np.ndarray): [N, ndim]. Points of all samples.
+            batch_inds (np.ndarray): [N]. Sample index of each point.
+            batch_size (int): Number of samples.
+
+        Returns:
+            tuple[np.ndarray]: Voxels, coordinates with the sample index as
+                the first column, and number of points per voxel.
+        """
+        return points_to_voxel_batch(points, batch_inds, batch_size,
+                                     self._voxel_size,
+                                     self._point_cloud_range,
+                                     self._max_num_points, True,
+                                     self._max_voxels)
 
     @property
     def voxel_size(self):
@@ -134,7 +237,7 @@ def points_to_voxel(points,
     return voxels, coors, num_points_per_voxel
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def _points_to_voxel_reverse_kernel(points,
                                     voxel_size,
                                     coors_range,
@@ -208,7 +311,7 @@ def _points_to_voxel_reverse_kernel(points,
     return voxel_num
 
 
-@numba.jit(nopython=True)
+@numba.jit(nopython=True, cache=True)
 def _points_to_voxel_kernel(points,
                             voxel_size,
                             coors_range,
@@ -278,3 +381,300 @@ def _points_to_voxel_kernel(points,
             voxels[voxelidx, num] = points[i]
             num_points_per_voxel[voxelidx] += 1
     return voxel_num
+
+
+def points_to_voxel_batch(points,
+                          batch_inds,
+                          batch_size,
+                          voxel_size,
+                          coors_range,
+                          max_points=35,
+                          reverse_index=True,
+                          max_voxels=20000):
+    """convert the concatenated points of a batch to voxels in one call.
+
+    The output is the same as calling :func:`points_to_voxel` on the points
+    of each sample and concatenating the results. As in
+    :meth:`VoxelGenerator.generate`, the voxel keys are computed in parallel
+    and the points are assigned to the voxels with a hash map, whose size
+    depends on the number of points instead of the size of the grid, then
+    the voxels are filled in parallel. The voxels are only allocated for the
+    voxels actually created.
+
+    Args:
+        points (np.ndarray): [N, ndim]. Points of all samples.
+            points[:, :3] contain xyz points and points[:, 3:] contain other
+            information such as reflectivity.
+        batch_inds (np.ndarray): [N]. Sample index of each point.
+        batch_size (int): Number of samples.
+        voxel_size (list, tuple, np.ndarray): [3] xyz, indicate voxel size
+        coors_range (list[float | tuple[float] | ndarray]): Voxel range.
+            format: xyzxyz, minmax
+        max_points (int): Indicate maximum points contained in a voxel.
+        reverse_index (bool): Whether return reversed coordinates.
+        max_voxels (int): Maximum number of voxels created for each sample.
+
+    Returns:
+        tuple[np.ndarray]:
+            voxels: [M, max_points, ndim] float tensor. only contain points.
+            coordinates: [M, 4] int32 tensor. The first column indicates
+                the sample index.
+            num_points_per_voxel: [M] int32 tensor.
+    """
+    if not isinstance(voxel_size, np.ndarray):
+        voxel_size = np.array(voxel_size, dtype=points.dtype)
+    if not isinstance(coors_range, np.ndarray):
+        coors_range = np.array(coors_range, dtype=points.dtype)
+    voxelmap_shape = (coors_range[3:] - coors_range[:3]) / voxel_size
+    voxelmap_shape = np.round(voxelmap_shape).astype(np.int64)
+    if reverse_index:
+        voxelmap_shape = voxelmap_shape[::-1].copy()
+
+    # group the points by sample while keeping their original order
+    batch_inds = np.asarray(batch_inds, dtype=np.int64)
+    if np.any(batch_inds[1:] < batch_inds[:-1]):
+        sample_order = np.argsort(batch_inds, kind='stable')
+        points = points[sample_order]
+        batch_inds = batch_inds[sample_order]
+    sample_offsets = np.zeros(batch_size + 1, dtype=np.int64)
+    np.cumsum(
+        np.bincount(batch_inds, minlength=batch_size)[:batch_size],
+        out=sample_offsets[1:])
+
+    keys = np.empty(points.shape[0], dtype=np.int64)
+    _points_to_voxel_keys_kernel(points, voxel_size, coors_range,
+                                 voxelmap_shape, reverse_index, keys)
+    max_voxel_num = min(points.shape[0], batch_size * max_voxels)
+    table_size = 1 << int(2 * max_voxel_num).bit_length()
+    point_voxel_inds = np.empty(points.shape[0], dtype=np.int32)
+    point_slots = np.empty(points.shape[0], dtype=np.int32)
+    num_points_per_voxel = np.zeros(max_voxel_num, dtype=np.int32)
+    voxel_keys = np.empty(max_voxel_num, dtype=np.int64)
+    voxel_batch_inds = np.empty(max_voxel_num, dtype=np.int32)
+    voxel_num = _assign_voxels_batch_kernel(
+        keys, sample_offsets, int(np.prod(voxelmap_shape)),
+        -np.ones(table_size, dtype=np.int64),
+        np.empty(table_size, dtype=np.int32), point_voxel_inds, point_slots,
+        num_points_per_voxel, voxel_keys, voxel_batch_inds, max_points,
+        max_voxels)
+
+    voxels = np.zeros(
+        shape=(voxel_num, max_points, points.shape[-1]), dtype=points.dtype)
+    _fill_voxels_kernel(points, point_voxel_inds, point_slots, voxels)
+    coors = np.empty(shape=(voxel_num, 4), dtype=np.int32)
+    coors[:, 0] = voxel_batch_inds[:voxel_num]
+    coors[:, 1:] = np.stack(
+        np.unravel_index(voxel_keys[:voxel_num], voxelmap_shape), axis=1)
+    return voxels, coors, num_points_per_voxel[:voxel_num].copy()
+
+
+@numba.jit(nopython=True, cache=True)
+def _assign_voxels_batch_kernel(keys, sample_offsets, num_cells, table_keys,
+                                table_values, point_voxel_inds, point_slots,
+                                num_points_per_voxel, voxel_keys,
+                                voxel_batch_inds, max_points, max_voxels):
+    """Assign the points of a batch to voxels and slots with a single
+    open-addressing hash map, keyed by the sample and the voxel.
+
+    Args:
+        keys (np.ndarray): [N]. Linear voxel index of each point, the
+            points being grouped by sample.
+        sample_offsets (np.ndarray): [B + 1]. Start of each sample in the
+            points.
+        num_cells (int): Number of cells of the voxel map.
+        table_keys (np.ndarray): Keys of the hash map, i.e. the linear voxel
+            index offset by ``sample index * num_cells``, -1 for the empty
+            slots. Its size is a power of 2 larger than the number of voxels.
+        table_values (np.ndarray): Voxel index of each slot of the hash map.
+        point_voxel_inds (np.ndarray): [N]. Created voxel index of each
+            point, -1 for the dropped points.
+        point_slots (np.ndarray): [N]. Created position of each point in
+            its voxel.
+        num_points_per_voxel (np.ndarray): Created number of points per
+            voxel.
+        voxel_keys (np.ndarray): Created linear index of each voxel.
+        voxel_batch_inds (np.ndarray): Created sample index of each voxel.
+        max_points (int): Indicate maximum points contained in a voxel.
+        max_voxels (int): Maximum number of voxels of each sample.
+
+    Returns:
+        int: Number of voxels.
+    """
+    mask = table_keys.shape[0] - 1
+    voxel_num = 0
+    for b in range(sample_offsets.shape[0] - 1):
+        sample_voxel_num = 0
+        for i in range(sample_offsets[b], sample_offsets[b + 1]):
+            point_voxel_inds[i] = -1
+            key = keys[i]
+            if key < 0:
+                continue
+            batch_key = b * num_cells + key
+            slot = (batch_key * 2654435761) & mask
+            while table_keys[slot] != -1 and table_keys[slot] != batch_key:
+                slot = (slot + 1) & mask
+            if table_keys[slot] == -1:
+                if sample_voxel_num >= max_voxels:
+                    continue
+                voxelidx = voxel_num
+                voxel_num += 1
+                sample_voxel_num += 1
+                table_keys[slot] = batch_key
+                table_values[slot] = voxelidx
+                voxel_keys[voxelidx] = key
+                voxel_batch_inds[voxelidx] = b
+            else:
+                voxelidx = table_values[slot]
+            num = num_points_per_voxel[voxelidx]
+            if num < max_points:
+                point_voxel_inds[i] = voxelidx
+                point_slots[i] = num
+                num_points_per_voxel[voxelidx] += 1
+    return voxel_num
+
+
+@numba.jit(nopython=True, parallel=True, cache=True)
+def _points_to_voxel_keys_kernel(points, voxel_size, coors_range,
+                                 voxelmap_shape, reverse_index, keys):
+    """Compute the linear index of the voxel of each point in parallel.
+
+    Args:
+        points (np.ndarray): [N, ndim]. Points.
+        voxel_size (np.ndarray): [3] xyz, indicate voxel size.
+        coors_range (np.ndarray): Range of voxels. format: xyzxyz, minmax
+        voxelmap_shape (np.ndarray): [3]. Shape of the voxel map, in zyx
+            order if `reverse_index` is True.
+        reverse_index (bool): Whether the voxel map is in zyx order.
+        keys (np.ndarray): [N]. Created linear voxel indices, -1 for the
+            points out of range.
+    """
+    N = points.shape[0]
+    ndim = 3
+    for i in numba.prange(N):
+        key = 0
+        for k in range(ndim):
+            j = ndim - 1 - k if reverse_index else k
+            c = np.floor((points[i, j] - coors_range[j]) / voxel_size[j])
+            if c < 0 or c >= voxelmap_shape[k]:
+                key = -1
+                break
+            key = key * voxelmap_shape[k] + int(c)
+        keys[i] = key
+
+
+@numba.jit(nopython=True, cache=True)
+def _assign_voxels_dense_kernel(keys, coor_to_voxelidx, point_voxel_inds,
+                                point_slots, num_points_per_voxel, voxel_keys,
+                                max_points, max_voxels):
+    """Assign each point to a voxel and a slot with a dense voxel map.
+
+    Args:
+        keys (np.ndarray): [N]. Linear voxel index of each point.
+        coor_to_voxelidx (np.ndarray): Flattened voxel map, -1 for the
+            empty cells.
+        point_voxel_inds (np.ndarray): [N]. Created voxel index of each
+            point, -1 for the dropped points.
+        point_slots (np.ndarray): [N]. Created position of each point in
+            its voxel.
+        num_points_per_voxel (np.ndarray): Created number of points per
+            voxel.
+        voxel_keys (np.ndarray): Created linear index of each voxel.
+        max_points (int): Indicate maximum points contained in a voxel.
+        max_voxels (int): Maximum number of voxels this function create.
+
+    Returns:
+        int: Number of voxels.
+    """
+    voxel_num = 0
+    for i in range(keys.shape[0]):
+        point_voxel_inds[i] = -1
+        key = keys[i]
+        if key < 0:
+            continue
+        voxelidx = coor_to_voxelidx[key]
+        if voxelidx == -1:
+            if voxel_num >= max_voxels:
+                continue
+            voxelidx = voxel_num
+            voxel_num += 1
+            coor_to_voxelidx[key] = voxelidx
+            voxel_keys[voxelidx] = key
+        num = num_points_per_voxel[voxelidx]
+        if num < max_points:
+            point_voxel_inds[i] = voxelidx
+            point_slots[i] = num
+            num_points_per_voxel[voxelidx] += 1
+    return voxel_num
+
+
+@numba.jit(nopython=True, cache=True)
+def _assign_voxels_hash_kernel(keys, table_keys, table_values, voxel_slots,
+                               point_voxel_inds, point_slots,
+                               num_points_per_voxel, voxel_keys, max_points,
+                               max_voxels):
+    """Assign each point to a voxel and a slot with an open-addressing hash
+    map, whose size only depends on `max_voxels`.
+
+    Args:
+        keys (np.ndarray): [N]. Linear voxel index of each point.
+        table_keys (np.ndarray): Keys of the hash map, -1 for the empty
+            slots. Its size is a power of 2 larger than `max_voxels`.
+        table_values (np.ndarray): Voxel index of each slot of the hash map.
+        voxel_slots (np.ndarray): Created hash map slot of each voxel.
+        point_voxel_inds (np.ndarray): [N]. Created voxel index of each
+            point, -1 for the dropped points.
+        point_slots (np.ndarray): [N]. Created position of each point in
+            its voxel.
+        num_points_per_voxel (np.ndarray): Created number of points per
+            voxel.
+        voxel_keys (np.ndarray): Created linear index of each voxel.
+        max_points (int): Indicate maximum points contained in a voxel.
+        max_voxels (int): Maximum number of voxels this function create.
+
+    Returns:
+        int: Number of voxels.
+    """
+    mask = table_keys.shape[0] - 1
+    voxel_num = 0
+    for i in range(keys.shape[0]):
+        point_voxel_inds[i] = -1
+        key = keys[i]
+        if key < 0:
+            continue
+        slot = (key * 2654435761) & mask
+        while table_keys[slot] != -1 and table_keys[slot] != key:
+            slot = (slot + 1) & mask
+        if table_keys[slot] == -1:
+            if voxel_num >= max_voxels:
+                continue
+            voxelidx = voxel_num
+            voxel_num += 1
+            table_keys[slot] = key
+            table_values[slot] = voxelidx
+            voxel_slots[voxelidx] = slot
+            voxel_keys[voxelidx] = key
+        else:
+            voxelidx = table_values[slot]
+        num = num_points_per_voxel[voxelidx]
+        if num < max_points:
+            point_voxel_inds[i] = voxelidx
+            point_slots[i] = num
+            num_points_per_voxel[voxelidx] += 1
+    return voxel_num
+
+
+@numba.jit(nopython=True, parallel=True, cache=True)
+def _fill_voxels_kernel(points, point_voxel_inds, point_slots, voxels):
+    """Copy the points into their assigned voxels in parallel.
+
+    Args:
+        points (np.ndarray): [N, ndim]. Points.
+        point_voxel_inds (np.ndarray): [N]. Voxel index of each point, -1
+            for the dropped points.
+        point_slots (np.ndarray): [N]. Position of each point in its voxel.
+        voxels (np.ndarray): Voxels to fill.
+    """
+    for i in numba.prange(points.shape[0]):
+        voxelidx = point_voxel_inds[i]
+        if voxelidx >= 0:
+            voxels[voxelidx, point_slots[i]] = points[i]
@@ -1,16 +1,9 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import importlib
+
 from mmdet.datasets.builder import build_dataloader
 from .builder import DATASETS, PIPELINES, build_dataset
 from .custom_3d import Custom3DDataset
-from .custom_3d_seg import Custom3DSegDataset
-from .kitti_dataset import KittiDataset
-from .kitti_mono_dataset import KittiMonoDataset
-from .lyft_dataset import LyftDataset
-from .nuscenes_dataset import NuScenesDataset
-from .nuscenes_mono_dataset import NuScenesMonoDataset
-from .spa_dataset import SPADataset
-from .spa_mvx_dataset import SPA_MVX_Dataset
-from .spa_nus_dataset import SPA_Nus_Dataset
 # yapf: disable
 from .pipelines import (AffineResize, BackgroundPointsFilter, GlobalAlignment,
                         GlobalRotScaleTrans, IndoorPatchPointSample,
@@ -24,13 +17,30 @@ from .pipelines import (AffineResize, BackgroundPointsFilter, GlobalAlignment,
                         RandomShiftScale, RangeLimitedRandomCrop,
                         VoxelBasedPointSampler)
 # yapf: enable
-from .s3dis_dataset import S3DISDataset, S3DISSegDataset
-from .scannet_dataset import (ScanNetDataset, ScanNetInstanceSegDataset,
-                              ScanNetSegDataset)
-from .semantickitti_dataset import SemanticKITTIDataset
-from .sunrgbd_dataset import SUNRGBDDataset
 from .utils import get_loading_pipeline
-from .waymo_dataset import WaymoDataset
+
+# The dataset modules pull in the devkits of their benchmarks, so they are
+# imported the first time they are built from a config (see `LazyRegistry`)
+# or accessed from this package.
+_LAZY_MODULES = {
+    'Custom3DSegDataset': '.custom_3d_seg',
+    'KittiDataset': '.kitti_dataset',
+    'KittiMonoDataset': '.kitti_mono_dataset',
+    'LyftDataset': '.lyft_dataset',
+    'NuScenesDataset': '.nuscenes_dataset',
+    'NuScenesMonoDataset': '.nuscenes_mono_dataset',
+    'SPADataset': '.spa_dataset',
+    'SPA_MVX_Dataset': '.spa_mvx_dataset',
+    'SPA_Nus_Dataset': '.spa_nus_dataset',
+    'S3DISDataset': '.s3dis_dataset',
+    'S3DISSegDataset': '.s3dis_dataset',
+    'ScanNetDataset': '.scannet_dataset',
+    'ScanNetInstanceSegDataset': '.scannet_dataset',
+    'ScanNetSegDataset': '.scannet_dataset',
+    'SemanticKITTIDataset': '.semantickitti_dataset',
+    'SUNRGBDDataset': '.sunrgbd_dataset',
+    'WaymoDataset': '.waymo_dataset',
+}
 
 __all__ = [
     'KittiDataset', 'KittiMonoDataset', 'build_dataloader', 'DATASETS',
@@ -47,5 +57,14 @@ __all__ = [
     'RandomJitterPoints', 'ObjectNameFilter', 'AffineResize',
     'RandomShiftScale', 'LoadPointsFromDict', 'PIPELINES',
     'RangeLimitedRandomCrop', 'RandomRotate', 'MultiViewWrapper',
-    'SPADataset', 'SPA_MVX_Dataset', "SPA_Nus_Dataset"
+    'SPADataset', 'SPA_MVX_Dataset', 'SPA_Nus_Dataset'
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(_LAZY_MODULES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -3,6 +3,7 @@ import platform
 
 from mmcv.utils import Registry, build_from_cfg
 
+from mmdet3d.utils import LazyRegistry
 from mmdet.datasets import DATASETS as MMDET_DATASETS
 from mmdet.datasets.builder import _concat_dataset
 
@@ -16,7 +17,7 @@ if platform.system() != 'Windows':
     resource.setrlimit(resource.RLIMIT_NOFILE, (soft_limit, hard_limit))
 
 OBJECTSAMPLERS = Registry('Object sampler')
-DATASETS = Registry('dataset')
+DATASETS = LazyRegistry('dataset', locations=['mmdet3d.datasets'])
 PIPELINES = Registry('pipeline')
 
 
@@ -37,10 +38,11 @@ def build_dataset(cfg, default_args=None):
         dataset = ClassBalancedDataset(
             build_dataset(cfg['dataset'], default_args), cfg['oversample_thr'])
     elif cfg['type'] == 'CBGSDataset':
-        dataset = CBGSDataset(build_dataset(cfg['dataset'], default_args))
+        dataset = CBGSDataset(
+            build_dataset(cfg['dataset'], default_args), cfg.get('seed'))
     elif isinstance(cfg.get('ann_file'), (list, tuple)):
         dataset = _concat_dataset(cfg, default_args)
-    elif cfg['type'] in DATASETS._module_dict.keys():
+    elif cfg['type'] in DATASETS:
         dataset = build_from_cfg(cfg, DATASETS, default_args)
     else:
         dataset = build_from_cfg(cfg, MMDET_DATASETS, default_args)
@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import tempfile
 import warnings
+from multiprocessing import Pool
 from os import path as osp
 
 import mmcv
@@ -12,6 +13,22 @@ from .builder import DATASETS
 from .pipelines import Compose
 from .utils import extract_result_dict, get_loading_pipeline
 
+# dataset and loading pipeline of the workers loading ground truth masks
+_gt_worker_args = None
+
+
+def _init_gt_worker(dataset, pipeline):
+    """Store the dataset and the loading pipeline in a worker process."""
+    global _gt_worker_args
+    _gt_worker_args = (dataset, pipeline)
+
+
+def _load_gt_sem_mask(index):
+    """Load the ground truth semantic mask of a sample in a worker."""
+    dataset, pipeline = _gt_worker_args
+    return dataset._extract_data(
+        index, pipeline, 'pts_semantic_mask', load_annos=True)
+
 
 @DATASETS.register_module()
 @SEG_DATASETS.register_module()
@@ -307,16 +324,80 @@ class Custom3DSegDataset(Dataset):
         mmcv.dump(outputs, out)
         return outputs, tmp_dir
 
+    def gt_sem_masks(self, indices=None, pipeline=None, nproc=1):
+        """Load the ground truth semantic masks one by one.
+
+        Args:
+            indices (Iterable[int], optional): Indices of the samples to load.
+                Defaults to all the samples in ``self.data_infos``.
+            pipeline (list[dict] | :obj:`Compose`, optional): Raw data loading
+                pipeline. Default: None.
+            nproc (int, optional): Number of worker processes loading the
+                masks. Default: 1.
+
+        Yields:
+            torch.Tensor: Ground truth semantic mask of each sample, in the
+                order of ``indices``.
+        """
+        if indices is None:
+            indices = range(len(self.data_infos))
+        if not isinstance(pipeline, Compose):
+            pipeline = self._get_pipeline(pipeline)
+        if nproc <= 1:
+            for i in indices:
+                yield self._extract_data(
+                    i, pipeline, 'pts_semantic_mask', load_annos=True)
+            return
+        with Pool(
+                nproc, initializer=_init_gt_worker,
+                initargs=(self, pipeline)) as pool:
+            yield from pool.imap(_load_gt_sem_mask, indices)
+
+    def seg_hists(self, results, indices=None, pipeline=None, nproc=1):
+        """Compute the confusion matrix of each result.
+
+        Only one ground truth mask per worker is held in memory at a time,
+        so the results can be turned into confusion matrices while testing
+        and the predicted masks can be released early.
+
+        Args:
+            results (list[dict]): List of results.
+            indices (list[int], optional): Indices of the samples the
+                results belong to. Defaults to all the samples in
+                ``self.data_infos``.
+            pipeline (list[dict] | :obj:`Compose`, optional): Raw data loading
+                pipeline. Default: None.
+            nproc (int, optional): Number of worker processes loading the
+                ground truth masks. Default: 1.
+
+        Yields:
+            np.ndarray: Confusion matrix of each result in shape
+                (num_classes, num_classes).
+        """
+        from mmdet3d.core.evaluation import seg_hist
+        if indices is None:
+            indices = range(len(self.data_infos))
+        assert len(results) == len(indices)
+        gt_sem_masks = self.gt_sem_masks(indices, pipeline, nproc)
+        for result, gt_sem_mask in zip(results, gt_sem_masks):
+            yield seg_hist(gt_sem_mask, result['semantic_mask'],
+                           len(self.CLASSES), self.ignore_index)
+
     def evaluate(self,
                  results,
                  metric=None,
                  logger=None,
                  show=False,
                  out_dir=None,
-                 pipeline=None):
+                 pipeline=None,
+                 nproc=1):
         """Evaluate.
 
-        Evaluation in semantic segmentation protocol.
+        Evaluation in semantic segmentation protocol. The confusion matrices
+        are accumulated while the ground truth masks are loaded, which can be
+        done by ``nproc`` worker processes. Results computed by
+        :meth:`seg_hists` during testing (dict with a ``seg_hist`` key) are
+        summed directly.
 
         Args:
             results (list[dict]): List of results.
@@ -329,11 +410,13 @@ class Custom3DSegDataset(Dataset):
                 Defaults to None.
             pipeline (list[dict], optional): raw data loading for showing.
                 Default: None.
+            nproc (int, optional): Number of worker processes loading the
+                ground truth masks. Default: 1.
 
         Returns:
             dict: Evaluation results.
         """
-        from mmdet3d.core.evaluation import seg_eval
+        from mmdet3d.core.evaluation import seg_eval_hist
         assert isinstance(
             results, list), f'Expect results to be list, got {type(results)}.'
         assert len(results) > 0, 'Expect length of results > 0.'
@@ -342,19 +425,16 @@ class Custom3DSegDataset(Dataset):
             results[0], dict
         ), f'Expect elements in results to be dict, got {type(results[0])}.'
 
-        load_pipeline = self._get_pipeline(pipeline)
-        pred_sem_masks = [result['semantic_mask'] for result in results]
-        gt_sem_masks = [
-            self._extract_data(
-                i, load_pipeline, 'pts_semantic_mask', load_annos=True)
-            for i in range(len(self.data_infos))
-        ]
-        ret_dict = seg_eval(
-            gt_sem_masks,
-            pred_sem_masks,
-            self.label2cat,
-            self.ignore_index,
-            logger=logger)
+        if all('seg_hist' in result for result in results):
+            assert not show, 'Cannot show results without semantic masks'
+            hists = (result['seg_hist'] for result in results)
+        else:
+            hists = self.seg_hists(results, pipeline=pipeline, nproc=nproc)
+        num_classes = len(self.CLASSES)
+        hist = np.zeros((num_classes, num_classes), dtype=np.int64)
+        for seg_hist in hists:
+            hist += seg_hist
+        ret_dict = seg_eval_hist(hist, self.label2cat, logger=logger)
 
         if show:
             self.show(results, out_dir, pipeline=pipeline)
@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import numpy as np
 
+from mmdet.core import sync_random_seed
 from .builder import DATASETS
 
 
@@ -10,61 +11,91 @@ class CBGSDataset(object):
     paper `Class-balanced Grouping and Sampling for Point Cloud 3D Object
     Detection <https://arxiv.org/abs/1908.09492.>`_.
 
-    Balance the number of scenes under different classes.
+    Balance the number of scenes under different classes. The class-to-sample
+    index is taken from ``dataset.get_class_sample_inds()`` when the dataset
+    provides it, and the scenes are redrawn every epoch once
+    :meth:`set_epoch` is called (e.g. by :class:`SetDatasetEpochHook`).
+
+    Note:
+        The scenes are redrawn in the main process, so the data loader
+        workers only see them if they are not persistent.
 
     Args:
         dataset (:obj:`CustomDataset`): The dataset to be class sampled.
+        seed (int, optional): The scenes of epoch ``i`` are drawn with seed
+            ``seed + i``. If not given, a seed is drawn on rank 0 and
+            broadcast, so that every process samples the same scenes.
+            Default: None.
     """
 
-    def __init__(self, dataset):
+    def __init__(self, dataset, seed=None):
         self.dataset = dataset
         self.CLASSES = dataset.CLASSES
         self.cat2id = {name: i for i, name in enumerate(self.CLASSES)}
+        self.seed = sync_random_seed(seed)
+        self.epoch = 0
+        self.class_sample_inds = self._get_class_sample_inds()
         self.sample_indices = self._get_sample_indices()
-        # self.dataset.data_infos = self.data_infos
-        if hasattr(self.dataset, 'flag'):
-            self.flag = np.array(
-                [self.dataset.flag[ind] for ind in self.sample_indices],
-                dtype=np.uint8)
-
-    def _get_sample_indices(self):
-        """Load annotations from ann_file.
 
-        Args:
-            ann_file (str): Path of the annotation file.
+    def _get_class_sample_inds(self):
+        """Get the indices of the samples containing each class.
 
         Returns:
-            list[dict]: List of annotations after class sampling.
+            list[np.ndarray]: Sample indices of each class.
         """
+        if hasattr(self.dataset, 'get_class_sample_inds'):
+            return self.dataset.get_class_sample_inds()
         class_sample_idxs = {cat_id: [] for cat_id in self.cat2id.values()}
         for idx in range(len(self.dataset)):
             sample_cat_ids = self.dataset.get_cat_ids(idx)
             for cat_id in sample_cat_ids:
                 class_sample_idxs[cat_id].append(idx)
-        duplicated_samples = sum(
-            [len(v) for _, v in class_sample_idxs.items()])
-        class_distribution = {
-            k: len(v) / duplicated_samples
-            for k, v in class_sample_idxs.items()
-        }
+        return [
+            np.array(v, dtype=np.int64) for v in class_sample_idxs.values()
+        ]
 
-        sample_indices = []
+    def _get_sample_indices(self):
+        """Draw the class balanced scenes of the current epoch.
 
+        Returns:
+            np.ndarray: Indices of the sampled scenes in the wrapped dataset.
+        """
+        rng = np.random.default_rng(self.seed + self.epoch)
+        duplicated_samples = sum(len(v) for v in self.class_sample_inds)
         frac = 1.0 / len(self.CLASSES)
-        ratios = [frac / v for v in class_distribution.values()]
-        for cls_inds, ratio in zip(list(class_sample_idxs.values()), ratios):
-            sample_indices += np.random.choice(cls_inds,
-                                               int(len(cls_inds) *
-                                                   ratio)).tolist()
+        sample_indices = []
+        for cls_inds in self.class_sample_inds:
+            # classes without any scene can not be balanced
+            if len(cls_inds) == 0:
+                continue
+            ratio = frac / (len(cls_inds) / duplicated_samples)
+            sample_indices.append(
+                rng.choice(cls_inds, int(len(cls_inds) * ratio)))
+        if len(sample_indices) == 0:
+            return np.zeros(0, dtype=np.int64)
+        sample_indices = np.concatenate(sample_indices).astype(np.int64)
+        if hasattr(self.dataset, 'flag'):
+            self.flag = np.asarray(
+                self.dataset.flag, dtype=np.uint8)[sample_indices]
         return sample_indices
 
+    def set_epoch(self, epoch):
+        """Redraw the class balanced scenes for a new epoch.
+
+        Args:
+            epoch (int): Index of the epoch about to start.
+        """
+        if epoch != self.epoch:
+            self.epoch = epoch
+            self.sample_indices = self._get_sample_indices()
+
     def __getitem__(self, idx):
         """Get item from infos according to the given index.
 
         Returns:
             dict: Data dictionary of the corresponding index.
         """
-        ori_idx = self.sample_indices[idx]
+        ori_idx = int(self.sample_indices[idx])
         return self.dataset[ori_idx]
 
     def __len__(self):
@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import os
 import tempfile
+from collections.abc import Sequence
 from os import path as osp
 
 import mmcv
@@ -331,7 +332,7 @@ class LyftDataset(Custom3DDataset):
                 directory created for saving json files when
                 `jsonfile_prefix` is not specified.
         """
-        assert isinstance(results, list), 'results must be a list'
+        assert isinstance(results, Sequence), 'results must be a sequence'
         assert len(results) == len(self), (
             'The length of results is not equal to the dataset len: {} != {}'.
             format(len(results), len(self)))
@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import tempfile
+from collections.abc import Sequence
 from os import path as osp
 
 import mmcv
@@ -12,6 +13,7 @@ from ..core.bbox import Box3DMode, Coord3DMode, LiDARInstance3DBoxes
 from .builder import DATASETS
 from .custom_3d import Custom3DDataset
 from .pipelines import Compose
+from .utils import load_class_sample_inds
 
 
 @DATASETS.register_module()
@@ -175,6 +177,22 @@ class NuScenesDataset(Custom3DDataset):
                 cat_ids.append(self.cat2id[name])
         return cat_ids
 
+    def get_class_sample_inds(self):
+        """Get the indices of the samples containing each category.
+
+        The inverted index is built from all ``gt_names`` at once and cached
+        next to the annotation file.
+
+        Returns:
+            list[np.ndarray]: Sorted sample indices, one array per category.
+        """
+        return load_class_sample_inds(
+            self.ann_file,
+            self.data_infos,
+            self.CLASSES,
+            use_valid_flag=self.use_valid_flag,
+            load_interval=self.load_interval)
+
     def load_annotations(self, ann_file):
         """Load annotations from ann_file.
 
@@ -440,7 +458,7 @@ class NuScenesDataset(Custom3DDataset):
                 directory created for saving json files when
                 `jsonfile_prefix` is not specified.
         """
-        assert isinstance(results, list), 'results must be a list'
+        assert isinstance(results, Sequence), 'results must be a sequence'
         assert len(results) == len(self), (
             'The length of results is not equal to the dataset len: {} != {}'.
             format(len(results), len(self)))
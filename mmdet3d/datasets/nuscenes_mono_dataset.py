@@ -2,6 +2,7 @@
 import copy
 import tempfile
 import warnings
+from collections.abc import Sequence
 from os import path as osp
 
 import mmcv
@@ -343,28 +344,28 @@ class NuScenesMonoDataset(CocoDataset):
 
             if sample_id % CAM_NUM == 0:
                 boxes_per_frame = []
-                attrs_per_frame = []
 
             # need to merge results from images of the same sample
             annos = []
-            boxes, attrs = output_to_nusc_box(det)
+            boxes = output_to_nusc_arrays(det)
             sample_token = self.data_infos[sample_id]['token']
-            boxes, attrs = cam_nusc_box_to_global(self.data_infos[sample_id],
-                                                  boxes, attrs,
-                                                  mapped_class_names,
-                                                  self.eval_detection_configs,
-                                                  self.eval_version)
-
-            boxes_per_frame.extend(boxes)
-            attrs_per_frame.extend(attrs)
+            boxes = cam_nusc_arrays_to_global(self.data_infos[sample_id],
+                                              boxes, mapped_class_names,
+                                              self.eval_detection_configs)
+
+            boxes_per_frame.append(boxes)
             # Remove redundant predictions caused by overlap of images
             if (sample_id + 1) % CAM_NUM != 0:
                 continue
-            boxes = global_nusc_box_to_cam(
-                self.data_infos[sample_id + 1 - CAM_NUM], boxes_per_frame,
-                mapped_class_names, self.eval_detection_configs,
-                self.eval_version)
-            cam_boxes3d, scores, labels = nusc_box_to_cam_box3d(boxes)
+            cam_info = self.data_infos[sample_id + 1 - CAM_NUM]
+            boxes = {
+                key: np.concatenate([b[key] for b in boxes_per_frame])
+                for key in boxes_per_frame[0]
+            }
+            boxes = global_nusc_arrays_to_cam(cam_info, boxes,
+                                              mapped_class_names,
+                                              self.eval_detection_configs)
+            cam_boxes3d, scores, labels = nusc_arrays_to_cam_box3d(boxes)
             # box nms 3d over 6 images in a frame
             # TODO: move this global setting into config
             nms_cfg = dict(
@@ -380,7 +381,7 @@ class NuScenesMonoDataset(CocoDataset):
             cam_boxes3d_for_nms = xywhr2xyxyr(cam_boxes3d.bev)
             boxes3d = cam_boxes3d.tensor
             # generate attr scores from attr labels
-            attrs = labels.new_tensor([attr for attr in attrs_per_frame])
+            attrs = labels.new_tensor(boxes['attr'])
             boxes3d, scores, labels, attrs = box3d_multiclass_nms(
                 boxes3d,
                 cam_boxes3d_for_nms,
@@ -391,23 +392,27 @@ class NuScenesMonoDataset(CocoDataset):
                 mlvl_attr_scores=attrs)
             cam_boxes3d = CameraInstance3DBoxes(boxes3d, box_dim=9)
             det = bbox3d2result(cam_boxes3d, scores, labels, attrs)
-            boxes, attrs = output_to_nusc_box(det)
-            boxes, attrs = cam_nusc_box_to_global(
-                self.data_infos[sample_id + 1 - CAM_NUM], boxes, attrs,
-                mapped_class_names, self.eval_detection_configs,
-                self.eval_version)
-
-            for i, box in enumerate(boxes):
-                name = mapped_class_names[box.label]
-                attr = self.get_attr_name(attrs[i], name)
+            boxes = output_to_nusc_arrays(det)
+            boxes = cam_nusc_arrays_to_global(cam_info, boxes,
+                                              mapped_class_names,
+                                              self.eval_detection_configs)
+
+            translations = boxes['center'].tolist()
+            sizes = boxes['wlh'].tolist()
+            rotations = boxes['orientation'].tolist()
+            velocities = boxes['velocity'][:, :2].tolist()
+            scores = boxes['score'].tolist()
+            for i, label in enumerate(boxes['label']):
+                name = mapped_class_names[label]
+                attr = self.get_attr_name(boxes['attr'][i], name)
                 nusc_anno = dict(
                     sample_token=sample_token,
-                    translation=box.center.tolist(),
-                    size=box.wlh.tolist(),
-                    rotation=box.orientation.elements.tolist(),
-                    velocity=box.velocity[:2].tolist(),
+                    translation=translations[i],
+                    size=sizes[i],
+                    rotation=rotations[i],
+                    velocity=velocities[i],
                     detection_name=name,
-                    detection_score=box.score,
+                    detection_score=scores[i],
                     attribute_name=attr)
                 annos.append(nusc_anno)
             # other views results of the same frame should be concatenated
@@ -500,7 +505,7 @@ class NuScenesMonoDataset(CocoDataset):
                 the json filepaths, tmp_dir is the temporal directory created
                 for saving json files when jsonfile_prefix is not specified.
         """
-        assert isinstance(results, list), 'results must be a list'
+        assert isinstance(results, Sequence), 'results must be a sequence'
         assert len(results) == len(self), (
             'The length of results is not equal to the dataset len: {} != {}'.
             format(len(results), len(self)))
@@ -829,12 +834,220 @@ def nusc_box_to_cam_box3d(boxes):
     dims[:, [0, 1, 2]] = dims[:, [1, 2, 0]]
     rots = -rots
 
-    boxes_3d = torch.cat([locs, dims, rots, velocity], dim=1).cuda()
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    boxes_3d = torch.cat([locs, dims, rots, velocity], dim=1).to(device)
     cam_boxes3d = CameraInstance3DBoxes(
         boxes_3d, box_dim=9, origin=(0.5, 0.5, 0.5))
-    scores = torch.Tensor([b.score for b in boxes]).cuda()
-    labels = torch.LongTensor([b.label for b in boxes]).cuda()
+    scores = torch.Tensor([b.score for b in boxes]).to(device)
+    labels = torch.LongTensor([b.label for b in boxes]).to(device)
     nms_scores = scores.new_zeros(scores.shape[0], 10 + 1)
     indices = labels.new_tensor(list(range(scores.shape[0])))
     nms_scores[indices, labels] = scores
     return cam_boxes3d, nms_scores, labels
+
+
+def output_to_nusc_arrays(detection):
+    """Convert the output to arrays of boxes in the nuScenes convention.
+
+    This is the batched counterpart of :func:`output_to_nusc_box`, which
+    keeps the boxes of an image in arrays instead of creating a
+    :obj:`NuScenesBox` for each of them.
+
+    Args:
+        detection (dict): Detection results.
+
+            - boxes_3d (:obj:`BaseInstance3DBoxes`): Detection bbox.
+            - scores_3d (torch.Tensor): Detection scores.
+            - labels_3d (torch.Tensor): Predicted box labels.
+            - attrs_3d (torch.Tensor, optional): Predicted attributes.
+
+    Returns:
+        dict[str, np.ndarray]: Boxes in the camera coordinate, including
+            ``center`` (N, 3), ``wlh`` (N, 3), ``orientation`` (N, 4) as
+            quaternions, ``velocity`` (N, 3), ``score`` (N, ), ``label``
+            (N, ) and ``attr`` (N, ) if the attributes are predicted.
+    """
+    box3d = detection['boxes_3d']
+    box_dims = box3d.dims.numpy()
+    box_yaw = box3d.yaw.numpy().astype(np.float64)
+    num_boxes = len(box3d)
+
+    # convert the dim/rot to nuscbox convention
+    box_dims = box_dims[:, [2, 0, 1]]
+    box_yaw = -box_yaw
+
+    # rotation of pi / 2 around the x axis followed by the yaw
+    # around the z axis, which is ``q2 * q1`` in `output_to_nusc_box`
+    cos, sin = np.cos(box_yaw / 2), np.sin(box_yaw / 2)
+    q2 = pyquaternion.Quaternion(axis=[1, 0, 0], radians=np.pi / 2)
+    q1 = np.stack([cos, np.zeros_like(cos), np.zeros_like(cos), sin], axis=1)
+    velocity = np.zeros((num_boxes, 3))
+    velocity[:, [0, 2]] = box3d.tensor[:, 7:9].numpy()
+
+    boxes = dict(
+        center=box3d.gravity_center.numpy(),
+        wlh=box_dims,
+        orientation=_quaternion_left_multiply(q2, q1),
+        velocity=velocity,
+        score=detection['scores_3d'].numpy(),
+        label=detection['labels_3d'].numpy())
+    if 'attrs_3d' in detection:
+        boxes['attr'] = detection['attrs_3d'].numpy()
+    return boxes
+
+
+def _quaternion_left_multiply(quaternion, quaternions):
+    """Compute ``quaternion * q`` for each quaternion ``q`` of an array.
+
+    Args:
+        quaternion (:obj:`pyquaternion.Quaternion`): Left operand.
+        quaternions (np.ndarray): Right operands with shape (N, 4).
+
+    Returns:
+        np.ndarray: Products with shape (N, 4).
+    """
+    return quaternions @ quaternion._q_matrix().T
+
+
+def _transform_nusc_arrays(boxes, rotation=None, translation=None):
+    """Rotate and then translate the boxes in arrays.
+
+    Args:
+        boxes (dict[str, np.ndarray]): Boxes from
+            :func:`output_to_nusc_arrays`.
+        rotation (:obj:`pyquaternion.Quaternion`, optional): Rotation
+            applied to the centers, orientations and velocities.
+            Default: None.
+        translation (np.ndarray, optional): Translation applied to the
+            centers. Default: None.
+
+    Returns:
+        dict[str, np.ndarray]: Transformed boxes.
+    """
+    boxes = boxes.copy()
+    if rotation is not None:
+        rot_mat = rotation.rotation_matrix
+        boxes['center'] = boxes['center'] @ rot_mat.T
+        boxes['velocity'] = boxes['velocity'] @ rot_mat.T
+        boxes['orientation'] = _quaternion_left_multiply(
+            rotation, boxes['orientation'])
+    if translation is not None:
+        boxes['center'] = boxes['center'] + np.asarray(translation)
+    return boxes
+
+
+def _filter_nusc_arrays_by_range(boxes, classes, eval_configs):
+    """Remove the boxes out of the detection range of their classes.
+
+    Args:
+        boxes (dict[str, np.ndarray]): Boxes in the ego coordinate.
+        classes (list[str]): Mapped classes in the evaluation.
+        eval_configs (object): Evaluation configuration object.
+
+    Returns:
+        dict[str, np.ndarray]: Boxes in the detection range.
+    """
+    cls_range_map = eval_configs.class_range
+    det_ranges = np.array([cls_range_map[name] for name in classes])
+    radius = np.linalg.norm(boxes['center'][:, :2], 2, axis=1)
+    mask = radius <= det_ranges[boxes['label']]
+    return {key: value[mask] for key, value in boxes.items()}
+
+
+def cam_nusc_arrays_to_global(info, boxes, classes, eval_configs):
+    """Convert the boxes in arrays from camera to global coordinate.
+
+    This is the batched counterpart of :func:`cam_nusc_box_to_global`.
+
+    Args:
+        info (dict): Info for a specific sample data, including the
+            calibration information.
+        boxes (dict[str, np.ndarray]): Boxes from
+            :func:`output_to_nusc_arrays`.
+        classes (list[str]): Mapped classes in the evaluation.
+        eval_configs (object): Evaluation configuration object.
+
+    Returns:
+        dict[str, np.ndarray]: Boxes in the global coordinate.
+    """
+    # Move box to ego vehicle coord system
+    boxes = _transform_nusc_arrays(
+        boxes, pyquaternion.Quaternion(info['cam2ego_rotation']),
+        info['cam2ego_translation'])
+    # filter det in ego.
+    boxes = _filter_nusc_arrays_by_range(boxes, classes, eval_configs)
+    # Move box to global coord system
+    return _transform_nusc_arrays(
+        boxes, pyquaternion.Quaternion(info['ego2global_rotation']),
+        info['ego2global_translation'])
+
+
+def global_nusc_arrays_to_cam(info, boxes, classes, eval_configs):
+    """Convert the boxes in arrays from global to camera coordinate.
+
+    This is the batched counterpart of :func:`global_nusc_box_to_cam`.
+
+    Args:
+        info (dict): Info for a specific sample data, including the
+            calibration information.
+        boxes (dict[str, np.ndarray]): Boxes in the global coordinate.
+        classes (list[str]): Mapped classes in the evaluation.
+        eval_configs (object): Evaluation configuration object.
+
+    Returns:
+        dict[str, np.ndarray]: Boxes in the camera coordinate.
+    """
+    # Move box to ego vehicle coord system
+    boxes = _transform_nusc_arrays(
+        boxes, translation=-np.array(info['ego2global_translation']))
+    boxes = _transform_nusc_arrays(
+        boxes,
+        pyquaternion.Quaternion(info['ego2global_rotation']).inverse)
+    # filter det in ego.
+    boxes = _filter_nusc_arrays_by_range(boxes, classes, eval_configs)
+    # Move box to camera coord system
+    boxes = _transform_nusc_arrays(
+        boxes, translation=-np.array(info['cam2ego_translation']))
+    return _transform_nusc_arrays(
+        boxes,
+        pyquaternion.Quaternion(info['cam2ego_rotation']).inverse)
+
+
+def nusc_arrays_to_cam_box3d(boxes, num_classes=10, device=None):
+    """Convert boxes in arrays to :obj:`CameraInstance3DBoxes`.
+
+    This is the batched counterpart of :func:`nusc_box_to_cam_box3d`.
+
+    Args:
+        boxes (dict[str, np.ndarray]): Boxes in the camera coordinate.
+        num_classes (int, optional): Number of classes. Default: 10.
+        device (str | torch.device, optional): Device of the returned
+            tensors. If not specified, use GPU when it is available and CPU
+            otherwise. Default: None.
+
+    Returns:
+        tuple (:obj:`CameraInstance3DBoxes` | torch.Tensor | torch.Tensor):
+            Converted 3D bounding boxes, scores and labels.
+    """
+    if device is None:
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    # yaw of the orientations as `pyquaternion.Quaternion.yaw_pitch_roll`
+    quats = boxes['orientation']
+    quats = quats / np.linalg.norm(quats, axis=1, keepdims=True)
+    w, x, y, z = quats.T
+    yaws = np.arctan2(2 * (w * z - x * y), 1 - 2 * (y**2 + z**2))
+
+    # convert nusbox to cambox convention
+    dims = boxes['wlh'][:, [1, 2, 0]]
+    rots = -yaws[:, None]
+    velocity = boxes['velocity'][:, 0::2]
+    boxes_3d = np.concatenate([boxes['center'], dims, rots, velocity], axis=1)
+    boxes_3d = torch.tensor(boxes_3d, dtype=torch.float32, device=device)
+    cam_boxes3d = CameraInstance3DBoxes(
+        boxes_3d, box_dim=9, origin=(0.5, 0.5, 0.5))
+    scores = torch.tensor(boxes['score'], dtype=torch.float32, device=device)
+    labels = torch.tensor(boxes['label'], dtype=torch.long, device=device)
+    nms_scores = scores.new_zeros(scores.shape[0], num_classes + 1)
+    indices = torch.arange(scores.shape[0], device=device)
+    nms_scores[indices, labels] = scores
+    return cam_boxes3d, nms_scores, labels
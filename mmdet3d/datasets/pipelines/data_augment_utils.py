@@ -10,7 +10,7 @@ from mmdet3d.core.bbox import box_np_ops
 warnings.filterwarnings('ignore', category=NumbaPerformanceWarning)
 
 
-@numba.njit
+@numba.njit(cache=True)
 def _rotation_box2d_jit_(corners, angle, rot_mat_T):
     """Rotate 2D boxes.
 
@@ -28,7 +28,60 @@ def _rotation_box2d_jit_(corners, angle, rot_mat_T):
     corners[:] = corners @ rot_mat_T
 
 
-@numba.jit(nopython=True)
+@numba.njit(cache=True)
+def _box_pair_collision(box, qbox, clockwise=True):
+    """Test whether two 2D boxes collide.
+
+    Args:
+        box (np.ndarray): Corners of a box with shape (4, 2).
+        qbox (np.ndarray): Corners of the other box with shape (4, 2).
+        clockwise (bool, optional): Whether the corners are in
+            clockwise order. Default: True.
+
+    Returns:
+        bool: Whether the edges of the boxes intersect or one box
+            contains the other.
+    """
+    for k in range(4):
+        A = box[k]
+        B = box[(k + 1) % 4]
+        for box_l in range(4):
+            C = qbox[box_l]
+            D = qbox[(box_l + 1) % 4]
+            acd = (D[1] - A[1]) * (C[0] - A[0]) > (C[1] - A[1]) * (D[0] - A[0])
+            bcd = (D[1] - B[1]) * (C[0] - B[0]) > (C[1] - B[1]) * (D[0] - B[0])
+            if acd != bcd:
+                abc = (C[1] - A[1]) * (B[0] - A[0]) > (B[1] - A[1]) * (
+                    C[0] - A[0])
+                abd = (D[1] - A[1]) * (B[0] - A[0]) > (B[1] - A[1]) * (
+                    D[0] - A[0])
+                if abc != abd:
+                    return True  # collision.
+    # now check complete overlap.
+    # box overlap qbox:
+    if _box_contains_corners(box, qbox, clockwise):
+        return True
+    return _box_contains_corners(qbox, box, clockwise)
+
+
+@numba.njit(cache=True)
+def _box_contains_corners(box, qbox, clockwise=True):
+    """Test whether all corners of ``qbox`` are inside ``box``."""
+    for box_l in range(4):  # point l in qbox
+        for k in range(4):  # corner k in box
+            vec_x = box[k, 0] - box[(k + 1) % 4, 0]
+            vec_y = box[k, 1] - box[(k + 1) % 4, 1]
+            if clockwise:
+                vec_x = -vec_x
+                vec_y = -vec_y
+            cross = vec_y * (box[k, 0] - qbox[box_l, 0])
+            cross -= vec_x * (box[k, 1] - qbox[box_l, 1])
+            if cross >= 0:
+                return False
+    return True
+
+
+@numba.jit(nopython=True, cache=True)
 def box_collision_test(boxes, qboxes, clockwise=True):
     """Box collision test.
 
@@ -41,11 +94,6 @@ def box_collision_test(boxes, qboxes, clockwise=True):
     N = boxes.shape[0]
     K = qboxes.shape[0]
     ret = np.zeros((N, K), dtype=np.bool_)
-    slices = np.array([1, 2, 3, 0])
-    lines_boxes = np.stack((boxes, boxes[:, slices, :]),
-                           axis=2)  # [N, 4, 2(line), 2(xy)]
-    lines_qboxes = np.stack((qboxes, qboxes[:, slices, :]), axis=2)
-    # vec = np.zeros((2,), dtype=boxes.dtype)
     boxes_standup = box_np_ops.corner_to_standup_nd_jit(boxes)
     qboxes_standup = box_np_ops.corner_to_standup_nd_jit(qboxes)
     for i in range(N):
@@ -59,73 +107,12 @@ def box_collision_test(boxes, qboxes, clockwise=True):
                     min(boxes_standup[i, 3], qboxes_standup[j, 3]) -
                     max(boxes_standup[i, 1], qboxes_standup[j, 1]))
                 if ih > 0:
-                    for k in range(4):
-                        for box_l in range(4):
-                            A = lines_boxes[i, k, 0]
-                            B = lines_boxes[i, k, 1]
-                            C = lines_qboxes[j, box_l, 0]
-                            D = lines_qboxes[j, box_l, 1]
-                            acd = (D[1] - A[1]) * (C[0] -
-                                                   A[0]) > (C[1] - A[1]) * (
-                                                       D[0] - A[0])
-                            bcd = (D[1] - B[1]) * (C[0] -
-                                                   B[0]) > (C[1] - B[1]) * (
-                                                       D[0] - B[0])
-                            if acd != bcd:
-                                abc = (C[1] - A[1]) * (B[0] - A[0]) > (
-                                    B[1] - A[1]) * (
-                                        C[0] - A[0])
-                                abd = (D[1] - A[1]) * (B[0] - A[0]) > (
-                                    B[1] - A[1]) * (
-                                        D[0] - A[0])
-                                if abc != abd:
-                                    ret[i, j] = True  # collision.
-                                    break
-                        if ret[i, j] is True:
-                            break
-                    if ret[i, j] is False:
-                        # now check complete overlap.
-                        # box overlap qbox:
-                        box_overlap_qbox = True
-                        for box_l in range(4):  # point l in qboxes
-                            for k in range(4):  # corner k in boxes
-                                vec = boxes[i, k] - boxes[i, (k + 1) % 4]
-                                if clockwise:
-                                    vec = -vec
-                                cross = vec[1] * (
-                                    boxes[i, k, 0] - qboxes[j, box_l, 0])
-                                cross -= vec[0] * (
-                                    boxes[i, k, 1] - qboxes[j, box_l, 1])
-                                if cross >= 0:
-                                    box_overlap_qbox = False
-                                    break
-                            if box_overlap_qbox is False:
-                                break
-
-                        if box_overlap_qbox is False:
-                            qbox_overlap_box = True
-                            for box_l in range(4):  # point box_l in boxes
-                                for k in range(4):  # corner k in qboxes
-                                    vec = qboxes[j, k] - qboxes[j, (k + 1) % 4]
-                                    if clockwise:
-                                        vec = -vec
-                                    cross = vec[1] * (
-                                        qboxes[j, k, 0] - boxes[i, box_l, 0])
-                                    cross -= vec[0] * (
-                                        qboxes[j, k, 1] - boxes[i, box_l, 1])
-                                    if cross >= 0:  #
-                                        qbox_overlap_box = False
-                                        break
-                                if qbox_overlap_box is False:
-                                    break
-                            if qbox_overlap_box:
-                                ret[i, j] = True  # collision.
-                        else:
-                            ret[i, j] = True  # collision.
+                    ret[i, j] = _box_pair_collision(boxes[i], qboxes[j],
+                                                    clockwise)
     return ret
 
 
-@numba.njit
+@numba.njit(cache=True)
 def noise_per_box(boxes, valid_mask, loc_noises, rot_noises):
     """Add noise to every box (only on the horizontal plane).
 
@@ -166,7 +153,7 @@ def noise_per_box(boxes, valid_mask, loc_noises, rot_noises):
     return success_mask
 
 
-@numba.njit
+@numba.njit(cache=True)
 def noise_per_box_v2_(boxes, valid_mask, loc_noises, rot_noises,
                       global_rot_noises):
     """Add noise to every box (only on the horizontal plane). Version 2 used
@@ -245,13 +232,286 @@ def _select_transform(transform, indices):
     """
     result = np.zeros((transform.shape[0], *transform.shape[2:]),
                       dtype=transform.dtype)
-    for i in range(transform.shape[0]):
-        if indices[i] != -1:
-            result[i] = transform[i, indices[i]]
+    selected = np.nonzero(indices != -1)[0]
+    result[selected] = transform[selected, indices[selected]]
     return result
 
 
-@numba.njit
+def _noise_box_corners(boxes, loc_noises, rot_noises, global_rot_noises=None):
+    """Compute the corners of all noise candidates of all boxes at once.
+
+    Args:
+        boxes (np.ndarray): Input boxes with shape (N, 5).
+        loc_noises (np.ndarray): Location noises with shape (N, M, 3).
+        rot_noises (np.ndarray): Rotation noises with shape (N, M).
+        global_rot_noises (np.ndarray, optional): Global rotation noises
+            with shape (N, M). If given, the boxes are first rotated around
+            the origin as in :func:`noise_per_box_v2_`. Default: None.
+
+    Returns:
+        tuple[np.ndarray]: Corners of the candidates with shape
+            (N, M, 4, 2), and the location and rotation noises of the
+            candidates, which include the global rotation if it is applied.
+    """
+    dtype = boxes.dtype
+    if global_rot_noises is None:
+        box_corners = box_np_ops.box2d_to_corner_jit(boxes)[:, None]
+        centers = boxes[:, None, :2]
+    else:
+        current_radius = np.sqrt(boxes[:, 0]**2 + boxes[:, 1]**2)
+        current_grot = np.arctan2(boxes[:, 0], boxes[:, 1])[:, None]
+        dst_grot = current_grot + global_rot_noises
+        dst_pos = current_radius[:, None, None] * np.stack(
+            [np.sin(dst_grot), np.cos(dst_grot)], axis=-1)
+        dst_boxes = np.repeat(boxes[:, None], dst_grot.shape[1], axis=1)
+        dst_boxes[..., :2] = dst_pos
+        dst_boxes[..., -1] += dst_grot - current_grot
+        box_corners = box_np_ops.box2d_to_corner_jit(dst_boxes.reshape(
+            -1, 5)).reshape(dst_boxes.shape[:2] + (4, 2))
+        centers = dst_boxes[..., :2]
+
+    # rotate the corners around the box centers and then translate them
+    rot_sin = np.sin(rot_noises).astype(dtype)[..., None]
+    rot_cos = np.cos(rot_noises).astype(dtype)[..., None]
+    rel_x = box_corners[..., 0] - centers[..., None, 0]
+    rel_y = box_corners[..., 1] - centers[..., None, 1]
+    corners = np.stack(
+        [rel_x * rot_cos - rel_y * rot_sin, rel_x * rot_sin + rel_y * rot_cos],
+        axis=-1)
+    corners += (centers + loc_noises[..., :2])[..., None, :]
+
+    if global_rot_noises is not None:
+        loc_noises = loc_noises.copy()
+        loc_noises[..., :2] += centers - boxes[:, None, :2]
+        rot_noises = rot_noises + (dst_grot - current_grot)
+    return corners, loc_noises, rot_noises
+
+
+@numba.njit(cache=True)
+def _standup_to_cells(corners, lower, cell_size, grid_size):
+    """Get the range of grid cells covered by the standup box of corners."""
+    x0 = int((corners[:, 0].min() - lower[0]) / cell_size)
+    y0 = int((corners[:, 1].min() - lower[1]) / cell_size)
+    x1 = int((corners[:, 0].max() - lower[0]) / cell_size)
+    y1 = int((corners[:, 1].max() - lower[1]) / cell_size)
+    return (max(x0, 0), max(y0, 0), min(x1, grid_size[0] - 1),
+            min(y1, grid_size[1] - 1))
+
+
+def noise_per_box_hashed(box_corners, candidate_corners, valid_mask):
+    """Select a collision-free noise candidate for every box.
+
+    The result is the same as :func:`noise_per_box` and
+    :func:`noise_per_box_v2_`: the boxes are visited in order and each one
+    takes its first candidate that does not collide with the other boxes
+    at their current (noised or original) positions. Instead of testing a
+    candidate against all boxes, the boxes are stored in a BEV spatial hash
+    and only the boxes in the cells covered by the candidate are tested.
+
+    Args:
+        box_corners (np.ndarray): BEV corners of the boxes with shape
+            (N, 4, 2).
+        candidate_corners (np.ndarray): BEV corners of the noise candidates
+            with shape (N, M, 4, 2).
+        valid_mask (np.ndarray): Mask to indicate which boxes are valid
+            with shape (N).
+
+    Returns:
+        np.ndarray: Index of the selected candidate of each box, -1 if
+            all candidates collide.
+    """
+    num_boxes, num_tests = candidate_corners.shape[:2]
+    if num_boxes == 0 or num_tests == 0:
+        return -np.ones((num_boxes, ), dtype=np.int64)
+    all_corners = np.concatenate(
+        [box_corners, candidate_corners.reshape(-1, 4, 2)])
+    lower = all_corners.min(axis=(0, 1)).astype(np.float64)
+    upper = all_corners.max(axis=(0, 1)).astype(np.float64)
+    # the cells are larger than any box, so that a box covers at most
+    # 2 x 2 cells, but their number is bounded when the boxes are spread out
+    extents = all_corners.max(axis=1) - all_corners.min(axis=1)
+    cell_size = max(extents.max() * 1.01, (upper - lower).max() / 256, 1e-3)
+    grid_size = ((upper - lower) // cell_size).astype(np.int64) + 1
+    return _noise_per_box_hashed(box_corners, candidate_corners, valid_mask,
+                                 lower, cell_size, grid_size)
+
+
+@numba.njit(cache=True)
+def _noise_per_box_hashed(box_corners, candidate_corners, valid_mask, lower,
+                          cell_size, grid_size):
+    """Select noise candidates with boxes stored in a BEV grid.
+
+    Args:
+        box_corners (np.ndarray): BEV corners of the boxes with shape
+            (N, 4, 2).
+        candidate_corners (np.ndarray): BEV corners of the noise candidates
+            with shape (N, M, 4, 2).
+        valid_mask (np.ndarray): Mask to indicate which boxes are valid
+            with shape (N).
+        lower (np.ndarray): Lower bound of the grid along x and y axes.
+        cell_size (float): Size of the grid cells.
+        grid_size (np.ndarray): Number of cells along x and y axes.
+
+    Returns:
+        np.ndarray: Index of the selected candidate of each box, -1 if
+            all candidates collide.
+    """
+    num_boxes = box_corners.shape[0]
+    num_tests = candidate_corners.shape[1]
+    success_mask = -np.ones((num_boxes, ), dtype=np.int64)
+
+    # cells are linked lists of entries, an entry is outdated once its box
+    # is moved and inserted again
+    head = -np.ones((grid_size[0] * grid_size[1], ), dtype=np.int64)
+    capacity = 2 * 9 * num_boxes
+    entry_box = np.zeros((capacity, ), dtype=np.int64)
+    entry_next = np.zeros((capacity, ), dtype=np.int64)
+    entry_version = np.zeros((capacity, ), dtype=np.int64)
+    box_version = np.zeros((num_boxes, ), dtype=np.int64)
+    num_entries = 0
+    current_corners = box_corners.copy()
+    standups = box_np_ops.corner_to_standup_nd_jit(current_corners)
+    for i in range(num_boxes):
+        x0, y0, x1, y1 = _standup_to_cells(current_corners[i], lower,
+                                           cell_size, grid_size)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cx * grid_size[1] + cy
+                entry_box[num_entries] = i
+                entry_version[num_entries] = 0
+                entry_next[num_entries] = head[cell]
+                head[cell] = num_entries
+                num_entries += 1
+
+    last_query = -np.ones((num_boxes, ), dtype=np.int64)
+    num_queries = 0
+    for i in range(num_boxes):
+        if not valid_mask[i]:
+            continue
+        for j in range(num_tests):
+            corners = candidate_corners[i, j]
+            xmin = corners[:, 0].min()
+            ymin = corners[:, 1].min()
+            xmax = corners[:, 0].max()
+            ymax = corners[:, 1].max()
+            x0, y0, x1, y1 = _standup_to_cells(corners, lower, cell_size,
+                                               grid_size)
+            collided = False
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    entry = head[cx * grid_size[1] + cy]
+                    while entry >= 0 and not collided:
+                        k = entry_box[entry]
+                        if k != i and last_query[k] != num_queries and \
+                                entry_version[entry] == box_version[k]:
+                            last_query[k] = num_queries
+                            iw = min(xmax, standups[k, 2]) - max(
+                                xmin, standups[k, 0])
+                            ih = min(ymax, standups[k, 3]) - max(
+                                ymin, standups[k, 1])
+                            if iw > 0 and ih > 0:
+                                collided = _box_pair_collision(
+                                    corners, current_corners[k])
+                        entry = entry_next[entry]
+            num_queries += 1
+            if not collided:
+                success_mask[i] = j
+                current_corners[i] = corners
+                standups[i, 0] = xmin
+                standups[i, 1] = ymin
+                standups[i, 2] = xmax
+                standups[i, 3] = ymax
+                box_version[i] += 1
+                for cx in range(x0, x1 + 1):
+                    for cy in range(y0, y1 + 1):
+                        cell = cx * grid_size[1] + cy
+                        entry_box[num_entries] = i
+                        entry_version[num_entries] = box_version[i]
+                        entry_next[num_entries] = head[cell]
+                        head[cell] = num_entries
+                        num_entries += 1
+                break
+    return success_mask
+
+
+@numba.njit(cache=True)
+def _points_in_first_box_hashed(points, box_cells, normal_vec, d, valid_mask,
+                                lower, upper, cell_size, grid_size):
+    """Find the first valid box containing each point with a BEV grid.
+
+    The points are sorted into the grid cells with a counting sort, so only
+    the points in the cells covered by a box are tested against its
+    surfaces.
+
+    Args:
+        points (np.ndarray): Points with shape (M, 3).
+        box_cells (np.ndarray): Range of cells (x0, y0, x1, y1) covered by
+            each box with shape (N, 4).
+        normal_vec (np.ndarray): Normal vectors of the box surfaces with
+            shape (N, 6, 3).
+        d (np.ndarray): Offsets of the box surfaces with shape (N, 6).
+        valid_mask (np.ndarray): Mask to indicate which boxes are valid.
+        lower (np.ndarray): Lower bound of the grid along x and y axes.
+        upper (np.ndarray): Upper bound of the grid along x and y axes.
+        cell_size (float): Size of the grid cells.
+        grid_size (np.ndarray): Number of cells along x and y axes.
+
+    Returns:
+        np.ndarray: Index of the first valid box containing each point, -1
+            if the point is not in any valid box.
+    """
+    num_points = points.shape[0]
+    num_boxes = box_cells.shape[0]
+    num_surfaces = normal_vec.shape[1]
+    num_cells = grid_size[0] * grid_size[1]
+
+    # points outside all boxes are not put into the grid
+    point_cells = -np.ones((num_points, ), dtype=np.int64)
+    cell_starts = np.zeros((num_cells + 1, ), dtype=np.int64)
+    for i in range(num_points):
+        x = points[i, 0]
+        y = points[i, 1]
+        if x < lower[0] or x > upper[0] or y < lower[1] or y > upper[1]:
+            continue
+        cx = min(int((x - lower[0]) / cell_size), grid_size[0] - 1)
+        cy = min(int((y - lower[1]) / cell_size), grid_size[1] - 1)
+        point_cells[i] = cx * grid_size[1] + cy
+        cell_starts[point_cells[i] + 1] += 1
+    for cell in range(num_cells):
+        cell_starts[cell + 1] += cell_starts[cell]
+    point_order = np.zeros((cell_starts[num_cells], ), dtype=np.int64)
+    cell_fill = cell_starts[:num_cells].copy()
+    for i in range(num_points):
+        if point_cells[i] >= 0:
+            point_order[cell_fill[point_cells[i]]] = i
+            cell_fill[point_cells[i]] += 1
+
+    point_box_inds = -np.ones((num_points, ), dtype=np.int64)
+    for j in range(num_boxes):
+        if not valid_mask[j]:
+            continue
+        for cx in range(box_cells[j, 0], box_cells[j, 2] + 1):
+            for cy in range(box_cells[j, 1], box_cells[j, 3] + 1):
+                cell = cx * grid_size[1] + cy
+                for idx in range(cell_starts[cell], cell_starts[cell + 1]):
+                    i = point_order[idx]
+                    if point_box_inds[i] >= 0:
+                        continue
+                    inside = True
+                    for k in range(num_surfaces):
+                        sign = (
+                            points[i, 0] * normal_vec[j, k, 0] +
+                            points[i, 1] * normal_vec[j, k, 1] +
+                            points[i, 2] * normal_vec[j, k, 2] + d[j, k])
+                        if sign >= 0:
+                            inside = False
+                            break
+                    if inside:
+                        point_box_inds[i] = j
+    return point_box_inds
+
+
+@numba.njit(cache=True)
 def _rotation_matrix_3d_(rot_mat_T, angle, axis):
     """Get the 3D rotation matrix.
 
@@ -280,7 +540,7 @@ def _rotation_matrix_3d_(rot_mat_T, angle, axis):
         rot_mat_T[2, 2] = rot_cos
 
 
-@numba.njit
+@numba.njit(cache=True)
 def points_transform_(points, centers, point_masks, loc_transform,
                       rot_transform, valid_mask):
     """Apply transforms to points and box centers.
@@ -310,7 +570,7 @@ def points_transform_(points, centers, point_masks, loc_transform,
                     break  # only apply first box's transform
 
 
-@numba.njit
+@numba.njit(cache=True)
 def box3d_transform_(boxes, loc_transform, rot_transform, valid_mask):
     """Transform 3D boxes.
 
@@ -327,6 +587,68 @@ def box3d_transform_(boxes, loc_transform, rot_transform, valid_mask):
             boxes[i, 6] += rot_transform[i]
 
 
+def _points_in_first_box(points, box_corners, surfaces, valid_mask):
+    """Find the first valid box containing each point.
+
+    Args:
+        points (np.ndarray): Points with shape (M, 3).
+        box_corners (np.ndarray): Corners of the 3D boxes with shape
+            (N, 8, 3).
+        surfaces (np.ndarray): Surfaces of the boxes with shape (N, 6, 4, 3).
+        valid_mask (np.ndarray): Mask to indicate which boxes are valid.
+
+    Returns:
+        np.ndarray: Index of the first valid box containing each point, -1
+            if the point is not in any valid box.
+    """
+    num_points = points.shape[0]
+    if num_points == 0 or not valid_mask.any():
+        return -np.ones((num_points, ), dtype=np.int64)
+    standups = np.concatenate(
+        [box_corners[..., :2].min(axis=1), box_corners[..., :2].max(axis=1)],
+        axis=1).astype(np.float64)
+    lower = standups[valid_mask, :2].min(axis=0)
+    upper = standups[valid_mask, 2:].max(axis=0)
+    # cells of the size of an average box
+    extents = standups[valid_mask, 2:] - standups[valid_mask, :2]
+    cell_size = max(extents.mean(), (upper - lower).max() / 1024, 1e-3)
+    grid_size = ((upper - lower) // cell_size).astype(np.int64) + 1
+
+    box_cells = ((standups - np.tile(lower, 2)) // cell_size).astype(np.int64)
+    box_cells = np.clip(box_cells, 0, np.tile(grid_size - 1, 2))
+    normal_vec, d = box_np_ops.surface_equ_3d(surfaces[:, :, :3, :])
+    return _points_in_first_box_hashed(points, box_cells, normal_vec, d,
+                                       valid_mask, lower, upper, cell_size,
+                                       grid_size)
+
+
+def _transform_points_in_boxes(points, centers, point_box_inds, loc_transforms,
+                               rot_transforms):
+    """Apply the transforms of boxes to the points inside them.
+
+    Args:
+        points (np.ndarray): Input points.
+        centers (np.ndarray): Input box centers.
+        point_box_inds (np.ndarray): Index of the box containing each point,
+            -1 if the point is not in any box.
+        loc_transforms (np.ndarray): Location transforms of the boxes.
+        rot_transforms (np.ndarray): Rotation transforms of the boxes.
+    """
+    point_inds = np.nonzero(point_box_inds >= 0)[0]
+    box_inds = point_box_inds[point_inds]
+    rot_sin = np.sin(rot_transforms).astype(points.dtype)[box_inds]
+    rot_cos = np.cos(rot_transforms).astype(points.dtype)[box_inds]
+    box_centers = centers[box_inds, :3].astype(points.dtype)
+    rel = points[point_inds, :3] - box_centers
+    transformed = np.stack([
+        rel[:, 0] * rot_cos - rel[:, 1] * rot_sin,
+        rel[:, 0] * rot_sin + rel[:, 1] * rot_cos, rel[:, 2]
+    ],
+                           axis=1)
+    transformed += box_centers
+    points[point_inds, :3] = transformed + loc_transforms[box_inds]
+
+
 def noise_per_object_v3_(gt_boxes,
                          points=None,
                          valid_mask=None,
@@ -389,23 +711,22 @@ def noise_per_object_v3_(gt_boxes,
         origin=origin,
         axis=2)
 
-    # TODO: rewrite this noise box function?
-    if not enable_grot:
-        selected_noise = noise_per_box(gt_boxes[:, [0, 1, 3, 4, 6]],
-                                       valid_mask, loc_noises, rot_noises)
-    else:
-        selected_noise = noise_per_box_v2_(gt_boxes[:, [0, 1, 3, 4, 6]],
-                                           valid_mask, loc_noises, rot_noises,
-                                           global_rot_noises)
+    # evaluate all candidates of all boxes at once
+    boxes_bev = gt_boxes[:, [0, 1, 3, 4, 6]]
+    candidate_corners, loc_noises, rot_noises = _noise_box_corners(
+        boxes_bev, loc_noises, rot_noises,
+        global_rot_noises if enable_grot else None)
+    selected_noise = noise_per_box_hashed(
+        box_np_ops.box2d_to_corner_jit(boxes_bev), candidate_corners,
+        valid_mask)
 
     loc_transforms = _select_transform(loc_noises, selected_noise)
     rot_transforms = _select_transform(rot_noises, selected_noise)
     surfaces = box_np_ops.corner_to_surfaces_3d_jit(gt_box_corners)
     if points is not None:
-        # TODO: replace this points_in_convex function by my tools?
-        point_masks = box_np_ops.points_in_convex_polygon_3d_jit(
-            points[:, :3], surfaces)
-        points_transform_(points, gt_boxes[:, :3], point_masks, loc_transforms,
-                          rot_transforms, valid_mask)
+        point_box_inds = _points_in_first_box(points[:, :3], gt_box_corners,
+                                              surfaces, valid_mask)
+        _transform_points_in_boxes(points, gt_boxes[:, :3], point_box_inds,
+                                   loc_transforms, rot_transforms)
 
     box3d_transform_(gt_boxes, loc_transforms, rot_transforms, valid_mask)
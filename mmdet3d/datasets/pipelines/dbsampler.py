@@ -9,6 +9,7 @@ import numpy as np
 from mmdet3d.core.bbox import box_np_ops
 from mmdet3d.datasets.pipelines import data_augment_utils
 from ..builder import OBJECTSAMPLERS, PIPELINES
+from .patch_database import PatchChunkReader
 
 
 class BatchSampler:
@@ -93,6 +94,8 @@ class DataBaseSampler(object):
             Default: None.
         points_loader(dict, optional): Config of points loader. Default:
             dict(type='LoadPointsFromFile', load_dim=4, use_dim=[0,1,2,3])
+        file_client_args (dict, optional): Config of file client.
+            Default: dict(backend='disk').
     """
 
     def __init__(self,
@@ -119,6 +122,7 @@ class DataBaseSampler(object):
         self.label2cat = {i: name for i, name in enumerate(classes)}
         self.points_loader = mmcv.build_from_cfg(points_loader, PIPELINES)
         self.file_client = mmcv.FileClient(**file_client_args)
+        self.patch_reader = PatchChunkReader(data_root, file_client_args)
 
         # load data base infos
         if hasattr(self.file_client, 'get_local_path'):
@@ -213,12 +217,24 @@ class DataBaseSampler(object):
                 db_infos[name] = filtered_infos
         return db_infos
 
-    def sample_all(self, gt_bboxes, gt_labels, img=None, ground_plane=None):
+    def sample_all(self,
+                   gt_bboxes,
+                   gt_labels,
+                   img=None,
+                   ground_plane=None,
+                   gt_bboxes_2d=None):
         """Sampling all categories of bboxes.
 
         Args:
             gt_bboxes (np.ndarray): Ground truth bounding boxes.
             gt_labels (np.ndarray): Ground truth labels of boxes.
+            img (np.ndarray, optional): Image to paste the image patches
+                of the sampled objects to. Default: None.
+            ground_plane (np.ndarray, optional): Ground plane to adjust
+                the sampled objects to. Default: None.
+            gt_bboxes_2d (np.ndarray, optional): Ground truth 2D bounding
+                boxes in the image, which are not used in the collision
+                test yet. Default: None.
 
         Returns:
             dict: Dict of sampled 'pseudo ground truths'.
@@ -229,6 +245,10 @@ class DataBaseSampler(object):
                     sampled ground truth 3D bounding boxes
                 - points (np.ndarray): sampled points
                 - group_ids (np.ndarray): ids of sampled ground truths
+                - gt_bboxes_2d (np.ndarray): 2D bounding boxes of sampled
+                    objects, only when ``img`` is given
+                - img (np.ndarray): image with the sampled objects pasted,
+                    only when ``img`` is given
         """
         sampled_num_dict = {}
         sample_num_per_class = []
@@ -287,7 +307,7 @@ class DataBaseSampler(object):
                 s_points_list.append(s_points)
 
             gt_labels = np.array([self.cat2label[s['name']] for s in sampled],
-                                 dtype=np.long)
+                                 dtype=np.int64)
 
             if ground_plane is not None:
                 xyz = sampled_gt_bboxes[:, :3]
@@ -309,8 +329,71 @@ class DataBaseSampler(object):
                           gt_bboxes.shape[0] + len(sampled))
             }
 
+            if img is not None:
+                sampled_gt_bboxes_2d = np.stack(
+                    [s['box2d_camera'] for s in sampled], axis=0)
+                ret['gt_bboxes_2d'] = sampled_gt_bboxes_2d
+                ret['img'] = self.paste_patches(img, sampled,
+                                                sampled_gt_bboxes_2d)
+
         return ret
 
+    def load_patch(self, info):
+        """Load the image patch and mask of a sampled object.
+
+        The patches packed by ``create_groundtruth_database`` are sliced out
+        of their memory-mapped chunks. The ``.png`` patches of the databases
+        created before are still decoded.
+
+        Args:
+            info (dict): Database info of the object.
+
+        Returns:
+            tuple[np.ndarray]: Image patch of shape (h, w, 3) and mask of
+                shape (h, w).
+        """
+        if 'img_patch' in info:
+            return self.patch_reader.read(info['img_patch'])
+        file_path = os.path.join(
+            self.data_root, info['path']) if self.data_root else info['path']
+        img_patch = mmcv.imfrombytes(self.file_client.get(file_path + '.png'))
+        mask = mmcv.imfrombytes(
+            self.file_client.get(file_path + '.mask.png'), flag='grayscale')
+        return img_patch, mask
+
+    def paste_patches(self, img, sampled, bboxes_2d):
+        """Paste the image patches of sampled objects to the image.
+
+        The farther objects are pasted first so that they are occluded by
+        the nearer ones.
+
+        Args:
+            img (np.ndarray): Image to paste the patches to, in place.
+            sampled (list[dict]): Database infos of sampled objects.
+            bboxes_2d (np.ndarray): 2D bounding boxes of sampled objects.
+
+        Returns:
+            np.ndarray: The image with pasted patches.
+        """
+        img_h, img_w = img.shape[:2]
+        dists = np.array(
+            [np.linalg.norm(s['box3d_lidar'][:2]) for s in sampled])
+        for i in np.argsort(-dists, kind='stable'):
+            img_patch, mask = self.load_patch(sampled[i])
+            left, top = bboxes_2d[i, :2].astype(np.int32)
+            # the patch may exceed the image, which has a different size
+            x1, y1 = max(left, 0), max(top, 0)
+            x2 = min(left + mask.shape[1], img_w)
+            y2 = min(top + mask.shape[0], img_h)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            region = (slice(y1 - top, y2 - top), slice(x1 - left, x2 - left))
+            np.copyto(
+                img[y1:y2, x1:x2],
+                img_patch[region],
+                where=mask[region][..., None] > 0)
+        return img
+
     def sample_class_v2(self, name, num, gt_bboxes):
         """Sampling specific categories of bounding boxes.
 
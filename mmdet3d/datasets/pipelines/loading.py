@@ -1,4 +1,8 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
 import mmcv
 import numpy as np
 
@@ -13,16 +17,125 @@ class LoadMultiViewImageFromFiles(object):
 
     Expects results['img_filename'] to be a list of filenames.
 
+    The views are decoded concurrently by a pool of threads, as the image
+    decoders release the GIL. With ``decode_scale`` larger than 1, the
+    images are decoded at a reduced resolution, which is much faster for
+    JPEG files, and the projection matrices in the results (``lidar2img``,
+    ``cam2img`` and ``cam_intrinsic``) are scaled accordingly.
+
     Args:
         to_float32 (bool, optional): Whether to convert the img to float32.
             Defaults to False.
         color_type (str, optional): Color type of the file.
             Defaults to 'unchanged'.
+        num_threads (int, optional): Number of threads decoding the views.
+            The views are decoded sequentially if it is 0. Defaults to 4.
+        decode_scale (int, optional): Ratio to downscale the images by when
+            decoding them, one of 1, 2, 4 and 8. Only supported when
+            ``color_type`` is 'color' or 'grayscale'. Defaults to 1.
+        reuse_buffer (bool, optional): Whether to convert the images to
+            float32 into buffers reused across samples instead of allocating
+            new arrays. The images must then be copied by the following
+            transforms (e.g. ``DefaultFormatBundle``) before the next sample
+            is loaded. Defaults to False.
+        file_client_args (dict, optional): Arguments to instantiate a
+            FileClient. See :class:`mmcv.fileio.FileClient` for details.
+            Defaults to dict(backend='disk').
     """
 
-    def __init__(self, to_float32=False, color_type='unchanged'):
+    _REDUCED_FLAGS = {
+        ('color', 2): cv2.IMREAD_REDUCED_COLOR_2,
+        ('color', 4): cv2.IMREAD_REDUCED_COLOR_4,
+        ('color', 8): cv2.IMREAD_REDUCED_COLOR_8,
+        ('grayscale', 2): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+        ('grayscale', 4): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+        ('grayscale', 8): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    }
+
+    def __init__(self,
+                 to_float32=False,
+                 color_type='unchanged',
+                 num_threads=4,
+                 decode_scale=1,
+                 reuse_buffer=False,
+                 file_client_args=dict(backend='disk')):
+        if decode_scale != 1 and \
+                (color_type, decode_scale) not in self._REDUCED_FLAGS:
+            raise ValueError(
+                f'Cannot decode {color_type} images downscaled by '
+                f'{decode_scale}, decode_scale should be 1, 2, 4 or 8 and '
+                "color_type should be 'color' or 'grayscale'")
         self.to_float32 = to_float32
         self.color_type = color_type
+        self.num_threads = num_threads
+        self.decode_scale = decode_scale
+        self.reuse_buffer = reuse_buffer
+        self.file_client_args = file_client_args.copy()
+        self.file_client = None
+        self._executor = None
+        self._executor_pid = None
+        self._buffers = {}
+
+    def __getstate__(self):
+        # the thread pool and the buffers are created in each process
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_executor_pid'] = None
+        state['_buffers'] = {}
+        return state
+
+    def _get_executor(self):
+        """Get the thread pool of the current process."""
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.num_threads)
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _load_view(self, view_idx, filename):
+        """Decode the image of a view.
+
+        Args:
+            view_idx (int): Index of the view.
+            filename (str): Filename of the image.
+
+        Returns:
+            np.ndarray: Image of the view.
+        """
+        img_bytes = self.file_client.get(filename)
+        if self.decode_scale == 1:
+            img = mmcv.imfrombytes(img_bytes, flag=self.color_type)
+        else:
+            img = cv2.imdecode(
+                np.frombuffer(img_bytes, np.uint8),
+                self._REDUCED_FLAGS[(self.color_type, self.decode_scale)])
+        if not self.to_float32:
+            return img
+        if not self.reuse_buffer:
+            return img.astype(np.float32)
+        buffer = self._buffers.get(view_idx)
+        if buffer is None or buffer.shape != img.shape:
+            buffer = np.empty(img.shape, dtype=np.float32)
+            self._buffers[view_idx] = buffer
+        np.copyto(buffer, img)
+        return buffer
+
+    def _scale_projections(self, results):
+        """Scale the projection matrices to the downscaled images."""
+        for key in ('lidar2img', 'cam2img', 'cam_intrinsic'):
+            if key not in results:
+                continue
+            if isinstance(results[key], list):
+                results[key] = [
+                    self._scale_projection(mat) for mat in results[key]
+                ]
+            else:
+                results[key] = self._scale_projection(results[key])
+
+    def _scale_projection(self, mat):
+        """Scale the rows of image coordinates of a projection matrix."""
+        mat = np.array(mat)
+        mat[..., :2, :] = mat[..., :2, :] / self.decode_scale
+        return mat
 
     def __call__(self, results):
         """Call function to load multi-view image from files.
@@ -35,29 +148,37 @@ class LoadMultiViewImageFromFiles(object):
                 Added keys and values are described below.
 
                 - filename (str): Multi-view image filenames.
-                - img (np.ndarray): Multi-view image arrays.
+                - img (list[np.ndarray]): Multi-view image arrays.
                 - img_shape (tuple[int]): Shape of multi-view image arrays.
                 - ori_shape (tuple[int]): Shape of original image arrays.
                 - pad_shape (tuple[int]): Shape of padded image arrays.
                 - scale_factor (float): Scale factor.
                 - img_norm_cfg (dict): Normalization configuration of images.
         """
+        if self.file_client is None:
+            self.file_client = mmcv.FileClient(**self.file_client_args)
         filename = results['img_filename']
-        # img is of shape (h, w, c, num_views)
-        img = np.stack(
-            [mmcv.imread(name, self.color_type) for name in filename], axis=-1)
-        if self.to_float32:
-            img = img.astype(np.float32)
+        view_inds = range(len(filename))
+        if self.num_threads > 0:
+            imgs = list(self._get_executor().map(self._load_view, view_inds,
+                                                 filename))
+        else:
+            imgs = list(map(self._load_view, view_inds, filename))
+        if self.decode_scale != 1:
+            self._scale_projections(results)
         results['filename'] = filename
-        # unravel to list, see `DefaultFormatBundle` in formatting.py
-        # which will transpose each image separately and then stack into array
-        results['img'] = [img[..., i] for i in range(img.shape[-1])]
-        results['img_shape'] = img.shape
-        results['ori_shape'] = img.shape
+        # the views are kept as a list, see `DefaultFormatBundle` in
+        # formatting.py which will transpose each image separately and then
+        # stack into array
+        results['img'] = imgs
+        # img_shape is of shape (h, w, c, num_views)
+        img_shape = imgs[0].shape + (len(imgs), )
+        results['img_shape'] = img_shape
+        results['ori_shape'] = img_shape
         # Set initial values for default meta_keys
-        results['pad_shape'] = img.shape
+        results['pad_shape'] = img_shape
         results['scale_factor'] = 1.0
-        num_channels = 1 if len(img.shape) < 3 else img.shape[2]
+        num_channels = 1 if len(img_shape) < 4 else img_shape[2]
         results['img_norm_cfg'] = dict(
             mean=np.zeros(num_channels, dtype=np.float32),
             std=np.ones(num_channels, dtype=np.float32),
@@ -68,7 +189,11 @@ class LoadMultiViewImageFromFiles(object):
         """str: Return a string that describes the module."""
         repr_str = self.__class__.__name__
         repr_str += f'(to_float32={self.to_float32}, '
-        repr_str += f"color_type='{self.color_type}')"
+        repr_str += f"color_type='{self.color_type}', "
+        repr_str += f'num_threads={self.num_threads}, '
+        repr_str += f'decode_scale={self.decode_scale}, '
+        repr_str += f'reuse_buffer={self.reuse_buffer}, '
+        repr_str += f'file_client_args={self.file_client_args})'
         return repr_str
 
 
@@ -0,0 +1,132 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import io
+import os.path as osp
+
+import mmcv
+import numpy as np
+
+
+class PatchChunkWriter:
+    """Pack the image patches and masks of a GT database into chunks.
+
+    Every object is stored as its ``(h, w, 3)`` uint8 image patch directly
+    followed by its ``(h, w)`` uint8 mask in a flat uint8 array. The arrays
+    are saved as ``.npy`` chunks of about ``chunk_size`` bytes, so that the
+    patches can be memory-mapped and sliced instead of decoded from images
+    when they are pasted.
+
+    Args:
+        save_dir (str): Directory to save the chunks.
+        rel_dir (str): Directory of the chunks relative to the data root,
+            which is recorded in the index of each patch.
+        chunk_size (int, optional): Number of bytes of each chunk.
+            Default: 256 * 1024**2.
+    """
+
+    def __init__(self, save_dir, rel_dir, chunk_size=256 * 1024**2):
+        self.save_dir = save_dir
+        self.rel_dir = rel_dir
+        self.chunk_size = chunk_size
+        self._chunk_idx = 0
+        self._buffers = []
+        self._offset = 0
+        mmcv.mkdir_or_exist(save_dir)
+
+    def _chunk_name(self):
+        return f'img_patches_{self._chunk_idx:05d}.npy'
+
+    def add(self, img_patch, mask):
+        """Add the image patch and mask of an object.
+
+        Args:
+            img_patch (np.ndarray): Image patch of shape (h, w, 3).
+            mask (np.ndarray): Mask of shape (h, w).
+
+        Returns:
+            dict: Index of the patch, including the ``path`` of its chunk,
+                its ``offset`` in the chunk and its ``shape`` (h, w).
+        """
+        h, w = mask.shape[:2]
+        assert img_patch.shape == (h, w, 3)
+        if self._offset > 0 and self._offset + 4 * h * w > self.chunk_size:
+            self.flush()
+        index = dict(
+            path=osp.join(self.rel_dir, self._chunk_name()),
+            offset=self._offset,
+            shape=(h, w))
+        self._buffers.append(
+            np.ascontiguousarray(img_patch, dtype=np.uint8).reshape(-1))
+        self._buffers.append(
+            np.ascontiguousarray(mask, dtype=np.uint8).reshape(-1))
+        self._offset += 4 * h * w
+        return index
+
+    def flush(self):
+        """Save the current chunk and start a new one."""
+        if self._offset == 0:
+            return
+        np.save(
+            osp.join(self.save_dir, self._chunk_name()),
+            np.concatenate(self._buffers))
+        self._chunk_idx += 1
+        self._buffers = []
+        self._offset = 0
+
+
+class PatchChunkReader:
+    """Read the image patches and masks packed by :class:`PatchChunkWriter`.
+
+    The chunks on disk are memory-mapped and the others are loaded through
+    the file client. Both are kept open, so reading a patch only slices it
+    out of its chunk.
+
+    Args:
+        data_root (str, optional): Root of the paths in the patch indices.
+            Default: None.
+        file_client_args (dict, optional): Config of file client.
+            Default: dict(backend='disk').
+    """
+
+    def __init__(self, data_root=None, file_client_args=dict(backend='disk')):
+        self.data_root = data_root
+        self.file_client_args = file_client_args.copy()
+        self.file_client = None
+        self._chunks = {}
+
+    def _get_chunk(self, path):
+        chunk = self._chunks.get(path)
+        if chunk is None:
+            filepath = osp.join(self.data_root,
+                                path) if self.data_root else path
+            if self.file_client_args['backend'] == 'disk':
+                chunk = np.load(filepath, mmap_mode='r')
+            else:
+                if self.file_client is None:
+                    self.file_client = mmcv.FileClient(**self.file_client_args)
+                chunk = np.load(io.BytesIO(self.file_client.get(filepath)))
+            self._chunks[path] = chunk
+        return chunk
+
+    def read(self, index):
+        """Read a patch.
+
+        Args:
+            index (dict): Index returned by :meth:`PatchChunkWriter.add`.
+
+        Returns:
+            tuple[np.ndarray]: Read-only views of the image patch of shape
+                (h, w, 3) and of the mask of shape (h, w).
+        """
+        h, w = index['shape']
+        start = index['offset']
+        chunk = self._get_chunk(index['path'])
+        img_patch = chunk[start:start + 3 * h * w].reshape(h, w, 3)
+        mask = chunk[start + 3 * h * w:start + 4 * h * w].reshape(h, w)
+        return img_patch, mask
+
+    def __getstate__(self):
+        # the workers of the dataloader open the chunks themselves
+        state = self.__dict__.copy()
+        state['file_client'] = None
+        state['_chunks'] = {}
+        return state
@@ -1033,12 +1033,22 @@ class PointSample(object):
             prior to be sampled. Defaults to None.
         replace (bool, optional): Whether the sampling is with or without
             replacement. Defaults to False.
+        ragged (bool, optional): Whether to keep the point clouds with at
+            most `num_points` points as they are instead of duplicating
+            their points. The samples of different sizes are then batched
+            as a ragged batch, which is supported by the PointNet++
+            backbones and VoteNet. Defaults to False.
     """
 
-    def __init__(self, num_points, sample_range=None, replace=False):
+    def __init__(self,
+                 num_points,
+                 sample_range=None,
+                 replace=False,
+                 ragged=False):
         self.num_points = num_points
         self.sample_range = sample_range
         self.replace = replace
+        self.ragged = ragged
 
     def _points_random_sampling(self,
                                 points,
@@ -1098,6 +1108,8 @@ class PointSample(object):
                 and 'pts_semantic_mask' keys are updated in the result dict.
         """
         points = results['points']
+        if self.ragged and len(points) <= self.num_points:
+            return results
         points, choices = self._points_random_sampling(
             points,
             self.num_points,
@@ -1124,7 +1136,8 @@ class PointSample(object):
         repr_str = self.__class__.__name__
         repr_str += f'(num_points={self.num_points},'
         repr_str += f' sample_range={self.sample_range},'
-        repr_str += f' replace={self.replace})'
+        repr_str += f' replace={self.replace},'
+        repr_str += f' ragged={self.ragged})'
 
         return repr_str
 
@@ -1250,12 +1263,72 @@ class IndoorPatchPointSample(object):
 
         return points
 
+    def _build_grid_index(self, coords):
+        """Build a 2D grid index of the points.
+
+        Points are sorted by the xy cell they fall in, so that the points of
+        consecutive cells along y are stored in a contiguous range.
+
+        Args:
+            coords (np.ndarray): 3D Points.
+
+        Returns:
+            tuple[np.ndarray]: Min and max coordinates of the points, sorted
+                point indices, start of each cell in the sorted indices and
+                shape of the grid.
+        """
+        coord_max = np.amax(coords, axis=0)
+        coord_min = np.amin(coords, axis=0)
+        cell_size = self.block_size / 2.0
+        cells = ((coords[:, :2] - coord_min[:2]) / cell_size).astype(np.int64)
+        grid_shape = np.amax(cells, axis=0) + 1
+        keys = cells[:, 0] * grid_shape[1] + cells[:, 1]
+        order = np.argsort(keys, kind='stable').astype(np.int32)
+        cell_starts = np.zeros(grid_shape[0] * grid_shape[1] + 1, np.int64)
+        np.cumsum(
+            np.bincount(keys, minlength=grid_shape[0] * grid_shape[1]),
+            out=cell_starts[1:])
+        return coord_min, coord_max, order, cell_starts, grid_shape
+
+    def _query_grid_index(self, grid_index, coords, query_min, query_max):
+        """Find the points inside a range of xy coordinates.
+
+        Args:
+            grid_index (tuple[np.ndarray]): The grid index of the points.
+            coords (np.ndarray): 3D Points.
+            query_min (np.ndarray): Min corner of the range.
+            query_max (np.ndarray): Max corner of the range.
+
+        Returns:
+            np.ndarray: Indices of the points inside the range in ascending
+                order.
+        """
+        grid_min, _, order, cell_starts, grid_shape = grid_index
+        grid_min = grid_min[:2]
+        cell_size = self.block_size / 2.0
+        cell_min = np.floor((query_min[:2] - grid_min) / cell_size)
+        cell_max = np.floor((query_max[:2] - grid_min) / cell_size)
+        cell_min = np.clip(cell_min, 0, grid_shape - 1).astype(np.int64)
+        cell_max = np.clip(cell_max, 0, grid_shape - 1).astype(np.int64)
+        candidates = np.concatenate([
+            order[cell_starts[x * grid_shape[1] + cell_min[1]]:
+                  cell_starts[x * grid_shape[1] + cell_max[1] + 1]]
+            for x in range(cell_min[0], cell_max[0] + 1)
+        ])
+        cand_coords = coords[candidates, :2]
+        inside = np.all((cand_coords >= query_min[:2]) &
+                        (cand_coords <= query_max[:2]), axis=1)
+        return np.sort(candidates[inside])
+
     def _patch_points_sampling(self, points, sem_mask):
         """Patch points sampling.
 
         First sample a valid patch.
         Then sample points within that patch to a certain number.
 
+        The points of a candidate patch are looked up in a 2D grid index of
+        the scene instead of scanning all the points for every try.
+
         Args:
             points (:obj:`BasePoints`): 3D Points.
             sem_mask (np.ndarray): semantic segmentation mask for input points.
@@ -1271,8 +1344,8 @@ class IndoorPatchPointSample(object):
         attribute_dims = points.attribute_dims
         point_type = type(points)
 
-        coord_max = np.amax(coords, axis=0)
-        coord_min = np.amin(coords, axis=0)
+        grid_index = self._build_grid_index(coords)
+        coord_min, coord_max = grid_index[:2]
 
         for _ in range(self.num_try):
             # random sample a point as patch center
@@ -1286,17 +1359,17 @@ class IndoorPatchPointSample(object):
                 [self.block_size / 2.0, self.block_size / 2.0, 0.0])
             cur_max[2] = coord_max[2]
             cur_min[2] = coord_min[2]
-            cur_choice = np.sum(
-                (coords >= (cur_min - self.enlarge_size)) *
-                (coords <= (cur_max + self.enlarge_size)),
-                axis=1) == 3
+            # the patch spans the whole scene along z, so only xy is queried
+            cur_idxs = self._query_grid_index(grid_index, coords,
+                                              cur_min - self.enlarge_size,
+                                              cur_max + self.enlarge_size)
 
-            if not cur_choice.any():  # no points in this patch
+            if cur_idxs.size == 0:  # no points in this patch
                 continue
 
-            cur_coords = coords[cur_choice, :]
-            cur_sem_mask = sem_mask[cur_choice]
-            point_idxs = np.where(cur_choice)[0]
+            point_idxs = cur_idxs
+            cur_coords = coords[point_idxs, :]
+            cur_sem_mask = sem_mask[point_idxs]
             mask = np.sum(
                 (cur_coords >= (cur_min - self.eps)) * (cur_coords <=
                                                         (cur_max + self.eps)),
@@ -1309,12 +1382,15 @@ class IndoorPatchPointSample(object):
                 # [31, 31, 62] are just some big values used to transform
                 # coords from 3d array to 1d and then check their uniqueness
                 # this is used in all the ScanNet code following PointNet++
-                vidx = np.ceil(
-                    (cur_coords[mask, :] - cur_min) / (cur_max - cur_min) *
-                    np.array([31.0, 31.0, 62.0]))
-                vidx = np.unique(vidx[:, 0] * 31.0 * 62.0 + vidx[:, 1] * 62.0 +
-                                 vidx[:, 2])
-                flag1 = len(vidx) / 31.0 / 31.0 / 62.0 >= 0.02
+                # a patch with too few points cannot occupy enough voxels
+                flag1 = mask.sum() / 31.0 / 31.0 / 62.0 >= 0.02
+                if flag1:
+                    vidx = np.ceil(
+                        (cur_coords[mask, :] - cur_min) /
+                        (cur_max - cur_min) * np.array([31.0, 31.0, 62.0]))
+                    vidx = np.unique(vidx[:, 0] * 31.0 * 62.0 +
+                                     vidx[:, 1] * 62.0 + vidx[:, 2])
+                    flag1 = len(vidx) / 31.0 / 31.0 / 62.0 >= 0.02
             else:
                 # if `min_unique_num` is provided, directly compare with it
                 flag1 = mask.sum() >= self.min_unique_num
@@ -2,6 +2,7 @@
 import copy
 import os
 import tempfile
+from concurrent import futures
 from os import path as osp
 
 import mmcv
@@ -11,7 +12,7 @@ from mmcv.utils import print_log
 
 from ..core import show_multi_modality_result, show_result
 from ..core.bbox import (Box3DMode, CameraInstance3DBoxes, Coord3DMode,
-                         LiDARInstance3DBoxes, points_cam2img)
+                         LiDARInstance3DBoxes)
 from .builder import DATASETS
 from .custom_3d import Custom3DDataset
 from .pipelines import Compose
@@ -365,6 +366,28 @@ class SPADataset(Custom3DDataset):
             dict[str, float]: Results of each evaluation metric.
         """
         result_files, tmp_dir = self.format_results(results, pklfile_prefix)
+        ap_dict = self._evaluate_result_files(result_files, metric, logger)
+
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+        if show or out_dir:
+            self.show(results, out_dir, show=show, pipeline=pipeline)
+        return ap_dict
+
+    def _evaluate_result_files(self, result_files, metric=None, logger=None):
+        """Evaluate the results in kitti format in KITTI protocol.
+
+        Args:
+            result_files (list[dict] | dict[str, list[dict]]): Results in
+                kitti format, or a dict of them for each result name.
+            metric (str | list[str], optional): Metrics to be evaluated.
+                Default: None.
+            logger (logging.Logger | str, optional): Logger used for printing
+                related information during evaluation. Default: None.
+
+        Returns:
+            dict[str, float]: Results of each evaluation metric.
+        """
         from mmdet3d.core.evaluation import kitti_eval
         gt_annos = [info['annos'] for info in self.data_infos]
 
@@ -393,18 +416,103 @@ class SPADataset(Custom3DDataset):
                 ap_result_str, ap_dict = kitti_eval(gt_annos, result_files,
                                                     self.CLASSES)
             print_log('\n' + ap_result_str, logger=logger)
-
-        if tmp_dir is not None:
-            tmp_dir.cleanup()
-        if show or out_dir:
-            self.show(results, out_dir, show=show, pipeline=pipeline)
         return ap_dict
 
+    def format_result(self, idx, result, submission_prefix=None):
+        """Convert the 3D detection result of a single sample to kitti format.
+
+        This is the per-sample counterpart of :meth:`format_results`, used to
+        format the results while testing.
+
+        Args:
+            idx (int): Index of the sample.
+            result (dict): Testing result of the sample.
+            submission_prefix (str, optional): The prefix of submission data.
+                If not specified, the submission data will not be generated.
+                Default: None.
+
+        Returns:
+            dict | dict[str, dict]: The result in kitti format, or a dict of
+                them for each result name.
+        """
+        if 'pts_bbox' not in result and 'img_bbox' not in result:
+            return self.result2kitti_anno(idx, result, self.CLASSES,
+                                          submission_prefix)
+        formatted = dict()
+        for name in result:
+            assert 'img' not in name, \
+                '2D results cannot be formatted sample by sample'
+            if submission_prefix is not None:
+                submission_prefix_ = submission_prefix + name
+                mmcv.mkdir_or_exist(submission_prefix_)
+            else:
+                submission_prefix_ = None
+            formatted[name] = self.result2kitti_anno(idx, result[name],
+                                                     self.CLASSES,
+                                                     submission_prefix_)
+        return formatted
+
+    def evaluate_formatted(self,
+                           formatted,
+                           metric=None,
+                           logger=None,
+                           pklfile_prefix=None,
+                           submission_prefix=None,
+                           **kwargs):
+        """Evaluation in KITTI protocol of results formatted by
+        :meth:`format_result`.
+
+        Args:
+            formatted (list[dict]): Formatted results of the dataset.
+            metric (str | list[str], optional): Metrics to be evaluated.
+                Default: None.
+            logger (logging.Logger | str, optional): Logger used for printing
+                related information during evaluation. Default: None.
+            pklfile_prefix (str, optional): The prefix of pkl files, including
+                the file path and the prefix of filename, e.g., "a/b/prefix".
+                If not specified, the results are not saved. Default: None.
+            submission_prefix (str, optional): The prefix of submission data.
+                If not specified, the submission data will not be generated.
+                Default: None.
+            kwargs (dict): Other arguments of :meth:`evaluate`. The formatted
+                results cannot be shown, so ``show``, ``out_dir`` and
+                ``pipeline`` are ignored.
+
+        Returns:
+            dict[str, float]: Results of each evaluation metric.
+        """
+        assert len(formatted) == len(self.data_infos), \
+            'invalid list length of formatted results'
+        if 'pts_bbox' in formatted[0] or 'img_bbox' in formatted[0]:
+            result_files = {
+                name: [anno[name] for anno in formatted]
+                for name in formatted[0]
+            }
+        else:
+            result_files = formatted
+        if pklfile_prefix is not None:
+            mmcv.dump(result_files, f'{pklfile_prefix}.pkl')
+        if submission_prefix is not None:
+            if isinstance(result_files, dict):
+                submissions = [(submission_prefix + name, annos)
+                               for name, annos in result_files.items()]
+            else:
+                submissions = [(submission_prefix, result_files)]
+            for submission_prefix_, annos in submissions:
+                mmcv.mkdir_or_exist(submission_prefix_)
+                dump_kitti_submissions(annos, [
+                    f'{submission_prefix_}/'
+                    f'{info["image"]["image_idx"]:06d}.txt'
+                    for info in self.data_infos
+                ])
+        return self._evaluate_result_files(result_files, metric, logger)
+
     def bbox2result_kitti(self,
                           net_outputs,
                           class_names,
                           pklfile_prefix=None,
-                          submission_prefix=None):
+                          submission_prefix=None,
+                          nproc=4):
         """Convert 3D detection results to kitti format for evaluation and test
         submission.
 
@@ -414,98 +522,34 @@ class SPADataset(Custom3DDataset):
             class_names (list[String]): A list of class names.
             pklfile_prefix (str): The prefix of pkl file.
             submission_prefix (str): The prefix of submission file.
+            nproc (int, optional): Number of threads used to write the
+                submission files. Default: 4.
 
         Returns:
             list[dict]: A list of dictionaries with the kitti format.
         """
         assert len(net_outputs) == len(self.data_infos), \
             'invalid list length of network outputs'
-        if submission_prefix is not None:
-            mmcv.mkdir_or_exist(submission_prefix)
 
-        det_annos = []
         print('\nConverting prediction to KITTI format')
-        for idx, pred_dicts in enumerate(
-                mmcv.track_iter_progress(net_outputs)):
-            annos = []
-            info = self.data_infos[idx]
-            sample_idx = info['image']['image_idx']
-            image_shape = info['image']['image_shape'][:2]
-            box_dict = self.convert_valid_bboxes(pred_dicts, info)
-            anno = {
-                'name': [],
-                'truncated': [],
-                'occluded': [],
-                'alpha': [],
-                'bbox': [],
-                'dimensions': [],
-                'location': [],
-                'rotation_y': [],
-                'score': []
-            }
-            if len(box_dict['bbox']) > 0:
-                box_2d_preds = box_dict['bbox']
-                box_preds = box_dict['box3d_camera']
-                scores = box_dict['scores']
-                box_preds_lidar = box_dict['box3d_lidar']
-                label_preds = box_dict['label_preds']
-
-                for box, box_lidar, bbox, score, label in zip(
-                        box_preds, box_preds_lidar, box_2d_preds, scores,
-                        label_preds):
-                    bbox[2:] = np.minimum(bbox[2:], image_shape[::-1])
-                    bbox[:2] = np.maximum(bbox[:2], [0, 0])
-                    anno['name'].append(class_names[int(label)])
-                    anno['truncated'].append(0.0)
-                    anno['occluded'].append(0)
-                    anno['alpha'].append(
-                        -np.arctan2(-box_lidar[1], box_lidar[0]) + box[6])
-                    anno['bbox'].append(bbox)
-                    anno['dimensions'].append(box[3:6])
-                    anno['location'].append(box[:3])
-                    anno['rotation_y'].append(box[6])
-                    anno['score'].append(score)
-
-                anno = {k: np.stack(v) for k, v in anno.items()}
-                annos.append(anno)
-            else:
-                anno = {
-                    'name': np.array([]),
-                    'truncated': np.array([]),
-                    'occluded': np.array([]),
-                    'alpha': np.array([]),
-                    'bbox': np.zeros([0, 4]),
-                    'dimensions': np.zeros([0, 3]),
-                    'location': np.zeros([0, 3]),
-                    'rotation_y': np.array([]),
-                    'score': np.array([]),
-                }
-                annos.append(anno)
+        box_dicts = convert_valid_bboxes_batch(net_outputs, self.data_infos,
+                                               self.pcd_limit_range)
+        det_annos = []
+        for info, box_dict in zip(self.data_infos, box_dicts):
+            anno = box_dict2kitti_anno(box_dict, class_names,
+                                       info['image']['image_shape'][:2])
+            anno['sample_idx'] = np.full(
+                len(anno['score']), info['image']['image_idx'], dtype=np.int64)
+            det_annos.append(anno)
 
-            if submission_prefix is not None:
-                curr_file = f'{submission_prefix}/{sample_idx:06d}.txt'
-                with open(curr_file, 'w') as f:
-                    bbox = anno['bbox']
-                    loc = anno['location']
-                    dims = anno['dimensions']  # lhw -> hwl
-
-                    for idx in range(len(bbox)):
-                        print(
-                            '{} -1 -1 {:.4f} {:.4f} {:.4f} {:.4f} '
-                            '{:.4f} {:.4f} {:.4f} '
-                            '{:.4f} {:.4f} {:.4f} {:.4f} {:.4f} {:.4f}'.format(
-                                anno['name'][idx], anno['alpha'][idx],
-                                bbox[idx][0], bbox[idx][1], bbox[idx][2],
-                                bbox[idx][3], dims[idx][1], dims[idx][2],
-                                dims[idx][0], loc[idx][0], loc[idx][1],
-                                loc[idx][2], anno['rotation_y'][idx],
-                                anno['score'][idx]),
-                            file=f)
-
-            annos[-1]['sample_idx'] = np.array(
-                [sample_idx] * len(annos[-1]['score']), dtype=np.int64)
-
-            det_annos += annos
+        if submission_prefix is not None:
+            mmcv.mkdir_or_exist(submission_prefix)
+            dump_kitti_submissions(
+                det_annos, [
+                    f'{submission_prefix}/{info["image"]["image_idx"]:06d}.txt'
+                    for info in self.data_infos
+                ],
+                nproc=nproc)
 
         if pklfile_prefix is not None:
             if not pklfile_prefix.endswith(('.pkl', '.pickle')):
@@ -515,11 +559,41 @@ class SPADataset(Custom3DDataset):
 
         return det_annos
 
+    def result2kitti_anno(self,
+                          idx,
+                          pred_dicts,
+                          class_names,
+                          submission_prefix=None):
+        """Convert the 3D detection result of a sample to kitti format.
+
+        Args:
+            idx (int): Index of the sample.
+            pred_dicts (dict): Predicted bounding boxes and scores.
+            class_names (list[String]): A list of class names.
+            submission_prefix (str, optional): The prefix of submission file.
+                Default: None.
+
+        Returns:
+            dict: The result in kitti format.
+        """
+        info = self.data_infos[idx]
+        sample_idx = info['image']['image_idx']
+        box_dict = self.convert_valid_bboxes(pred_dicts, info)
+        anno = box_dict2kitti_anno(box_dict, class_names,
+                                   info['image']['image_shape'][:2])
+        if submission_prefix is not None:
+            with open(f'{submission_prefix}/{sample_idx:06d}.txt', 'w') as f:
+                f.write(format_kitti_submission(anno))
+        anno['sample_idx'] = np.full(
+            len(anno['score']), sample_idx, dtype=np.int64)
+        return anno
+
     def bbox2result_kitti2d(self,
                             net_outputs,
                             class_names,
                             pklfile_prefix=None,
-                            submission_prefix=None):
+                            submission_prefix=None,
+                            nproc=4):
         """Convert 2D detection results to kitti format for evaluation and test
         submission.
 
@@ -529,68 +603,21 @@ class SPADataset(Custom3DDataset):
             class_names (list[String]): A list of class names.
             pklfile_prefix (str): The prefix of pkl file.
             submission_prefix (str): The prefix of submission file.
+            nproc (int, optional): Number of threads used to write the
+                submission files. Default: 4.
 
         Returns:
             list[dict]: A list of dictionaries have the kitti format
         """
         assert len(net_outputs) == len(self.data_infos), \
             'invalid list length of network outputs'
-        det_annos = []
         print('\nConverting prediction to KITTI format')
-        for i, bboxes_per_sample in enumerate(
-                mmcv.track_iter_progress(net_outputs)):
-            annos = []
-            anno = dict(
-                name=[],
-                truncated=[],
-                occluded=[],
-                alpha=[],
-                bbox=[],
-                dimensions=[],
-                location=[],
-                rotation_y=[],
-                score=[])
-            sample_idx = self.data_infos[i]['image']['image_idx']
-
-            num_example = 0
-            for label in range(len(bboxes_per_sample)):
-                bbox = bboxes_per_sample[label]
-                for i in range(bbox.shape[0]):
-                    anno['name'].append(class_names[int(label)])
-                    anno['truncated'].append(0.0)
-                    anno['occluded'].append(0)
-                    anno['alpha'].append(0.0)
-                    anno['bbox'].append(bbox[i, :4])
-                    # set dimensions (height, width, length) to zero
-                    anno['dimensions'].append(
-                        np.zeros(shape=[3], dtype=np.float32))
-                    # set the 3D translation to (-1000, -1000, -1000)
-                    anno['location'].append(
-                        np.ones(shape=[3], dtype=np.float32) * (-1000.0))
-                    anno['rotation_y'].append(0.0)
-                    anno['score'].append(bbox[i, 4])
-                    num_example += 1
-
-            if num_example == 0:
-                annos.append(
-                    dict(
-                        name=np.array([]),
-                        truncated=np.array([]),
-                        occluded=np.array([]),
-                        alpha=np.array([]),
-                        bbox=np.zeros([0, 4]),
-                        dimensions=np.zeros([0, 3]),
-                        location=np.zeros([0, 3]),
-                        rotation_y=np.array([]),
-                        score=np.array([]),
-                    ))
-            else:
-                anno = {k: np.stack(v) for k, v in anno.items()}
-                annos.append(anno)
-
-            annos[-1]['sample_idx'] = np.array(
-                [sample_idx] * num_example, dtype=np.int64)
-            det_annos += annos
+        det_annos = []
+        for info, bboxes_per_sample in zip(self.data_infos, net_outputs):
+            anno = bboxes2kitti_anno_2d(bboxes_per_sample, class_names)
+            anno['sample_idx'] = np.full(
+                len(anno['score']), info['image']['image_idx'], dtype=np.int64)
+            det_annos.append(anno)
 
         if pklfile_prefix is not None:
             # save file in pkl format
@@ -603,26 +630,13 @@ class SPADataset(Custom3DDataset):
             # save file in submission format
             mmcv.mkdir_or_exist(submission_prefix)
             print(f'Saving KITTI submission to {submission_prefix}')
-            for i, anno in enumerate(det_annos):
-                sample_idx = self.data_infos[i]['image']['image_idx']
-                cur_det_file = f'{submission_prefix}/{sample_idx:06d}.txt'
-                with open(cur_det_file, 'w') as f:
-                    bbox = anno['bbox']
-                    loc = anno['location']
-                    dims = anno['dimensions'][::-1]  # lhw -> hwl
-                    for idx in range(len(bbox)):
-                        print(
-                            '{} -1 -1 {:4f} {:4f} {:4f} {:4f} {:4f} {:4f} '
-                            '{:4f} {:4f} {:4f} {:4f} {:4f} {:4f} {:4f}'.format(
-                                anno['name'][idx],
-                                anno['alpha'][idx],
-                                *bbox[idx],  # 4 float
-                                *dims[idx],  # 3 float
-                                *loc[idx],  # 3 float
-                                anno['rotation_y'][idx],
-                                anno['score'][idx]),
-                            file=f,
-                        )
+            dump_kitti_submissions(
+                det_annos, [
+                    f'{submission_prefix}/{info["image"]["image_idx"]:06d}.txt'
+                    for info in self.data_infos
+                ],
+                float_fmt='%4f',
+                nproc=nproc)
             print(f'Result is saved to {submission_prefix}')
 
         return det_annos
@@ -650,64 +664,8 @@ class SPADataset(Custom3DDataset):
                 - label_preds (np.ndarray): Class label predictions.
                 - sample_idx (int): Sample index.
         """
-        # TODO: refactor this function
-        box_preds = box_dict['boxes_3d']
-        scores = box_dict['scores_3d']
-        labels = box_dict['labels_3d']
-        sample_idx = info['image']['image_idx']
-        box_preds.limit_yaw(offset=0.5, period=np.pi * 2)
-
-        if len(box_preds) == 0:
-            return dict(
-                bbox=np.zeros([0, 4]),
-                box3d_camera=np.zeros([0, 7]),
-                box3d_lidar=np.zeros([0, 7]),
-                scores=np.zeros([0]),
-                label_preds=np.zeros([0, 4]),
-                sample_idx=sample_idx)
-
-        rect = info['calib']['R0_rect'].astype(np.float32)
-        Trv2c = info['calib']['Tr_velo_to_cam'].astype(np.float32)
-        P2 = info['calib']['P2'].astype(np.float32)
-        img_shape = info['image']['image_shape']
-        P2 = box_preds.tensor.new_tensor(P2)
-
-        box_preds_camera = box_preds.convert_to(Box3DMode.CAM, rect @ Trv2c)
-
-        box_corners = box_preds_camera.corners
-        box_corners_in_image = points_cam2img(box_corners, P2)
-        # box_corners_in_image: [N, 8, 2]
-        minxy = torch.min(box_corners_in_image, dim=1)[0]
-        maxxy = torch.max(box_corners_in_image, dim=1)[0]
-        box_2d_preds = torch.cat([minxy, maxxy], dim=1)
-        # Post-processing
-        # check box_preds_camera
-        image_shape = box_preds.tensor.new_tensor(img_shape)
-        valid_cam_inds = ((box_2d_preds[:, 0] < image_shape[1]) &
-                          (box_2d_preds[:, 1] < image_shape[0]) &
-                          (box_2d_preds[:, 2] > 0) & (box_2d_preds[:, 3] > 0))
-        # check box_preds
-        limit_range = box_preds.tensor.new_tensor(self.pcd_limit_range)
-        valid_pcd_inds = ((box_preds.center > limit_range[:3]) &
-                          (box_preds.center < limit_range[3:]))
-        valid_inds = valid_cam_inds & valid_pcd_inds.all(-1)
-
-        if valid_inds.sum() > 0:
-            return dict(
-                bbox=box_2d_preds[valid_inds, :].numpy(),
-                box3d_camera=box_preds_camera[valid_inds].tensor.numpy(),
-                box3d_lidar=box_preds[valid_inds].tensor.numpy(),
-                scores=scores[valid_inds].numpy(),
-                label_preds=labels[valid_inds].numpy(),
-                sample_idx=sample_idx)
-        else:
-            return dict(
-                bbox=np.zeros([0, 4]),
-                box3d_camera=np.zeros([0, 7]),
-                box3d_lidar=np.zeros([0, 7]),
-                scores=np.zeros([0]),
-                label_preds=np.zeros([0, 4]),
-                sample_idx=sample_idx)
+        return convert_valid_bboxes_batch([box_dict], [info],
+                                          self.pcd_limit_range)[0]
 
     def _build_default_pipeline(self):
         """Build the default pipeline for this dataset."""
@@ -780,3 +738,246 @@ class SPADataset(Custom3DDataset):
                     file_name,
                     box_mode='lidar',
                     show=show)
+
+
+def _empty_kitti_anno():
+    """Get the kitti format annotation of a sample without detections."""
+    return {
+        'name': np.array([]),
+        'truncated': np.array([]),
+        'occluded': np.array([]),
+        'alpha': np.array([]),
+        'bbox': np.zeros([0, 4]),
+        'dimensions': np.zeros([0, 3]),
+        'location': np.zeros([0, 3]),
+        'rotation_y': np.array([]),
+        'score': np.array([]),
+    }
+
+
+def convert_valid_bboxes_batch(box_dicts, infos, pcd_limit_range):
+    """Convert the predicted boxes of several samples into valid ones.
+
+    The boxes of all the samples are concatenated so that the conversion to
+    the camera coordinate and the projection to the image are done with one
+    batched matrix multiplication, each box using the calibration of its own
+    sample.
+
+    Args:
+        box_dicts (list[dict]): Box dictionaries to be converted.
+
+            - boxes_3d (:obj:`LiDARInstance3DBoxes`): 3D bounding boxes.
+            - scores_3d (torch.Tensor): Scores of boxes.
+            - labels_3d (torch.Tensor): Class labels of boxes.
+        infos (list[dict]): Data infos of the samples.
+        pcd_limit_range (list[float]): The range of point cloud used to
+            filter invalid predicted boxes.
+
+    Returns:
+        list[dict]: Valid predicted boxes of each sample, see
+            :meth:`SPADataset.convert_valid_bboxes`.
+    """
+    assert len(box_dicts) == len(infos)
+    num_samples = len(infos)
+    box_preds = box_dicts[0]['boxes_3d'].cat(
+        [box_dict['boxes_3d'] for box_dict in box_dicts])
+    scores = torch.cat([box_dict['scores_3d'] for box_dict in box_dicts])
+    labels = torch.cat([box_dict['labels_3d'] for box_dict in box_dicts])
+    box_preds.limit_yaw(offset=0.5, period=np.pi * 2)
+    sample_inds = torch.repeat_interleave(
+        torch.tensor([len(box_dict['boxes_3d']) for box_dict in box_dicts]))
+
+    lidar2cam = np.stack([
+        info['calib']['R0_rect'].astype(np.float32)
+        @ info['calib']['Tr_velo_to_cam'].astype(np.float32) for info in infos
+    ])
+    cam2img = np.tile(np.eye(4, dtype=np.float32), (num_samples, 1, 1))
+    for i, info in enumerate(infos):
+        P2 = info['calib']['P2'].astype(np.float32)
+        cam2img[i, :P2.shape[0], :P2.shape[1]] = P2
+    img_shape = np.stack([info['image']['image_shape'][:2] for info in infos])
+    lidar2cam = box_preds.tensor.new_tensor(lidar2cam)[sample_inds]
+    cam2img = box_preds.tensor.new_tensor(cam2img)[sample_inds]
+    img_shape = box_preds.tensor.new_tensor(img_shape)[sample_inds]
+
+    # only the centers depend on the calibration, the sizes and yaws are
+    # converted the same way for every sample
+    box_preds_camera = box_preds.convert_to(Box3DMode.CAM, torch.eye(4))
+    centers = torch.cat(
+        [box_preds.tensor[:, :3],
+         box_preds.tensor.new_ones(len(box_preds), 1)],
+        dim=-1)
+    box_preds_camera.tensor[:, :3] = torch.bmm(
+        centers[:, None], lidar2cam.transpose(1, 2))[:, 0, :3]
+
+    box_corners = box_preds_camera.corners
+    box_corners = torch.cat(
+        [box_corners, box_corners.new_ones(len(box_corners), 8, 1)], dim=-1)
+    box_corners_in_image = torch.bmm(box_corners, cam2img.transpose(1, 2))
+    box_corners_in_image = (
+        box_corners_in_image[..., :2] / box_corners_in_image[..., 2:3])
+    # box_corners_in_image: [N, 8, 2]
+    minxy = torch.min(box_corners_in_image, dim=1)[0]
+    maxxy = torch.max(box_corners_in_image, dim=1)[0]
+    box_2d_preds = torch.cat([minxy, maxxy], dim=1)
+    # Post-processing
+    # check box_preds_camera
+    valid_cam_inds = ((box_2d_preds[:, 0] < img_shape[:, 1]) &
+                      (box_2d_preds[:, 1] < img_shape[:, 0]) &
+                      (box_2d_preds[:, 2] > 0) & (box_2d_preds[:, 3] > 0))
+    # check box_preds
+    limit_range = box_preds.tensor.new_tensor(pcd_limit_range)
+    valid_pcd_inds = ((box_preds.center > limit_range[:3]) &
+                      (box_preds.center < limit_range[3:]))
+    valid_inds = valid_cam_inds & valid_pcd_inds.all(-1)
+
+    # the boxes are ordered by sample, so the valid ones can be split back
+    # by the number of valid boxes of each sample
+    split_inds = np.cumsum(
+        np.bincount(
+            sample_inds[valid_inds].numpy(),
+            minlength=num_samples))[:-1]
+    valid = dict(
+        bbox=box_2d_preds[valid_inds].numpy(),
+        box3d_camera=box_preds_camera.tensor[valid_inds].numpy(),
+        box3d_lidar=box_preds.tensor[valid_inds].numpy(),
+        scores=scores[valid_inds].numpy(),
+        label_preds=labels[valid_inds].numpy())
+    valid = {k: np.split(v, split_inds) for k, v in valid.items()}
+
+    results = []
+    for i, info in enumerate(infos):
+        sample_idx = info['image']['image_idx']
+        if len(valid['bbox'][i]) > 0:
+            results.append(
+                dict(
+                    bbox=valid['bbox'][i],
+                    box3d_camera=valid['box3d_camera'][i],
+                    box3d_lidar=valid['box3d_lidar'][i],
+                    scores=valid['scores'][i],
+                    label_preds=valid['label_preds'][i],
+                    sample_idx=sample_idx))
+        else:
+            results.append(
+                dict(
+                    bbox=np.zeros([0, 4]),
+                    box3d_camera=np.zeros([0, 7]),
+                    box3d_lidar=np.zeros([0, 7]),
+                    scores=np.zeros([0]),
+                    label_preds=np.zeros([0, 4]),
+                    sample_idx=sample_idx))
+    return results
+
+
+def box_dict2kitti_anno(box_dict, class_names, image_shape):
+    """Convert the valid predicted boxes of a sample to kitti format.
+
+    Args:
+        box_dict (dict): Valid predicted boxes returned by
+            :func:`convert_valid_bboxes_batch`.
+        class_names (list[String]): A list of class names.
+        image_shape (tuple[int]): Height and width of the image.
+
+    Returns:
+        dict: The result in kitti format, without the sample indices.
+    """
+    num_boxes = len(box_dict['bbox'])
+    if num_boxes == 0:
+        return _empty_kitti_anno()
+    box_preds = box_dict['box3d_camera']
+    box_preds_lidar = box_dict['box3d_lidar']
+    bbox = box_dict['bbox']
+    bbox[:, 2:] = np.minimum(bbox[:, 2:], image_shape[::-1])
+    bbox[:, :2] = np.maximum(bbox[:, :2], [0, 0])
+    return dict(
+        name=np.array(class_names)[box_dict['label_preds'].astype(np.int64)],
+        truncated=np.zeros(num_boxes),
+        occluded=np.zeros(num_boxes, dtype=np.int64),
+        alpha=-np.arctan2(-box_preds_lidar[:, 1], box_preds_lidar[:, 0]) +
+        box_preds[:, 6],
+        bbox=bbox,
+        dimensions=box_preds[:, 3:6],
+        location=box_preds[:, :3],
+        rotation_y=box_preds[:, 6],
+        score=box_dict['scores'])
+
+
+def bboxes2kitti_anno_2d(bboxes_per_sample, class_names):
+    """Convert the 2D detection result of a sample to kitti format.
+
+    Args:
+        bboxes_per_sample (list[np.ndarray]): Bounding boxes and scores of
+            each class, in shape (N, 5).
+        class_names (list[String]): A list of class names.
+
+    Returns:
+        dict: The result in kitti format, without the sample indices.
+    """
+    num_boxes = [len(bboxes) for bboxes in bboxes_per_sample]
+    if sum(num_boxes) == 0:
+        return _empty_kitti_anno()
+    bboxes = np.concatenate(bboxes_per_sample)
+    labels = np.repeat(np.arange(len(bboxes_per_sample)), num_boxes)
+    return dict(
+        name=np.array(class_names)[labels],
+        truncated=np.zeros(len(bboxes)),
+        occluded=np.zeros(len(bboxes), dtype=np.int64),
+        alpha=np.zeros(len(bboxes)),
+        bbox=bboxes[:, :4],
+        # set dimensions (height, width, length) to zero
+        dimensions=np.zeros([len(bboxes), 3], dtype=np.float32),
+        # set the 3D translation to (-1000, -1000, -1000)
+        location=np.full([len(bboxes), 3], -1000.0, dtype=np.float32),
+        rotation_y=np.zeros(len(bboxes)),
+        score=bboxes[:, 4])
+
+
+def format_kitti_submission(anno, float_fmt='%.4f'):
+    """Format a kitti format result as the content of a submission file.
+
+    All the lines are formatted by a single ``%`` operation on the flattened
+    fields instead of one call per box.
+
+    Args:
+        anno (dict): The result in kitti format.
+        float_fmt (str, optional): Format of the float fields.
+            Default: '%.4f'.
+
+    Returns:
+        str: Content of the submission file.
+    """
+    num_boxes = len(anno['bbox'])
+    if num_boxes == 0:
+        return ''
+    fields = np.empty((num_boxes, 14), dtype=object)
+    fields[:, 0] = anno['name']
+    # lhw -> hwl
+    fields[:, 1:] = np.concatenate([
+        anno['alpha'][:, None], anno['bbox'],
+        anno['dimensions'][:, [1, 2, 0]], anno['location'],
+        anno['rotation_y'][:, None], anno['score'][:, None]
+    ], axis=1)
+    line_fmt = '%s -1 -1 ' + ' '.join([float_fmt] * 13) + '\n'
+    return (line_fmt * num_boxes) % tuple(fields.ravel().tolist())
+
+
+def _dump_kitti_submission(anno, filename, float_fmt):
+    with open(filename, 'w') as f:
+        f.write(format_kitti_submission(anno, float_fmt))
+
+
+def dump_kitti_submissions(annos, filenames, float_fmt='%.4f', nproc=4):
+    """Write kitti format results to submission files on a thread pool.
+
+    Args:
+        annos (list[dict]): Results in kitti format.
+        filenames (list[str]): Submission file of each result.
+        float_fmt (str, optional): Format of the float fields.
+            Default: '%.4f'.
+        nproc (int, optional): Number of threads. Default: 4.
+    """
+    assert len(annos) == len(filenames)
+    with futures.ThreadPoolExecutor(nproc) as executor:
+        list(
+            executor.map(_dump_kitti_submission, annos, filenames,
+                         [float_fmt] * len(annos)))
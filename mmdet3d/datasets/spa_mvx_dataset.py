@@ -6,15 +6,16 @@ from os import path as osp
 
 import mmcv
 import numpy as np
-import torch
 from mmcv.utils import print_log
 
 from ..core import show_multi_modality_result, show_result
 from ..core.bbox import (Box3DMode, CameraInstance3DBoxes, Coord3DMode,
-                         LiDARInstance3DBoxes, points_cam2img)
+                         LiDARInstance3DBoxes)
 from .builder import DATASETS
 from .custom_3d import Custom3DDataset
 from .pipelines import Compose
+from .spa_dataset import (bboxes2kitti_anno_2d, box_dict2kitti_anno,
+                          convert_valid_bboxes_batch, dump_kitti_submissions)
 
 
 @DATASETS.register_module()
@@ -51,6 +52,10 @@ class SPA_MVX_Dataset(Custom3DDataset):
         pcd_limit_range (list, optional): The range of point cloud used to
             filter invalid predicted boxes.
             Default: [0, -40, -3, 70.4, 40, 0.0].
+        multi_view (bool, optional): Whether to load the images and
+            projection matrices of all the cameras (``P0`` to ``P4``) instead
+            of the camera of the sample only. The images are then loaded with
+            ``LoadMultiViewImageFromFiles``. Defaults to False.
     """
     CLASSES = ('car', 'pedestrian', 'cyclist', 'motorcyclist')
 
@@ -66,6 +71,7 @@ class SPA_MVX_Dataset(Custom3DDataset):
                  filter_empty_gt=True,
                  test_mode=False,
                  pcd_limit_range=[0, -40, -3, 70.4, 40, 0.0],
+                 multi_view=False,
                  **kwargs):
         super().__init__(
             data_root=data_root,
@@ -83,6 +89,7 @@ class SPA_MVX_Dataset(Custom3DDataset):
         assert self.modality is not None
         self.pcd_limit_range = pcd_limit_range
         self.pts_prefix = pts_prefix
+        self.multi_view = multi_view
 
     def _get_pts_filename(self, idx):
         """Get point cloud filename according to the given index.
@@ -124,18 +131,27 @@ class SPA_MVX_Dataset(Custom3DDataset):
         )
         img_filename = os.path.join(info['image']['image_path'])
 
-
-        cam_num = int(info['image']['image_path'].split('/')[5]) - 1
-        lidar2img_rts = info['calib']['P{}'.format(cam_num)]
-
-
-        input_dict.update(
-            dict(
-                lidar2img=lidar2img_rts,
-                img_prefix=None,
-                img_info=dict(filename=img_filename),
-            )
-        )
+        if self.multi_view:
+            # the 6th directory of the image path is the 1-based camera id
+            path_parts = img_filename.split('/')
+            img_filenames, lidar2img_rts = [], []
+            cam_num = 0
+            while f'P{cam_num}' in info['calib']:
+                path_parts[5] = str(cam_num + 1)
+                img_filenames.append('/'.join(path_parts))
+                lidar2img_rts.append(info['calib'][f'P{cam_num}'])
+                cam_num += 1
+            input_dict.update(
+                dict(img_filename=img_filenames, lidar2img=lidar2img_rts))
+        else:
+            cam_num = int(info['image']['image_path'].split('/')[5]) - 1
+            lidar2img_rts = info['calib']['P{}'.format(cam_num)]
+            input_dict.update(
+                dict(
+                    lidar2img=lidar2img_rts,
+                    img_prefix=None,
+                    img_info=dict(filename=img_filename),
+                ))
 
         if not self.test_mode:
             annos = self.get_ann_info(index)
@@ -398,7 +414,8 @@ class SPA_MVX_Dataset(Custom3DDataset):
                           net_outputs,
                           class_names,
                           pklfile_prefix=None,
-                          submission_prefix=None):
+                          submission_prefix=None,
+                          nproc=4):
         """Convert 3D detection results to kitti format for evaluation and test
         submission.
 
@@ -408,98 +425,34 @@ class SPA_MVX_Dataset(Custom3DDataset):
             class_names (list[String]): A list of class names.
             pklfile_prefix (str): The prefix of pkl file.
             submission_prefix (str): The prefix of submission file.
+            nproc (int, optional): Number of threads used to write the
+                submission files. Default: 4.
 
         Returns:
             list[dict]: A list of dictionaries with the kitti format.
         """
         assert len(net_outputs) == len(self.data_infos), \
             'invalid list length of network outputs'
-        if submission_prefix is not None:
-            mmcv.mkdir_or_exist(submission_prefix)
 
-        det_annos = []
         print('\nConverting prediction to KITTI format')
-        for idx, pred_dicts in enumerate(
-                mmcv.track_iter_progress(net_outputs)):
-            annos = []
-            info = self.data_infos[idx]
-            sample_idx = info['image']['image_idx']
-            image_shape = info['image']['image_shape'][:2]
-            box_dict = self.convert_valid_bboxes(pred_dicts, info)
-            anno = {
-                'name': [],
-                'truncated': [],
-                'occluded': [],
-                'alpha': [],
-                'bbox': [],
-                'dimensions': [],
-                'location': [],
-                'rotation_y': [],
-                'score': []
-            }
-            if len(box_dict['bbox']) > 0:
-                box_2d_preds = box_dict['bbox']
-                box_preds = box_dict['box3d_camera']
-                scores = box_dict['scores']
-                box_preds_lidar = box_dict['box3d_lidar']
-                label_preds = box_dict['label_preds']
-
-                for box, box_lidar, bbox, score, label in zip(
-                        box_preds, box_preds_lidar, box_2d_preds, scores,
-                        label_preds):
-                    bbox[2:] = np.minimum(bbox[2:], image_shape[::-1])
-                    bbox[:2] = np.maximum(bbox[:2], [0, 0])
-                    anno['name'].append(class_names[int(label)])
-                    anno['truncated'].append(0.0)
-                    anno['occluded'].append(0)
-                    anno['alpha'].append(
-                        -np.arctan2(-box_lidar[1], box_lidar[0]) + box[6])
-                    anno['bbox'].append(bbox)
-                    anno['dimensions'].append(box[3:6])
-                    anno['location'].append(box[:3])
-                    anno['rotation_y'].append(box[6])
-                    anno['score'].append(score)
-
-                anno = {k: np.stack(v) for k, v in anno.items()}
-                annos.append(anno)
-            else:
-                anno = {
-                    'name': np.array([]),
-                    'truncated': np.array([]),
-                    'occluded': np.array([]),
-                    'alpha': np.array([]),
-                    'bbox': np.zeros([0, 4]),
-                    'dimensions': np.zeros([0, 3]),
-                    'location': np.zeros([0, 3]),
-                    'rotation_y': np.array([]),
-                    'score': np.array([]),
-                }
-                annos.append(anno)
-
-            if submission_prefix is not None:
-                curr_file = f'{submission_prefix}/{sample_idx:06d}.txt'
-                with open(curr_file, 'w') as f:
-                    bbox = anno['bbox']
-                    loc = anno['location']
-                    dims = anno['dimensions']  # lhw -> hwl
-
-                    for idx in range(len(bbox)):
-                        print(
-                            '{} -1 -1 {:.4f} {:.4f} {:.4f} {:.4f} '
-                            '{:.4f} {:.4f} {:.4f} '
-                            '{:.4f} {:.4f} {:.4f} {:.4f} {:.4f} {:.4f}'.format(
-                                anno['name'][idx], anno['alpha'][idx],
-                                bbox[idx][0], bbox[idx][1], bbox[idx][2],
-                                bbox[idx][3], dims[idx][1], dims[idx][2],
-                                dims[idx][0], loc[idx][0], loc[idx][1],
-                                loc[idx][2], anno['rotation_y'][idx],
-                                anno['score'][idx]),
-                            file=f)
-
-            annos[-1]['sample_idx'] = np.array(
-                [sample_idx] * len(annos[-1]['score']), dtype=np.int64)
-
-            det_annos += annos
+        box_dicts = convert_valid_bboxes_batch(net_outputs, self.data_infos,
+                                               self.pcd_limit_range)
+        det_annos = []
+        for info, box_dict in zip(self.data_infos, box_dicts):
+            anno = box_dict2kitti_anno(box_dict, class_names,
+                                       info['image']['image_shape'][:2])
+            anno['sample_idx'] = np.full(
+                len(anno['score']), info['image']['image_idx'], dtype=np.int64)
+            det_annos.append(anno)
+
+        if submission_prefix is not None:
+            mmcv.mkdir_or_exist(submission_prefix)
+            dump_kitti_submissions(
+                det_annos, [
+                    f'{submission_prefix}/{info["image"]["image_idx"]:06d}.txt'
+                    for info in self.data_infos
+                ],
+                nproc=nproc)
 
         if pklfile_prefix is not None:
             if not pklfile_prefix.endswith(('.pkl', '.pickle')):
@@ -513,7 +466,8 @@ class SPA_MVX_Dataset(Custom3DDataset):
                             net_outputs,
                             class_names,
                             pklfile_prefix=None,
-                            submission_prefix=None):
+                            submission_prefix=None,
+                            nproc=4):
         """Convert 2D detection results to kitti format for evaluation and test
         submission.
 
@@ -523,68 +477,21 @@ class SPA_MVX_Dataset(Custom3DDataset):
             class_names (list[String]): A list of class names.
             pklfile_prefix (str): The prefix of pkl file.
             submission_prefix (str): The prefix of submission file.
+            nproc (int, optional): Number of threads used to write the
+                submission files. Default: 4.
 
         Returns:
             list[dict]: A list of dictionaries have the kitti format
         """
         assert len(net_outputs) == len(self.data_infos), \
             'invalid list length of network outputs'
-        det_annos = []
         print('\nConverting prediction to KITTI format')
-        for i, bboxes_per_sample in enumerate(
-                mmcv.track_iter_progress(net_outputs)):
-            annos = []
-            anno = dict(
-                name=[],
-                truncated=[],
-                occluded=[],
-                alpha=[],
-                bbox=[],
-                dimensions=[],
-                location=[],
-                rotation_y=[],
-                score=[])
-            sample_idx = self.data_infos[i]['image']['image_idx']
-
-            num_example = 0
-            for label in range(len(bboxes_per_sample)):
-                bbox = bboxes_per_sample[label]
-                for i in range(bbox.shape[0]):
-                    anno['name'].append(class_names[int(label)])
-                    anno['truncated'].append(0.0)
-                    anno['occluded'].append(0)
-                    anno['alpha'].append(0.0)
-                    anno['bbox'].append(bbox[i, :4])
-                    # set dimensions (height, width, length) to zero
-                    anno['dimensions'].append(
-                        np.zeros(shape=[3], dtype=np.float32))
-                    # set the 3D translation to (-1000, -1000, -1000)
-                    anno['location'].append(
-                        np.ones(shape=[3], dtype=np.float32) * (-1000.0))
-                    anno['rotation_y'].append(0.0)
-                    anno['score'].append(bbox[i, 4])
-                    num_example += 1
-
-            if num_example == 0:
-                annos.append(
-                    dict(
-                        name=np.array([]),
-                        truncated=np.array([]),
-                        occluded=np.array([]),
-                        alpha=np.array([]),
-                        bbox=np.zeros([0, 4]),
-                        dimensions=np.zeros([0, 3]),
-                        location=np.zeros([0, 3]),
-                        rotation_y=np.array([]),
-                        score=np.array([]),
-                    ))
-            else:
-                anno = {k: np.stack(v) for k, v in anno.items()}
-                annos.append(anno)
-
-            annos[-1]['sample_idx'] = np.array(
-                [sample_idx] * num_example, dtype=np.int64)
-            det_annos += annos
+        det_annos = []
+        for info, bboxes_per_sample in zip(self.data_infos, net_outputs):
+            anno = bboxes2kitti_anno_2d(bboxes_per_sample, class_names)
+            anno['sample_idx'] = np.full(
+                len(anno['score']), info['image']['image_idx'], dtype=np.int64)
+            det_annos.append(anno)
 
         if pklfile_prefix is not None:
             # save file in pkl format
@@ -597,26 +504,13 @@ class SPA_MVX_Dataset(Custom3DDataset):
             # save file in submission format
             mmcv.mkdir_or_exist(submission_prefix)
             print(f'Saving KITTI submission to {submission_prefix}')
-            for i, anno in enumerate(det_annos):
-                sample_idx = self.data_infos[i]['image']['image_idx']
-                cur_det_file = f'{submission_prefix}/{sample_idx:06d}.txt'
-                with open(cur_det_file, 'w') as f:
-                    bbox = anno['bbox']
-                    loc = anno['location']
-                    dims = anno['dimensions'][::-1]  # lhw -> hwl
-                    for idx in range(len(bbox)):
-                        print(
-                            '{} -1 -1 {:4f} {:4f} {:4f} {:4f} {:4f} {:4f} '
-                            '{:4f} {:4f} {:4f} {:4f} {:4f} {:4f} {:4f}'.format(
-                                anno['name'][idx],
-                                anno['alpha'][idx],
-                                *bbox[idx],  # 4 float
-                                *dims[idx],  # 3 float
-                                *loc[idx],  # 3 float
-                                anno['rotation_y'][idx],
-                                anno['score'][idx]),
-                            file=f,
-                        )
+            dump_kitti_submissions(
+                det_annos, [
+                    f'{submission_prefix}/{info["image"]["image_idx"]:06d}.txt'
+                    for info in self.data_infos
+                ],
+                float_fmt='%4f',
+                nproc=nproc)
             print(f'Result is saved to {submission_prefix}')
 
         return det_annos
@@ -644,64 +538,8 @@ class SPA_MVX_Dataset(Custom3DDataset):
                 - label_preds (np.ndarray): Class label predictions.
                 - sample_idx (int): Sample index.
         """
-        # TODO: refactor this function
-        box_preds = box_dict['boxes_3d']
-        scores = box_dict['scores_3d']
-        labels = box_dict['labels_3d']
-        sample_idx = info['image']['image_idx']
-        box_preds.limit_yaw(offset=0.5, period=np.pi * 2)
-
-        if len(box_preds) == 0:
-            return dict(
-                bbox=np.zeros([0, 4]),
-                box3d_camera=np.zeros([0, 7]),
-                box3d_lidar=np.zeros([0, 7]),
-                scores=np.zeros([0]),
-                label_preds=np.zeros([0, 4]),
-                sample_idx=sample_idx)
-
-        rect = info['calib']['R0_rect'].astype(np.float32)
-        Trv2c = info['calib']['Tr_velo_to_cam'].astype(np.float32)
-        P2 = info['calib']['P2'].astype(np.float32)
-        img_shape = info['image']['image_shape']
-        P2 = box_preds.tensor.new_tensor(P2)
-
-        box_preds_camera = box_preds.convert_to(Box3DMode.CAM, rect @ Trv2c)
-
-        box_corners = box_preds_camera.corners
-        box_corners_in_image = points_cam2img(box_corners, P2)
-        # box_corners_in_image: [N, 8, 2]
-        minxy = torch.min(box_corners_in_image, dim=1)[0]
-        maxxy = torch.max(box_corners_in_image, dim=1)[0]
-        box_2d_preds = torch.cat([minxy, maxxy], dim=1)
-        # Post-processing
-        # check box_preds_camera
-        image_shape = box_preds.tensor.new_tensor(img_shape)
-        valid_cam_inds = ((box_2d_preds[:, 0] < image_shape[1]) &
-                          (box_2d_preds[:, 1] < image_shape[0]) &
-                          (box_2d_preds[:, 2] > 0) & (box_2d_preds[:, 3] > 0))
-        # check box_preds
-        limit_range = box_preds.tensor.new_tensor(self.pcd_limit_range)
-        valid_pcd_inds = ((box_preds.center > limit_range[:3]) &
-                          (box_preds.center < limit_range[3:]))
-        valid_inds = valid_cam_inds & valid_pcd_inds.all(-1)
-
-        if valid_inds.sum() > 0:
-            return dict(
-                bbox=box_2d_preds[valid_inds, :].numpy(),
-                box3d_camera=box_preds_camera[valid_inds].tensor.numpy(),
-                box3d_lidar=box_preds[valid_inds].tensor.numpy(),
-                scores=scores[valid_inds].numpy(),
-                label_preds=labels[valid_inds].numpy(),
-                sample_idx=sample_idx)
-        else:
-            return dict(
-                bbox=np.zeros([0, 4]),
-                box3d_camera=np.zeros([0, 7]),
-                box3d_lidar=np.zeros([0, 7]),
-                scores=np.zeros([0]),
-                label_preds=np.zeros([0, 4]),
-                sample_idx=sample_idx)
+        return convert_valid_bboxes_batch([box_dict], [info],
+                                          self.pcd_limit_range)[0]
 
     def _build_default_pipeline(self):
         """Build the default pipeline for this dataset."""
@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import tempfile
+from collections.abc import Sequence
 from os import path as osp
 import json
 import os
@@ -17,6 +18,7 @@ from ..core.bbox import Box3DMode, Coord3DMode, LiDARInstance3DBoxes
 from .builder import DATASETS
 from .custom_3d import Custom3DDataset
 from .pipelines import Compose
+from .utils import load_class_sample_inds
 from nuscenes.eval.detection.data_classes import DetectionConfig, DetectionMetrics, DetectionBox, \
     DetectionMetricDataList
 from nuscenes.eval.tracking.data_classes import TrackingBox
@@ -162,6 +164,22 @@ class SPA_Nus_Dataset(Custom3DDataset):
                 cat_ids.append(self.cat2id[name])
         return cat_ids
 
+    def get_class_sample_inds(self):
+        """Get the indices of the samples containing each category.
+
+        The inverted index is built from all ``gt_names`` at once and cached
+        next to the annotation file.
+
+        Returns:
+            list[np.ndarray]: Sorted sample indices, one array per category.
+        """
+        return load_class_sample_inds(
+            self.ann_file,
+            self.data_infos,
+            self.CLASSES,
+            use_valid_flag=self.use_valid_flag,
+            load_interval=self.load_interval)
+
     def load_annotations(self, ann_file):
         """Load annotations from ann_file.
 
@@ -289,6 +307,81 @@ class SPA_Nus_Dataset(Custom3DDataset):
             gt_names=gt_names_3d)
         return anns_results
 
+    def _format_single_bbox(self, sample_id, det):
+        """Convert the result of a single sample to the standard format.
+
+        Args:
+            sample_id (int): Index of the sample.
+            det (dict): Testing result of the sample.
+
+        Returns:
+            list[dict]: Detections of the sample in the standard format.
+        """
+        annos = []
+        mapped_class_names = self.CLASSES
+        boxes = output_to_nusc_box(det, self.with_velocity)
+        sample_token = self.data_infos[sample_id]['token']
+        boxes = lidar_nusc_box_to_global(self.data_infos[sample_id], boxes,
+                                         mapped_class_names,
+                                         self.eval_detection_configs,
+                                         self.eval_version)
+        for i, box in enumerate(boxes):
+            name = mapped_class_names[box.label]
+            if np.sqrt(box.velocity[0]**2 + box.velocity[1]**2) > 0.2:
+                if name in [
+                        'car',
+                        'construction_vehicle',
+                        'bus',
+                        'truck',
+                        'trailer',
+                ]:
+                    attr = 'vehicle.moving'
+                elif name in ['motorcycle', 'cyclist']:
+                    attr = 'cycle.with_rider'
+                else:
+                    attr = SPA_Nus_Dataset.DefaultAttribute[name]
+            else:
+                if name in ['pedestrian']:
+                    attr = 'pedestrian.standing'
+                elif name in ['bus']:
+                    attr = 'vehicle.stopped'
+                else:
+                    attr = SPA_Nus_Dataset.DefaultAttribute[name]
+
+            nusc_anno = dict(
+                sample_token=sample_token,
+                translation=box.center.tolist(),
+                size=box.wlh.tolist(),
+                rotation=box.orientation.elements.tolist(),
+                velocity=box.velocity[:2].tolist(),
+                detection_name=cls_label_map[name],
+                detection_score=box.score,
+                attribute_name=attr)
+            annos.append(nusc_anno)
+        return annos
+
+    def _dump_nusc_annos(self, nusc_annos, jsonfile_prefix):
+        """Dump the detections in the standard format to a json file.
+
+        Args:
+            nusc_annos (dict[str, list[dict]]): Detections of each sample
+                token.
+            jsonfile_prefix (str): The prefix of the output jsonfile.
+
+        Returns:
+            str: Path of the output json file.
+        """
+        nusc_submissions = {
+            'meta': self.modality,
+            'results': nusc_annos,
+        }
+
+        mmcv.mkdir_or_exist(jsonfile_prefix)
+        res_path = osp.join(jsonfile_prefix, 'results_nusc.json')
+        print('Results writes to', res_path)
+        mmcv.dump(nusc_submissions, res_path)
+        return res_path
+
     def _format_bbox(self, results, jsonfile_prefix=None):
         """Convert the results to the standard format.
 
@@ -302,61 +395,33 @@ class SPA_Nus_Dataset(Custom3DDataset):
             str: Path of the output json file.
         """
         nusc_annos = {}
-        mapped_class_names = self.CLASSES
 
         print('Start to convert detection format...')
         for sample_id, det in enumerate(mmcv.track_iter_progress(results)):
-            annos = []
-            boxes = output_to_nusc_box(det, self.with_velocity)
             sample_token = self.data_infos[sample_id]['token']
-            boxes = lidar_nusc_box_to_global(self.data_infos[sample_id], boxes,
-                                             mapped_class_names,
-                                             self.eval_detection_configs,
-                                             self.eval_version)
-            for i, box in enumerate(boxes):
-                name = mapped_class_names[box.label]
-                if np.sqrt(box.velocity[0]**2 + box.velocity[1]**2) > 0.2:
-                    if name in [
-                            'car',
-                            'construction_vehicle',
-                            'bus',
-                            'truck',
-                            'trailer',
-                    ]:
-                        attr = 'vehicle.moving'
-                    elif name in ['motorcycle', 'cyclist']:
-                        attr = 'cycle.with_rider'
-                    else:
-                        attr = SPA_Nus_Dataset.DefaultAttribute[name]
-                else:
-                    if name in ['pedestrian']:
-                        attr = 'pedestrian.standing'
-                    elif name in ['bus']:
-                        attr = 'vehicle.stopped'
-                    else:
-                        attr = SPA_Nus_Dataset.DefaultAttribute[name]
-
-                nusc_anno = dict(
-                    sample_token=sample_token,
-                    translation=box.center.tolist(),
-                    size=box.wlh.tolist(),
-                    rotation=box.orientation.elements.tolist(),
-                    velocity=box.velocity[:2].tolist(),
-                    detection_name=cls_label_map[name],
-                    detection_score=box.score,
-                    attribute_name=attr)
-                annos.append(nusc_anno)
-            nusc_annos[sample_token] = annos
-        nusc_submissions = {
-            'meta': self.modality,
-            'results': nusc_annos,
-        }
+            nusc_annos[sample_token] = self._format_single_bbox(sample_id, det)
+        return self._dump_nusc_annos(nusc_annos, jsonfile_prefix)
 
-        mmcv.mkdir_or_exist(jsonfile_prefix)
-        res_path = osp.join(jsonfile_prefix, 'results_nusc.json')
-        print('Results writes to', res_path)
-        mmcv.dump(nusc_submissions, res_path)
-        return res_path
+    def format_result(self, idx, result):
+        """Convert the result of a single sample to the standard format.
+
+        This is the per-sample counterpart of :meth:`format_results`, used to
+        format the results while testing.
+
+        Args:
+            idx (int): Index of the sample.
+            result (dict): Testing result of the sample.
+
+        Returns:
+            list[dict] | dict[str, list[dict]]: Detections of the sample in
+                the standard format, or a dict of them for each result name.
+        """
+        if not ('pts_bbox' in result or 'img_bbox' in result):
+            return self._format_single_bbox(idx, result)
+        return {
+            name: self._format_single_bbox(idx, result[name])
+            for name in result
+        }
 
     def _evaluate_single(self,
                          result_path,
@@ -443,7 +508,7 @@ class SPA_Nus_Dataset(Custom3DDataset):
                 directory created for saving json files when
                 `jsonfile_prefix` is not specified.
         """
-        assert isinstance(results, list), 'results must be a list'
+        assert isinstance(results, Sequence), 'results must be a sequence'
         assert len(results) == len(self), (
             'The length of results is not equal to the dataset len: {} != {}'.
             format(len(results), len(self)))
@@ -504,6 +569,29 @@ class SPA_Nus_Dataset(Custom3DDataset):
             dict[str, float]: Results of each evaluation metric.
         """
 
+        result_files, tmp_dir = self.format_results(results, jsonfile_prefix)
+        results_dict = self._evaluate_result_files(result_files, result_names)
+
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+        if show or out_dir:
+            self.show(results, out_dir, show=show, pipeline=pipeline)
+        return results_dict
+
+    def _evaluate_result_files(self, result_files, result_names=['pts_bbox']):
+        """Evaluate the json files of the results in nuScenes protocol.
+
+        Args:
+            result_files (str | dict[str, str]): Json file of the results, or
+                a dict of them for each result name.
+            result_names (list[str], optional): Result names to evaluate.
+                Default: ['pts_bbox'].
+
+        Returns:
+            dict[str, float]: Results of each evaluation metric.
+        """
+
         # open json
         def json_to_dict(path):
             scen_ped_id={}
@@ -523,8 +611,6 @@ class SPA_Nus_Dataset(Custom3DDataset):
             'bicycle': 'vehicle.moving',
          }
 
-        result_files, tmp_dir = self.format_results(results, jsonfile_prefix)
-
         save_path_ = "./"
         try:
             result_ = json_to_dict(result_files['pts_bbox'])
@@ -575,12 +661,61 @@ class SPA_Nus_Dataset(Custom3DDataset):
             results_dict.update(ret_dict)
         elif isinstance(result_files, str):
             results_dict = self._evaluate_single(result_files)
+        return results_dict
+
+    def evaluate_formatted(self,
+                           formatted,
+                           metric='bbox',
+                           logger=None,
+                           jsonfile_prefix=None,
+                           result_names=['pts_bbox'],
+                           **kwargs):
+        """Evaluation in nuScenes protocol of results formatted by
+        :meth:`format_result`.
+
+        Args:
+            formatted (list[list[dict] | dict]): Formatted results of the
+                dataset.
+            metric (str | list[str], optional): Metrics to be evaluated.
+                Default: 'bbox'.
+            logger (logging.Logger | str, optional): Logger used for printing
+                related information during evaluation. Default: None.
+            jsonfile_prefix (str, optional): The prefix of json files including
+                the file path and the prefix of filename, e.g., "a/b/prefix".
+                If not specified, a temp file will be created. Default: None.
+            result_names (list[str], optional): Result names to evaluate.
+                Default: ['pts_bbox'].
+            kwargs (dict): Other arguments of :meth:`evaluate`. The formatted
+                results cannot be shown, so ``show``, ``out_dir`` and
+                ``pipeline`` are ignored.
+
+        Returns:
+            dict[str, float]: Results of each evaluation metric.
+        """
+        assert len(formatted) == len(self), (
+            'The length of results is not equal to the dataset len: {} != {}'.
+            format(len(formatted), len(self)))
+        if jsonfile_prefix is None:
+            tmp_dir = tempfile.TemporaryDirectory()
+            jsonfile_prefix = osp.join(tmp_dir.name, 'results')
+        else:
+            tmp_dir = None
+
+        tokens = [info['token'] for info in self.data_infos]
+        if isinstance(formatted[0], list):
+            result_files = self._dump_nusc_annos(
+                dict(zip(tokens, formatted)), jsonfile_prefix)
+        else:
+            result_files = dict()
+            for name in formatted[0]:
+                nusc_annos = dict(
+                    zip(tokens, (annos[name] for annos in formatted)))
+                result_files[name] = self._dump_nusc_annos(
+                    nusc_annos, osp.join(jsonfile_prefix, name))
+        results_dict = self._evaluate_result_files(result_files, result_names)
 
         if tmp_dir is not None:
             tmp_dir.cleanup()
-
-        if show or out_dir:
-            self.show(results, out_dir, show=show, pipeline=pipeline)
         return results_dict
 
     def _build_default_pipeline(self):
@@ -1,5 +1,9 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os
+from os import path as osp
+
 import mmcv
+import numpy as np
 
 # yapf: disable
 from mmdet3d.datasets.pipelines import (Collect3D, DefaultFormatBundle3D,
@@ -138,3 +142,103 @@ def extract_result_dict(results, key):
     if isinstance(data, mmcv.parallel.DataContainer):
         data = data._data
     return data
+
+
+def get_class_sample_inds(data_infos, classes, use_valid_flag=False):
+    """Build the class-to-sample inverted index of a detection dataset.
+
+    All ``gt_names`` are concatenated once and mapped to category ids, so the
+    index is built with a handful of array operations instead of one
+    ``get_cat_ids`` call per sample.
+
+    Args:
+        data_infos (list[dict]): Annotation infos with ``gt_names`` and,
+            optionally, ``valid_flag``.
+        classes (list[str]): Class names of the dataset.
+        use_valid_flag (bool, optional): Whether to only count the boxes
+            marked by ``valid_flag``. Default: False.
+
+    Returns:
+        list[np.ndarray]: Sorted indices of the samples containing each
+            class, one array per class.
+    """
+    num_samples = len(data_infos)
+    if num_samples == 0:
+        return [np.zeros(0, dtype=np.int64) for _ in classes]
+    names = np.concatenate([info['gt_names'] for info in data_infos])
+    num_boxes = [len(info['gt_names']) for info in data_infos]
+    sample_inds = np.repeat(np.arange(num_samples), num_boxes)
+    if use_valid_flag:
+        valid = np.concatenate(
+            [info['valid_flag'] for info in data_infos]).astype(bool)
+        names, sample_inds = names[valid], sample_inds[valid]
+
+    cat_ids = np.full(len(names), -1, dtype=np.int64)
+    for cat_id, name in enumerate(classes):
+        cat_ids[names == name] = cat_id
+    keep = cat_ids >= 0
+    # unique (cat, sample) pairs come out sorted by class, then by sample
+    keys = np.unique(cat_ids[keep] * num_samples + sample_inds[keep])
+    cls_of_key = keys // num_samples
+    splits = np.cumsum(np.bincount(cls_of_key, minlength=len(classes)))[:-1]
+    return np.split(keys % num_samples, splits)
+
+
+def load_class_sample_inds(ann_file,
+                           data_infos,
+                           classes,
+                           use_valid_flag=False,
+                           **cache_key):
+    """Load the class-to-sample inverted index, cached next to ``ann_file``.
+
+    The index is stored in ``<ann_file>_class_inds.pkl`` and rebuilt by
+    :func:`get_class_sample_inds` whenever the annotation file, the number
+    of loaded samples or any of the arguments change. Failing to write the
+    cache (e.g. on a read-only file system) is not an error.
+
+    Args:
+        ann_file (str): Path of the annotation file.
+        data_infos (list[dict]): Annotation infos loaded from ``ann_file``.
+        classes (list[str]): Class names of the dataset.
+        use_valid_flag (bool, optional): Whether to only count the boxes
+            marked by ``valid_flag``. Default: False.
+        **cache_key: Anything else that changes ``data_infos`` (e.g.
+            ``load_interval``) and should invalidate the cache.
+
+    Returns:
+        list[np.ndarray]: Sorted indices of the samples containing each
+            class, one array per class.
+    """
+    if not isinstance(ann_file, str) or not osp.isfile(ann_file):
+        return get_class_sample_inds(data_infos, classes, use_valid_flag)
+    stat = os.stat(ann_file)
+    key = dict(
+        ann_file=osp.abspath(ann_file),
+        mtime=stat.st_mtime,
+        size=stat.st_size,
+        num_samples=len(data_infos),
+        classes=list(classes),
+        use_valid_flag=use_valid_flag,
+        **cache_key)
+    cache_file = osp.splitext(ann_file)[0] + '_class_inds.pkl'
+    if osp.isfile(cache_file):
+        try:
+            cache = mmcv.load(cache_file, file_format='pkl')
+            if cache['key'] == key:
+                return cache['class_sample_inds']
+        except Exception:
+            pass
+
+    class_sample_inds = get_class_sample_inds(data_infos, classes,
+                                              use_valid_flag)
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    try:
+        mmcv.dump(
+            dict(key=key, class_sample_inds=class_sample_inds),
+            tmp_file,
+            file_format='pkl')
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        if osp.exists(tmp_file):
+            os.remove(tmp_file)
+    return class_sample_inds
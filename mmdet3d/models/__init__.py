@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from .backbones import *  # noqa: F401,F403
+import importlib
+
 from .builder import (BACKBONES, DETECTORS, FUSION_LAYERS, HEADS, LOSSES,
                       MIDDLE_ENCODERS, NECKS, ROI_EXTRACTORS, SEGMENTORS,
                       SHARED_HEADS, VOXEL_ENCODERS, build_backbone,
@@ -7,17 +8,14 @@ from .builder import (BACKBONES, DETECTORS, FUSION_LAYERS, HEADS, LOSSES,
                       build_loss, build_middle_encoder, build_model,
                       build_neck, build_roi_extractor, build_shared_head,
                       build_voxel_encoder)
-from .decode_heads import *  # noqa: F401,F403
-from .dense_heads import *  # noqa: F401,F403
-from .detectors import *  # noqa: F401,F403
-from .fusion_layers import *  # noqa: F401,F403
-from .losses import *  # noqa: F401,F403
-from .middle_encoders import *  # noqa: F401,F403
+# `model_utils` registers into mmcv registries, so it is imported eagerly
 from .model_utils import *  # noqa: F401,F403
-from .necks import *  # noqa: F401,F403
-from .roi_heads import *  # noqa: F401,F403
-from .segmentors import *  # noqa: F401,F403
-from .voxel_encoders import *  # noqa: F401,F403
+
+# The other subpackages are imported the first time one of their types is
+# built from a config (see `LazyRegistry`) or one of their names is accessed.
+_LAZY_SUBPACKAGES = ('backbones', 'decode_heads', 'dense_heads', 'detectors',
+                     'fusion_layers', 'losses', 'middle_encoders', 'necks',
+                     'roi_heads', 'segmentors', 'voxel_encoders')
 
 __all__ = [
     'BACKBONES', 'NECKS', 'ROI_EXTRACTORS', 'SHARED_HEADS', 'HEADS', 'LOSSES',
@@ -27,3 +25,15 @@ __all__ = [
     'build_fusion_layer', 'build_model', 'build_middle_encoder',
     'build_voxel_encoder'
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBPACKAGES:
+        return importlib.import_module(f'.{name}', __name__)
+    for subpackage in _LAZY_SUBPACKAGES:
+        module = importlib.import_module(f'.{subpackage}', __name__)
+        if name in getattr(module, '__all__', ()):
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
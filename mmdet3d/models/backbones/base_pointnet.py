@@ -2,6 +2,7 @@
 import warnings
 from abc import ABCMeta
 
+import torch
 from mmcv.runner import BaseModule
 
 
@@ -37,3 +38,31 @@ class BasePointNet(BaseModule, metaclass=ABCMeta):
             features = None
 
         return xyz, features
+
+    @staticmethod
+    def _split_ragged_point_feats(points):
+        """Concatenate point clouds of different sizes into a ragged batch.
+
+        Args:
+            points (list[torch.Tensor]): Point coordinates with features of
+                each sample, with shape (N_i, 3 + input_feature_dim).
+
+        Returns:
+            torch.Tensor: Coordinates of the concatenated points,
+                with shape (1, N, 3).
+            torch.Tensor: Features of the concatenated points,
+                with shape (1, input_feature_dim, N).
+            torch.Tensor: Indices of the points in each sample,
+                with shape (1, N).
+            torch.Tensor: Offsets of the samples in the concatenated points,
+                with shape (B + 1, ).
+        """
+        num_points = torch.tensor([len(p) for p in points])
+        offsets = num_points.new_zeros(len(points) + 1)
+        offsets[1:] = num_points.cumsum(0)
+        xyz, features = BasePointNet._split_point_feats(
+            torch.cat(points).unsqueeze(0))
+        indices = torch.arange(
+            offsets[-1].item(), device=xyz.device) - torch.repeat_interleave(
+                offsets[:-1], num_points).to(xyz.device)
+        return xyz, features, indices.unsqueeze(0), offsets
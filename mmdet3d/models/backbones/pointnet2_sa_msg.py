@@ -129,8 +129,12 @@ class PointNet2SAMSG(BasePointNet):
         """Forward pass.
 
         Args:
-            points (torch.Tensor): point coordinates with features,
-                with shape (B, N, 3 + input_feature_dim).
+            points (torch.Tensor | list[torch.Tensor]): point coordinates
+                with features, with shape (B, N, 3 + input_feature_dim), or
+                a ragged batch of point clouds with shape
+                (N_i, 3 + input_feature_dim). The first SA module samples
+                and groups each point cloud of a ragged batch separately,
+                and its outputs are batched.
 
         Returns:
             dict[str, torch.Tensor]: Outputs of the last SA module.
@@ -141,11 +145,16 @@ class PointNet2SAMSG(BasePointNet):
                 - sa_indices (torch.Tensor): Indices of the
                     input points.
         """
-        xyz, features = self._split_point_feats(points)
+        if isinstance(points, (list, tuple)):
+            xyz, features, indices, offsets = \
+                self._split_ragged_point_feats(points)
+        else:
+            xyz, features = self._split_point_feats(points)
+            offsets = None
 
-        batch, num_points = xyz.shape[:2]
-        indices = xyz.new_tensor(range(num_points)).unsqueeze(0).repeat(
-            batch, 1).long()
+            batch, num_points = xyz.shape[:2]
+            indices = xyz.new_tensor(range(num_points)).unsqueeze(0).repeat(
+                batch, 1).long()
 
         sa_xyz = [xyz]
         sa_features = [features]
@@ -157,13 +166,17 @@ class PointNet2SAMSG(BasePointNet):
 
         for i in range(self.num_sa):
             cur_xyz, cur_features, cur_indices = self.SA_modules[i](
-                sa_xyz[i], sa_features[i])
+                sa_xyz[i], sa_features[i], offsets=offsets if i == 0 else None)
             if self.aggregation_mlps[i] is not None:
                 cur_features = self.aggregation_mlps[i](cur_features)
             sa_xyz.append(cur_xyz)
             sa_features.append(cur_features)
-            sa_indices.append(
-                torch.gather(sa_indices[-1], 1, cur_indices.long()))
+            if i == 0 and offsets is not None:
+                # the indices of a ragged batch are already in each sample
+                sa_indices.append(cur_indices.long())
+            else:
+                sa_indices.append(
+                    torch.gather(sa_indices[-1], 1, cur_indices.long()))
             if i in self.out_indices:
                 out_sa_xyz.append(sa_xyz[-1])
                 out_sa_features.append(sa_features[-1])
@@ -91,8 +91,12 @@ class PointNet2SASSG(BasePointNet):
         """Forward pass.
 
         Args:
-            points (torch.Tensor): point coordinates with features,
-                with shape (B, N, 3 + input_feature_dim).
+            points (torch.Tensor | list[torch.Tensor]): point coordinates
+                with features, with shape (B, N, 3 + input_feature_dim), or
+                a ragged batch of point clouds with shape
+                (N_i, 3 + input_feature_dim). The first SA module samples
+                and groups each point cloud of a ragged batch separately,
+                and its outputs are batched.
 
         Returns:
             dict[str, list[torch.Tensor]]: Outputs after SA and FP modules.
@@ -104,11 +108,16 @@ class PointNet2SASSG(BasePointNet):
                 - fp_indices (list[torch.Tensor]): Indices of the
                     input points.
         """
-        xyz, features = self._split_point_feats(points)
+        if isinstance(points, (list, tuple)):
+            xyz, features, indices, offsets = \
+                self._split_ragged_point_feats(points)
+        else:
+            xyz, features = self._split_point_feats(points)
+            offsets = None
 
-        batch, num_points = xyz.shape[:2]
-        indices = xyz.new_tensor(range(num_points)).unsqueeze(0).repeat(
-            batch, 1).long()
+            batch, num_points = xyz.shape[:2]
+            indices = xyz.new_tensor(range(num_points)).unsqueeze(0).repeat(
+                batch, 1).long()
 
         sa_xyz = [xyz]
         sa_features = [features]
@@ -116,12 +125,18 @@ class PointNet2SASSG(BasePointNet):
 
         for i in range(self.num_sa):
             cur_xyz, cur_features, cur_indices = self.SA_modules[i](
-                sa_xyz[i], sa_features[i])
+                sa_xyz[i], sa_features[i], offsets=offsets if i == 0 else None)
             sa_xyz.append(cur_xyz)
             sa_features.append(cur_features)
-            sa_indices.append(
-                torch.gather(sa_indices[-1], 1, cur_indices.long()))
-
+            if i == 0 and offsets is not None:
+                # the indices of a ragged batch are already in each sample
+                sa_indices.append(cur_indices.long())
+            else:
+                sa_indices.append(
+                    torch.gather(sa_indices[-1], 1, cur_indices.long()))
+
+        assert offsets is None or self.num_fp < self.num_sa, \
+            'the features can not be propagated to a ragged batch'
         fp_xyz = [sa_xyz[-1]]
         fp_features = [sa_features[-1]]
         fp_indices = [sa_indices[-1]]
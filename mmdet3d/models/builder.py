@@ -2,8 +2,8 @@
 import warnings
 
 from mmcv.cnn import MODELS as MMCV_MODELS
-from mmcv.utils import Registry
 
+from mmdet3d.utils import LazyRegistry
 from mmdet.models.builder import BACKBONES as MMDET_BACKBONES
 from mmdet.models.builder import DETECTORS as MMDET_DETECTORS
 from mmdet.models.builder import HEADS as MMDET_HEADS
@@ -13,7 +13,8 @@ from mmdet.models.builder import ROI_EXTRACTORS as MMDET_ROI_EXTRACTORS
 from mmdet.models.builder import SHARED_HEADS as MMDET_SHARED_HEADS
 from mmseg.models.builder import LOSSES as MMSEG_LOSSES
 
-MODELS = Registry('models', parent=MMCV_MODELS)
+MODELS = LazyRegistry(
+    'models', locations=['mmdet3d.models'], parent=MMCV_MODELS)
 
 BACKBONES = MODELS
 NECKS = MODELS
@@ -30,7 +31,7 @@ SEGMENTORS = MODELS
 
 def build_backbone(cfg):
     """Build backbone."""
-    if cfg['type'] in BACKBONES._module_dict.keys():
+    if cfg['type'] in BACKBONES:
         return BACKBONES.build(cfg)
     else:
         return MMDET_BACKBONES.build(cfg)
@@ -38,7 +39,7 @@ def build_backbone(cfg):
 
 def build_neck(cfg):
     """Build neck."""
-    if cfg['type'] in NECKS._module_dict.keys():
+    if cfg['type'] in NECKS:
         return NECKS.build(cfg)
     else:
         return MMDET_NECKS.build(cfg)
@@ -46,7 +47,7 @@ def build_neck(cfg):
 
 def build_roi_extractor(cfg):
     """Build RoI feature extractor."""
-    if cfg['type'] in ROI_EXTRACTORS._module_dict.keys():
+    if cfg['type'] in ROI_EXTRACTORS:
         return ROI_EXTRACTORS.build(cfg)
     else:
         return MMDET_ROI_EXTRACTORS.build(cfg)
@@ -54,7 +55,7 @@ def build_roi_extractor(cfg):
 
 def build_shared_head(cfg):
     """Build shared head of detector."""
-    if cfg['type'] in SHARED_HEADS._module_dict.keys():
+    if cfg['type'] in SHARED_HEADS:
         return SHARED_HEADS.build(cfg)
     else:
         return MMDET_SHARED_HEADS.build(cfg)
@@ -62,7 +63,7 @@ def build_shared_head(cfg):
 
 def build_head(cfg):
     """Build head."""
-    if cfg['type'] in HEADS._module_dict.keys():
+    if cfg['type'] in HEADS:
         return HEADS.build(cfg)
     else:
         return MMDET_HEADS.build(cfg)
@@ -70,7 +71,7 @@ def build_head(cfg):
 
 def build_loss(cfg):
     """Build loss function."""
-    if cfg['type'] in LOSSES._module_dict.keys():
+    if cfg['type'] in LOSSES:
         return LOSSES.build(cfg)
     elif cfg['type'] in MMDET_LOSSES._module_dict.keys():
         return MMDET_LOSSES.build(cfg)
@@ -88,7 +89,7 @@ def build_detector(cfg, train_cfg=None, test_cfg=None):
         'train_cfg specified in both outer field and model field '
     assert cfg.get('test_cfg') is None or test_cfg is None, \
         'test_cfg specified in both outer field and model field '
-    if cfg['type'] in DETECTORS._module_dict.keys():
+    if cfg['type'] in DETECTORS:
         return DETECTORS.build(
             cfg, default_args=dict(train_cfg=train_cfg, test_cfg=test_cfg))
     else:
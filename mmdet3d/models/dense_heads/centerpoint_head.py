@@ -638,12 +638,20 @@ class CenterHead(BaseModule):
             loss_dict[f'task{task_id}.loss_bbox'] = loss_bbox
         return loss_dict
 
-    def get_bboxes(self, preds_dicts, img_metas, img=None, rescale=False):
+    def get_bboxes(self,
+                   preds_dicts,
+                   img_metas,
+                   img=None,
+                   rescale=False,
+                   points=None):
         """Generate bboxes from bbox head predictions.
 
         Args:
             preds_dicts (tuple[list[dict]]): Prediction results.
             img_metas (list[dict]): Point cloud and image's meta info.
+            points (list[torch.Tensor], optional): Points of each sample,
+                used by the bbox coder to skip the empty cells of the
+                heatmaps. Defaults to None.
 
         Returns:
             list[dict]: Decoded bbox, scores and labels after nms.
@@ -652,7 +660,11 @@ class CenterHead(BaseModule):
         for task_id, preds_dict in enumerate(preds_dicts):
             num_class_with_bg = self.num_classes[task_id]
             batch_size = preds_dict[0]['heatmap'].shape[0]
-            batch_heatmap = preds_dict[0]['heatmap'].sigmoid()
+            if getattr(self.bbox_coder, 'sparse_decode', False):
+                # only the peaks go through the sigmoid in the bbox coder
+                batch_heatmap = preds_dict[0]['heatmap']
+            else:
+                batch_heatmap = preds_dict[0]['heatmap'].sigmoid()
 
             batch_reg = preds_dict[0]['reg']
             batch_hei = preds_dict[0]['height']
@@ -677,7 +689,8 @@ class CenterHead(BaseModule):
                 batch_dim,
                 batch_vel,
                 reg=batch_reg,
-                task_id=task_id)
+                task_id=task_id,
+                points=points)
             assert self.test_cfg['nms_type'] in ['circle', 'rotate']
             batch_reg_preds = [box['bboxes'] for box in temp]
             batch_cls_preds = [box['scores'] for box in temp]
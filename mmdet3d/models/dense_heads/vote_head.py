@@ -411,6 +411,16 @@ class VoteHead(BaseModule):
                                           (0, 0, 0, pad_num))
             valid_gt_masks[index] = F.pad(valid_gt_masks[index], (0, pad_num))
 
+        # the points of a ragged batch have different sizes, the padded
+        # vote targets are never gathered by the seed indices
+        max_num_points = max(len(p) for p in points)
+        for index in range(len(points)):
+            pad_num = max_num_points - len(points[index])
+            vote_targets[index] = F.pad(vote_targets[index],
+                                        (0, 0, 0, pad_num))
+            vote_target_masks[index] = F.pad(vote_target_masks[index],
+                                             (0, pad_num))
+
         vote_targets = torch.stack(vote_targets)
         vote_target_masks = torch.stack(vote_target_masks)
         center_targets = torch.stack(center_targets)
@@ -569,7 +579,8 @@ class VoteHead(BaseModule):
         """Generate bboxes from vote head predictions.
 
         Args:
-            points (torch.Tensor): Input points.
+            points (torch.Tensor | list[torch.Tensor]): Input points, or the
+                points of each sample of a ragged batch.
             bbox_preds (dict): Predictions from vote head.
             input_metas (list[dict]): Point cloud and image's meta info.
             rescale (bool): Whether to rescale bboxes.
@@ -590,7 +601,7 @@ class VoteHead(BaseModule):
             for b in range(batch_size):
                 bbox_selected, score_selected, labels = \
                     self.multiclass_nms_single(obj_scores[b], sem_scores[b],
-                                               bbox3d[b], points[b, ..., :3],
+                                               bbox3d[b], points[b][..., :3],
                                                input_metas[b])
                 bbox = input_metas[b]['box_type_3d'](
                     bbox_selected,
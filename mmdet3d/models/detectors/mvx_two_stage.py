@@ -4,13 +4,12 @@ from os import path as osp
 
 import mmcv
 import torch
-from mmcv.ops import Voxelization
 from mmcv.parallel import DataContainer as DC
 from mmcv.runner import force_fp32
-from torch.nn import functional as F
 
 from mmdet3d.core import (Box3DMode, Coord3DMode, bbox3d2result,
                           merge_aug_bboxes_3d, show_result)
+from mmdet3d.ops.batch_voxelize import BatchVoxelization
 from mmdet.core import multi_apply
 from .. import builder
 from ..builder import DETECTORS
@@ -40,7 +39,7 @@ class MVXTwoStageDetector(Base3DDetector):
         super(MVXTwoStageDetector, self).__init__(init_cfg=init_cfg)
 
         if pts_voxel_layer:
-            self.pts_voxel_layer = Voxelization(**pts_voxel_layer)
+            self.pts_voxel_layer = BatchVoxelization(**pts_voxel_layer)
         if pts_voxel_encoder:
             self.pts_voxel_encoder = builder.build_voxel_encoder(
                 pts_voxel_encoder)
@@ -220,19 +219,12 @@ class MVXTwoStageDetector(Base3DDetector):
             tuple[torch.Tensor]: Concatenated points, number of points
                 per voxel, and coordinates.
         """
-        voxels, coors, num_points = [], [], []
-        for res in points:
-            res_voxels, res_coors, res_num_points = self.pts_voxel_layer(res)
-            voxels.append(res_voxels)
-            coors.append(res_coors)
-            num_points.append(res_num_points)
-        voxels = torch.cat(voxels, dim=0)
-        num_points = torch.cat(num_points, dim=0)
-        coors_batch = []
-        for i, coor in enumerate(coors):
-            coor_pad = F.pad(coor, (1, 0), mode='constant', value=i)
-            coors_batch.append(coor_pad)
-        coors_batch = torch.cat(coors_batch, dim=0)
+        batch_inds = torch.cat([
+            res.new_full((res.shape[0], ), i, dtype=torch.long)
+            for i, res in enumerate(points)
+        ])
+        voxels, coors_batch, num_points = self.pts_voxel_layer.forward_batch(
+            torch.cat(points, dim=0), batch_inds, len(points))
         return voxels, num_points, coors_batch
 
     def forward_train(self,
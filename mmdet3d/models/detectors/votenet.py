@@ -25,6 +25,21 @@ class VoteNet(SingleStage3DDetector):
             init_cfg=None,
             pretrained=pretrained)
 
+    @staticmethod
+    def _batch_points(points):
+        """Batch the points of the samples.
+
+        Args:
+            points (list[torch.Tensor]): Points of each sample.
+
+        Returns:
+            torch.Tensor | list[torch.Tensor]: Stacked points, or the points
+                as a ragged batch if the samples have different sizes.
+        """
+        if len(set(len(p) for p in points)) > 1:
+            return points
+        return torch.stack(points)
+
     def forward_train(self,
                       points,
                       img_metas,
@@ -50,7 +65,7 @@ class VoteNet(SingleStage3DDetector):
         Returns:
             dict: Losses.
         """
-        points_cat = torch.stack(points)
+        points_cat = self._batch_points(points)
 
         x = self.extract_feat(points_cat)
         bbox_preds = self.bbox_head(x, self.train_cfg.sample_mod)
@@ -71,7 +86,7 @@ class VoteNet(SingleStage3DDetector):
         Returns:
             list: Predicted 3d boxes.
         """
-        points_cat = torch.stack(points)
+        points_cat = self._batch_points(points)
 
         x = self.extract_feat(points_cat)
         bbox_preds = self.bbox_head(x, self.test_cfg.sample_mod)
@@ -85,7 +100,7 @@ class VoteNet(SingleStage3DDetector):
 
     def aug_test(self, points, img_metas, imgs=None, rescale=False):
         """Test with augmentation."""
-        points_cat = [torch.stack(pts) for pts in points]
+        points_cat = [self._batch_points(pts) for pts in points]
         feats = self.extract_feats(points_cat, img_metas)
 
         # only support aug_test for one sample
@@ -1,10 +1,9 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import torch
-from mmcv.ops import Voxelization
 from mmcv.runner import force_fp32
-from torch.nn import functional as F
 
 from mmdet3d.core import bbox3d2result, merge_aug_bboxes_3d
+from mmdet3d.ops.batch_voxelize import BatchVoxelization
 from .. import builder
 from ..builder import DETECTORS
 from .single_stage import SingleStage3DDetector
@@ -33,7 +32,7 @@ class VoxelNet(SingleStage3DDetector):
             test_cfg=test_cfg,
             init_cfg=init_cfg,
             pretrained=pretrained)
-        self.voxel_layer = Voxelization(**voxel_layer)
+        self.voxel_layer = BatchVoxelization(**voxel_layer)
         self.voxel_encoder = builder.build_voxel_encoder(voxel_encoder)
         self.middle_encoder = builder.build_middle_encoder(middle_encoder)
 
@@ -52,19 +51,12 @@ class VoxelNet(SingleStage3DDetector):
     @force_fp32()
     def voxelize(self, points):
         """Apply hard voxelization to points."""
-        voxels, coors, num_points = [], [], []
-        for res in points:
-            res_voxels, res_coors, res_num_points = self.voxel_layer(res)
-            voxels.append(res_voxels)
-            coors.append(res_coors)
-            num_points.append(res_num_points)
-        voxels = torch.cat(voxels, dim=0)
-        num_points = torch.cat(num_points, dim=0)
-        coors_batch = []
-        for i, coor in enumerate(coors):
-            coor_pad = F.pad(coor, (1, 0), mode='constant', value=i)
-            coors_batch.append(coor_pad)
-        coors_batch = torch.cat(coors_batch, dim=0)
+        batch_inds = torch.cat([
+            res.new_full((res.shape[0], ), i, dtype=torch.long)
+            for i, res in enumerate(points)
+        ])
+        voxels, coors_batch, num_points = self.voxel_layer.forward_batch(
+            torch.cat(points, dim=0), batch_inds, len(points))
         return voxels, num_points, coors_batch
 
     def forward_train(self,
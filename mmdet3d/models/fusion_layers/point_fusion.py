@@ -1,4 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import numpy as np
 import torch
 from mmcv.cnn import ConvModule
 from mmcv.runner import BaseModule
@@ -91,6 +92,125 @@ def point_sample(img_meta,
     return point_features.squeeze().t()
 
 
+def multiview_point_sample(img_meta,
+                           img_features,
+                           points,
+                           proj_mats,
+                           coord_type,
+                           img_scale_factor,
+                           img_crop_offset,
+                           img_flip,
+                           img_pad_shape,
+                           img_shape,
+                           aligned=True,
+                           padding_mode='zeros',
+                           align_corners=True,
+                           view_reduce='mean'):
+    """Obtain image features of points from multiple cameras.
+
+    All points are projected into all cameras with a single batched matmul.
+    Only the point/camera pairs inside the camera frustum, i.e. in front of
+    the camera and inside the image, are sampled, so the cost scales with
+    the number of visible pairs. The features of a point seen by several
+    cameras are reduced across views, and points seen by no camera get zero
+    features.
+
+    Args:
+        img_meta (dict): Meta info.
+        img_features (torch.Tensor): V x C x H x W image features of the
+            V cameras.
+        points (torch.Tensor): Nx3 point cloud in LiDAR coordinates.
+        proj_mats (torch.Tensor): Vx4x4 transformation matrices.
+        coord_type (str): 'DEPTH' or 'CAMERA' or 'LIDAR'.
+        img_scale_factor (torch.Tensor): Scale factor with shape of
+            (w_scale, h_scale).
+        img_crop_offset (torch.Tensor): Crop offset used to crop
+            image during data augmentation with shape of (w_offset, h_offset).
+        img_flip (bool): Whether the image is flipped.
+        img_pad_shape (tuple[int]): int tuple indicates the h & w after
+            padding, this is necessary to obtain features in feature map.
+        img_shape (tuple[int]): int tuple indicates the h & w before padding
+            after scaling, this is necessary for flipping coordinates.
+        aligned (bool, optional): Whether use bilinear interpolation when
+            sampling image features for each point. Defaults to True.
+        padding_mode (str, optional): Padding mode when padding values for
+            features at the border of the feature maps. Points outside all
+            the images still get zero features. Defaults to 'zeros'.
+        align_corners (bool, optional): Whether to align corners when
+            sampling image features for each point. Defaults to True.
+        view_reduce (str, optional): How to reduce the features of a point
+            seen by several cameras, 'mean' or 'sum'. Defaults to 'mean'.
+
+    Returns:
+        torch.Tensor: NxC image features sampled by point coordinates.
+    """
+    assert view_reduce in ['mean', 'sum']
+    num_views, num_channels = img_features.shape[:2]
+    num_points = points.shape[0]
+
+    # apply transformation based on info in img_meta
+    points = apply_3d_transformation(
+        points, coord_type, img_meta, reverse=True)
+
+    # project points to all cameras at once, Vx4x4 @ 4xN -> Vx4xN
+    if proj_mats.shape[-2:] != (4, 4):
+        pad_mats = proj_mats.new_zeros(num_views, 4, 4)
+        pad_mats[:, :proj_mats.shape[1], :proj_mats.shape[2]] = proj_mats
+        pad_mats[:, 3, 3] = 1
+        proj_mats = pad_mats
+    points_4 = torch.cat([points, points.new_ones(num_points, 1)], dim=1)
+    pts_2d = torch.matmul(proj_mats, points_4.t())
+    depth = pts_2d[:, 2]
+    pts_2d = pts_2d[:, :2] / depth.unsqueeze(1)  # Vx2xN
+
+    # img transformation: scale -> crop -> flip
+    img_coors = pts_2d.transpose(1, 2) * img_scale_factor  # VxNx2
+    img_coors = img_coors - img_crop_offset
+    orig_h, orig_w = img_shape
+    if img_flip:
+        # by default we take it as horizontal flip
+        # use img_shape before padding for flip
+        img_coors[..., 0] = orig_w - img_coors[..., 0]
+
+    # frustum culling
+    visible = ((depth > 1e-5) & (img_coors[..., 0] >= 0)
+               & (img_coors[..., 0] < orig_w) & (img_coors[..., 1] >= 0)
+               & (img_coors[..., 1] < orig_h))
+    view_inds, point_inds = visible.nonzero(as_tuple=True)
+    img_pts = points.new_zeros(num_points, num_channels)
+    if view_inds.numel() == 0:
+        return img_pts
+
+    # gather the visible pairs of each view into a padded grid, pairs are
+    # sorted by view as returned by `nonzero`
+    num_visible = visible.sum(dim=1)
+    view_starts = torch.cumsum(num_visible, dim=0) - num_visible
+    slots = torch.arange(
+        view_inds.numel(), device=view_inds.device) - view_starts[view_inds]
+    h, w = img_pad_shape
+    grid = img_coors.new_full((num_views, int(num_visible.max()), 2), -2.)
+    coors = img_coors[view_inds, point_inds]
+    grid[view_inds, slots] = torch.stack(
+        [coors[:, 0] / w * 2 - 1, coors[:, 1] / h * 2 - 1], dim=1)
+
+    # align_corner=True provides higher performance
+    mode = 'bilinear' if aligned else 'nearest'
+    pair_features = F.grid_sample(
+        img_features,
+        grid.unsqueeze(1),
+        mode=mode,
+        padding_mode=padding_mode,
+        align_corners=align_corners)  # VxCx1xM feats
+    pair_features = pair_features[view_inds, :, 0, slots]
+
+    # reduce across views
+    img_pts.index_add_(0, point_inds, pair_features)
+    if view_reduce == 'mean':
+        num_views_per_point = torch.bincount(point_inds, minlength=num_points)
+        img_pts /= num_views_per_point.clamp(min=1).unsqueeze(1).to(img_pts)
+    return img_pts
+
+
 @FUSION_LAYERS.register_module()
 class PointFusion(BaseModule):
     """Fuse image features from multi-scale features.
@@ -125,6 +245,10 @@ class PointFusion(BaseModule):
             Defaults to 'zeros'.
         lateral_conv (bool, optional): Whether to apply lateral convs
             to image features. Defaults to True.
+        view_reduce (str, optional): How to reduce the features of a point
+            seen by several cameras when the projection matrix of a sample
+            stacks the matrices of multiple views, 'mean' or 'sum'.
+            Defaults to 'mean'.
     """
 
     def __init__(self,
@@ -144,7 +268,8 @@ class PointFusion(BaseModule):
                  aligned=True,
                  align_corners=True,
                  padding_mode='zeros',
-                 lateral_conv=True):
+                 lateral_conv=True,
+                 view_reduce='mean'):
         super(PointFusion, self).__init__(init_cfg=init_cfg)
         if isinstance(img_levels, int):
             img_levels = [img_levels]
@@ -164,6 +289,7 @@ class PointFusion(BaseModule):
         self.aligned = aligned
         self.align_corners = align_corners
         self.padding_mode = padding_mode
+        self.view_reduce = view_reduce
 
         self.lateral_convs = None
         if lateral_conv:
@@ -255,14 +381,21 @@ class PointFusion(BaseModule):
             img_ins = img_feats
         img_feats_per_point = []
         # Sample multi-level features
+        img_start = 0
         for i in range(len(img_metas)):
+            # multi-view samples have one image per camera
+            proj_mat = get_proj_mat_by_coord_type(img_metas[i],
+                                                  self.coord_type)
+            num_views = len(proj_mat) if np.ndim(proj_mat) == 3 else 1
             mlvl_img_feats = []
             for level in range(len(self.img_levels)):
                 mlvl_img_feats.append(
-                    self.sample_single(img_ins[level][i:i + 1], pts[i][:, :3],
-                                       img_metas[i]))
+                    self.sample_single(
+                        img_ins[level][img_start:img_start + num_views],
+                        pts[i][:, :3], img_metas[i]))
             mlvl_img_feats = torch.cat(mlvl_img_feats, dim=-1)
             img_feats_per_point.append(mlvl_img_feats)
+            img_start += num_views
 
         img_pts = torch.cat(img_feats_per_point, dim=0)
         return img_pts
@@ -272,7 +405,7 @@ class PointFusion(BaseModule):
 
         Args:
             img_feats (torch.Tensor): Image feature map in shape
-                (1, C, H, W).
+                (1, C, H, W), or (V, C, H, W) for V cameras.
             pts (torch.Tensor): Points of a single sample.
             img_meta (dict): Meta information of the single sample.
 
@@ -280,19 +413,42 @@ class PointFusion(BaseModule):
             torch.Tensor: Single level image features of each point.
         """
         # TODO: image transformation also extracted
-        img_scale_factor = (
-            pts.new_tensor(img_meta['scale_factor'][:2])
-            if 'scale_factor' in img_meta.keys() else 1)
+        img_scale_factor = 1
+        if 'scale_factor' in img_meta.keys():
+            scale_factor = np.asarray(img_meta['scale_factor'])
+            img_scale_factor = pts.new_tensor(
+                scale_factor[:2] if scale_factor.ndim else scale_factor)
         img_flip = img_meta['flip'] if 'flip' in img_meta.keys() else False
         img_crop_offset = (
             pts.new_tensor(img_meta['img_crop_offset'])
             if 'img_crop_offset' in img_meta.keys() else 0)
-        proj_mat = get_proj_mat_by_coord_type(img_meta, self.coord_type)
+        proj_mat = pts.new_tensor(
+            np.asarray(get_proj_mat_by_coord_type(img_meta, self.coord_type)))
+        if proj_mat.dim() == 3:
+            img_shape = img_meta['img_shape']
+            if isinstance(img_shape[0], (list, tuple)):
+                # shapes of the views, which are resized the same way
+                img_shape = img_shape[0]
+            return multiview_point_sample(
+                img_meta=img_meta,
+                img_features=img_feats,
+                points=pts,
+                proj_mats=proj_mat,
+                coord_type=self.coord_type,
+                img_scale_factor=img_scale_factor,
+                img_crop_offset=img_crop_offset,
+                img_flip=img_flip,
+                img_pad_shape=img_meta['input_shape'][:2],
+                img_shape=img_shape[:2],
+                aligned=self.aligned,
+                padding_mode=self.padding_mode,
+                align_corners=self.align_corners,
+                view_reduce=self.view_reduce)
         img_pts = point_sample(
             img_meta=img_meta,
             img_features=img_feats,
             points=pts,
-            proj_mat=pts.new_tensor(proj_mat),
+            proj_mat=proj_mat,
             coord_type=self.coord_type,
             img_scale_factor=img_scale_factor,
             img_crop_offset=img_crop_offset,
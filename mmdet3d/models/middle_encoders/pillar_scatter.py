@@ -15,21 +15,27 @@ class PointPillarsScatter(nn.Module):
     Args:
         in_channels (int): Channels of input features.
         output_shape (list[int]): Required output shape of features.
+        reuse_canvas (bool, optional): Whether to reuse the batch canvas
+            across calls with the same batch size, dtype and device in
+            inference. Only the pillars written by the previous call are
+            cleared, so the returned tensor is overwritten by the next call
+            and must not be kept. Defaults to False.
     """
 
-    def __init__(self, in_channels, output_shape):
+    def __init__(self, in_channels, output_shape, reuse_canvas=False):
         super().__init__()
         self.output_shape = output_shape
         self.ny = output_shape[0]
         self.nx = output_shape[1]
         self.in_channels = in_channels
+        self.reuse_canvas = reuse_canvas
         self.fp16_enabled = False
+        self._canvas = None
+        self._canvas_indices = None
 
     @auto_fp16(apply_to=('voxel_features', ))
     def forward(self, voxel_features, coors, batch_size=None):
         """Forward function to scatter features."""
-        # TODO: rewrite the function in a batch manner
-        # no need to deal with different batch cases
         if batch_size is not None:
             return self.forward_batch(voxel_features, coors, batch_size)
         else:
@@ -60,7 +66,10 @@ class PointPillarsScatter(nn.Module):
         return canvas
 
     def forward_batch(self, voxel_features, coors, batch_size):
-        """Scatter features of single sample.
+        """Scatter features of a batch of samples.
+
+        All pillars are written into a single (B, C, ny * nx) canvas with
+        one indexed assignment instead of a canvas per sample.
 
         Args:
             voxel_features (torch.Tensor): Voxel features in shape (N, C).
@@ -68,35 +77,58 @@ class PointPillarsScatter(nn.Module):
                 The first column indicates the sample ID.
             batch_size (int): Number of samples in the current batch.
         """
-        # batch_canvas will be the final output.
-        batch_canvas = []
-        for batch_itt in range(batch_size):
-            # Create the canvas for this sample
-            canvas = torch.zeros(
-                self.in_channels,
-                self.nx * self.ny,
-                dtype=voxel_features.dtype,
-                device=voxel_features.device)
-
-            # Only include non-empty pillars
-            batch_mask = coors[:, 0] == batch_itt
-            this_coors = coors[batch_mask, :]
-            indices = this_coors[:, 2] * self.nx + this_coors[:, 3]
-            indices = indices.type(torch.long)
-            voxels = voxel_features[batch_mask, :]
-            voxels = voxels.t()
-
-            # Now scatter the blob back to the canvas.
-            canvas[:, indices] = voxels
-
-            # Append to a list for later stacking.
-            batch_canvas.append(canvas)
-
-        # Stack to 3-dim tensor (batch-size, in_channels, nrows*ncols)
-        batch_canvas = torch.stack(batch_canvas, 0)
+        batch_inds = coors[:, 0].long()
+        indices = (coors[:, 2] * self.nx + coors[:, 3]).long()
+        batch_canvas = self._get_canvas(voxel_features, batch_size)
+
+        # Now scatter the blob back to the canvas.
+        batch_canvas[batch_inds, :, indices] = voxel_features
+        if batch_canvas is self._canvas:
+            self._canvas_indices = (batch_inds, indices)
 
         # Undo the column stacking to final 4-dim tensor
         batch_canvas = batch_canvas.view(batch_size, self.in_channels, self.ny,
                                          self.nx)
 
         return batch_canvas
+
+    def forward_sparse(self, voxel_features, coors, batch_size):
+        """Scatter features of a batch of samples into a sparse BEV map.
+
+        Args:
+            voxel_features (torch.Tensor): Voxel features in shape (N, C).
+            coors (torch.Tensor): Coordinates of each voxel in shape (N, 4).
+                The first column indicates the sample ID.
+            batch_size (int): Number of samples in the current batch.
+
+        Returns:
+            torch.Tensor: Sparse COO tensor in shape (B, ny, nx, C) whose
+                non-empty entries are the pillars.
+        """
+        indices = coors[:, [0, 2, 3]].t().long()
+        return torch.sparse_coo_tensor(
+            indices,
+            voxel_features,
+            (batch_size, self.ny, self.nx, self.in_channels),
+            dtype=voxel_features.dtype,
+            device=voxel_features.device)
+
+    def _get_canvas(self, voxel_features, batch_size):
+        """Get an empty (B, C, ny * nx) canvas.
+
+        The cached canvas is only used in inference and is cleared by
+        resetting the pillars written in the previous call.
+        """
+        shape = (batch_size, self.in_channels, self.nx * self.ny)
+        if not self.reuse_canvas or (torch.is_grad_enabled()
+                                     and voxel_features.requires_grad):
+            return voxel_features.new_zeros(shape)
+        canvas = self._canvas
+        if (canvas is None or canvas.shape != shape
+                or canvas.dtype != voxel_features.dtype
+                or canvas.device != voxel_features.device):
+            self._canvas = voxel_features.new_zeros(shape)
+        elif self._canvas_indices is not None:
+            canvas[self._canvas_indices[0], :, self._canvas_indices[1]] = 0
+        self._canvas_indices = None
+        return self._canvas
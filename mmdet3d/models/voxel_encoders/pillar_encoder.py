@@ -1,12 +1,11 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import torch
 from mmcv.cnn import build_norm_layer
-from mmcv.ops import DynamicScatter
 from mmcv.runner import force_fp32
 from torch import nn
 
 from ..builder import VOXEL_ENCODERS
-from .utils import PFNLayer, get_paddings_indicator
+from .utils import PFNLayer, VoxelSegments, get_paddings_indicator
 
 
 @VOXEL_ENCODERS.register_module()
@@ -228,49 +227,13 @@ class DynamicPillarFeatureNet(PillarFeatureNet):
                     nn.ReLU(inplace=True)))
         self.num_pfn = len(pfn_layers)
         self.pfn_layers = nn.ModuleList(pfn_layers)
-        self.pfn_scatter = DynamicScatter(voxel_size, point_cloud_range,
-                                          (mode != 'max'))
-        self.cluster_scatter = DynamicScatter(
-            voxel_size, point_cloud_range, average_points=True)
-
-    def map_voxel_center_to_point(self, pts_coors, voxel_mean, voxel_coors):
-        """Map the centers of voxels to its corresponding points.
-
-        Args:
-            pts_coors (torch.Tensor): The coordinates of each points, shape
-                (M, 3), where M is the number of points.
-            voxel_mean (torch.Tensor): The mean or aggregated features of a
-                voxel, shape (N, C), where N is the number of voxels.
-            voxel_coors (torch.Tensor): The coordinates of each voxel.
-
-        Returns:
-            torch.Tensor: Corresponding voxel centers of each points, shape
-                (M, C), where M is the number of points.
-        """
-        # Step 1: scatter voxel into canvas
-        # Calculate necessary things for canvas creation
-        canvas_y = int(
-            (self.point_cloud_range[4] - self.point_cloud_range[1]) / self.vy)
-        canvas_x = int(
-            (self.point_cloud_range[3] - self.point_cloud_range[0]) / self.vx)
-        canvas_channel = voxel_mean.size(1)
-        batch_size = pts_coors[-1, 0] + 1
-        canvas_len = canvas_y * canvas_x * batch_size
-        # Create the canvas for this sample
-        canvas = voxel_mean.new_zeros(canvas_channel, canvas_len)
-        # Only include non-empty pillars
-        indices = (
-            voxel_coors[:, 0] * canvas_y * canvas_x +
-            voxel_coors[:, 2] * canvas_x + voxel_coors[:, 3])
-        # Scatter the blob back to the canvas
-        canvas[:, indices.long()] = voxel_mean.t()
-
-        # Step 2: get voxel mean for each point
-        voxel_index = (
-            pts_coors[:, 0] * canvas_y * canvas_x +
-            pts_coors[:, 2] * canvas_x + pts_coors[:, 3])
-        center_per_point = canvas[:, voxel_index.long()].t()
-        return center_per_point
+        self.reduce = 'max' if mode == 'max' else 'mean'
+        range_size = [
+            point_cloud_range[i + 3] - point_cloud_range[i] for i in range(3)
+        ]
+        self.grid_size = tuple(
+            int(round(size / voxel))
+            for size, voxel in zip(range_size, voxel_size))
 
     @force_fp32(out_fp16=True)
     def forward(self, features, coors):
@@ -284,14 +247,15 @@ class DynamicPillarFeatureNet(PillarFeatureNet):
         Returns:
             torch.Tensor: Features of pillars.
         """
+        # sort the points by pillars once for all the reductions
+        segments = VoxelSegments(coors, self.grid_size)
         features_ls = [features]
         # Find distance of x, y, and z from cluster center
         if self._with_cluster_center:
-            voxel_mean, mean_coors = self.cluster_scatter(features, coors)
-            points_mean = self.map_voxel_center_to_point(
-                coors, voxel_mean, mean_coors)
+            voxel_mean = segments.reduce(features[:, :3], 'mean')
+            points_mean = segments.gather(voxel_mean)
             # TODO: maybe also do cluster for reflectivity
-            f_cluster = features[:, :3] - points_mean[:, :3]
+            f_cluster = features[:, :3] - points_mean
             features_ls.append(f_cluster)
 
         # Find distance of x, y, and z from pillar center
@@ -313,11 +277,10 @@ class DynamicPillarFeatureNet(PillarFeatureNet):
         features = torch.cat(features_ls, dim=-1)
         for i, pfn in enumerate(self.pfn_layers):
             point_feats = pfn(features)
-            voxel_feats, voxel_coors = self.pfn_scatter(point_feats, coors)
+            voxel_feats = segments.reduce(point_feats, self.reduce)
             if i != len(self.pfn_layers) - 1:
                 # need to concat voxel feats if it is not the last pfn
-                feat_per_point = self.map_voxel_center_to_point(
-                    coors, voxel_feats, voxel_coors)
+                feat_per_point = segments.gather(voxel_feats)
                 features = torch.cat([point_feats, feat_per_point], dim=1)
 
-        return voxel_feats, voxel_coors
+        return voxel_feats, segments.voxel_coors
@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import torch
 from mmcv.cnn import build_norm_layer
+from mmcv.ops import dynamic_scatter
 from mmcv.runner import auto_fp16
 from torch import nn
 from torch.nn import functional as F
@@ -29,6 +30,82 @@ def get_paddings_indicator(actual_num, max_num, axis=0):
     return paddings_indicator
 
 
+class VoxelSegments:
+    """Points of dynamic voxels grouped into contiguous segments.
+
+    The points are sorted by the linear keys of their voxel coordinates
+    once, and the permutation and the segment lengths are reused by every
+    reduction and gathering of the encoder, instead of running a
+    ``DynamicScatter`` and scattering the voxels into a dense canvas for
+    each of them. Points out of range (with negative coordinates) belong to
+    no voxel, as in ``DynamicScatter``.
+
+    Args:
+        coors (torch.Tensor): Voxel coordinates (batch_idx, z, y, x) of
+            each point, shape (N, 4).
+        grid_size (tuple[int]): Number of voxels along x, y and z.
+    """
+
+    def __init__(self, coors, grid_size):
+        self.coors = coors
+        grid_x, grid_y, grid_z = grid_size
+        valid_inds = torch.nonzero(
+            (coors >= 0).all(dim=1), as_tuple=False).squeeze(1)
+        valid_coors = coors[valid_inds].long()
+        keys = ((valid_coors[:, 0] * grid_z + valid_coors[:, 1]) * grid_y +
+                valid_coors[:, 2]) * grid_x + valid_coors[:, 3]
+        keys, order = keys.sort()
+        self.perm = valid_inds[order]
+        _, self.counts = torch.unique_consecutive(keys, return_counts=True)
+        self.num_voxels = self.counts.numel()
+        self.all_valid = self.perm.numel() == coors.size(0)
+
+        voxel_inds = torch.repeat_interleave(
+            torch.arange(self.num_voxels, device=coors.device), self.counts)
+        self.point2voxel = coors.new_full((coors.size(0), ),
+                                          -1,
+                                          dtype=torch.long)
+        self.point2voxel[self.perm] = voxel_inds
+        first_point_inds = self.perm[torch.cumsum(self.counts, 0) -
+                                     self.counts]
+        self.voxel_coors = coors[first_point_inds]
+
+    def reduce(self, feats, reduce='mean'):
+        """Reduce the features of points in each voxel.
+
+        Args:
+            feats (torch.Tensor): Features of each point, shape (N, C).
+            reduce (str, optional): Reduction, 'mean' or 'max'.
+                Defaults to 'mean'.
+
+        Returns:
+            torch.Tensor: Features of each voxel in the order of
+                ``voxel_coors``, shape (M, C).
+        """
+        if not hasattr(torch, 'segment_reduce'):
+            # the voxels of DynamicScatter are sorted in the same order
+            return dynamic_scatter(feats, self.coors, reduce)[0]
+        return torch.segment_reduce(
+            feats[self.perm], reduce, lengths=self.counts)
+
+    def gather(self, voxel_feats):
+        """Gather the features of the voxel of each point.
+
+        Args:
+            voxel_feats (torch.Tensor): Features of each voxel, shape (M, C).
+
+        Returns:
+            torch.Tensor: Features of each point, shape (N, C). They are
+                zeros for the points out of range.
+        """
+        if self.all_valid:
+            return voxel_feats[self.point2voxel]
+        point_feats = voxel_feats.new_zeros(
+            (self.point2voxel.size(0), voxel_feats.size(1)))
+        point_feats[self.perm] = voxel_feats[self.point2voxel[self.perm]]
+        return point_feats
+
+
 class VFELayer(nn.Module):
     """Voxel Feature Encoder layer.
 
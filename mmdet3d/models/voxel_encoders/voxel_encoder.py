@@ -7,7 +7,7 @@ from torch import nn
 
 from .. import builder
 from ..builder import VOXEL_ENCODERS
-from .utils import VFELayer, get_paddings_indicator
+from .utils import VFELayer, VoxelSegments, get_paddings_indicator
 
 
 @VOXEL_ENCODERS.register_module()
@@ -168,56 +168,17 @@ class DynamicVFE(nn.Module):
                     nn.ReLU(inplace=True)))
         self.vfe_layers = nn.ModuleList(vfe_layers)
         self.num_vfe = len(vfe_layers)
-        self.vfe_scatter = DynamicScatter(voxel_size, point_cloud_range,
-                                          (mode != 'max'))
-        self.cluster_scatter = DynamicScatter(
-            voxel_size, point_cloud_range, average_points=True)
+        self.reduce = 'max' if mode == 'max' else 'mean'
+        range_size = [
+            point_cloud_range[i + 3] - point_cloud_range[i] for i in range(3)
+        ]
+        self.grid_size = tuple(
+            int(round(size / voxel))
+            for size, voxel in zip(range_size, voxel_size))
         self.fusion_layer = None
         if fusion_layer is not None:
             self.fusion_layer = builder.build_fusion_layer(fusion_layer)
 
-    def map_voxel_center_to_point(self, pts_coors, voxel_mean, voxel_coors):
-        """Map voxel features to its corresponding points.
-
-        Args:
-            pts_coors (torch.Tensor): Voxel coordinate of each point.
-            voxel_mean (torch.Tensor): Voxel features to be mapped.
-            voxel_coors (torch.Tensor): Coordinates of valid voxels
-
-        Returns:
-            torch.Tensor: Features or centers of each point.
-        """
-        # Step 1: scatter voxel into canvas
-        # Calculate necessary things for canvas creation
-        canvas_z = int(
-            (self.point_cloud_range[5] - self.point_cloud_range[2]) / self.vz)
-        canvas_y = int(
-            (self.point_cloud_range[4] - self.point_cloud_range[1]) / self.vy)
-        canvas_x = int(
-            (self.point_cloud_range[3] - self.point_cloud_range[0]) / self.vx)
-        # canvas_channel = voxel_mean.size(1)
-        batch_size = pts_coors[-1, 0] + 1
-        canvas_len = canvas_z * canvas_y * canvas_x * batch_size
-        # Create the canvas for this sample
-        canvas = voxel_mean.new_zeros(canvas_len, dtype=torch.long)
-        # Only include non-empty pillars
-        indices = (
-            voxel_coors[:, 0] * canvas_z * canvas_y * canvas_x +
-            voxel_coors[:, 1] * canvas_y * canvas_x +
-            voxel_coors[:, 2] * canvas_x + voxel_coors[:, 3])
-        # Scatter the blob back to the canvas
-        canvas[indices.long()] = torch.arange(
-            start=0, end=voxel_mean.size(0), device=voxel_mean.device)
-
-        # Step 2: get voxel mean for each point
-        voxel_index = (
-            pts_coors[:, 0] * canvas_z * canvas_y * canvas_x +
-            pts_coors[:, 1] * canvas_y * canvas_x +
-            pts_coors[:, 2] * canvas_x + pts_coors[:, 3])
-        voxel_inds = canvas[voxel_index.long()]
-        center_per_point = voxel_mean[voxel_inds, ...]
-        return center_per_point
-
     @force_fp32(out_fp16=True)
     def forward(self,
                 features,
@@ -241,14 +202,15 @@ class DynamicVFE(nn.Module):
                 its coordinates. If `return_point_feats` is True, returns
                 feature of each points inside voxels.
         """
+        # sort the points by voxels once for all the reductions
+        segments = VoxelSegments(coors, self.grid_size)
         features_ls = [features]
         # Find distance of x, y, and z from cluster center
         if self._with_cluster_center:
-            voxel_mean, mean_coors = self.cluster_scatter(features, coors)
-            points_mean = self.map_voxel_center_to_point(
-                coors, voxel_mean, mean_coors)
+            voxel_mean = segments.reduce(features[:, :3], 'mean')
+            points_mean = segments.gather(voxel_mean)
             # TODO: maybe also do cluster for reflectivity
-            f_cluster = features[:, :3] - points_mean[:, :3]
+            f_cluster = features[:, :3] - points_mean
             features_ls.append(f_cluster)
 
         # Find distance of x, y, and z from pillar center
@@ -274,16 +236,15 @@ class DynamicVFE(nn.Module):
                     and img_feats is not None):
                 point_feats = self.fusion_layer(img_feats, points, point_feats,
                                                 img_metas)
-            voxel_feats, voxel_coors = self.vfe_scatter(point_feats, coors)
+            voxel_feats = segments.reduce(point_feats, self.reduce)
             if i != len(self.vfe_layers) - 1:
                 # need to concat voxel feats if it is not the last vfe
-                feat_per_point = self.map_voxel_center_to_point(
-                    coors, voxel_feats, voxel_coors)
+                feat_per_point = segments.gather(voxel_feats)
                 features = torch.cat([point_feats, feat_per_point], dim=1)
 
         if self.return_point_feats:
             return point_feats
-        return voxel_feats, voxel_coors
+        return voxel_feats, segments.voxel_coors
 
 
 @VOXEL_ENCODERS.register_module()
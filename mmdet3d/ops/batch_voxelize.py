@@ -0,0 +1,65 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import torch
+from mmcv.ops import Voxelization
+
+from mmdet3d.core.voxel.voxel_generator import points_to_voxel_batch
+
+
+class BatchVoxelization(Voxelization):
+    """Voxelization which also voxelizes a whole batch in one call.
+
+    The arguments are the same as :class:`mmcv.ops.Voxelization`. Calling the
+    module on the points of a single sample behaves as the mmcv layer, while
+    :meth:`forward_batch` takes the concatenated points of a batch. On CPU,
+    hard voxelization of the batch runs in a single call of
+    :func:`points_to_voxel_batch`, whose memory does not depend on the size
+    of the grid, instead of one call per sample.
+    """
+
+    @torch.no_grad()
+    def forward_batch(self, points, batch_inds, batch_size):
+        """Voxelize the concatenated points of a batch.
+
+        Args:
+            points (torch.Tensor): Points of all samples in shape (N, C).
+            batch_inds (torch.Tensor): Sample index of each point in
+                shape (N, ).
+            batch_size (int): Number of samples.
+
+        Returns:
+            tuple[torch.Tensor]: Voxels, coordinates of each voxel in shape
+                (M, 4) whose first column indicates the sample index, and
+                number of points per voxel.
+        """
+        assert self.max_num_points != -1, \
+            'forward_batch only supports hard voxelization'
+        if not points.is_cuda:
+            max_voxels = self.max_voxels[0] if self.training \
+                else self.max_voxels[1]
+            voxels, coors, num_points = points_to_voxel_batch(
+                points.numpy(),
+                batch_inds.numpy(),
+                batch_size,
+                self.voxel_size,
+                self.point_cloud_range,
+                max_points=self.max_num_points,
+                reverse_index=True,
+                max_voxels=max_voxels)
+            return (torch.from_numpy(voxels), torch.from_numpy(coors),
+                    torch.from_numpy(num_points))
+
+        # mmcv voxelizes a single sample per call on GPU
+
+        voxels, coors, num_points = [], [], []
+        for i in range(batch_size):
+            res_voxels, res_coors, res_num_points = self(
+                points[batch_inds == i])
+            voxels.append(res_voxels)
+            coors.append(
+                torch.cat([res_coors.new_full((len(res_coors), 1), i),
+                           res_coors], dim=1))
+            num_points.append(res_num_points)
+        voxels = torch.cat(voxels, dim=0)
+        coors = torch.cat(coors, dim=0)
+        num_points = torch.cat(num_points, dim=0)
+        return voxels, coors, num_points
@@ -234,6 +234,7 @@ class PAConvCUDASAModuleMSG(BasePointSAModule):
         features=None,
         indices=None,
         target_xyz=None,
+        offsets=None,
     ):
         """forward.
 
@@ -245,6 +246,9 @@ class PAConvCUDASAModuleMSG(BasePointSAModule):
                 Default: None.
             target_xyz (Tensor, optional): (B, M, 3) new coords of the outputs.
                 Default: None.
+            offsets (Tensor | list[int], optional): Offsets of the samples of
+                a ragged batch, which is not supported by the CUDA PAConv.
+                Default: None.
 
         Returns:
             Tensor: (B, M, 3) where M is the number of points.
@@ -254,6 +258,8 @@ class PAConvCUDASAModuleMSG(BasePointSAModule):
             Tensor: (B, M) where M is the number of points.
                 Index of the features.
         """
+        assert offsets is None, \
+            'the CUDA PAConv gathers the features of the whole batch'
         new_features_list = []
 
         # sample points, (B, num_point, 3), (B, num_point)
@@ -109,6 +109,29 @@ class BasePointSAModule(nn.Module):
                 grouper = GroupAll(use_xyz)
             self.groupers.append(grouper)
 
+    @staticmethod
+    def _split_ragged(points_xyz, features, offsets):
+        """Split the concatenated points of a ragged batch.
+
+        Args:
+            points_xyz (Tensor): (1, N, 3) xyz coordinates of the
+                concatenated points.
+            features (Tensor): (1, C, N) features of the concatenated points.
+            offsets (list[int]): Offsets of the B samples in the concatenated
+                points, with length B + 1.
+
+        Returns:
+            list[tuple[Tensor]]: (1, N_i, 3) xyz coordinates and
+                (1, C, N_i) features of each sample.
+        """
+        samples = []
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            sample_xyz = points_xyz[:, start:end].contiguous()
+            sample_features = features[..., start:end].contiguous() \
+                if features is not None else None
+            samples.append((sample_xyz, sample_features))
+        return samples
+
     def _sample_points(self, points_xyz, features, indices, target_xyz):
         """Perform point sampling based on inputs.
 
@@ -167,12 +190,64 @@ class BasePointSAModule(nn.Module):
 
         return new_features.squeeze(-1).contiguous()
 
+    def _sample_ragged_points(self, samples, indices, target_xyz):
+        """Perform point sampling in each sample of a ragged batch.
+
+        Args:
+            samples (list[tuple[Tensor]]): (1, N_i, 3) xyz coordinates and
+                (1, C, N_i) features of each sample.
+            indices (Tensor): (B, num_point) Index of the features in
+                each sample.
+            target_xyz (Tensor): (B, M, 3) new_xyz coordinates of the outputs.
+
+        Returns:
+            Tensor: (B, num_point, 3) sampled xyz coordinates of points.
+            Tensor: (B, num_point) sampled points' index in each sample.
+        """
+        assert self.num_point is not None, \
+            'ragged batches need the points to be sampled'
+        if target_xyz is not None:
+            return target_xyz.contiguous(), indices
+        new_xyz, new_indices = [], []
+        for i, (sample_xyz, sample_features) in enumerate(samples):
+            sample_indices = indices[i:i + 1] if indices is not None else None
+            # samples with less than num_point points repeat some indices
+            sample_new_xyz, sample_indices = self._sample_points(
+                sample_xyz, sample_features, sample_indices, None)
+            new_xyz.append(sample_new_xyz)
+            new_indices.append(sample_indices)
+        return torch.cat(new_xyz), torch.cat(new_indices)
+
+    @staticmethod
+    def _group_ragged_points(grouper, samples, new_xyz):
+        """Group the points of each sample of a ragged batch.
+
+        Args:
+            grouper (nn.Module): Grouper of the points.
+            samples (list[tuple[Tensor]]): (1, N_i, 3) xyz coordinates and
+                (1, C, N_i) features of each sample.
+            new_xyz (Tensor): (B, num_point, 3) xyz coordinates of the
+                centers of the groups.
+
+        Returns:
+            Tensor | tuple[Tensor]: Grouped results of the batch, the same
+                as the outputs of the grouper on a padded batch.
+        """
+        grouped_results = [
+            grouper(sample_xyz, new_xyz[i:i + 1], sample_features)
+            for i, (sample_xyz, sample_features) in enumerate(samples)
+        ]
+        if isinstance(grouped_results[0], tuple):
+            return tuple(map(torch.cat, zip(*grouped_results)))
+        return torch.cat(grouped_results)
+
     def forward(
         self,
         points_xyz,
         features=None,
         indices=None,
         target_xyz=None,
+        offsets=None,
     ):
         """forward.
 
@@ -184,6 +259,12 @@ class BasePointSAModule(nn.Module):
                 Default: None.
             target_xyz (Tensor, optional): (B, M, 3) new coords of the outputs.
                 Default: None.
+            offsets (Tensor | list[int], optional): Offsets of the samples of
+                a ragged batch, with length B + 1. If given, ``points_xyz``
+                and ``features`` are the (1, N, 3) and (1, C, N) concatenated
+                points of the samples, which are sampled and grouped
+                separately, and ``indices`` index the points of each sample.
+                Default: None.
 
         Returns:
             Tensor: (B, M, 3) where M is the number of points.
@@ -195,16 +276,28 @@ class BasePointSAModule(nn.Module):
         """
         new_features_list = []
 
-        # sample points, (B, num_point, 3), (B, num_point)
-        new_xyz, indices = self._sample_points(points_xyz, features, indices,
-                                               target_xyz)
+        if offsets is None:
+            # sample points, (B, num_point, 3), (B, num_point)
+            new_xyz, indices = self._sample_points(points_xyz, features,
+                                                   indices, target_xyz)
+        else:
+            if isinstance(offsets, torch.Tensor):
+                offsets = offsets.tolist()
+            samples = self._split_ragged(points_xyz, features, offsets)
+            new_xyz, indices = self._sample_ragged_points(
+                samples, indices, target_xyz)
 
         for i in range(len(self.groupers)):
             # grouped_results may contain:
             # - grouped_features: (B, C, num_point, nsample)
             # - grouped_xyz: (B, 3, num_point, nsample)
             # - grouped_idx: (B, num_point, nsample)
-            grouped_results = self.groupers[i](points_xyz, new_xyz, features)
+            if offsets is None:
+                grouped_results = self.groupers[i](points_xyz, new_xyz,
+                                                   features)
+            else:
+                grouped_results = self._group_ragged_points(
+                    self.groupers[i], samples, new_xyz)
 
             # (B, mlp[-1], num_point, nsample)
             new_features = self.mlps[i](grouped_results)
@@ -3,6 +3,7 @@ from mmcv.utils import Registry, build_from_cfg, print_log
 
 from .collect_env import collect_env
 from .compat_cfg import compat_cfg
+from .lazy_registry import LazyRegistry, get_registry_index
 from .logger import get_root_logger
 from .misc import find_latest_checkpoint
 from .setup_env import setup_multi_processes
@@ -10,5 +11,5 @@ from .setup_env import setup_multi_processes
 __all__ = [
     'Registry', 'build_from_cfg', 'get_root_logger', 'collect_env',
     'print_log', 'setup_multi_processes', 'find_latest_checkpoint',
-    'compat_cfg'
+    'compat_cfg', 'LazyRegistry', 'get_registry_index'
 ]
@@ -5,11 +5,13 @@ from mmcv.utils import get_git_hash
 import mmdet
 import mmdet3d
 import mmseg
-from mmdet3d.ops.spconv import IS_SPCONV2_AVAILABLE
 
 
 def collect_env():
     """Collect the information of the running environments."""
+    # imported here as `mmdet3d.ops` is slow to import
+    from mmdet3d.ops.spconv import IS_SPCONV2_AVAILABLE
+
     env_info = collect_base_env()
     env_info['MMDetection'] = mmdet.__version__
     env_info['MMSegmentation'] = mmseg.__version__
@@ -0,0 +1,113 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import importlib
+import os
+import re
+from collections import defaultdict
+from functools import lru_cache
+from importlib.util import find_spec
+from os import path as osp
+
+from mmcv.utils import Registry
+
+_REGISTER_PATTERN = re.compile(
+    r'@\w+\.register_module\(([^)]*)\)\s*'
+    r'(?:@[^\n]*\n\s*)*(?:class|def)\s+(\w+)')
+_NAME_PATTERN = re.compile(r'name\s*=\s*[\'"](\w+)[\'"]')
+
+
+@lru_cache(maxsize=None)
+def get_registry_index(package):
+    """Find the modules registering each type name under a package.
+
+    The source files are scanned for ``@XXX.register_module()`` decorators
+    without importing them, so the index is cheap to build.
+
+    Args:
+        package (str): Name of the package to scan, e.g. ``mmdet3d.models``.
+
+    Returns:
+        dict[str, list[str]]: Names of the modules registering each type.
+    """
+    spec = find_spec(package)
+    if spec is None or not spec.submodule_search_locations:
+        return {}
+    index = defaultdict(list)
+    for root in spec.submodule_search_locations:
+        for filename in sorted(_iter_py_files(root)):
+            with open(filename, encoding='utf-8') as f:
+                source = f.read()
+            if 'register_module' not in source:
+                continue
+            rel_path = osp.splitext(osp.relpath(filename, root))[0]
+            module = '.'.join([package] + rel_path.split(osp.sep))
+            if module.endswith('.__init__'):
+                module = module[:-len('.__init__')]
+            for args, obj_name in _REGISTER_PATTERN.findall(source):
+                name = _NAME_PATTERN.search(args)
+                index[name.group(1) if name else obj_name].append(module)
+    return dict(index)
+
+
+def _iter_py_files(root):
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith('.py'):
+                yield osp.join(dirpath, filename)
+
+
+class LazyRegistry(Registry):
+    """A registry importing the module of a type when it is first queried.
+
+    Packages such as ``mmdet3d.models`` do not import all of their modules
+    (and third-party dependencies) eagerly. Instead, the modules registering
+    a type are looked up with :func:`get_registry_index` and imported the
+    first time the type is built from a config.
+
+    Args:
+        name (str): Registry name.
+        locations (list[str]): Packages whose modules register into this
+            registry.
+        **kwargs: Other arguments of :class:`mmcv.utils.Registry`.
+    """
+
+    def __init__(self, name, locations, **kwargs):
+        super().__init__(name, **kwargs)
+        self._locations = list(locations)
+        self._imported_all = False
+
+    def get(self, key):
+        obj = super().get(key)
+        if obj is not None or self._imported_all:
+            return obj
+        scope, real_key = self.split_scope_key(key)
+        if scope is not None and scope != self._scope:
+            return obj
+        imported = False
+        for location in self._locations:
+            for module in get_registry_index(location).get(real_key, []):
+                importlib.import_module(module)
+                imported = True
+        return super().get(key) if imported else obj
+
+    def import_all(self):
+        """Import every module under the locations of this registry."""
+        if self._imported_all:
+            return
+        for location in self._locations:
+            for modules in get_registry_index(location).values():
+                for module in modules:
+                    importlib.import_module(module)
+        self._imported_all = True
+
+    def __len__(self):
+        self.import_all()
+        return super().__len__()
+
+    def __repr__(self):
+        self.import_all()
+        return super().__repr__()
+
+    @property
+    def module_dict(self):
+        self.import_all()
+        return self._module_dict
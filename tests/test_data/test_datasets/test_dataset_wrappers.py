@@ -3,6 +3,88 @@ import numpy as np
 import torch
 
 from mmdet3d.datasets.builder import build_dataset
+from mmdet3d.datasets.dataset_wrappers import CBGSDataset
+from mmdet3d.datasets.utils import (get_class_sample_inds,
+                                    load_class_sample_inds)
+
+
+class _FakeDataset:
+    CLASSES = ('car', 'ped', 'cyc', 'bus')
+
+    def __init__(self, num_samples=50):
+        self.cat2id = {name: i for i, name in enumerate(self.CLASSES)}
+        self.data_infos = []
+        rng = np.random.RandomState(0)
+        for _ in range(num_samples):
+            num_boxes = rng.randint(0, 6)
+            self.data_infos.append(
+                dict(
+                    gt_names=rng.choice(['car', 'ped', 'cyc', 'truck'],
+                                        num_boxes),
+                    valid_flag=rng.rand(num_boxes) > 0.3))
+        self.flag = np.arange(num_samples, dtype=np.uint8) % 2
+
+    def get_cat_ids(self, idx):
+        info = self.data_infos[idx]
+        gt_names = set(info['gt_names'][info['valid_flag']])
+        return [self.cat2id[n] for n in gt_names if n in self.CLASSES]
+
+    def __getitem__(self, idx):
+        return idx
+
+    def __len__(self):
+        return len(self.data_infos)
+
+
+def test_class_sample_inds(tmp_path):
+    dataset = _FakeDataset()
+    expected = [[] for _ in dataset.CLASSES]
+    for idx in range(len(dataset)):
+        for cat_id in dataset.get_cat_ids(idx):
+            expected[cat_id].append(idx)
+
+    class_sample_inds = get_class_sample_inds(
+        dataset.data_infos, dataset.CLASSES, use_valid_flag=True)
+    assert [inds.tolist() for inds in class_sample_inds] == expected
+    assert len(class_sample_inds[3]) == 0
+    assert get_class_sample_inds([], dataset.CLASSES)[0].shape == (0, )
+
+    ann_file = tmp_path / 'infos.pkl'
+    ann_file.write_bytes(b'')
+    for _ in range(2):
+        cached = load_class_sample_inds(
+            str(ann_file),
+            dataset.data_infos,
+            dataset.CLASSES,
+            use_valid_flag=True)
+        assert [inds.tolist() for inds in cached] == expected
+    assert (tmp_path / 'infos_class_inds.pkl').is_file()
+    cached = load_class_sample_inds(
+        str(ann_file), dataset.data_infos, dataset.CLASSES)
+    assert len(cached[0]) >= len(expected[0])
+
+
+def test_cbgs_set_epoch():
+    dataset = _FakeDataset()
+    cbgs_dataset = CBGSDataset(dataset, seed=0)
+    sample_indices = cbgs_dataset.sample_indices.copy()
+    assert len(cbgs_dataset) == len(sample_indices) > 0
+    assert np.all(cbgs_dataset.flag == dataset.flag[sample_indices])
+    assert cbgs_dataset[3] == sample_indices[3]
+
+    # the draw only depends on the seed and the epoch
+    cbgs_dataset.set_epoch(1)
+    assert not np.array_equal(cbgs_dataset.sample_indices, sample_indices)
+    cbgs_dataset.set_epoch(0)
+    assert np.array_equal(cbgs_dataset.sample_indices, sample_indices)
+    assert np.array_equal(
+        CBGSDataset(dataset, seed=0).sample_indices, sample_indices)
+
+    # without a seed, the shared seed is drawn from the global state
+    np.random.seed(0)
+    sample_indices = CBGSDataset(dataset).sample_indices
+    np.random.seed(0)
+    assert np.array_equal(CBGSDataset(dataset).sample_indices, sample_indices)
 
 
 def test_getitem():
@@ -189,3 +189,58 @@ def test_show():
     mmcv.check_file_exist(gt_file_path)
     mmcv.check_file_exist(pred_file_path)
     tmp_dir.cleanup()
+
+
+def test_nusc_arrays_conversion():
+    from nuscenes.eval.detection.config import config_factory
+
+    from mmdet3d.core.bbox import CameraInstance3DBoxes
+    from mmdet3d.datasets.nuscenes_mono_dataset import (
+        cam_nusc_arrays_to_global, cam_nusc_box_to_global,
+        global_nusc_arrays_to_cam, global_nusc_box_to_cam,
+        nusc_arrays_to_cam_box3d, nusc_box_to_cam_box3d, output_to_nusc_arrays,
+        output_to_nusc_box)
+
+    np.random.seed(0)
+    torch.manual_seed(0)
+    eval_configs = config_factory('detection_cvpr_2019')
+    classes = NuScenesMonoDataset.CLASSES
+    info = dict(
+        cam2ego_rotation=[0.5037872, -0.4965507, 0.4987282, -0.5008662],
+        cam2ego_translation=[1.7008, 0.0159, 1.5110],
+        ego2global_rotation=[0.5721, -0.0014, 0.0114, -0.8201],
+        ego2global_translation=[411.4199, 1180.8975, 0.0])
+    locs = torch.rand(20, 3) * 100 - 50
+    dims = torch.rand(20, 3) * 4 + 0.5
+    boxes_3d = torch.cat([locs, dims, torch.rand(20, 3) * 6 - 3], dim=1)
+
+    def get_detection():
+        return dict(
+            boxes_3d=CameraInstance3DBoxes(boxes_3d.clone(), box_dim=9),
+            scores_3d=torch.linspace(1, 0.05, 20),
+            labels_3d=torch.arange(20) % 10,
+            attrs_3d=torch.arange(20) % 9)
+
+    boxes, attrs = output_to_nusc_box(get_detection())
+    boxes, attrs = cam_nusc_box_to_global(info, boxes, attrs, classes,
+                                          eval_configs)
+    arrays = output_to_nusc_arrays(get_detection())
+    arrays = cam_nusc_arrays_to_global(info, arrays, classes, eval_configs)
+    assert 0 < len(boxes) < 20
+    assert np.allclose(arrays['center'], [box.center for box in boxes])
+    assert np.allclose(arrays['wlh'], [box.wlh for box in boxes])
+    assert np.allclose(arrays['orientation'],
+                       [box.orientation.elements for box in boxes])
+    assert np.allclose(arrays['velocity'], [box.velocity for box in boxes])
+    assert np.allclose(arrays['score'], [box.score for box in boxes])
+    assert np.all(arrays['label'] == [box.label for box in boxes])
+    assert np.all(arrays['attr'] == attrs)
+
+    boxes = global_nusc_box_to_cam(info, boxes, classes, eval_configs)
+    arrays = global_nusc_arrays_to_cam(info, arrays, classes, eval_configs)
+    expected_boxes, expected_scores, expected_labels = \
+        nusc_box_to_cam_box3d(boxes)
+    cam_boxes, scores, labels = nusc_arrays_to_cam_box3d(arrays)
+    assert torch.allclose(cam_boxes.tensor, expected_boxes.tensor, atol=1e-4)
+    assert torch.allclose(scores, expected_scores)
+    assert torch.all(labels == expected_labels)
@@ -238,6 +238,15 @@ def test_seg_evaluate():
     assert abs(ret_dict['acc'] - 0.9) < 0.01
     assert abs(ret_dict['acc_cls'] - 0.9074) < 0.01
 
+    # load ground truth masks in worker processes
+    assert s3dis_dataset.evaluate(results, nproc=2) == ret_dict
+
+    # evaluate confusion matrices computed during testing
+    hist_results = [
+        dict(seg_hist=hist) for hist in s3dis_dataset.seg_hists(results)
+    ]
+    assert s3dis_dataset.evaluate(hist_results) == ret_dict
+
 
 def test_seg_show():
     import tempfile
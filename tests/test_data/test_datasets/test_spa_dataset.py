@@ -0,0 +1,113 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import numpy as np
+import torch
+
+from mmdet3d.core.bbox import LiDARInstance3DBoxes
+from mmdet3d.datasets.spa_dataset import (SPADataset, bboxes2kitti_anno_2d,
+                                          box_dict2kitti_anno,
+                                          convert_valid_bboxes_batch,
+                                          dump_kitti_submissions,
+                                          format_kitti_submission)
+
+
+def _get_infos(num_samples):
+    infos = []
+    for i in range(num_samples):
+        lidar2cam = np.eye(4)
+        lidar2cam[:3, :3] = [[0, -1, 0], [0, 0, -1], [1, 0, 0]]
+        lidar2cam[:3, 3] = [0.01 * i, -0.08, -0.27]
+        cam2img = np.array([[721.5, 0, 609.6, 44.9], [0, 721.5, 172.9, 0.2],
+                            [0, 0, 1, 0.003], [0, 0, 0, 1]])
+        infos.append(
+            dict(
+                image=dict(image_idx=i, image_shape=np.array([375, 1242])),
+                calib=dict(
+                    R0_rect=np.eye(4),
+                    Tr_velo_to_cam=lidar2cam,
+                    P2=cam2img)))
+    return infos
+
+
+def test_convert_valid_bboxes_batch():
+    np.random.seed(0)
+    pcd_limit_range = [0, -40, -3, 70.4, 40, 0.0]
+    infos = _get_infos(3)
+    box_dicts = []
+    for num_boxes in [5, 0, 8]:
+        boxes = np.concatenate([
+            np.random.uniform([0, -40, -3], [70, 40, 0], (num_boxes, 3)),
+            np.random.uniform(0.5, 4, (num_boxes, 3)),
+            np.random.uniform(-np.pi, np.pi, (num_boxes, 1))
+        ],
+                               axis=1)
+        box_dicts.append(
+            dict(
+                boxes_3d=LiDARInstance3DBoxes(torch.tensor(boxes).float()),
+                scores_3d=torch.rand(num_boxes),
+                labels_3d=torch.randint(0, 3, (num_boxes, ))))
+
+    batched = convert_valid_bboxes_batch(box_dicts, infos, pcd_limit_range)
+    assert len(batched) == 3
+    assert batched[1]['bbox'].shape == (0, 4)
+    for box_dict, info, result in zip(box_dicts, infos, batched):
+        single = convert_valid_bboxes_batch([box_dict], [info],
+                                            pcd_limit_range)[0]
+        assert result['sample_idx'] == info['image']['image_idx']
+        for key in ['bbox', 'box3d_camera', 'box3d_lidar', 'scores']:
+            assert np.allclose(result[key], single[key], atol=1e-3)
+
+    anno = box_dict2kitti_anno(batched[0], ['car', 'ped', 'cyc'],
+                               infos[0]['image']['image_shape'][:2])
+    assert len(anno['name']) == len(batched[0]['bbox'])
+    assert (anno['bbox'][:, :2] >= 0).all()
+    assert (anno['bbox'][:, 2] <= 1242).all()
+    assert (anno['bbox'][:, 3] <= 375).all()
+
+
+def test_format_kitti_submission(tmp_path):
+    bboxes = [
+        np.array([[1., 2., 3., 4., 0.5]], dtype=np.float32),
+        np.zeros([0, 5], dtype=np.float32),
+        np.array([[5., 6., 7., 8., 0.25], [1., 1., 2., 2., 0.75]],
+                 dtype=np.float32)
+    ]
+    anno = bboxes2kitti_anno_2d(bboxes, ['car', 'ped', 'cyc'])
+    assert anno['name'].tolist() == ['car', 'cyc', 'cyc']
+    assert np.allclose(anno['score'], [0.5, 0.25, 0.75])
+    assert np.allclose(anno['location'], -1000)
+
+    lines = format_kitti_submission(anno).split('\n')
+    assert len(lines) == 4 and lines[-1] == ''
+    assert lines[0] == ('car -1 -1 0.0000 1.0000 2.0000 3.0000 4.0000 '
+                        '0.0000 0.0000 0.0000 -1000.0000 -1000.0000 '
+                        '-1000.0000 0.0000 0.5000')
+    assert format_kitti_submission(bboxes2kitti_anno_2d(
+        bboxes[1:2], ['car'])) == ''
+
+    filenames = [str(tmp_path / f'{i:06d}.txt') for i in range(2)]
+    dump_kitti_submissions([anno, anno], filenames, nproc=2)
+    for filename in filenames:
+        with open(filename) as f:
+            assert f.read() == format_kitti_submission(anno)
+
+
+def test_evaluate_formatted(tmp_path):
+    bboxes = [np.array([[1., 2., 3., 4., 0.5]], dtype=np.float32)] * 3
+    anno = bboxes2kitti_anno_2d(bboxes, ['car', 'ped', 'cyc'])
+    # skip the data loading of the dataset
+    dataset = SPADataset.__new__(SPADataset)
+    dataset.data_infos = _get_infos(2)
+    dataset._evaluate_result_files = lambda result_files, *args: dict(
+        result_files=result_files)
+
+    # the arguments of evaluate which do not apply are ignored
+    formatted = [dict(pts_bbox=anno), dict(pts_bbox=anno)]
+    results = dataset.evaluate_formatted(
+        formatted,
+        submission_prefix=str(tmp_path / 'submission_'),
+        show=False,
+        out_dir=None)
+    assert results['result_files'] == dict(pts_bbox=[anno, anno])
+    for i in range(2):
+        with open(tmp_path / 'submission_pts_bbox' / f'{i:06d}.txt') as f:
+            assert f.read() == format_kitti_submission(anno)
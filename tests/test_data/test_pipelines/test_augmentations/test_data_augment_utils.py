@@ -70,3 +70,68 @@ def test_points_transform():
                       rot_transforms, valid_mask)
     assert points.shape == (5, 4)
     assert gt_boxes.shape == (5, 7)
+
+
+def test_noise_per_box_hashed():
+    from mmdet3d.core.bbox import box_np_ops
+    from mmdet3d.datasets.pipelines.data_augment_utils import (
+        _noise_box_corners, noise_per_box, noise_per_box_hashed,
+        noise_per_box_v2_)
+
+    np.random.seed(0)
+    num_boxes, num_try = 40, 20
+    centers = np.random.uniform(-20, 20, (num_boxes, 2))
+    dims = np.random.uniform(1, 5, (num_boxes, 2))
+    yaws = np.random.uniform(-np.pi, np.pi, (num_boxes, 1))
+    boxes = np.concatenate([centers, dims, yaws], axis=1).astype(np.float32)
+    valid_mask = np.random.rand(num_boxes) > 0.2
+    loc_noises = np.random.normal(scale=0.5, size=(num_boxes, num_try, 3))
+    rot_noises = np.random.uniform(-0.3, 0.3, (num_boxes, num_try))
+    global_rot_noises = np.random.uniform(-0.5, 0.5, (num_boxes, num_try))
+    box_corners = box_np_ops.box2d_to_corner_jit(boxes)
+
+    expected_mask = noise_per_box(boxes, valid_mask, loc_noises, rot_noises)
+    candidate_corners, _, _ = _noise_box_corners(boxes, loc_noises, rot_noises)
+    success_mask = noise_per_box_hashed(box_corners, candidate_corners,
+                                        valid_mask)
+    assert np.all(success_mask == expected_mask)
+    assert np.all(success_mask[~valid_mask] == -1)
+
+    candidate_corners, new_loc_noises, new_rot_noises = _noise_box_corners(
+        boxes, loc_noises, rot_noises, global_rot_noises)
+    success_mask = noise_per_box_hashed(box_corners, candidate_corners,
+                                        valid_mask)
+    expected_mask = noise_per_box_v2_(boxes, valid_mask, loc_noises,
+                                      rot_noises, global_rot_noises)
+    assert np.all(success_mask == expected_mask)
+    inds = np.nonzero(success_mask >= 0)[0]
+    assert np.allclose(new_loc_noises[inds, success_mask[inds]],
+                       loc_noises[inds, success_mask[inds]])
+    assert np.allclose(new_rot_noises[inds, success_mask[inds]],
+                       rot_noises[inds, success_mask[inds]])
+
+
+def test_points_in_first_box():
+    from mmdet3d.core.bbox import box_np_ops
+    from mmdet3d.datasets.pipelines.data_augment_utils import \
+        _points_in_first_box
+
+    np.random.seed(0)
+    num_boxes = 30
+    centers = np.random.uniform(-10, 10, (num_boxes, 3))
+    dims = np.random.uniform(1, 4, (num_boxes, 3))
+    yaws = np.random.uniform(-np.pi, np.pi, (num_boxes, 1))
+    boxes = np.concatenate([centers, dims, yaws], axis=1).astype(np.float32)
+    points = np.random.uniform(-12, 12, (2000, 3)).astype(np.float32)
+    valid_mask = np.random.rand(num_boxes) > 0.2
+    corners = box_np_ops.center_to_corner_box3d(
+        boxes[:, :3], boxes[:, 3:6], boxes[:, 6], origin=(0.5, 0.5, 0), axis=2)
+    surfaces = box_np_ops.corner_to_surfaces_3d_jit(corners)
+
+    point_masks = box_np_ops.points_in_convex_polygon_3d_jit(points, surfaces)
+    point_masks &= valid_mask
+    expected_inds = np.where(point_masks.any(1), point_masks.argmax(1), -1)
+    point_box_inds = _points_in_first_box(points, corners, surfaces,
+                                          valid_mask)
+    assert (point_box_inds >= 0).sum() > 0
+    assert np.all(point_box_inds == expected_inds)
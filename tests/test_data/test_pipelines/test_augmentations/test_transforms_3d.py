@@ -1,4 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import tempfile
+
 import mmcv
 import numpy as np
 import pytest
@@ -18,6 +21,7 @@ from mmdet3d.datasets import (AffineResize, BackgroundPointsFilter,
                               RandomJitterPoints, RandomRotate,
                               RandomShiftScale, RangeLimitedRandomCrop,
                               VoxelBasedPointSampler)
+from mmdet3d.datasets.pipelines.patch_database import PatchChunkWriter
 
 
 def test_remove_points_in_boxes():
@@ -113,6 +117,68 @@ def test_object_sample():
     assert np.all(gt_labels_3d == [0])
 
 
+def test_object_sample_2d():
+    tmp_dir = tempfile.TemporaryDirectory()
+    # a tiny database of two cars with packed image patches
+    patch_writer = PatchChunkWriter(
+        osp.join(tmp_dir.name, 'gt_database'), 'gt_database', chunk_size=16)
+    rng = np.random.RandomState(0)
+    boxes_3d = [[10., 2., -1., 4., 2., 1.5, 0.],
+                [20., -2., -1., 4., 2., 1.5, 0.]]
+    boxes_2d = [[4., 3., 12., 9.], [8., 5., 14., 11.]]
+    db_infos = []
+    for i, (box3d, box2d) in enumerate(zip(boxes_3d, boxes_2d)):
+        img_patch = np.full((6, 8, 3), 100 * (i + 1), dtype=np.uint8)
+        mask = (rng.rand(6, 8) > 0.5).astype(np.uint8)
+        gt_points = rng.rand(5, 4).astype(np.float32)
+        gt_points.tofile(osp.join(tmp_dir.name, f'gt_database/{i}.bin'))
+        db_infos.append(
+            dict(
+                name='Car',
+                path=f'gt_database/{i}.bin',
+                box3d_lidar=np.array(box3d, dtype=np.float32),
+                num_points_in_gt=5,
+                difficulty=0,
+                box2d_camera=np.array(box2d, dtype=np.float32),
+                img_patch=patch_writer.add(img_patch, mask)))
+    patch_writer.flush()
+    # every patch is in its own chunk as they exceed the chunk size
+    assert db_infos[1]['img_patch']['offset'] == 0
+    info_path = osp.join(tmp_dir.name, 'dbinfos.pkl')
+    mmcv.dump(dict(Car=db_infos), info_path)
+
+    db_sampler = mmcv.ConfigDict(
+        data_root=tmp_dir.name,
+        info_path=info_path,
+        rate=1.0,
+        prepare=dict(),
+        classes=['Car'],
+        sample_groups=dict(Car=2))
+    object_sample = ObjectSample(db_sampler, sample_2d=True)
+    img = np.zeros((12, 13, 3), dtype=np.uint8)
+    input_dict = dict(
+        points=LiDARPoints(np.zeros((0, 4), dtype=np.float32), points_dim=4),
+        gt_bboxes_3d=LiDARInstance3DBoxes(np.zeros((0, 7), np.float32)),
+        gt_labels_3d=np.zeros(0, dtype=np.int64),
+        gt_bboxes=np.zeros((0, 4), dtype=np.float32),
+        img=img)
+    input_dict = object_sample(input_dict)
+    assert input_dict['points'].tensor.shape == (10, 4)
+    assert input_dict['gt_bboxes'].shape == (2, 4)
+
+    # the nearer car is pasted over the farther one, which is cropped
+    expected_img = np.zeros((12, 13, 3), dtype=np.uint8)
+    for i in np.argsort([-info['box3d_lidar'][0] for info in db_infos]):
+        img_patch, mask = object_sample.db_sampler.load_patch(db_infos[i])
+        x1, y1 = db_infos[i]['box2d_camera'][:2].astype(np.int64)
+        h, w = min(6, 12 - y1), min(8, 13 - x1)
+        region = expected_img[y1:y1 + h, x1:x1 + w]
+        region[mask[:h, :w] > 0] = img_patch[:h, :w][mask[:h, :w] > 0]
+    assert np.all(input_dict['img'] == expected_img)
+    assert np.any(expected_img == 100) and np.any(expected_img == 200)
+    tmp_dir.cleanup()
+
+
 def test_object_noise():
     np.random.seed(0)
     object_noise = ObjectNoise()
@@ -747,7 +813,7 @@ def test_points_sample():
     repr_str = repr(point_sample)
     expected_repr_str = f'PointSample(num_points={num_points}, ' \
                         f'sample_range={sample_range}, ' \
-                        'replace=False)'
+                        'replace=False, ragged=False)'
     assert repr_str == expected_repr_str
 
     # test when number of far points are larger than number of sampled points
@@ -760,6 +826,19 @@ def test_points_sample():
     expected_pts = points.tensor.numpy()[select_idx]
     assert np.allclose(sampled_pts.tensor.numpy(), expected_pts)
 
+    # test ragged sampling, which only downsamples the large point clouds
+    point_sample = PointSample(num_points=4, ragged=True)
+    small_points = DepthPoints(np.random.rand(3, 4), points_dim=4)
+    results = point_sample(
+        dict(points=small_points, pts_semantic_mask=np.arange(3)))
+    assert results['points'] is small_points
+    assert np.all(results['pts_semantic_mask'] == np.arange(3))
+    large_points = DepthPoints(np.random.rand(6, 4), points_dim=4)
+    results = point_sample(
+        dict(points=large_points, pts_semantic_mask=np.arange(6)))
+    assert len(results['points']) == 4
+    assert len(np.unique(results['pts_semantic_mask'])) == 4
+
 
 def test_affine_resize():
 
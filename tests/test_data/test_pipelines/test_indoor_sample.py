@@ -60,7 +60,7 @@ def test_indoor_sample():
     repr_str = repr(sunrgbd_sample_points)
     expected_repr_str = 'PointSample(num_points=5, ' \
                         'sample_range=None, ' \
-                        'replace=False)'
+                        'replace=False, ragged=False)'
     assert repr_str == expected_repr_str
     assert np.allclose(sunrgbd_point_cloud[sunrgbd_choices],
                        sunrgbd_points_result)
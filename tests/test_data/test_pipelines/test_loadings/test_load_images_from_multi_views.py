@@ -1,5 +1,10 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import tempfile
+from os import path as osp
+
+import mmcv
 import numpy as np
+import pytest
 import torch
 from mmcv.parallel import DataContainer
 
@@ -33,7 +38,8 @@ def test_load_multi_view_image_from_files():
 
     repr_str = repr(multi_view_img_loader)
     expected_str = 'LoadMultiViewImageFromFiles(to_float32=True, ' \
-                   "color_type='unchanged')"
+                   "color_type='unchanged', num_threads=4, decode_scale=1, " \
+                   "reuse_buffer=False, file_client_args={'backend': 'disk'})"
     assert repr_str == expected_str
 
     # test LoadMultiViewImageFromFiles's compatibility with DefaultFormatBundle
@@ -44,3 +50,35 @@ def test_load_multi_view_image_from_files():
 
     assert isinstance(img, DataContainer)
     assert img._data.shape == torch.Size((num_views, 3, 1280, 1920))
+
+
+def test_load_multi_view_image_threads_and_decode_scale():
+    tmp_dir = tempfile.TemporaryDirectory()
+    num_views = 3
+    filenames = []
+    for i in range(num_views):
+        img = np.full((64, 96, 3), 40 * i, dtype=np.uint8)
+        filename = osp.join(tmp_dir.name, f'{i}.jpg')
+        mmcv.imwrite(img, filename)
+        filenames.append(filename)
+    lidar2img = [np.eye(4) * (i + 1) for i in range(num_views)]
+
+    # decoding the views concurrently gives the same images
+    expected_imgs = LoadMultiViewImageFromFiles(
+        to_float32=True, num_threads=0)(dict(img_filename=filenames))['img']
+    loader = LoadMultiViewImageFromFiles(to_float32=True, reuse_buffer=True)
+    for _ in range(2):
+        imgs = loader(dict(img_filename=filenames))['img']
+        for img, expected_img in zip(imgs, expected_imgs):
+            assert img.dtype == np.float32
+            assert np.all(img == expected_img)
+
+    loader = LoadMultiViewImageFromFiles(color_type='color', decode_scale=2)
+    results = loader(dict(img_filename=filenames, lidar2img=lidar2img))
+    assert results['img_shape'] == (32, 48, 3, num_views)
+    assert results['img'][0].dtype == np.uint8
+    assert np.allclose(results['lidar2img'][1], np.diag([1., 1., 2., 2.]))
+    tmp_dir.cleanup()
+
+    with pytest.raises(ValueError):
+        LoadMultiViewImageFromFiles(color_type='unchanged', decode_scale=2)
@@ -3,7 +3,9 @@ import numpy as np
 import pytest
 import torch
 
-from mmdet3d.core.evaluation.indoor_eval import average_precision, indoor_eval
+from mmdet3d.core.evaluation.indoor_eval import (assign_det_cls,
+                                                 average_precision,
+                                                 indoor_eval)
 
 
 def test_indoor_eval():
@@ -186,3 +188,18 @@ def test_average_precision():
         np.array([[0.25, 0.5, 0.75], [0.25, 0.5, 0.75]]),
         np.array([[1., 1., 1.], [1., 1., 1.]]), '11points')
     assert abs(ap[0] - 0.06611571) < 0.001
+
+
+def test_assign_det_cls():
+    # the second detection of gt 0 and the detection without any ground
+    # truth in its scene are false positives
+    scores = np.array([0.5, 0.9, 0.8, 0.7, 0.6])
+    ious_max = np.array([0.6, 0.7, 0.3, 0.8, -np.inf])
+    gt_inds = np.array([0, 0, 1, 2, 0])
+    ret = assign_det_cls(scores, ious_max, gt_inds, 3, [0.25, 0.5])
+    recall, precision, _ = ret[0]
+    assert np.allclose(recall, [1 / 3, 2 / 3, 1, 1, 1])
+    assert np.allclose(precision, [1, 1, 1, 0.75, 0.6])
+    recall, precision, _ = ret[1]
+    assert np.allclose(recall, [1 / 3, 1 / 3, 2 / 3, 2 / 3, 2 / 3])
+    assert np.allclose(precision, [1, 0.5, 2 / 3, 0.5, 0.4])
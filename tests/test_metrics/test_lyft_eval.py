@@ -0,0 +1,86 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import numpy as np
+import pytest
+
+
+def test_lyft_eval():
+    pytest.importorskip('lyft_dataset_sdk')
+    from lyft_dataset_sdk.eval.detection.mAP_evaluation import Box3D
+
+    from mmdet3d.core.evaluation.lyft_eval import (get_bev_corners,
+                                                   get_paired_ious,
+                                                   get_single_class_aps,
+                                                   pack_lyft_boxes)
+    gt = [
+        dict(
+            sample_token='a',
+            translation=[1.0, 2.0, 0.5],
+            size=[2.0, 4.0, 1.5],
+            rotation=[0.9238795, 0.0, 0.0, 0.3826834],
+            name='car'),
+        dict(
+            sample_token='a',
+            translation=[10.0, 2.0, 0.5],
+            size=[2.0, 4.0, 1.5],
+            rotation=[1.0, 0.0, 0.0, 0.0],
+            name='car'),
+        dict(
+            sample_token='b',
+            translation=[0.0, 0.0, 0.0],
+            size=[1.0, 1.0, 1.0],
+            rotation=[1.0, 0.0, 0.0, 0.0],
+            name='car')
+    ]
+    predictions = [
+        dict(
+            sample_token='a',
+            translation=[1.2, 2.1, 0.6],
+            size=[2.1, 3.8, 1.5],
+            rotation=[0.9659258, 0.0, 0.0, 0.258819],
+            name='car',
+            score=0.9),
+        dict(
+            sample_token='a',
+            translation=[1.0, 2.0, 0.5],
+            size=[2.0, 4.0, 1.5],
+            rotation=[0.9238795, 0.0, 0.0, 0.3826834],
+            name='car',
+            score=0.8),
+        dict(
+            sample_token='c',
+            translation=[0.0, 0.0, 0.0],
+            size=[1.0, 1.0, 1.0],
+            rotation=[1.0, 0.0, 0.0, 0.0],
+            name='car',
+            score=0.7),
+        dict(
+            sample_token='a',
+            translation=[10.5, 2.0, 0.5],
+            size=[2.0, 4.0, 1.5],
+            rotation=[1.0, 0.0, 0.0, 0.0],
+            name='car',
+            score=0.6)
+    ]
+
+    # the batched ious are the same as the ones of the sdk
+    gt_boxes = pack_lyft_boxes(gt)
+    pred_boxes = pack_lyft_boxes(predictions)
+    pred_inds, gt_inds = np.meshgrid(
+        np.arange(len(predictions)), np.arange(len(gt)), indexing='ij')
+    ious = get_paired_ious(pred_boxes, get_bev_corners(pred_boxes),
+                           pred_inds.ravel(), gt_boxes,
+                           get_bev_corners(gt_boxes), gt_inds.ravel())
+    expected_ious = [
+        Box3D(**pred).get_iou(Box3D(**box)) for pred in predictions
+        for box in gt
+    ]
+    assert np.allclose(ious, expected_ious)
+
+    # the duplicated prediction and the prediction of a sample without
+    # ground truth are false positives
+    recalls, precisions, aps = get_single_class_aps(gt, predictions,
+                                                    [0.5, 0.9])
+    assert np.allclose(recalls[:, 0], [1 / 3, 1 / 3, 1 / 3, 2 / 3])
+    assert np.allclose(precisions[:, 0], [1, 0.5, 1 / 3, 0.5])
+    assert np.allclose(recalls[:, 1], [0, 1 / 3, 1 / 3, 1 / 3])
+    assert np.allclose(aps, [1 / 3 + 1 / 3 * 0.5, 1 / 3 * 0.5])
@@ -3,7 +3,7 @@ import numpy as np
 import pytest
 import torch
 
-from mmdet3d.core.evaluation.seg_eval import seg_eval
+from mmdet3d.core.evaluation.seg_eval import seg_eval, seg_eval_hist, seg_hist
 
 
 def test_indoor_eval():
@@ -37,3 +37,22 @@ def test_indoor_eval():
     assert np.isclose(ret_value['acc'], 0.7)
     assert np.isclose(ret_value['acc_cls'], 0.7)
     assert np.isclose(ret_value['miou'], 0.547619048)
+
+
+def test_seg_eval_hist():
+    label2cat = {0: 'car', 1: 'bicycle', 2: 'motorcycle'}
+    gt_labels = [np.array([0, 0, 1, 255, 2]), np.array([2, 2, 1, 0])]
+    seg_preds = [np.array([0, 1, 1, 2, 2]), np.array([2, 0, 1, 0])]
+    hists = [
+        seg_hist(gt, pred, 3, ignore_index=255)
+        for gt, pred in zip(gt_labels, seg_preds)
+    ]
+    assert np.all(hists[0] == [[1, 1, 0], [0, 1, 0], [0, 0, 1]])
+    assert np.all(hists[1] == [[1, 0, 0], [0, 1, 0], [1, 0, 1]])
+
+    # the confusion matrices are accumulated from generators
+    ret_value = seg_eval(
+        iter(gt_labels), iter(seg_preds), label2cat, ignore_index=255)
+    assert ret_value == seg_eval_hist(sum(hists), label2cat)
+    assert np.isclose(ret_value['car'], 0.5)
+    assert np.isclose(ret_value['acc'], 0.75)
@@ -74,6 +74,49 @@ def test_pointnet2_sa_ssg():
     assert sa_features[2].shape == torch.Size([1, 16, 16])
 
 
+def test_pointnet2_sa_ssg_ragged():
+    if not torch.cuda.is_available():
+        pytest.skip()
+
+    cfg = dict(
+        type='PointNet2SASSG',
+        in_channels=6,
+        num_points=(32, 16),
+        radius=(0.8, 1.2),
+        num_samples=(16, 8),
+        sa_channels=((8, 16), (16, 16)),
+        fp_channels=((16, 16), ))
+    self = build_backbone(cfg)
+    self.cuda().eval()
+
+    xyz = np.fromfile('tests/data/sunrgbd/points/000001.bin', dtype=np.float32)
+    xyz = torch.from_numpy(xyz).view(-1, 6).cuda()
+    points = [xyz, xyz[:60]]
+    # test forward of a ragged batch
+    ret_dict = self(points)
+    fp_features = ret_dict['fp_features']
+    fp_indices = ret_dict['fp_indices']
+    sa_xyz = ret_dict['sa_xyz']
+    sa_indices = ret_dict['sa_indices']
+    assert sa_xyz[0].shape == torch.Size([1, 160, 3])
+    assert sa_xyz[1].shape == torch.Size([2, 32, 3])
+    assert fp_features[-1].shape == torch.Size([2, 16, 32])
+    assert sa_indices[1].shape == torch.Size([2, 32])
+    # the indices are in each sample
+    assert sa_indices[1][1].max() < 60
+    assert torch.equal(sa_xyz[1][1], points[1][sa_indices[1][1], :3])
+
+    # the samples of a ragged batch are processed as single samples
+    for i, sample_points in enumerate(points):
+        single_dict = self(sample_points[None])
+        assert torch.allclose(
+            single_dict['fp_features'][-1],
+            fp_features[-1][i:i + 1],
+            atol=1e-5)
+        assert torch.equal(single_dict['fp_indices'][-1],
+                           fp_indices[-1][i:i + 1])
+
+
 def test_multi_backbone():
     if not torch.cuda.is_available():
         pytest.skip()
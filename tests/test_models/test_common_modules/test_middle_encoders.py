@@ -47,3 +47,42 @@ def test_sparse_encoder_for_ssd():
 
     ret, _ = sparse_encoder(voxel_features, coors, 4, True)
     assert ret.shape == torch.Size([4, 256, 128, 128])
+
+
+def test_pillars_scatter():
+    pillars_scatter_cfg = dict(
+        type='PointPillarsScatter', in_channels=8, output_shape=[20, 30])
+    pillars_scatter = build_middle_encoder(pillars_scatter_cfg)
+    batch_size = 3
+
+    def random_coors(num_pillars):
+        flat_inds = torch.randperm(batch_size * 20 * 30)[:num_pillars]
+        return torch.stack([
+            flat_inds // 600,
+            torch.zeros_like(flat_inds), flat_inds % 600 // 30,
+            flat_inds % 30
+        ],
+                           dim=1).int()
+
+    coors = random_coors(500)
+    voxel_features = torch.rand([500, 8])
+
+    ret = pillars_scatter(voxel_features, coors, batch_size)
+    assert ret.shape == torch.Size([batch_size, 8, 20, 30])
+    for i in range(batch_size):
+        mask = coors[:, 0] == i
+        expected = pillars_scatter(voxel_features[mask], coors[mask])
+        assert torch.equal(ret[i:i + 1], expected)
+
+    sparse_ret = pillars_scatter.forward_sparse(voxel_features, coors,
+                                                batch_size)
+    assert torch.equal(sparse_ret.to_dense().permute(0, 3, 1, 2), ret)
+
+    # the cached canvas only keeps the pillars of the latest call
+    pillars_scatter_cfg['reuse_canvas'] = True
+    pillars_scatter = build_middle_encoder(pillars_scatter_cfg)
+    with torch.no_grad():
+        pillars_scatter(
+            torch.rand([400, 8]), random_coors(400), batch_size)
+        reused_ret = pillars_scatter(voxel_features, coors, batch_size)
+    assert torch.equal(reused_ret, ret)
@@ -5,7 +5,10 @@ CommandLine:
     pytest tests/test_models/test_fusion/test_point_fusion.py
 """
 
+from unittest.mock import patch
+
 import torch
+from torch.nn import functional as F
 
 from mmdet3d.models.fusion_layers import PointFusion
 
@@ -59,3 +62,58 @@ def test_sample_single():
     expected_tensor = torch.tensor(
         [0.5560822, 0.5476625, 0.9687978, 0.6241757])
     assert torch.allclose(expected_tensor, out, 1e-4)
+
+
+def test_sample_multiview():
+    lidar2img = torch.tensor(
+        [[6.0294e+02, -7.0791e+02, -1.2275e+01, -1.7094e+02],
+         [1.7678e+02, 8.8088e+00, -7.0794e+02, -1.0257e+02],
+         [9.9998e-01, -1.5283e-03, -5.2907e-03, -3.2757e-01],
+         [0.0000e+00, 0.0000e+00, 0.0000e+00, 1.0000e+00]])
+    # a camera looking backwards, which sees none of the points
+    back2img = lidar2img.clone()
+    back2img[:3, :3] = -back2img[:3, :3]
+    img_meta = {
+        'transformation_3d_flow': ['R', 'S', 'T', 'HF'],
+        'input_shape': [370, 1224],
+        'img_shape': [370, 1224],
+        'lidar2img': torch.stack([lidar2img, back2img, lidar2img]),
+    }
+    img_feat = torch.arange(370 * 1224)[None, ...].view(
+        370, 1224)[None, None, ...].float() / (370 * 1224)
+    img_feats = torch.cat([img_feat, img_feat + 1, img_feat + 2])
+    # the last point is outside of the images
+    pts = torch.tensor([[8.356, -4.312, -0.445], [11.777, -6.724, -0.564],
+                        [6.453, 2.53, -1.612], [6.227, -3.839, -0.563],
+                        [6.227, 30.0, -0.563]])
+
+    # features of the first view, invisible points get zero features
+    view_feats = torch.tensor([0.5560822, 0.5476625, 0.9687978, 0.6241757, 0])
+    visible = torch.tensor([1., 1., 1., 1., 0.])
+
+    fuse = PointFusion(1, 1, 1, 1)
+    out = fuse.sample_single(img_feats, pts, img_meta)
+    # the first and the last views see the first four points
+    expected_tensor = view_feats + visible
+    assert torch.allclose(expected_tensor, out[:, 0], 1e-4)
+
+    fuse = PointFusion(1, 1, 1, 1, view_reduce='sum')
+    out = fuse.sample_single(img_feats, pts, img_meta)
+    assert torch.allclose(expected_tensor * 2, out[:, 0], 1e-4)
+
+    # the configured padding mode is used for all the views
+    fuse = PointFusion(1, 1, 1, 1, padding_mode='border')
+    with patch.object(F, 'grid_sample', wraps=F.grid_sample) as grid_sample:
+        out = fuse.sample_single(img_feats, pts, img_meta)
+    assert grid_sample.call_args.kwargs['padding_mode'] == 'border'
+    assert torch.allclose(expected_tensor, out[:, 0], 1e-4)
+
+    # features of a batch are indexed by the number of views of each sample
+    fuse = PointFusion(1, 1, 1, 1, lateral_conv=False, view_reduce='sum')
+    img_metas = [dict(img_meta, lidar2img=lidar2img), img_meta]
+    img_feat = img_feat.repeat(1, 2, 1, 1)
+    img_feats = [torch.cat([img_feat + 3, img_feat, img_feat, img_feat])]
+    out = fuse.obtain_mlvl_feats(img_feats, [pts, pts], img_metas)
+    assert out.shape == (10, 2)
+    assert torch.allclose(out[:4, 0], view_feats[:4] + 3, 1e-4)
+    assert torch.allclose(out[5:, 0], view_feats * 2, 1e-4)
@@ -974,6 +974,15 @@ def test_center_head():
         assert ret_list[1].shape[0] <= 500
         assert ret_list[2].shape[0] <= 500
 
+    # test get_bboxes with sparse decoding in the cells with points
+    center_head.bbox_coder.sparse_decode = True
+    center_head.bbox_coder.mask_empty_cells = True
+    points = [torch.rand([100, 4]) * 20, torch.rand([100, 4]) * 20]
+    ret_lists = center_head.get_bboxes(output, img_metas, points=points)
+    for ret_list in ret_lists:
+        assert ret_list[0].tensor.shape[0] <= 500
+        assert (ret_list[1] > 0.1).all()
+
 
 def test_dcn_center_head():
     if not torch.cuda.is_available():
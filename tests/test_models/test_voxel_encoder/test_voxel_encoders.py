@@ -2,6 +2,7 @@
 import torch
 
 from mmdet3d.models.builder import build_voxel_encoder
+from mmdet3d.models.voxel_encoders.utils import VoxelSegments
 
 
 def test_pillar_feature_net():
@@ -32,3 +33,57 @@ def test_hard_simple_VFE():
 
     outputs = hard_simple_VFE(features, num_voxels, None)
     assert outputs.shape == torch.Size([240000, 5])
+
+
+def test_voxel_segments():
+    torch.manual_seed(0)
+    coors = torch.randint(0, 3, [200, 4], dtype=torch.int32)
+    coors[[3, 50]] = -1
+    feats = torch.rand([200, 5])
+    segments = VoxelSegments(coors, (3, 3, 3))
+
+    valid = (coors >= 0).all(dim=1)
+    voxel_coors, inverse = torch.unique(
+        coors[valid], dim=0, return_inverse=True)
+    assert torch.equal(segments.voxel_coors, voxel_coors)
+    voxel_max = segments.reduce(feats, 'max')
+    voxel_mean = segments.reduce(feats, 'mean')
+    for i in range(voxel_coors.shape[0]):
+        voxel_feats = feats[valid][inverse == i]
+        assert torch.allclose(voxel_max[i], voxel_feats.max(0)[0])
+        assert torch.allclose(voxel_mean[i], voxel_feats.mean(0))
+    point_feats = segments.gather(voxel_max)
+    assert torch.equal(point_feats[valid], voxel_max[inverse])
+    assert torch.all(point_feats[~valid] == 0)
+
+
+def test_dynamic_vfe():
+    dynamic_vfe_cfg = dict(
+        type='DynamicVFE',
+        in_channels=4,
+        feat_channels=[16, 16],
+        with_cluster_center=True,
+        with_voxel_center=True,
+        voxel_size=(0.2, 0.2, 4),
+        point_cloud_range=(0, -40, -3, 70.4, 40, 1))
+    dynamic_vfe = build_voxel_encoder(dynamic_vfe_cfg)
+    features = torch.rand([1000, 4])
+    coors = torch.randint(0, 10, [1000, 4], dtype=torch.int32)
+    coors[:, 0] = torch.randint(0, 2, [1000])
+    coors[:, 1] = 0
+    num_voxels = torch.unique(coors, dim=0).shape[0]
+
+    voxel_feats, voxel_coors = dynamic_vfe(features, coors)
+    assert voxel_feats.shape == torch.Size([num_voxels, 16])
+    assert voxel_coors.shape == torch.Size([num_voxels, 4])
+
+    dynamic_pillar_cfg = dict(
+        type='DynamicPillarFeatureNet',
+        in_channels=4,
+        feat_channels=[16, 16],
+        voxel_size=(0.2, 0.2, 4),
+        point_cloud_range=(0, -40, -3, 70.4, 40, 1))
+    dynamic_pillar = build_voxel_encoder(dynamic_pillar_cfg)
+    pillar_feats, pillar_coors = dynamic_pillar(features, coors)
+    assert pillar_feats.shape == torch.Size([num_voxels, 16])
+    assert torch.equal(pillar_coors, voxel_coors)
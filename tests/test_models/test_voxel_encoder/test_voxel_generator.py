@@ -1,7 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import numpy as np
 
-from mmdet3d.core.voxel.voxel_generator import VoxelGenerator
+from mmdet3d.core.voxel.voxel_generator import VoxelGenerator, points_to_voxel
 
 
 def test_voxel_generator():
@@ -20,3 +20,53 @@ def test_voxel_generator():
     assert voxels.shape == (8, 1000, 4)
     assert np.all(coors == expected_coors)
     assert np.all(num_points_per_voxel == expected_num_points_per_voxel)
+
+
+def test_voxel_generator_workspace():
+    np.random.seed(0)
+    voxel_size = [0.5, 0.5, 0.5]
+    point_cloud_range = [0, -40, -3, 70.4, 40, 1]
+    for max_dense_cells in [2**24, 0]:
+        # the hash map is used when the grid exceeds `max_dense_cells`
+        self = VoxelGenerator(
+            voxel_size,
+            point_cloud_range,
+            max_num_points=5,
+            max_voxels=100,
+            max_dense_cells=max_dense_cells)
+        for _ in range(3):
+            points = np.random.rand(1000, 4) * 10 - [1, 45, 4, 0]
+            voxels, coors, num_points_per_voxel = self.generate(points)
+            expected_voxels, expected_coors, expected_num_points_per_voxel = \
+                points_to_voxel(points, voxel_size, point_cloud_range, 5,
+                                True, 100)
+            assert np.all(voxels == expected_voxels)
+            assert np.all(coors == expected_coors)
+            assert np.all(
+                num_points_per_voxel == expected_num_points_per_voxel)
+
+
+def test_voxel_generator_batch():
+    np.random.seed(0)
+    voxel_size = [0.5, 0.5, 0.5]
+    point_cloud_range = [0, -40, -3, 70.4, 40, 1]
+    self = VoxelGenerator(
+        voxel_size, point_cloud_range, max_num_points=50, max_voxels=6)
+    points = [np.random.rand(num_points, 4) for num_points in [1000, 0, 500]]
+    batch_inds = np.concatenate(
+        [np.full(len(res), i) for i, res in enumerate(points)])
+    voxels, coors, num_points_per_voxel = self.generate_batch(
+        np.concatenate(points), batch_inds, len(points))
+
+    expected_voxels, expected_coors, expected_num_points_per_voxel = [], [], []
+    for i, res in enumerate(points):
+        res_voxels, res_coors, res_num_points = self.generate(res)
+        expected_voxels.append(res_voxels)
+        expected_coors.append(np.pad(res_coors, ((0, 0), (1, 0)),
+                                     constant_values=i))
+        expected_num_points_per_voxel.append(res_num_points)
+    assert voxels.shape == (12, 50, 4)
+    assert np.all(voxels == np.concatenate(expected_voxels))
+    assert np.all(coors == np.concatenate(expected_coors))
+    assert np.all(
+        num_points_per_voxel == np.concatenate(expected_num_points_per_voxel))
@@ -3,16 +3,20 @@ import os
 import tempfile
 from os.path import dirname, exists, join
 
+import mmcv
 import numpy as np
 import pytest
 import torch
 from mmcv.parallel import MMDataParallel
 
-from mmdet3d.apis import (convert_SyncBN, inference_detector,
+from mmdet3d.apis import (AsyncResultFormatter, ColumnarResults,
+                          SpooledResults, convert_SyncBN, inference_detector,
                           inference_mono_3d_detector,
                           inference_multi_modality_detector,
                           inference_segmentor, init_model, show_result_meshlab,
                           single_gpu_test)
+from mmdet3d.apis.test import (InterleavedColumnarResults, _append_results,
+                               _indexed_batches)
 from mmdet3d.core import Box3DMode
 from mmdet3d.core.bbox import (CameraInstance3DBoxes, DepthInstance3DBoxes,
                                LiDARInstance3DBoxes)
@@ -360,3 +364,118 @@ def test_single_gpu_test():
     assert bboxes_3d.tensor.shape[1] == 7
     assert scores_3d.shape[0] >= 0
     assert labels_3d.shape[0] >= 0
+
+
+class _ToyFormatDataset(object):
+
+    def __init__(self, num_samples):
+        self.tokens = [f'token_{i}' for i in range(num_samples)]
+
+    def format_result(self, idx, result):
+        return dict(token=self.tokens[idx], score=float(result['score']))
+
+
+def test_indexed_batches():
+    # the shuffled sampler gives a different order on every pass
+    data_loader = torch.utils.data.DataLoader(
+        [dict(idx=i) for i in range(10)], batch_size=3, shuffle=True)
+    num_samples = 0
+    for indices, data in _indexed_batches(data_loader):
+        assert data['idx'].tolist() == indices
+        num_samples += len(indices)
+    assert num_samples == 10
+
+
+def test_async_result_formatter():
+    formatter = AsyncResultFormatter(
+        _ToyFormatDataset(10), nproc=2, max_pending=2)
+    for start in range(0, 10, 3):
+        indices = list(range(start, min(start + 3, 10)))
+        formatter.submit(indices,
+                         [dict(score=torch.tensor(i)) for i in indices])
+    formatted = formatter.finish()
+    expected = [dict(token=f'token_{i}', score=float(i)) for i in range(10)]
+    # the formatted results are read from the spool file when accessed
+    assert isinstance(formatted, SpooledResults)
+    assert len(formatted) == 10
+    assert formatted[7] == expected[7]
+    assert formatted[-1] == expected[-1]
+    assert formatted[2:4] == expected[2:4]
+    assert list(formatted) == expected
+    with pytest.raises(IndexError):
+        formatted[10]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        formatted.dump(join(tmpdir, 'part_0'))
+        loaded = SpooledResults.load(join(tmpdir, 'part_0'))
+        assert list(loaded) == expected
+        loaded.file.close()
+
+
+def test_columnar_results():
+    results = []
+    for num_boxes in [3, 0, 2]:
+        results.append(
+            dict(
+                pts_bbox=dict(
+                    boxes_3d=LiDARInstance3DBoxes(torch.rand(num_boxes, 9),
+                                                  box_dim=9),
+                    scores_3d=torch.rand(num_boxes),
+                    labels_3d=torch.randint(0, 3, (num_boxes, )))))
+    assert ColumnarResults.is_packable(results[0])
+    assert not ColumnarResults.is_packable(dict(semantic_mask=1))
+
+    columnar_results = ColumnarResults()
+    for result in results:
+        columnar_results.append(result)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        columnar_results.dump(join(tmpdir, 'part_0'))
+        loaded_results = ColumnarResults.load(join(tmpdir, 'part_0'))
+        assert len(loaded_results) == 3
+        for i, result in enumerate(results):
+            loaded_result = loaded_results[i]['pts_bbox']
+            boxes_3d = loaded_result['boxes_3d']
+            assert isinstance(boxes_3d, LiDARInstance3DBoxes)
+            assert boxes_3d.box_dim == 9
+            assert torch.equal(boxes_3d.tensor,
+                               result['pts_bbox']['boxes_3d'].tensor)
+            assert torch.equal(loaded_result['scores_3d'],
+                               result['pts_bbox']['scores_3d'])
+            assert torch.equal(loaded_result['labels_3d'],
+                               result['pts_bbox']['labels_3d'])
+
+        # the second part has one padded sample
+        parts = [loaded_results, ColumnarResults.load(join(tmpdir, 'part_0'))]
+        collected = InterleavedColumnarResults(parts, 5)
+        assert len(collected) == 5
+        for i, j in enumerate([0, 0, 1, 1, 2]):
+            assert torch.equal(collected[i]['pts_bbox']['scores_3d'],
+                               results[j]['pts_bbox']['scores_3d'])
+        assert len(collected[1:3]) == 2
+        assert torch.equal(collected[-1]['pts_bbox']['scores_3d'],
+                           results[2]['pts_bbox']['scores_3d'])
+        with pytest.raises(IndexError):
+            collected[5]
+        # dumped with ``--out`` as a plain list of result dicts
+        mmcv.dump(list(collected), join(tmpdir, 'results.pkl'))
+        dumped = mmcv.load(join(tmpdir, 'results.pkl'))
+        assert isinstance(dumped, list) and len(dumped) == 5
+        assert torch.equal(dumped[2]['pts_bbox']['scores_3d'],
+                           results[1]['pts_bbox']['scores_3d'])
+        del loaded_results, parts, collected
+
+    # unpackable results turn the stored results into a list
+    stored = _append_results([], results[:2], columnar=True)
+    assert isinstance(stored, ColumnarResults)
+    stored = _append_results(stored, [dict(semantic_mask=1), results[2]],
+                             columnar=True)
+    assert isinstance(stored, list) and len(stored) == 4
+    assert stored[2] == dict(semantic_mask=1)
+    assert torch.equal(stored[1]['pts_bbox']['scores_3d'],
+                       results[1]['pts_bbox']['scores_3d'])
+    # results with different keys as well
+    stored = _append_results([], results[:1], columnar=True)
+    stored = _append_results(stored, [dict(scores_3d=torch.rand(2))],
+                             columnar=True)
+    assert isinstance(stored, list) and len(stored) == 2
+    assert isinstance(_append_results([], results, columnar=False), list)
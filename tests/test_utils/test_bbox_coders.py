@@ -330,7 +330,17 @@ def test_anchor_free_box_coder():
     assert size.shape == torch.Size([2, 256, 3])
 
 
+def _sort_decoded_bboxes(result):
+    """Sort decoded boxes by score, then box, to ignore the order of ties."""
+    rows = torch.cat([
+        result['bboxes'], result['labels'][:, None].float(),
+        result['scores'][:, None]
+    ], dim=1).numpy()
+    return rows[np.lexsort(rows.T)]
+
+
 def test_centerpoint_bbox_coder():
+    torch.manual_seed(0)
     bbox_coder_cfg = dict(
         type='CenterPointBBoxCoder',
         post_center_range=[-61.2, -61.2, -10.0, 61.2, 61.2, 10.0],
@@ -357,6 +367,38 @@ def test_centerpoint_bbox_coder():
         assert temp[i]['scores'].shape == torch.Size([500])
         assert temp[i]['labels'].shape == torch.Size([500])
 
+    # sparse decoding gets the same boxes as the dense one after max-pooling
+    bbox_coder_cfg.update(sparse_decode=True)
+    sparse_bbox_coder = build_bbox_coder(bbox_coder_cfg)
+    batch_hm = torch.randn([2, 2, 128, 128]) * 2 - 4
+    batch_hm_max = torch.nn.functional.max_pool2d(batch_hm, 3, 1, 1)
+    batch_peaks = batch_hm.sigmoid() * (batch_hm == batch_hm_max)
+    temp = bbox_coder.decode(batch_peaks, batch_rots, batch_rotc, batch_hei,
+                             batch_dim, batch_vel, batch_reg, 5)
+    sparse_temp = sparse_bbox_coder.decode(batch_hm, batch_rots, batch_rotc,
+                                           batch_hei, batch_dim, batch_vel,
+                                           batch_reg, 5)
+    for i in range(len(temp)):
+        # tied scores may come out of topk in a different order
+        assert np.allclose(
+            _sort_decoded_bboxes(temp[i]),
+            _sort_decoded_bboxes(sparse_temp[i]))
+
+    # only decode the cells with points
+    bbox_coder_cfg.update(mask_empty_cells=True)
+    sparse_bbox_coder = build_bbox_coder(bbox_coder_cfg)
+    points = [torch.rand([100, 4]) * 10, torch.rand([100, 4]) * 10]
+    occupancy = sparse_bbox_coder.get_occupancy(points, 128, 128)
+    assert occupancy.shape == torch.Size([2, 128, 128])
+    assert occupancy.sum() <= 200
+    sparse_temp = sparse_bbox_coder.decode(
+        batch_hm, batch_rots, batch_rotc, batch_hei, batch_dim, batch_vel,
+        batch_reg, 5, points=points)
+    for i in range(len(temp)):
+        # the boxes are offset from their cells by the regression
+        assert (sparse_temp[i]['bboxes'][:, :2] >= -0.8).all()
+        assert (sparse_temp[i]['bboxes'][:, :2] <= 11.6).all()
+
 
 def test_point_xyzwhlr_bbox_coder():
     bbox_coder_cfg = dict(
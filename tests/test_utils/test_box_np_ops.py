@@ -81,3 +81,33 @@ def test_points_in_convex_polygon_jit():
     res = points_in_convex_polygon_jit(points, polygons, clockwise=True)
     expected_res = np.array([[1, 0, 1], [0, 0, 1], [0, 1, 0]]).astype(np.bool)
     assert np.allclose(res, expected_res)
+
+
+def test_points_in_frusta_mask():
+    from mmdet3d.core.bbox.box_np_ops_spa import (points_in_frusta_mask,
+                                                  remove_outside_points)
+    rect = np.array([[0.9999128, 0.01009263, -0.00851193, 0.],
+                     [-0.01012729, 0.9999406, -0.00403767, 0.],
+                     [0.00847068, 0.00412352, 0.9999556, 0.], [0., 0., 0.,
+                                                               1.]])
+    Trv2c = np.array([[0.00692796, -0.9999722, -0.00275783, -0.02457729],
+                      [-0.00116298, 0.00274984, -0.9999955, -0.06127237],
+                      [0.9999753, 0.00693114, -0.0011439, -0.3321029],
+                      [0., 0., 0., 1.]])
+    P2 = np.array([[721.5377, 0., 609.5593, 44.85728],
+                   [0., 721.5377, 172.854, 0.2163791],
+                   [0., 0., 1., 0.002745884], [0., 0., 0., 1.]])
+    image_shape = [375, 1242]
+    np.random.seed(0)
+    points = np.random.uniform([-50, -50, -3, 0], [50, 50, 1, 1],
+                               (2000, 4)).astype(np.float32)
+    mask = points_in_frusta_mask(points, rect, Trv2c, [P2], [image_shape])
+    expected_points = remove_outside_points(points, rect, Trv2c, P2,
+                                            image_shape)
+    assert np.allclose(points[mask], expected_points)
+
+    # points seen by several cameras are kept only once
+    mask = points_in_frusta_mask(points, rect, Trv2c, [P2, P2],
+                                 [image_shape, image_shape])
+    assert mask.shape == (2000, )
+    assert np.allclose(points[mask], expected_points)
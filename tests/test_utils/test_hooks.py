@@ -0,0 +1,25 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from mmdet3d.core.hook import (NumbaWarmupHook, numba_warmup,
+                               warmup_numba_kernels)
+from mmdet3d.datasets.pipelines import data_augment_utils
+
+
+def test_warmup_numba_kernels():
+    np.random.seed(0)
+    expected = np.random.rand()
+    np.random.seed(0)
+    warmup_numba_kernels(dtypes=('float32', ))
+    # the kernels are compiled and the global random state is restored
+    assert len(data_augment_utils.box_collision_test.signatures) > 0
+    assert np.random.rand() == expected
+
+
+def test_numba_warmup_hook():
+    hook = NumbaWarmupHook(dtypes=('float32', ))
+    with patch.object(numba_warmup, 'warmup_numba_kernels') as warmup:
+        hook.before_run(MagicMock())
+    warmup.assert_called_once_with(('float32', ))
@@ -0,0 +1,36 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import subprocess
+import sys
+
+from mmdet3d.utils import LazyRegistry, get_registry_index
+
+
+def test_get_registry_index():
+    index = get_registry_index('mmdet3d.models')
+    assert index['SECOND'] == ['mmdet3d.models.backbones.second']
+    assert index['VoxelNet'] == ['mmdet3d.models.detectors.voxelnet']
+    index = get_registry_index('mmdet3d.datasets')
+    assert index['KittiDataset'] == ['mmdet3d.datasets.kitti_dataset']
+    assert get_registry_index('mmdet3d.not_a_package') == {}
+
+
+def test_lazy_registry():
+    registry = LazyRegistry('dataset', locations=['mmdet3d.datasets'])
+    assert registry.get('NotADataset') is None
+    assert 'NotADataset' not in registry
+    # the type is registered into `DATASETS` rather than this registry
+    assert registry.get('KittiDataset') is None
+
+    # datasets are only imported when they are first built
+    code = ('import sys\n'
+            'import mmdet3d.datasets\n'
+            'from mmdet3d.datasets import DATASETS\n'
+            'name = "mmdet3d.datasets.kitti_dataset"\n'
+            'assert name not in sys.modules\n'
+            'assert DATASETS.get("KittiDataset") is not None\n'
+            'assert name in sys.modules\n'
+            'from mmdet3d.datasets import WaymoDataset\n'
+            'assert "WaymoDataset" in DATASETS\n'
+            'from mmdet3d.models import BACKBONES\n'
+            'assert "SECOND" in BACKBONES\n')
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -112,3 +112,76 @@ def test_nms_normal_bev():
     inds = nms_normal_bev(boxes.cuda(), scores.cuda(), thresh=0.3)
 
     assert np.allclose(inds.cpu().numpy(), np_inds)
+
+
+def test_nms_rotated_cpu():
+    from mmcv.ops import nms_rotated
+
+    from mmdet3d.core.post_processing import nms_bev, nms_rotated_cpu
+
+    np_boxes = np.array(
+        [[6.0, 3.0, 8.0, 7.0, 2.0], [3.0, 6.0, 9.0, 11.0, 1.0],
+         [3.0, 7.0, 10.0, 12.0, 1.0], [1.0, 4.0, 13.0, 7.0, 3.0]],
+        dtype=np.float32)
+    np_scores = np.array([0.6, 0.9, 0.7, 0.2], dtype=np.float32)
+    boxes = torch.from_numpy(np_boxes)
+    scores = torch.from_numpy(np_scores)
+    inds = nms_bev(boxes, scores, thresh=0.3)
+    assert np.allclose(inds.numpy(), np.array([1, 0, 3]))
+
+    torch.manual_seed(0)
+    boxes = torch.cat([
+        torch.rand(300, 2) * 30,
+        torch.rand(300, 2) * 3 + 0.3,
+        torch.rand(300, 1) * 6 - 3
+    ], 1)
+    scores = torch.rand(300)
+    # duplicated boxes, boxes rotated by pi and tied scores
+    boxes[200:] = boxes[:100]
+    boxes[250:, 4] += np.pi
+    scores[100:150] = scores[:50]
+    for thresh in [0.0, 0.01, 0.3, 0.9]:
+        expected_inds = nms_rotated(boxes, scores, thresh)[1]
+        inds = nms_rotated_cpu(boxes, scores, thresh, block_size=64)
+        assert torch.equal(inds, expected_inds)
+
+    # only the boxes with the same labels suppress each other
+    scores = torch.rand(300)
+    labels = torch.randint(3, (300, ))
+    inds = nms_rotated_cpu(boxes, scores, 0.3, labels=labels)
+    for label in range(3):
+        mask = labels == label
+        expected_inds = mask.nonzero().view(-1)[nms_rotated(
+            boxes[mask], scores[mask], 0.3)[1]]
+        assert torch.equal(inds[labels[inds] == label], expected_inds)
+
+
+def test_batched_nms_bev():
+    from mmdet3d.core.post_processing import (batched_nms_bev, nms_bev,
+                                              nms_normal_bev)
+
+    torch.manual_seed(0)
+    boxes = torch.cat([
+        torch.rand(200, 2) * 20,
+        torch.rand(200, 2) * 3 + 0.3,
+        torch.rand(200, 1) * 6 - 3
+    ], 1)
+    # xywhr -> xyxyr
+    boxes = torch.cat(
+        [boxes[:, :2] - boxes[:, 2:4] / 2, boxes[:, :2] + boxes[:, 2:4] / 2,
+         boxes[:, 4:]], 1)
+    scores = torch.rand(200)
+    labels = torch.randint(4, (200, ))
+    labels[labels == 2] = 3
+    for use_rotate_nms, nms_func in [(True, nms_bev),
+                                     (False, nms_normal_bev)]:
+        inds = batched_nms_bev(boxes, scores, labels, 0.1, use_rotate_nms)
+        expected_inds = []
+        for label in [0, 1, 3]:
+            class_inds = (labels == label).nonzero().view(-1)
+            expected_inds.append(class_inds[nms_func(
+                boxes[class_inds], scores[class_inds], 0.1)])
+        assert torch.equal(inds, torch.cat(expected_inds))
+
+    inds = batched_nms_bev(boxes[:0], scores[:0], labels[:0], 0.1)
+    assert inds.shape == (0, )
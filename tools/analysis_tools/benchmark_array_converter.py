@@ -0,0 +1,70 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import timeit
+
+import numpy as np
+import torch
+
+from mmdet3d.core.bbox import (limit_period, points_cam2img, points_img2cam,
+                               xywhr2xyxyr)
+from mmdet3d.core.bbox.structures import rotation_3d_in_axis
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the functions wrapped by array_converter')
+    parser.add_argument(
+        '--num-boxes', type=int, default=16, help='number of boxes')
+    parser.add_argument(
+        '--repeat', type=int, default=2000, help='number of calls to time')
+    args = parser.parse_args()
+    return args
+
+
+def get_cases(num_boxes):
+    """Get the wrapped functions and their inputs.
+
+    Args:
+        num_boxes (int): Number of boxes (and points) in the inputs.
+
+    Returns:
+        list[tuple]: Name, function and arguments of each case.
+    """
+    rng = np.random.RandomState(0)
+    points = rng.rand(num_boxes, 3).astype(np.float32) + 1
+    boxes = rng.rand(num_boxes, 5).astype(np.float32)
+    angles = rng.rand(num_boxes).astype(np.float32)
+    cam2img = np.array([[700., 0., 450., 0.], [0., 700., 200., 0.],
+                        [0., 0., 1., 0.], [0., 0., 0., 1.]],
+                       dtype=np.float32)
+    return [
+        ('limit_period', limit_period, (angles, )),
+        ('rotation_3d_in_axis', rotation_3d_in_axis,
+         (points[None].repeat(num_boxes, 0), angles, 1)),
+        ('xywhr2xyxyr', xywhr2xyxyr, (boxes, )),
+        ('points_cam2img', points_cam2img, (points, cam2img)),
+        ('points_img2cam', points_img2cam, (points, cam2img)),
+    ]
+
+
+def main():
+    args = parse_args()
+    print(f'{"function":<22}{"numpy (us)":>12}{"torch (us)":>12}'
+          f'{"unwrapped (us)":>16}')
+    for name, func, np_args in get_cases(args.num_boxes):
+        torch_args = [
+            torch.from_numpy(arg) if isinstance(arg, np.ndarray) else arg
+            for arg in np_args
+        ]
+        timings = []
+        # numpy inputs, torch inputs and the function without the wrapper
+        for f, f_args in ((func, np_args), (func, torch_args),
+                          (func.__wrapped__, torch_args)):
+            seconds = timeit.timeit(lambda: f(*f_args), number=args.repeat)
+            timings.append(seconds / args.repeat * 1e6)
+        print(f'{name:<22}{timings[0]:>12.1f}{timings[1]:>12.1f}'
+              f'{timings[2]:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import time
+
+import torch
+from mmcv.ops import nms_rotated
+
+from mmdet3d.core.post_processing import batched_nms_bev, nms_rotated_cpu
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the rotated BEV NMS on CPU')
+    parser.add_argument(
+        '--num-boxes', type=int, default=1000, help='number of boxes')
+    parser.add_argument(
+        '--num-classes', type=int, default=3, help='number of classes')
+    parser.add_argument(
+        '--num-objects',
+        type=int,
+        default=50,
+        help='number of objects the boxes are clustered around')
+    parser.add_argument(
+        '--iou-thr', type=float, default=0.1, help='IoU threshold of NMS')
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='number of NMS calls to time')
+    args = parser.parse_args()
+    return args
+
+
+def get_inputs(args):
+    """Get BEV boxes clustered around objects like the head predictions.
+
+    Args:
+        args (argparse.Namespace): Arguments of the benchmark.
+
+    Returns:
+        tuple: Boxes in XYWHR format, the scores and the labels.
+    """
+    torch.manual_seed(0)
+    centers = torch.rand(args.num_objects, 2) * 100 - 50
+    sizes = torch.rand(args.num_objects, 2) * 3 + 1
+    yaws = torch.rand(args.num_objects, 1) * 6.28 - 3.14
+    objects = torch.cat([centers, sizes, yaws], dim=1)
+    inds = torch.randint(args.num_objects, (args.num_boxes, ))
+    noise = torch.randn(args.num_boxes, 5) * torch.tensor(
+        [0.3, 0.3, 0.1, 0.1, 0.1])
+    boxes = objects[inds] + noise
+    scores = torch.rand(args.num_boxes)
+    labels = torch.randint(args.num_classes, (args.num_boxes, ))
+    return boxes, scores, labels
+
+
+def _xywhr2xyxyr(boxes):
+    half_sizes = boxes[:, 2:4] / 2
+    return torch.cat(
+        [boxes[:, :2] - half_sizes, boxes[:, :2] + half_sizes, boxes[:, 4:]],
+        dim=1)
+
+
+def _loop_nms(boxes, scores, labels, thresh):
+    keep = []
+    for label in range(int(labels.max()) + 1):
+        inds = (labels == label).nonzero(as_tuple=True)[0]
+        order = scores[inds].sort(descending=True)[1]
+        inds = inds[order]
+        keep.append(inds[nms_rotated(boxes[inds], scores[inds], thresh)[1]])
+    return torch.cat(keep)
+
+
+def main():
+    args = parse_args()
+    boxes, scores, labels = get_inputs(args)
+    order = scores.sort(descending=True)[1]
+    cases = [
+        ('mmcv nms_rotated',
+         lambda: order[nms_rotated(boxes[order], scores[order], args.iou_thr)
+                       [1]]),
+        ('nms_rotated_cpu',
+         lambda: nms_rotated_cpu(boxes, scores, args.iou_thr)),
+        ('mmcv per class', lambda: _loop_nms(boxes, scores, labels,
+                                             args.iou_thr)),
+        ('batched_nms_bev',
+         lambda: batched_nms_bev(
+             _xywhr2xyxyr(boxes), scores, labels, args.iou_thr)),
+    ]
+
+    print(f'{"method":<20}{"time (ms)":>12}{"kept":>8}{"same":>8}')
+    reference = None
+    for i, (name, run) in enumerate(cases):
+        for j in range(args.repeat + 1):
+            if j == 1:
+                # the first call is a warmup, e.g. for the numba compilation
+                start = time.perf_counter()
+            keep = run()
+        elapsed = (time.perf_counter() - start) / args.repeat * 1e3
+        keep = set(keep.tolist())
+        if i % 2 == 0:
+            # compare each implementation with the mmcv kernel before it
+            reference = keep
+        print(f'{name:<20}{elapsed:>12.2f}{len(keep):>8}'
+              f'{str(keep == reference):>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import time
+
+import torch
+
+from mmdet3d.core.bbox.coders import CenterPointBBoxCoder
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the dense and sparse CenterPoint decoding')
+    parser.add_argument(
+        '--grid-size', type=int, default=512, help='size of the heatmap')
+    parser.add_argument(
+        '--num-classes', type=int, default=2, help='number of classes')
+    parser.add_argument('--batch-size', type=int, default=1, help='batch size')
+    parser.add_argument(
+        '--num-points',
+        type=int,
+        default=30000,
+        help='number of points in the central part of the range')
+    parser.add_argument(
+        '--max-num', type=int, default=500, help='max number of boxes')
+    parser.add_argument(
+        '--score-thr', type=float, default=0.1, help='score threshold')
+    parser.add_argument(
+        '--repeat', type=int, default=20, help='number of decodes to time')
+    parser.add_argument(
+        '--device',
+        default='cuda' if torch.cuda.is_available() else 'cpu',
+        help='device to run on')
+    args = parser.parse_args()
+    return args
+
+
+def get_inputs(args):
+    """Get heatmap logits mostly in the background and the predictions.
+
+    Args:
+        args (argparse.Namespace): Arguments of the benchmark.
+
+    Returns:
+        tuple: Heatmap logits, the other predictions and the points.
+    """
+    torch.manual_seed(0)
+    grid = (args.grid_size, args.grid_size)
+    heat = torch.randn(
+        args.batch_size, args.num_classes, *grid, device=args.device) - 6
+    preds = [
+        torch.rand(args.batch_size, channels, *grid, device=args.device)
+        for channels in (1, 1, 1, 3, 2, 2)
+    ]
+    points = [
+        torch.rand(args.num_points, 4, device=args.device) * 60 - 30
+        for _ in range(args.batch_size)
+    ]
+    return heat, preds, points
+
+
+def main():
+    args = parse_args()
+    heat, preds, points = get_inputs(args)
+    rot_sine, rot_cosine, hei, dim, vel, reg = preds
+    coder_cfg = dict(
+        pc_range=[-51.2, -51.2],
+        out_size_factor=1,
+        voxel_size=[102.4 / args.grid_size] * 2,
+        post_center_range=[-61.2, -61.2, -10.0, 61.2, 61.2, 10.0],
+        max_num=args.max_num,
+        score_threshold=args.score_thr)
+    dense_coder = CenterPointBBoxCoder(**coder_cfg)
+    sparse_coder = CenterPointBBoxCoder(**coder_cfg, sparse_decode=True)
+    masked_coder = CenterPointBBoxCoder(
+        **coder_cfg, sparse_decode=True, mask_empty_cells=True)
+    cases = [
+        # the head applies the sigmoid to the dense heatmap
+        ('dense', dense_coder, lambda: heat.sigmoid()),
+        ('sparse', sparse_coder, lambda: heat),
+        ('sparse + empty cells', masked_coder, lambda: heat),
+    ]
+
+    print(f'{"mode":<22}{"time (ms)":>12}{"boxes":>8}')
+    for name, coder, get_heat in cases:
+        for i in range(args.repeat + 1):
+            if i == 1:
+                # the first decode is a warmup
+                if args.device != 'cpu':
+                    torch.cuda.synchronize()
+                start = time.perf_counter()
+            results = coder.decode(
+                get_heat(),
+                rot_sine,
+                rot_cosine,
+                hei,
+                dim,
+                vel,
+                reg=reg,
+                points=points)
+        if args.device != 'cpu':
+            torch.cuda.synchronize()
+        elapsed = (time.perf_counter() - start) / args.repeat * 1e3
+        num_boxes = sum(len(result['scores']) for result in results)
+        print(f'{name:<22}{elapsed:>12.2f}{num_boxes:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+_IMPORT_TIME_PATTERN = re.compile(
+    r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+# resolve every registry type used by a config, which imports the modules
+# defining them through the lazy registries
+_RESOLVE_CONFIG = '''
+from mmcv import Config
+from mmdet3d.datasets import DATASETS, PIPELINES
+from mmdet3d.models.builder import MODELS
+
+
+def resolve(cfg):
+    if isinstance(cfg, dict):
+        if isinstance(cfg.get('type'), str):
+            for registry in (MODELS, DATASETS, PIPELINES):
+                registry.get(cfg['type'])
+        for value in cfg.values():
+            resolve(value)
+    elif isinstance(cfg, (list, tuple)):
+        for value in cfg:
+            resolve(value)
+
+
+cfg = Config.fromfile({config!r})
+resolve(cfg.model)
+resolve(cfg.data)
+'''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Report the import time of each module')
+    parser.add_argument(
+        'modules',
+        nargs='*',
+        default=['mmdet3d.datasets', 'mmdet3d.models'],
+        help='modules to import')
+    parser.add_argument(
+        '--config',
+        help='also import the modules defining the types used by a config')
+    parser.add_argument(
+        '--topk', type=int, default=30, help='number of modules to report')
+    parser.add_argument(
+        '--sort',
+        choices=['self', 'cumulative'],
+        default='cumulative',
+        help='sort the modules by their self or cumulative import time')
+    parser.add_argument(
+        '--prefix',
+        default=None,
+        help='only report the modules starting with this prefix, '
+        'e.g. "mmdet3d"')
+    parser.add_argument(
+        '--by-package',
+        action='store_true',
+        help='sum up the self import time of each top-level package')
+    args = parser.parse_args()
+    return args
+
+
+def profile_imports(modules, config=None):
+    """Import modules in a fresh interpreter with ``-X importtime``.
+
+    Args:
+        modules (list[str]): Modules to import.
+        config (str, optional): Config whose registry types are resolved
+            after the imports. Default: None.
+
+    Returns:
+        list[tuple]: ``(self_us, cumulative_us, depth, module)`` of every
+            imported module, in the order reported by the interpreter.
+    """
+    code = ''.join(f'import {module}\n' for module in modules)
+    if config is not None:
+        code += _RESOLVE_CONFIG.format(config=config)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'Failed to import {modules}:\n{proc.stderr}')
+    records = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORT_TIME_PATTERN.match(line)
+        if match is not None:
+            records.append((int(match.group(1)), int(match.group(2)),
+                            len(match.group(3)) // 2, match.group(4)))
+    return records
+
+
+def main():
+    args = parse_args()
+    records = profile_imports(args.modules, args.config)
+    total = sum(record[0] for record in records)
+    print(f'Imported {len(records)} modules in {total / 1e6:.3f} s')
+
+    if args.by_package:
+        package_times = defaultdict(int)
+        for self_us, _, _, module in records:
+            package_times[module.split('.')[0]] += self_us
+        rows = sorted(package_times.items(), key=lambda x: -x[1])
+        print(f'{"self (ms)":>10}  package')
+        for package, self_us in rows[:args.topk]:
+            print(f'{self_us / 1e3:>10.1f}  {package}')
+        return
+
+    if args.prefix is not None:
+        records = [r for r in records if r[3].startswith(args.prefix)]
+    key = 0 if args.sort == 'self' else 1
+    records = sorted(records, key=lambda r: -r[key])
+    print(f'{"self (ms)":>10} {"cumulative (ms)":>16}  module')
+    for self_us, cumulative_us, _, module in records[:args.topk]:
+        print(f'{self_us / 1e3:>10.1f} {cumulative_us / 1e3:>16.1f}  '
+              f'{module}')
+
+
+if __name__ == '__main__':
+    main()
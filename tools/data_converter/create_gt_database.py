@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import pickle
+from multiprocessing import Pool
 from os import path as osp
 
 import mmcv
@@ -11,6 +12,7 @@ from pycocotools.coco import COCO
 
 from mmdet3d.core.bbox import box_np_ops as box_np_ops
 from mmdet3d.datasets import build_dataset
+from mmdet3d.datasets.pipelines.patch_database import PatchChunkWriter
 from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
 from tools.data_converter import spa_nus_converter as spa_nus_converter
 
@@ -140,8 +142,9 @@ def create_groundtruth_database(dataset_class_name,
             Default: None.
         relative_path (bool, optional): Whether to use relative path.
             Default: True.
-        with_mask (bool, optional): Whether to use mask.
-            Default: False.
+        with_mask (bool, optional): Whether to use mask. The masked image
+            patches of objects are packed into ``img_patches_*.npy`` chunks
+            of the database. Default: False.
     """
     print(f'Create GT Database of {dataset_class_name}')
     dataset_cfg = dict(
@@ -292,6 +295,9 @@ def create_groundtruth_database(dataset_class_name,
     mmcv.mkdir_or_exist(database_save_path)
     all_db_infos = dict()
     if with_mask:
+        # image patches and masks are packed into chunks of decoded arrays
+        patch_writer = PatchChunkWriter(database_save_path,
+                                        f'{info_prefix}_gt_database')
         coco = COCO(osp.join(data_path, mask_anno_path))
         imgIds = coco.getImgIds()
         file2id = dict()
@@ -372,10 +378,6 @@ def create_groundtruth_database(dataset_class_name,
                 if object_masks[i].sum() == 0 or not valid_inds[i]:
                     # Skip object for empty or invalid mask
                     continue
-                img_patch_path = abs_filepath + '.png'
-                mask_patch_path = abs_filepath + '.mask.png'
-                mmcv.imwrite(object_img_patches[i], img_patch_path)
-                mmcv.imwrite(object_masks[i], mask_patch_path)
 
             with open(abs_filepath, 'w') as f:
                 gt_points.tofile(f)
@@ -400,11 +402,16 @@ def create_groundtruth_database(dataset_class_name,
                     db_info['score'] = annos['score'][i]
                 if with_mask:
                     db_info.update({'box2d_camera': gt_boxes[i]})
+                    db_info['img_patch'] = patch_writer.add(
+                        object_img_patches[i], object_masks[i])
                 if names[i] in all_db_infos:
                     all_db_infos[names[i]].append(db_info)
                 else:
                     all_db_infos[names[i]] = [db_info]
 
+    if with_mask:
+        patch_writer.flush()
+
     for k, v in all_db_infos.items():
         print(f'load {len(v)} {k} database infos')
 
@@ -433,8 +440,9 @@ class GTDatabaseCreater:
             Default: None.
         relative_path (bool, optional): Whether to use relative path.
             Default: True.
-        with_mask (bool, optional): Whether to use mask.
-            Default: False.
+        with_mask (bool, optional): Whether to use mask. The masked image
+            patches of objects are packed into ``img_patches_*.npy`` chunks
+            of the database. Default: False.
         num_worker (int, optional): the number of parallel workers to use.
             Default: 8.
     """
@@ -538,10 +546,6 @@ class GTDatabaseCreater:
                 if object_masks[i].sum() == 0 or not valid_inds[i]:
                     # Skip object for empty or invalid mask
                     continue
-                img_patch_path = abs_filepath + '.png'
-                mask_patch_path = abs_filepath + '.mask.png'
-                mmcv.imwrite(object_img_patches[i], img_patch_path)
-                mmcv.imwrite(object_masks[i], mask_patch_path)
 
             with open(abs_filepath, 'w') as f:
                 gt_points.tofile(f)
@@ -566,6 +570,9 @@ class GTDatabaseCreater:
                     db_info['score'] = annos['score'][i]
                 if self.with_mask:
                     db_info.update({'box2d_camera': gt_boxes[i]})
+                    # packed by the main process as soon as the sample is done
+                    db_info['img_patch'] = (object_img_patches[i],
+                                            object_masks[i])
                 if names[i] in single_db_infos:
                     single_db_infos[names[i]].append(db_info)
                 else:
@@ -672,23 +679,35 @@ class GTDatabaseCreater:
             dataset.pre_pipeline(input_dict)
             return input_dict
 
-        multi_db_infos = mmcv.track_parallel_progress(
-            self.create_single, ((loop_dataset(i)
-                                  for i in range(len(dataset))), len(dataset)),
-            self.num_worker)
-        print('Make global unique group id')
+        if self.with_mask:
+            patch_writer = PatchChunkWriter(self.database_save_path,
+                                            f'{self.info_prefix}_gt_database')
         group_counter_offset = 0
         all_db_infos = dict()
-        for single_db_infos in track_iter_progress(multi_db_infos):
-            group_id = -1
-            for name, name_db_infos in single_db_infos.items():
-                for db_info in name_db_infos:
-                    group_id = max(group_id, db_info['group_id'])
-                    db_info['group_id'] += group_counter_offset
-                if name not in all_db_infos:
-                    all_db_infos[name] = []
-                all_db_infos[name].extend(name_db_infos)
-            group_counter_offset += (group_id + 1)
+        prog_bar = mmcv.ProgressBar(len(dataset))
+        # the db infos are merged as soon as a sample is done, so that the
+        # image patches are packed instead of being kept for all the samples
+        with Pool(self.num_worker) as pool:
+            for single_db_infos in pool.imap(self.create_single,
+                                             (loop_dataset(i)
+                                              for i in range(len(dataset)))):
+                # make global unique group id
+                group_id = -1
+                for name, name_db_infos in single_db_infos.items():
+                    for db_info in name_db_infos:
+                        group_id = max(group_id, db_info['group_id'])
+                        db_info['group_id'] += group_counter_offset
+                        if self.with_mask:
+                            db_info['img_patch'] = patch_writer.add(
+                                *db_info['img_patch'])
+                    if name not in all_db_infos:
+                        all_db_infos[name] = []
+                    all_db_infos[name].extend(name_db_infos)
+                group_counter_offset += (group_id + 1)
+                prog_bar.update()
+        if self.with_mask:
+            patch_writer.flush()
+        print()
 
         for k, v in all_db_infos.items():
             print(f'load {len(v)} {k} database infos')
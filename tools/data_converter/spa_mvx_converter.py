@@ -1,12 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from collections import OrderedDict
+from functools import partial
 from pathlib import Path
 
 import mmcv
 import numpy as np
 from nuscenes.utils.geometry_utils import view_points
 
-from mmdet3d.core.bbox import box_np_ops_spa_mvx, points_cam2img
+from mmdet3d.core.bbox import (box_np_ops_spa, box_np_ops_spa_mvx,
+                               points_cam2img)
 from .spa_mvx_data_utils import WaymoInfoGatherer, get_spa_image_info
 from .nuscenes_converter import post_process_coords
 
@@ -322,12 +324,64 @@ def create_waymo_info_file(data_path,
     mmcv.dump(waymo_infos_test, filename)
 
 
+def _reduce_single_point_cloud(info,
+                               save_path=None,
+                               back=False,
+                               num_features=4):
+    """Remove the points outside the camera frustum of a single frame.
+
+    Args:
+        info (dict): Info of the frame.
+        save_path (str, optional): Path to save reduced point cloud
+            data. Default: None.
+        back (bool, optional): Whether to flip the points to back.
+            Default: False.
+        num_features (int, optional): Number of point features. Default: 4.
+    """
+    pc_info = info['point_cloud']
+    image_info = info['image']
+    calib = info['calib']
+
+    v_path = pc_info['velodyne_path']
+    # v_path = Path(data_path) / v_path
+    v_path = Path(v_path)
+    points_v = np.fromfile(
+        str(v_path), dtype=np.float32, count=-1).reshape([-1, num_features])
+    rect = calib['R0_rect']
+    cam_num = int(image_info['image_path'].split('/')[5]) - 1
+    P = calib['P{}'.format(cam_num)]
+
+    Trv2c = calib['Tr_velo_to_cam']
+    # first remove z < 0 points
+    # keep = points_v[:, -1] > 0
+    # points_v = points_v[keep]
+    # then remove outside.
+    if back:
+        points_v[:, 0] = -points_v[:, 0]
+
+    mask = box_np_ops_spa.points_in_frusta_mask(points_v, rect, Trv2c, [P],
+                                                [image_info['image_shape']])
+    points_v = points_v[mask]
+
+    if save_path is None:
+        save_dir = v_path.parent.parent / (v_path.parent.stem + '_reduced')
+        save_dir.mkdir(exist_ok=True)
+        save_filename = str(save_dir / v_path.name)
+    else:
+        save_filename = str(Path(save_path) / v_path.name)
+    if back:
+        save_filename += '_back'
+    with open(save_filename, 'w') as f:
+        points_v.tofile(f)
+
+
 def _create_reduced_point_cloud(data_path,
                                 info_path,
                                 save_path=None,
                                 back=False,
                                 num_features=4,
-                                front_camera_id=2):
+                                front_camera_id=2,
+                                num_worker=8):
     """Create reduced point clouds for given info.
 
     Args:
@@ -339,50 +393,21 @@ def _create_reduced_point_cloud(data_path,
             Default: False.
         num_features (int, optional): Number of point features. Default: 4.
         front_camera_id (int, optional): The referenced/front camera ID.
+            Unused since the camera is read from the image path.
             Default: 2.
+        num_worker (int, optional): Number of processes to reduce frames
+            in parallel. Default: 8.
     """
     spa_mvx_infos = mmcv.load(info_path)
-
-    for info in mmcv.track_iter_progress(spa_mvx_infos):
-        pc_info = info['point_cloud']
-        image_info = info['image']
-        calib = info['calib']
-
-        v_path = pc_info['velodyne_path']
-        # v_path = Path(data_path) / v_path
-        v_path = Path(v_path)
-        points_v = np.fromfile(
-            str(v_path), dtype=np.float32,
-            count=-1).reshape([-1, num_features])
-        rect = calib['R0_rect']
-        cam_num = int(image_info['image_path'].split("/")[5]) -1
-        P = calib['P{}'.format(cam_num)]
-
-        Trv2c = calib['Tr_velo_to_cam']
-        # first remove z < 0 points
-        # keep = points_v[:, -1] > 0
-        # points_v = points_v[keep]
-        # then remove outside.
-        if back:
-            points_v[:, 0] = -points_v[:, 0]
-        
-        points_v = box_np_ops_spa_mvx.remove_outside_points(points_v, rect, Trv2c, P, image_info['image_shape'])
-
-
-        if save_path is None:
-            save_dir = v_path.parent.parent / (v_path.parent.stem + '_reduced')
-            if not save_dir.exists():
-                save_dir.mkdir()
-            save_filename = save_dir / v_path.name
-            # save_filename = str(v_path) + '_reduced'
-            if back:
-                save_filename += '_back'
-        else:
-            save_filename = str(Path(save_path) / v_path.name)
-            if back:
-                save_filename += '_back'
-        with open(save_filename, 'w') as f:
-            points_v.tofile(f)
+    reduce_single = partial(
+        _reduce_single_point_cloud,
+        save_path=save_path,
+        back=back,
+        num_features=num_features)
+    if num_worker > 1:
+        mmcv.track_parallel_progress(reduce_single, spa_mvx_infos, num_worker)
+    else:
+        mmcv.track_progress(reduce_single, spa_mvx_infos)
 
 
 def create_reduced_point_cloud(data_path,
@@ -391,7 +416,8 @@ def create_reduced_point_cloud(data_path,
                                val_info_path=None,
                                test_info_path=None,
                                save_path=None,
-                               with_back=False):
+                               with_back=False,
+                               num_worker=8):
     """Create reduced point clouds for training/validation/testing.
 
     Args:
@@ -407,6 +433,8 @@ def create_reduced_point_cloud(data_path,
             Default: None.
         with_back (bool, optional): Whether to flip the points to back.
             Default: False.
+        num_worker (int, optional): Number of processes to reduce frames
+            in parallel. Default: 8.
     """
     if train_info_path is None:
         train_info_path = Path(data_path) / f'{pkl_prefix}_infos_train.pkl'
@@ -416,18 +444,33 @@ def create_reduced_point_cloud(data_path,
         test_info_path = Path(data_path) / f'{pkl_prefix}_infos_test.pkl'
 
     print('create reduced point cloud for training set')
-    _create_reduced_point_cloud(data_path, train_info_path, save_path)
+    _create_reduced_point_cloud(
+        data_path, train_info_path, save_path, num_worker=num_worker)
     print('create reduced point cloud for validation set')
-    _create_reduced_point_cloud(data_path, val_info_path, save_path)
+    _create_reduced_point_cloud(
+        data_path, val_info_path, save_path, num_worker=num_worker)
     print('create reduced point cloud for testing set')
-    _create_reduced_point_cloud(data_path, test_info_path, save_path)
+    _create_reduced_point_cloud(
+        data_path, test_info_path, save_path, num_worker=num_worker)
     if with_back:
         _create_reduced_point_cloud(
-            data_path, train_info_path, save_path, back=True)
+            data_path,
+            train_info_path,
+            save_path,
+            back=True,
+            num_worker=num_worker)
         _create_reduced_point_cloud(
-            data_path, val_info_path, save_path, back=True)
+            data_path,
+            val_info_path,
+            save_path,
+            back=True,
+            num_worker=num_worker)
         _create_reduced_point_cloud(
-            data_path, test_info_path, save_path, back=True)
+            data_path,
+            test_info_path,
+            save_path,
+            back=True,
+            num_worker=num_worker)
 
 
 def export_2d_annotation(root_path, info_path, mono3d=True):
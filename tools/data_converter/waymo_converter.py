@@ -11,7 +11,9 @@ except ImportError:
         'to install the official devkit first.')
 
 from glob import glob
-from os.path import join
+from os.path import exists, join
+from queue import Queue
+from threading import Thread
 
 import mmcv
 import numpy as np
@@ -34,6 +36,12 @@ class Waymo2KITTI(object):
             validation and 2 for testing.
         workers (int, optional): Number of workers for the parallel process.
         test_mode (bool, optional): Whether in the test_mode. Default: False.
+        queue_size (int, optional): Maximum number of frames buffered
+            between the tfrecord decoding, the point cloud conversion and the
+            file writing stages of a segment, which bounds the peak memory of
+            each worker. Default: 8.
+        resume (bool, optional): Whether to skip the segments that have
+            been fully converted by a previous run. Default: True.
     """
 
     def __init__(self,
@@ -41,7 +49,9 @@ class Waymo2KITTI(object):
                  save_dir,
                  prefix,
                  workers=64,
-                 test_mode=False):
+                 test_mode=False,
+                 queue_size=8,
+                 resume=True):
         self.filter_empty_3dboxes = True
         self.filter_no_label_zone_points = True
 
@@ -77,6 +87,11 @@ class Waymo2KITTI(object):
         self.prefix = prefix
         self.workers = int(workers)
         self.test_mode = test_mode
+        self.queue_size = int(queue_size)
+        self.resume = resume
+        # created per segment in `convert_one` so that the converter stays
+        # picklable for the worker processes
+        self._write_queue = None
 
         self.tfrecord_pathnames = sorted(
             glob(join(self.load_dir, '*.tfrecord')))
@@ -88,6 +103,7 @@ class Waymo2KITTI(object):
         self.point_cloud_save_dir = f'{self.save_dir}/velodyne'
         self.pose_save_dir = f'{self.save_dir}/pose'
         self.timestamp_save_dir = f'{self.save_dir}/timestamp'
+        self.done_save_dir = f'{self.save_dir}/.done'
 
         self.create_folder()
 
@@ -101,29 +117,113 @@ class Waymo2KITTI(object):
     def convert_one(self, file_idx):
         """Convert action for single file.
 
+        The segment is converted as a pipeline: tfrecord records are
+        prefetched and decoded by tensorflow, frames are converted in the
+        calling thread and the outputs are written by a background thread.
+        Both stages are connected by bounded queues, so the memory footprint
+        does not grow with the length of the segment.
+
         Args:
             file_idx (int): Index of the file to be converted.
         """
+        done_path = self.get_done_path(file_idx)
+        if self.resume and exists(done_path):
+            return
+
         pathname = self.tfrecord_pathnames[file_idx]
         dataset = tf.data.TFRecordDataset(pathname, compression_type='')
+        dataset = dataset.prefetch(self.queue_size)
+
+        self._write_queue = Queue(maxsize=self.queue_size)
+        write_errors = []
+        writer = Thread(
+            target=self._write_worker,
+            args=(self._write_queue, write_errors))
+        writer.start()
+        try:
+            for frame_idx, data in enumerate(dataset):
+
+                frame = dataset_pb2.Frame()
+                frame.ParseFromString(bytearray(data.numpy()))
+                if (self.selected_waymo_locations is not None
+                        and frame.context.stats.location
+                        not in self.selected_waymo_locations):
+                    continue
+
+                self.save_image(frame, file_idx, frame_idx)
+                self.save_calib(frame, file_idx, frame_idx)
+                self.save_lidar(frame, file_idx, frame_idx)
+                self.save_pose(frame, file_idx, frame_idx)
+                self.save_timestamp(frame, file_idx, frame_idx)
+
+                if not self.test_mode:
+                    self.save_label(frame, file_idx, frame_idx)
+        finally:
+            self._write_queue.put(None)
+            writer.join()
+            self._write_queue = None
+        if write_errors:
+            raise write_errors[0]
+
+        # only mark the segment as converted once all its files are written
+        with open(done_path, 'w') as f:
+            f.write(pathname)
+
+    def get_done_path(self, file_idx):
+        """Get the path of the marker written when a segment is converted.
 
-        for frame_idx, data in enumerate(dataset):
+        Args:
+            file_idx (int): Index of the file.
 
-            frame = dataset_pb2.Frame()
-            frame.ParseFromString(bytearray(data.numpy()))
-            if (self.selected_waymo_locations is not None
-                    and frame.context.stats.location
-                    not in self.selected_waymo_locations):
-                continue
+        Returns:
+            str: Path of the marker file.
+        """
+        return f'{self.done_save_dir}/{self.prefix}' + \
+            f'{str(file_idx).zfill(3)}.txt'
+
+    def write_file(self, path, data):
+        """Write the data to a file, asynchronously if a writer is running.
+
+        Args:
+            path (str): Path of the file.
+            data (bytes | str | np.ndarray): Content of the file. Arrays are
+                written as packed binary with `np.ndarray.tofile`.
+        """
+        if self._write_queue is not None:
+            self._write_queue.put((path, data))
+        else:
+            self._write(path, data)
+
+    @staticmethod
+    def _write(path, data):
+        if isinstance(data, np.ndarray):
+            data.tofile(path)
+        else:
+            mode = 'w' if isinstance(data, str) else 'wb'
+            with open(path, mode) as f:
+                f.write(data)
 
-            self.save_image(frame, file_idx, frame_idx)
-            self.save_calib(frame, file_idx, frame_idx)
-            self.save_lidar(frame, file_idx, frame_idx)
-            self.save_pose(frame, file_idx, frame_idx)
-            self.save_timestamp(frame, file_idx, frame_idx)
+    @staticmethod
+    def _write_worker(write_queue, errors):
+        """Write the queued files until a ``None`` sentinel is received.
 
-            if not self.test_mode:
-                self.save_label(frame, file_idx, frame_idx)
+        After a write fails, the queue is still drained so that the producer
+        never blocks on it, and the error is left to the producer to raise.
+
+        Args:
+            write_queue (:obj:`Queue`): Queue of (path, data) pairs.
+            errors (list): List the first write error is appended to.
+        """
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+            if errors:
+                continue
+            try:
+                Waymo2KITTI._write(*item)
+            except Exception as e:
+                errors.append(e)
 
     def __len__(self):
         """Length of the filename list."""
@@ -143,8 +243,7 @@ class Waymo2KITTI(object):
             img_path = f'{self.image_save_dir}{str(img.name - 1)}/' + \
                 f'{self.prefix}{str(file_idx).zfill(3)}' + \
                 f'{str(frame_idx).zfill(3)}.jpg'
-            with open(img_path, 'wb') as fp:
-                fp.write(img.image)
+            self.write_file(img_path, img.image)
 
     def save_calib(self, frame, file_idx, frame_idx):
         """Parse and save the calibration data.
@@ -195,12 +294,10 @@ class Waymo2KITTI(object):
             calib_context += 'Tr_velo_to_cam_' + str(i) + ': ' + \
                 ' '.join(Tr_velo_to_cams[i]) + '\n'
 
-        with open(
-                f'{self.calib_save_dir}/{self.prefix}' +
-                f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt',
-                'w+') as fp_calib:
-            fp_calib.write(calib_context)
-            fp_calib.close()
+        self.write_file(
+            f'{self.calib_save_dir}/{self.prefix}' +
+            f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt',
+            calib_context)
 
     def save_lidar(self, frame, file_idx, frame_idx):
         """Parse and save the lidar data in psd format.
@@ -254,7 +351,7 @@ class Waymo2KITTI(object):
 
         pc_path = f'{self.point_cloud_save_dir}/{self.prefix}' + \
             f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.bin'
-        point_cloud.astype(np.float32).tofile(pc_path)
+        self.write_file(pc_path, point_cloud.astype(np.float32))
 
     def save_label(self, frame, file_idx, frame_idx):
         """Parse and save the label data in txt format.
@@ -269,9 +366,10 @@ class Waymo2KITTI(object):
             file_idx (int): Current file index.
             frame_idx (int): Current frame index.
         """
-        fp_label_all = open(
-            f'{self.label_all_save_dir}/{self.prefix}' +
-            f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt', 'w+')
+        # lines are gathered per file and written once, so that converting
+        # a frame again (e.g. when resuming a segment) does not duplicate them
+        lines_all = []
+        lines_per_camera = dict()
         id_to_bbox = dict()
         id_to_name = dict()
         for labels in frame.projected_lidar_labels:
@@ -346,15 +444,18 @@ class Waymo2KITTI(object):
             else:
                 line_all = line[:-1] + ' ' + name + '\n'
 
-            fp_label = open(
-                f'{self.label_save_dir}{name}/{self.prefix}' +
-                f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt', 'a')
-            fp_label.write(line)
-            fp_label.close()
-
-            fp_label_all.write(line_all)
+            lines_per_camera.setdefault(name, []).append(line)
+            lines_all.append(line_all)
 
-        fp_label_all.close()
+        for name, lines in lines_per_camera.items():
+            self.write_file(
+                f'{self.label_save_dir}{name}/{self.prefix}' +
+                f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt',
+                ''.join(lines))
+        self.write_file(
+            f'{self.label_all_save_dir}/{self.prefix}' +
+            f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt',
+            ''.join(lines_all))
 
     def save_pose(self, frame, file_idx, frame_idx):
         """Parse and save the pose data.
@@ -389,11 +490,10 @@ class Waymo2KITTI(object):
             file_idx (int): Current file index.
             frame_idx (int): Current frame index.
         """
-        with open(
-                join(f'{self.timestamp_save_dir}/{self.prefix}' +
-                     f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt'),
-                'w') as f:
-            f.write(str(frame.timestamp_micros))
+        self.write_file(
+            join(f'{self.timestamp_save_dir}/{self.prefix}' +
+                 f'{str(file_idx).zfill(3)}{str(frame_idx).zfill(3)}.txt'),
+            str(frame.timestamp_micros))
 
     def create_folder(self):
         """Create folder for data preprocessing."""
@@ -410,6 +510,7 @@ class Waymo2KITTI(object):
                 self.pose_save_dir, self.timestamp_save_dir
             ]
             dir_list2 = [self.image_save_dir]
+        dir_list1.append(self.done_save_dir)
         for d in dir_list1:
             mmcv.mkdir_or_exist(d)
         for d in dir_list2:
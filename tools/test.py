@@ -12,10 +12,11 @@ from mmcv.runner import (get_dist_info, init_dist, load_checkpoint,
                          wrap_fp16_model)
 
 import mmdet
-from mmdet3d.apis import single_gpu_test
+from mmdet3d.apis import (AsyncResultFormatter, multi_gpu_test,
+                          single_gpu_test)
 from mmdet3d.datasets import build_dataloader, build_dataset
 from mmdet3d.models import build_model
-from mmdet.apis import multi_gpu_test, set_random_seed
+from mmdet.apis import set_random_seed
 from mmdet.datasets import replace_ImageToTensor
 
 if mmdet.__version__ > '2.23.0':
@@ -75,6 +76,30 @@ def parse_args():
         '--gpu-collect',
         action='store_true',
         help='whether to use gpu to collect results.')
+    parser.add_argument(
+        '--columnar-collect',
+        action='store_true',
+        help='whether to store the results in columns and collect them '
+        'through memory-mapped files, only for distributed testing without '
+        '"--gpu-collect"')
+    parser.add_argument(
+        '--stream-seg-eval',
+        action='store_true',
+        help='whether to compute the confusion matrices of semantic '
+        'segmentation results during testing instead of keeping all the '
+        'predicted masks, only for evaluation of segmentation datasets')
+    parser.add_argument(
+        '--async-format',
+        action='store_true',
+        help='whether to format the results in background processes during '
+        'testing instead of keeping all the raw results, "--out" then saves '
+        'the formatted results')
+    parser.add_argument(
+        '--format-nproc',
+        type=int,
+        default=4,
+        help='number of processes formatting the results with '
+        '"--async-format"')
     parser.add_argument(
         '--tmpdir',
         help='tmp directory used for collecting results from multiple '
@@ -139,6 +164,16 @@ def main():
     if args.eval and args.format_only:
         raise ValueError('--eval and --format_only cannot be both specified')
 
+    if args.stream_seg_eval and (args.format_only or args.show
+                                 or args.show_dir):
+        raise ValueError('--stream-seg-eval only keeps the confusion '
+                         'matrices, which cannot be formatted or shown')
+
+    if args.async_format and (args.format_only or args.show or args.show_dir
+                              or args.stream_seg_eval):
+        raise ValueError('--async-format only keeps the formatted results, '
+                         'which cannot be formatted again or shown')
+
     if args.out is not None and not args.out.endswith(('.pkl', '.pickle')):
         raise ValueError('The output file must be a pkl file.')
 
@@ -225,22 +260,40 @@ def main():
         # segmentation dataset has `PALETTE` attribute
         model.PALETTE = dataset.PALETTE
 
+    formatter = None
+    if args.async_format:
+        formatter = AsyncResultFormatter(
+            dataset, nproc=args.format_nproc, tmpdir=args.tmpdir)
+
     if not distributed:
         model = MMDataParallel(model, device_ids=cfg.gpu_ids)
-        outputs = single_gpu_test(model, data_loader, args.show, args.show_dir)
+        outputs = single_gpu_test(
+            model,
+            data_loader,
+            args.show,
+            args.show_dir,
+            stream_seg_eval=args.stream_seg_eval,
+            formatter=formatter)
     else:
         model = MMDistributedDataParallel(
             model.cuda(),
             device_ids=[torch.cuda.current_device()],
             broadcast_buffers=False)
-        outputs = multi_gpu_test(model, data_loader, args.tmpdir,
-                                 args.gpu_collect)
+        outputs = multi_gpu_test(
+            model,
+            data_loader,
+            args.tmpdir,
+            args.gpu_collect,
+            stream_seg_eval=args.stream_seg_eval,
+            formatter=formatter,
+            columnar=args.columnar_collect)
 
     rank, _ = get_dist_info()
     if rank == 0:
         if args.out:
             print(f'\nwriting results to {args.out}')
-            mmcv.dump(outputs, args.out)
+            # lazy columnar or spooled results are dumped as a plain list
+            mmcv.dump(list(outputs), args.out)
         kwargs = {} if args.eval_options is None else args.eval_options
         if args.format_only:
             dataset.format_results(outputs, **kwargs)
@@ -253,7 +306,13 @@ def main():
             ]:
                 eval_kwargs.pop(key, None)
             eval_kwargs.update(dict(metric=args.eval, **kwargs))
-            print(dataset.evaluate(outputs, **eval_kwargs))
+            if args.async_format:
+                # the formatted results cannot be shown
+                for key in ['show', 'out_dir', 'pipeline']:
+                    eval_kwargs.pop(key, None)
+                print(dataset.evaluate_formatted(outputs, **eval_kwargs))
+            else:
+                print(dataset.evaluate(outputs, **eval_kwargs))
 
 
 if __name__ == '__main__':